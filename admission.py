@@ -0,0 +1,251 @@
+"""
+Admission Control for Expensive Endpoints
+
+Requests are sorted into endpoint classes, and each class has two limits
+that are checked before the view runs:
+
+- a per-client token bucket (rate per second, burst): over it the client
+  gets 429 with Retry-After set to when its next token arrives
+- a per-worker concurrency bound: when every slot is taken the request
+  gets 503 with Retry-After at once instead of queueing behind the others
+
+Classes (RPS_LIMIT_<CLASS>="rate,burst,concurrency"; 0 turns a limit off):
+
+    play        /api/play                                  50,100,0
+    heavy       /api/play with a body over RPS_HEAVY_PAYLOAD_BYTES
+                (long histories)                           2,5,4
+    bulk        /api/play/batch                            1,5,4
+    autoplay    /api/autoplay (streams hold their slot
+                until they end)                            1,5,4
+    commentary  /api/openai-commentary(/stream)            0.5,5,8
+
+so ordinary rounds only ever meet a generous rate limit, while history
+rebuilds, batches, streams and commentary are shed once they would tie
+up the worker's threads. Auto-play streams have their own class so they
+never take the batch endpoint's slots; the web client plays them in
+short streams and backs off and retries on 429/503.
+
+Token buckets live in worker memory by default. Set
+RPS_LIMIT_BACKEND=redis://... to share them across workers and hosts
+(pip install redis); if Redis fails, requests are let through.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+DEFAULT_LIMITS = {
+    'play': (50.0, 100.0, 0),
+    'heavy': (2.0, 5.0, 4),
+    'bulk': (1.0, 5.0, 4),
+    'autoplay': (1.0, 5.0, 4),
+    'commentary': (0.5, 5.0, 8)
+}
+
+ENDPOINT_CLASSES = {
+    '/api/play': 'play',
+    '/api/play/batch': 'bulk',
+    '/api/autoplay': 'autoplay',
+    '/api/openai-commentary': 'commentary',
+    '/api/openai-commentary/stream': 'commentary'
+}
+
+
+class TokenBucket:
+    """
+    In-memory token buckets, one per client key.
+
+    Args:
+        rate: Tokens added per second
+        burst: Bucket capacity
+        max_clients: Buckets kept; the longest idle (which would be full
+                     again anyway) are dropped first
+        clock: Monotonic time source (injectable for tests)
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 100000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.clock = clock
+        self._buckets = OrderedDict()  # key -> [tokens, updated_at]
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str) -> float:
+        """Take a token; returns 0.0, or the seconds until one is available."""
+        with self._lock:
+            now = self.clock()
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now]
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / self.rate
+
+
+# Token bucket in one round trip; Redis' own clock keeps workers consistent.
+# Floats go through strings because Lua numbers returned to Redis are
+# truncated to integers.
+_REDIS_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens = tonumber(state[1]) or burst
+local at = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - at) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisTokenBucket:
+    """
+    Token buckets shared through a Redis-protocol server.
+
+    Args:
+        client: redis.Redis (or compatible) client with register_script
+        rate: Tokens added per second
+        burst: Bucket capacity
+        prefix: Key prefix
+    """
+
+    def __init__(self, client, rate: float, burst: float, prefix: str = 'rps:limit:'):
+        self.client = client
+        self.rate = rate
+        self.burst = burst
+        self.prefix = prefix
+        self._script = client.register_script(_REDIS_BUCKET)
+
+    def acquire(self, key: str) -> float:
+        return float(self._script(keys=[self.prefix + key], args=[self.rate, self.burst]))
+
+
+class LimitClass:
+    """
+    Limits of one endpoint class.
+
+    Args:
+        name: Class name (metric label)
+        limiter: TokenBucket/RedisTokenBucket, or None for no rate limit
+        max_concurrent: Requests in flight per worker, or 0 for no bound
+    """
+
+    def __init__(self, name: str, limiter=None, max_concurrent: int = 0):
+        self.name = name
+        self.limiter = limiter
+        self.max_concurrent = max_concurrent
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed = 0
+        self.backend_errors = 0
+
+    def admit(self, client: str) -> Optional[Tuple[int, float]]:
+        """
+        Admit a request (call release() when it finishes).
+
+        Returns:
+            None if admitted, else (status, retry_after_seconds)
+        """
+        if self.limiter is not None:
+            try:
+                wait = self.limiter.acquire(f'{self.name}:{client}')
+            except Exception:
+                # A shared backend outage must not take the app down with it
+                self.backend_errors += 1
+                wait = 0.0
+            if wait > 0:
+                self.rate_limited += 1
+                return 429, wait
+        if self._slots is not None and not self._slots.acquire(blocking=False):
+            self.shed += 1
+            return 503, 1.0
+        self.admitted += 1
+        return None
+
+    def release(self):
+        if self._slots is not None:
+            self._slots.release()
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            'max_concurrent': self.max_concurrent,
+            'admitted': self.admitted,
+            'rate_limited': self.rate_limited,
+            'shed': self.shed,
+            'backend_errors': self.backend_errors
+        }
+
+
+class AdmissionController:
+    """
+    Maps requests to their LimitClass.
+
+    Args:
+        classes: Class name -> LimitClass
+        heavy_payload_bytes: /api/play bodies larger than this count as 'heavy'
+    """
+
+    def __init__(self, classes: Dict[str, LimitClass], heavy_payload_bytes: int = 16384):
+        self.classes = classes
+        self.heavy_payload_bytes = heavy_payload_bytes
+
+    @classmethod
+    def from_env(cls, environ=os.environ) -> 'AdmissionController':
+        """Build the limits from RPS_LIMIT_* settings (see module docstring)."""
+        backend = environ.get('RPS_LIMIT_BACKEND')
+        client = None
+        if backend:
+            try:
+                import redis
+            except ImportError:
+                raise ImportError("RPS_LIMIT_BACKEND requires redis. Run: pip install redis")
+            client = redis.Redis.from_url(backend)
+
+        classes = {}
+        for name, default in DEFAULT_LIMITS.items():
+            setting = environ.get(f'RPS_LIMIT_{name.upper()}')
+            rate, burst, concurrency = (
+                [float(part) for part in setting.split(',')] if setting else default
+            )
+            limiter = None
+            if rate > 0:
+                if client is not None:
+                    limiter = RedisTokenBucket(client, rate, max(burst, 1))
+                else:
+                    limiter = TokenBucket(rate, max(burst, 1))
+            classes[name] = LimitClass(name, limiter, int(concurrency))
+        return cls(classes, int(environ.get('RPS_HEAVY_PAYLOAD_BYTES', 16384)))
+
+    def classify(self, rule: str, content_length: Optional[int]) -> Optional[LimitClass]:
+        """LimitClass for a request to the given URL rule, or None if unlimited."""
+        name = ENDPOINT_CLASSES.get(rule)
+        if name == 'play' and content_length and content_length > self.heavy_payload_bytes:
+            name = 'heavy'
+        return self.classes.get(name)
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        return {name: limit.metrics() for name, limit in self.classes.items()}
+
+
+# Process-wide limits used by app.py
+ADMISSION = AdmissionController.from_env()
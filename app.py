@@ -1,196 +1,184 @@
-from flask import Flask, render_template, jsonify, request
+# Startup profiling (RPS_PROFILE_STARTUP=1, see startup.py); comes first so
+# it can time the imports below
+from startup import STARTUP
+STARTUP.install()
+
+from flask import Flask, Response, abort, g, render_template, jsonify, request, stream_with_context
 from flask_cors import CORS
 import random
-from collections import Counter
 import os
 import json
+import math
+import time
+
+from engine import (
+    MOVES, PAPER, PLAYER, COMPUTER, LookupTable, PlayerModel, counter,
+    SessionStore, decode_move, determine_winner, exact_distribution, get_counter_move,
+    make_rng, thread_rng, open_backend, AUTO_PLAYER_STRATEGIES, auto_player_move
+)
+
+# OpenAI commentary (OPENAI_AVAILABLE is False without the openai library)
+from commentary import (
+    COMMENTARY_CACHE, COMMENTARY_MODEL, COMMENTARY_POOL, OPENAI_AVAILABLE, OPENAI_GATEWAY,
+    CircuitOpen, CommentaryBusy, CommentaryStream, CommentaryTimeout, build_prompt, commentary_key,
+    generate_commentary, preload_openai
+)
+
+# Prometheus metrics (GET /metrics)
+from metrics import (
+    ADMISSION_REJECTED, DECIDE_SECONDS, HISTORY_ROUNDS, PLAY_SECONDS, REGISTRY, REQUEST_BYTES,
+    REQUEST_SECONDS, REQUESTS
+)
+
+# Rate limits and concurrency bounds per endpoint class
+from admission import ADMISSION
 
-# OpenAI import (will work if openai library is installed)
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
+# Fingerprinted, precompressed static files
+from assets import AssetManifest
 
-app = Flask(__name__)
-CORS(app)
+with STARTUP.step('flask app'):
+    app = Flask(__name__)
+    CORS(app)
+
+# Templates link static files with asset_url('script.js'), which points at
+# /assets/script.<content hash>.js, cacheable for a year (see assets.py)
+with STARTUP.step('asset manifest'):
+    ASSETS = AssetManifest(app.static_folder)
+app.add_template_global(ASSETS.url, 'asset_url')
 
 # ============================================================
-# ARCHITECTURE NOTE: Stateless Design
+# ARCHITECTURE NOTE: Server-Side Sessions
 # ============================================================
-# This application uses a stateless architecture where the entire game
-# history is passed in each /api/play request body from the client.
+# Each player's PlayerModel lives in SESSIONS (engine/sessions.py), keyed
+# by a session_id returned from the first /api/play call. Later requests
+# carry only the session id and the new choice, so payload size and parse
+# cost stay constant however long the game runs, and the AI sees the
+# whole game rather than the last few rounds.
 #
-# PROS:
-# - Highly scalable - no server-side state management needed
-# - No database or session storage required
-# - Simple deployment and horizontal scaling
-# - No session expiration issues
+# Memory is bounded: at most RPS_MAX_SESSIONS sessions are kept (least
+# recently used evicted first) and sessions idle for RPS_SESSION_TTL
+# seconds expire. An expired or unknown session id simply starts a new
+# session; the AI relearns the player from scratch.
 #
-# CONS:
-# - Requires client to manage and send entire game history with each request
-# - Network payload grows with each round (could be inefficient for very long games)
-# - Client-side state can be manipulated (though this is not a security concern for this app)
+# With several gunicorn workers, set RPS_SESSION_BACKEND to share sessions
+# between them (SQLite in WAL mode for one host, Redis for several).
+# Workers then write compact binary snapshots in batches and any worker
+# can serve a player's next round; sessions also survive worker restarts.
 #
-# FUTURE ENHANCEMENT SUGGESTION:
-# For production apps with long-running games or thousands of rounds, consider:
-# 1. Server-side session management using Flask's session object with a secret key
-# 2. In-memory store (dict mapping session_id -> history) for quick lookups
-# 3. Database persistence (Redis, PostgreSQL) for multi-server deployments
-# 4. Only pass session_id in API calls, retrieve history server-side
+# Clients opt in by sending a session_id key (null on the first round).
+# Requests without one keep the original stateless behaviour: the model is
+# rebuilt from the 'history' sent (empty if none) and no session is stored,
+# so legacy clients cost no memory, TTL churn or backend writes.
 #
-# Example implementation approach:
-#   from flask import session
-#   app.secret_key = 'your-secret-key-here'
-#   
-#   # Store history in session
-#   session['game_history'] = history
-#   
-#   # Or use in-memory dict
-#   game_sessions = {}  # session_id -> history
-#   session_id = request.json.get('session_id')
-#   history = game_sessions.get(session_id, [])
+# GET /api/sessions/metrics reports occupancy, hit rate and evictions.
 # ============================================================
 
-CHOICES = ['rock', 'paper', 'scissors']
+# Move/result encoding and the winner/counter rules live in engine/moves.py.
+# The AI functions below work on integer move codes and only convert to
+# strings when they return.
+CHOICES = list(MOVES)
 
-def determine_winner(player_choice, computer_choice):
-    """Determine the winner of the game."""
-    if player_choice == computer_choice:
-        return 'tie'
-    
-    winning_combinations = {
-        'rock': 'scissors',
-        'paper': 'rock',
-        'scissors': 'paper'
-    }
+# Root seed for per-session RNG streams, for tests and simulations only.
+# With RPS_SEED set, every round of a session is replayable from (seed,
+# session_id, round number), so anyone who knows the seed can predict the
+# AI. Without it, rounds draw from a per-thread generator seeded from OS
+# entropy (engine/rng.py thread_rng), so threads never share RNG state.
+RNG_SEED = os.environ.get('RPS_SEED')
+
+if RNG_SEED is not None:
+    app.logger.warning('RPS_SEED is set: AI moves are predictable; use it for tests only')
+
+def session_rng(session_id, round_number, *stream):
+    """
+    Random stream for one round of one session (see engine/rng.py).
+    Extra stream ids select independent streams for other actors.
+    """
+    if RNG_SEED is None:
+        return thread_rng()
+    return make_rng(RNG_SEED, session_id, round_number, *stream)
+
+def history_rng():
+    """
+    Random stream for a stateless round.
     
-    if winning_combinations[player_choice] == computer_choice:
-        return 'player'
-    else:
-        return 'computer'
+    Never derived from RPS_SEED: a stateless round is not recorded, so a
+    seeded stream picked by the history would let a client resend the same
+    history to see the AI's move before choosing its own.
+    """
+    return thread_rng()
 
-def get_counter_move(predicted_move):
-    """Get the move that beats the predicted move."""
-    counter_moves = {
-        'rock': 'paper',
-        'paper': 'scissors',
-        'scissors': 'rock'
-    }
-    return counter_moves[predicted_move]
+SESSION_TTL = float(os.environ.get('RPS_SESSION_TTL', 1800))
+
+# Optional storage shared by all workers, e.g. sqlite:///data/sessions.db or
+# redis://localhost:6379/0 (see engine/persistence.py)
+with STARTUP.step('session store'):
+    SESSIONS = SessionStore(
+        max_sessions=int(os.environ.get('RPS_MAX_SESSIONS', 10000)),
+        ttl=SESSION_TTL,
+        backend=open_backend(os.environ.get('RPS_SESSION_BACKEND'), SESSION_TTL)
+    )
 
 # ============================================================
 # HELPER FUNCTIONS FOR CODE REUSABILITY
 # ============================================================
-# These functions reduce duplication between ai_hard and ai_very_hard
+# These functions reduce duplication between ai_hard and ai_very_hard.
+# They accept either a history list or a PlayerModel (engine/player_model.py),
+# which is what the AI functions read from directly.
+
+def _as_model(history):
+    """Return history itself if it is already a PlayerModel, else build one."""
+    if isinstance(history, PlayerModel):
+        return history
+    return PlayerModel.from_history(history or [])
+
+def _decode_optional(move):
+    """Decode a move code, passing None through."""
+    return decode_move(move) if move is not None else None
 
 def analyze_frequency(history, window_size=12):
     """
     Analyze frequency bias in player choices.
     
     Args:
-        history: List of game dictionaries
+        history: List of game dictionaries, or a PlayerModel
         window_size: Number of recent games to analyze
     
     Returns:
         tuple: (most_common_move, frequency, total_moves)
         or (None, 0, 0) if insufficient data
     """
-    if not history or len(history) < 3:
-        return None, 0, 0
-    
-    recent_choices = [game['player'] for game in history[-window_size:]]
-    if not recent_choices:
-        return None, 0, 0
-    
-    choice_counts = Counter(recent_choices)
-    most_common_move, count = choice_counts.most_common(1)[0]
-    frequency = count / len(recent_choices)
-    
-    return most_common_move, frequency, len(recent_choices)
+    most_common_move, frequency, total_moves = _as_model(history).frequency(window_size)
+    return _decode_optional(most_common_move), frequency, total_moves
 
 def check_win_stay_pattern(history, window_size=8):
     """
     Detect if player exhibits win-stay behavior.
     
     Args:
-        history: List of game dictionaries
+        history: List of game dictionaries, or a PlayerModel
         window_size: Number of recent games to analyze
     
     Returns:
         tuple: (win_stay_rate, win_opportunities, last_move)
         or (0, 0, None) if insufficient data or no win opportunities
     """
-    if not history or len(history) < 2:
-        return 0, 0, None
-    
-    last_game = history[-1]
-    
-    # Only relevant if player won last game
-    if last_game['result'] != 'player':
-        return 0, 0, None
-    
-    win_stay_count = 0
-    win_opportunities = 0
-    
-    # Analyze win-stay pattern in recent history
-    for i in range(max(0, len(history) - window_size), len(history) - 1):
-        if history[i]['result'] == 'player':
-            win_opportunities += 1
-            if i + 1 < len(history) and history[i]['player'] == history[i + 1]['player']:
-                win_stay_count += 1
-    
-    if win_opportunities == 0:
-        return 0, 0, None
-    
-    win_stay_rate = win_stay_count / win_opportunities
-    return win_stay_rate, win_opportunities, last_game['player']
+    win_stay_rate, win_opportunities, last_move = _as_model(history).win_stay(window_size)
+    return win_stay_rate, win_opportunities, _decode_optional(last_move)
 
 def check_lose_shift_pattern(history, window_size=8):
     """
     Detect if player exhibits lose-shift behavior.
     
     Args:
-        history: List of game dictionaries
+        history: List of game dictionaries, or a PlayerModel
         window_size: Number of recent games to analyze
     
     Returns:
         tuple: (lose_shift_rate, lose_opportunities, predicted_next_move)
         or (0, 0, None) if insufficient data or no lose opportunities
     """
-    if not history or len(history) < 2:
-        return 0, 0, None
-    
-    last_game = history[-1]
-    
-    # Only relevant if player lost last game
-    if last_game['result'] != 'computer':
-        return 0, 0, None
-    
-    lose_shift_count = 0
-    lose_opportunities = 0
-    
-    # Analyze lose-shift pattern in recent history
-    for i in range(max(0, len(history) - window_size), len(history) - 1):
-        if history[i]['result'] == 'computer':
-            lose_opportunities += 1
-            if i + 1 < len(history) and history[i]['player'] != history[i + 1]['player']:
-                lose_shift_count += 1
-    
-    if lose_opportunities == 0:
-        return 0, 0, None
-    
-    lose_shift_rate = lose_shift_count / lose_opportunities
-    
-    # Predict sequential shift
-    sequence_shift = {
-        'rock': 'paper',
-        'paper': 'scissors',
-        'scissors': 'rock'
-    }
-    predicted_next = sequence_shift[last_game['player']]
-    
-    return lose_shift_rate, lose_opportunities, predicted_next
+    lose_shift_rate, lose_opportunities, predicted_next = _as_model(history).lose_shift(window_size)
+    return lose_shift_rate, lose_opportunities, _decode_optional(predicted_next)
 
 # ============================================================
 # END HELPER FUNCTIONS
@@ -243,6 +231,13 @@ class OptimizedParams:
     markov_moderate_base_confidence = 0.704
     markov_moderate_scaling = 0.120
     
+    # Context Tree Prediction (hand-set; not part of the optimization run yet)
+    context_min_rounds = 10
+    context_min_count = 4
+    context_threshold = 0.60
+    context_base_confidence = 0.780
+    context_scaling = 0.400
+    
     # Opponent Modeling
     predictable_threshold = 0.298
     predictable_confidence = 0.912
@@ -272,231 +267,291 @@ OPTIMIZED = OptimizedParams()
 # END OPTIMIZED HYPERPARAMETERS
 # ============================================================
 
-def ai_easy():
+def ai_easy(rng=random):
     """Easy AI: Random choice."""
-    return random.choice(CHOICES)
+    return rng.choice(CHOICES)
 
-def ai_medium(history):
-    """
-    Medium AI: Combines frequency analysis with basic psychological patterns.
-    Merges the best of old Medium and old Hard difficulties.
-    """
-    if not history or len(history) < 3:
-        return random.choice(CHOICES)
+def _medium_move(model, rng=random):
+    """ai_medium's decision as a move code."""
+    if model.rounds < 3:
+        return rng.randrange(3)
     
     # Analyze player's most common choice (from old Medium)
-    player_choices = [game['player'] for game in history]
-    most_common = Counter(player_choices).most_common(1)[0][0]
+    most_common = model.most_common()[0]
     
     # If we have enough history, add psychological patterns (from old Hard)
-    if len(history) >= 5:
-        last_game = history[-1]
-        
+    if model.rounds >= 5:
         # Check if player tends to repeat after winning
-        if last_game['result'] == 'player':
-            if random.random() < 0.65:  # 65% confidence
-                return get_counter_move(last_game['player'])
+        if model.last_result == PLAYER:
+            if rng.random() < 0.65:  # 65% confidence
+                return counter(model.last_move)
         
         # Check if player tends to switch after losing
-        if last_game['result'] == 'computer':
-            what_would_have_won = get_counter_move(last_game['computer'])
-            if random.random() < 0.65:  # 65% confidence
-                return get_counter_move(what_would_have_won)
+        if model.last_result == COMPUTER:
+            what_would_have_won = counter(model.last_computer_move)
+            if rng.random() < 0.65:  # 65% confidence
+                return counter(what_would_have_won)
         
         # Analyze recent pattern with weighted frequency
-        recent_choices = [game['player'] for game in history[-5:]]
-        recent_counter = Counter(recent_choices)
-        if recent_counter:
-            weighted_choice = recent_counter.most_common(1)[0][0]
-            if random.random() < 0.75:
-                return get_counter_move(weighted_choice)
+        weighted_choice = model.most_common(5)[0]
+        if rng.random() < 0.75:
+            return counter(weighted_choice)
     
     # Fallback: Counter the most common choice with 70% probability
-    if random.random() < 0.70:
-        return get_counter_move(most_common)
+    if rng.random() < 0.70:
+        return counter(most_common)
     else:
-        return random.choice(CHOICES)
+        return rng.randrange(3)
 
-def ai_hard(history):
+def ai_medium(history, model=None, rng=random):
     """
-    Hard AI: Master-level play using tiered strategy prioritization.
-    (Formerly Very Hard - optimized tiered detection system)
+    Medium AI: Combines frequency analysis with basic psychological patterns.
+    Merges the best of old Medium and old Hard difficulties.
     
-    Key features:
-    - Prioritizes frequency detection (catches "always X" strategies)
-    - Psychological pattern detection (win-stay, lose-shift)
-    - Cycle detection
-    - Anti-triple pattern recognition
+    Pass a PlayerModel kept up to date by the caller to avoid rebuilding
+    it from history on every call, and an rng stream (engine/rng.py) for
+    reproducible play.
     """
-    if not history or len(history) < 5:
-        if len(history) < 2:
-            return 'paper'  # Counter most common opening (rock)
-        return ai_medium(history)
-    
-    last_game = history[-1]
+    if model is None:
+        model = PlayerModel.from_history(history or [])
+    return decode_move(_medium_move(model, rng))
+
+def _pick_tier(candidates, rng=random):
+    """
+    Pick one of the applicable tiers as the old retry-until-fired loop would.
+
+    Re-running the tiers until one fires selects tier i with probability
+    rate_i * (1 - rate_0) * ... * (1 - rate_i-1), normalized by the chance
+    that any tier fires, so a single draw from those weights gives the
+    same move distribution with bounded cost.
+
+    Args:
+        candidates: List of (move_code, rate) in tier priority order
+    """
+    if not candidates:
+        return rng.randrange(3)
+
+    weights = []
+    miss = 1.0
+    for _, rate in candidates:
+        weights.append(rate * miss)
+        miss *= 1 - rate
+
+    # Compare one draw against cumulative shares so LookupTable can
+    # enumerate the outcome exactly
+    total = sum(weights)
+    cumulative = 0.0
+    draw = rng.random()
+    for (move, _), weight in zip(candidates, weights):
+        cumulative += weight
+        if draw < cumulative / total:
+            return move
+    return candidates[-1][0]
+
+def _hard_tiers(model):
+    """
+    Tiers of ai_hard that apply from round 5 on, as (move, rate) pairs.
+
+    Every tier is evaluated exactly once; _pick_tier then chooses among them.
+    """
+    candidates = []  # (move, rate) in tier priority order
     
     # TIER 1: Exploit Strong Frequency Bias (HIGHEST PRIORITY)
     # This catches "always X" and heavily biased strategies
     # Target: Beat Medium's 78% performance
-    if len(history) >= 8:
-        most_common_move, frequency, _ = analyze_frequency(history, window_size=12)
+    if model.rounds >= 8:
+        most_common_move, frequency, _ = model.frequency(window_size=12)
         
-        if most_common_move:
+        if most_common_move is not None:
             # Strong bias (55%+) - exploit aggressively
             if frequency >= 0.55:
-                if random.random() < 0.87:  # 87% exploitation rate
-                    return get_counter_move(most_common_move)
+                candidates.append((counter(most_common_move), 0.87))  # 87% exploitation rate
             
             # Moderate bias (45%+) - still exploit firmly
             elif frequency >= 0.45:
-                if random.random() < 0.76:  # 76% exploitation rate
-                    return get_counter_move(most_common_move)
+                candidates.append((counter(most_common_move), 0.76))  # 76% exploitation rate
     
     # TIER 2: Win-Stay Pattern Detection (HIGH PRIORITY)
     # Check if player has shown win-stay tendency
-    if len(history) >= 4:
-        win_stay_rate, win_opportunities, last_move = check_win_stay_pattern(history, window_size=8)
+    if model.rounds >= 4:
+        win_stay_rate, win_opportunities, last_move = model.win_stay(window_size=8)
         
         # If they've shown win-stay pattern at least 40% of the time
         if win_opportunities > 0 and win_stay_rate >= 0.4:
-            if random.random() < 0.73:  # 73% confidence
-                return get_counter_move(last_move)
+            candidates.append((counter(last_move), 0.73))  # 73% confidence
     
     # TIER 3: Anti-Triple Detection (MEDIUM-HIGH PRIORITY)
     # Most humans avoid playing the same move 3 times in a row
-    if len(history) >= 2:
-        last_two = [history[-2]['player'], history[-1]['player']]
+    if model.rounds >= 2:
+        last_two = model.recent_moves(2)
         if last_two[0] == last_two[1]:
             repeated_move = last_two[0]
             
             # They played same move twice
             # Predict they'll switch to what beats the repeated move
-            likely_next = get_counter_move(repeated_move)
+            likely_next = counter(repeated_move)
             
-            if random.random() < 0.69:  # 69% confidence
-                return get_counter_move(likely_next)
+            candidates.append((counter(likely_next), 0.69))  # 69% confidence
     
     # TIER 4: Lose-Shift Pattern Detection (MEDIUM PRIORITY)
-    if len(history) >= 4:
-        lose_shift_rate, lose_opportunities, predicted_next = check_lose_shift_pattern(history, window_size=8)
+    if model.rounds >= 4:
+        lose_shift_rate, lose_opportunities, predicted_next = model.lose_shift(window_size=8)
         
         # If they shift after losing at least 50% of the time
         if lose_opportunities > 0 and lose_shift_rate >= 0.5:
-            if random.random() < 0.66:  # 66% confidence
-                return get_counter_move(predicted_next)
+            candidates.append((counter(predicted_next), 0.66))  # 66% confidence
     
     # TIER 5: Cycle Detection (MEDIUM PRIORITY)
-    if len(history) >= 4:
-        recent_choices = [game['player'] for game in history[-4:]]
+    if model.rounds >= 4:
+        last_three = model.recent_moves(3)
         
         # Check for rock->paper->scissors or similar cycle
-        if len(set(recent_choices[-3:])) == 3:  # All different in last 3
-            # They might be cycling
-            cycle_patterns = {
-                ('rock', 'paper', 'scissors'): 'rock',
-                ('rock', 'scissors', 'paper'): 'rock',
-                ('paper', 'scissors', 'rock'): 'paper',
-                ('paper', 'rock', 'scissors'): 'paper',
-                ('scissors', 'rock', 'paper'): 'scissors',
-                ('scissors', 'paper', 'rock'): 'scissors',
-            }
-            
-            last_three = tuple(recent_choices[-3:])
-            predicted = cycle_patterns.get(last_three)
+        if len(set(last_three)) == 3:  # All different in last 3
+            # They might be cycling: every all-different triple predicts
+            # a return to its first move
+            predicted = last_three[0]
             
-            if predicted and random.random() < 0.62:  # 62% confidence
-                return get_counter_move(predicted)
+            candidates.append((counter(predicted), 0.62))  # 62% confidence
     
     # TIER 6: General Frequency Counter (LOW PRIORITY)
     # Fallback frequency analysis with lower threshold
-    if len(history) >= 5:
-        recent_choices = [game['player'] for game in history[-10:]]
-        choice_counts = Counter(recent_choices)
-        most_common = choice_counts.most_common(1)[0][0]
+    if model.rounds >= 5:
+        most_common = model.most_common(10)[0]
         
-        if random.random() < 0.58:  # 58% confidence
-            return get_counter_move(most_common)
+        candidates.append((counter(most_common), 0.58))  # 58% confidence
     
-    # Final Fallback: Use hard AI logic
-    return ai_hard(history)
+    return candidates
 
-def ai_very_hard(history):
+def _hard_move(model, rng=random):
+    """ai_hard's decision as a move code."""
+    if model.rounds < 5:
+        if model.rounds < 2:
+            return PAPER  # Counter most common opening (rock)
+        return _medium_move(model, rng)
+    
+    # Pick among the applicable tiers with one draw (this used to retry the
+    # whole tier list recursively until a tier fired)
+    return _pick_tier(_hard_tiers(model), rng)
+
+def ai_hard(history, model=None, rng=random):
     """
-    Very Hard AI: Expert-level play using advanced machine learning techniques.
+    Hard AI: Master-level play using tiered strategy prioritization.
+    (Formerly Very Hard - optimized tiered detection system)
     
-    Core capabilities:
-    - 2nd-order Markov chain for transition probability prediction
-    - Opponent profiling (randomness level, pattern complexity, adaptation speed)
-    - Level-k reasoning to counter players trying to outsmart the AI
-    - Ensemble prediction with weighted confidence voting
-    - Dynamic exploitation rates based on pattern strength
+    Key features:
+    - Prioritizes frequency detection (catches "always X" strategies)
+    - Psychological pattern detection (win-stay, lose-shift)
+    - Cycle detection
+    - Anti-triple pattern recognition
+    """
+    if model is None:
+        model = PlayerModel.from_history(history or [])
+    return decode_move(_hard_move(model, rng))
+
+# ============================================================
+# PRECOMPILED LOOKUP TABLES
+# ============================================================
+# ai_medium and ai_hard only read a handful of features of the game, so
+# each combination of those features maps to a fixed distribution over
+# moves. The tables are keyed on the features themselves (read in O(1)
+# from the PlayerModel's running aggregates) and compile each distribution
+# from the reference functions above on first sight.
+#
+# They serve the exact distributions below (simulations, analytics), not
+# live play: building a key evaluates every feature the decision reads,
+# so a lookup costs as much as calling _medium_move / _hard_move, which
+# the ai_* functions do directly.
+
+def _medium_key(model):
+    """Everything _medium_move reads, as a hashable key."""
+    if model.rounds < 3:
+        return None
+    return (model.rounds >= 5, model.most_common()[0], model.last_move,
+            model.last_computer_move, model.last_result, model.most_common(5)[0])
+
+def _hard_key(model):
+    """
+    Everything _hard_move reads, as a hashable key.
+    
+    From round 5 on, that is the tier list itself: which tiers fire
+    (frequency bias, win-stay, anti-triple, lose-shift, cycle, general
+    frequency) and the move each one predicts. There are only a few
+    thousand such lists however the game went, so the table stays small
+    and nearly every round is a hit. Before round 5 Hard plays paper or
+    defers to Medium, whose key covers the rest.
+    """
+    if model.rounds < 5:
+        return model.rounds < 2, _medium_key(model)
+    return tuple(_hard_tiers(model))
+
+def _compile_hard(model):
+    """
+    Distribution of _hard_move for one model.
     
-    Expected performance:
-    - Random: ~33% (maintains fairness)
-    - Always Rock: 96-99% win rate
-    - Cycles: 88-92% win rate
-    - Win-Stay-Lose-Shift: 80-85% win rate
-    - Anti-AI: 65-75% win rate
+    From round 5 on only _pick_tier's draw over the tier list is
+    enumerated; the tiers are not evaluated again for every path.
+    """
+    if model.rounds < 5:
+        return exact_distribution(_hard_move, model)
+    candidates = _hard_tiers(model)
+    return exact_distribution(lambda _, rng: _pick_tier(candidates, rng), None)
+
+MEDIUM_TABLE = LookupTable(_medium_move, _medium_key)
+HARD_TABLE = LookupTable(_hard_move, _hard_key, compiler=_compile_hard)
+
+def _very_hard_predictions(model):
     """
-    if not history or len(history) < 5:
-        if len(history) < 2:
-            return 'paper'  # Counter most common opening (rock)
-        return ai_hard(history)
+    Ensemble votes of ai_very_hard for the current round.
     
+    Returns (move, confidence, source) tuples in predictor order; move is
+    None for votes on a uniformly random move (drawn by _ensemble_move).
+    """
     # Initialize prediction ensemble
-    predictions = []  # List of (move, confidence) tuples
-    
-    last_game = history[-1]
-    player_choices = [game['player'] for game in history]
+    predictions = []  # List of (move, confidence, source) tuples
     
     # ============================================================
-    # FEATURE 1: MARKOV CHAIN PREDICTION (2nd Order)
+    # FEATURE 1: MARKOV CHAIN PREDICTION (1st Order)
     # ============================================================
     # Track: After playing X, player chooses Y with probability P
-    if len(history) >= 10:
-        # Build transition matrix
-        transitions = {}
-        for i in range(len(history) - 1):
-            current = history[i]['player']
-            next_move = history[i + 1]['player']
-            
-            if current not in transitions:
-                transitions[current] = []
-            transitions[current].append(next_move)
-        
-        # Get prediction based on last move
-        if last_game['player'] in transitions:
-            transition_counts = Counter(transitions[last_game['player']])
-            total = len(transitions[last_game['player']])
-            
-            # Find most likely next move
-            most_likely, count = transition_counts.most_common(1)[0]
-            probability = count / total
-            
+    # (transition counts are maintained incrementally by the model)
+    if model.rounds >= 10:
+        most_likely, probability = model.markov_prediction()
+        
+        if most_likely is not None:
             # High confidence if probability is strong (optimized thresholds)
             if probability >= OPTIMIZED.markov_strong_threshold:
                 confidence = OPTIMIZED.markov_strong_base_confidence + \
                            (probability - OPTIMIZED.markov_strong_threshold) * OPTIMIZED.markov_strong_scaling
-                predictions.append((get_counter_move(most_likely), confidence, 'markov'))
+                predictions.append((counter(most_likely), confidence, 'markov'))
             elif probability >= OPTIMIZED.markov_moderate_threshold:
                 confidence = OPTIMIZED.markov_moderate_base_confidence + \
                            (probability - OPTIMIZED.markov_moderate_threshold) * OPTIMIZED.markov_moderate_scaling
-                predictions.append((get_counter_move(most_likely), confidence, 'markov'))
+                predictions.append((counter(most_likely), confidence, 'markov'))
+    
+    # ============================================================
+    # FEATURE 1b: CONTEXT TREE PREDICTION (Variable Order)
+    # ============================================================
+    # Longest recent run of (move, result) rounds seen often enough;
+    # the suffix trie is maintained incrementally by the model
+    if model.rounds >= OPTIMIZED.context_min_rounds:
+        predicted, probability, _ = model.context.predict(OPTIMIZED.context_min_count)
+        
+        if predicted is not None and probability >= OPTIMIZED.context_threshold:
+            confidence = OPTIMIZED.context_base_confidence + \
+                       (probability - OPTIMIZED.context_threshold) * OPTIMIZED.context_scaling
+            predictions.append((counter(predicted), confidence, 'context_tree'))
     
     # ============================================================
     # FEATURE 2: OPPONENT MODELING
     # ============================================================
     # Build a profile of the opponent's playing style
-    if len(history) >= 15:
-        # Calculate randomness score (entropy)
-        choice_counts = Counter(player_choices[-20:])
-        total_recent = len(player_choices[-20:])
-        
-        # Calculate distribution uniformity (0 = predictable, 1 = random)
-        probabilities = [count / total_recent for count in choice_counts.values()]
-        entropy = -sum(p * (p if p == 0 else p * 0.01) for p in probabilities)
+    if model.rounds >= 15:
+        # Calculate randomness score
+        choice_counts = model.window_counts(20)
+        total_recent = sum(choice_counts.values())
         
         # Simple randomness estimate based on distribution
+        # (0 = predictable, 1 = random)
         if len(choice_counts) == 1:
             randomness_score = 0.0  # Always same move
         elif len(choice_counts) == 2:
@@ -513,194 +568,745 @@ def ai_very_hard(history):
         # Adapt strategy based on opponent profile (optimized thresholds)
         if randomness_score < OPTIMIZED.predictable_threshold:
             # Highly predictable opponent - exploit aggressively
-            most_common = Counter(player_choices[-15:]).most_common(1)[0][0]
-            predictions.append((get_counter_move(most_common), OPTIMIZED.predictable_confidence, 'exploit_predictable'))
+            most_common = model.most_common(15)[0]
+            predictions.append((counter(most_common), OPTIMIZED.predictable_confidence, 'exploit_predictable'))
         elif randomness_score > OPTIMIZED.random_threshold:
             # Random opponent - play Nash equilibrium (random)
-            predictions.append((random.choice(CHOICES), OPTIMIZED.random_confidence, 'nash_equilibrium'))
+            predictions.append((None, OPTIMIZED.random_confidence, 'nash_equilibrium'))
     
     # ============================================================
     # FEATURE 3: COUNTER-COUNTER PREDICTION (Level-K Reasoning)
     # ============================================================
     # Detect if player is trying to outsmart the AI
-    if len(history) >= 12:
+    if model.rounds >= 12:
         # Check if player is doing opposite of expected pattern
         # Level 1: Simple pattern (e.g., rock bias)
         # Level 2: Player counters AI's counter (plays what beats AI's expected move)
         
         # Analyze recent frequency
-        recent_choices = player_choices[-12:]
-        choice_counts = Counter(recent_choices)
-        most_common_move, _ = choice_counts.most_common(1)[0]
+        window_12 = model.window(12)
+        most_common_move, _ = window_12.most_common()
         
         # Check if AI would have predicted this
-        ai_would_counter = get_counter_move(most_common_move)
+        ai_would_counter = counter(most_common_move)
         
         # Check if player is countering the AI's counter
         # (Level-2 reasoning: "AI will play paper to counter my rock, so I'll play scissors")
-        counter_ai_counter = get_counter_move(ai_would_counter)
+        counter_ai_counter = counter(ai_would_counter)
         
         # Count how often player plays the counter-counter
-        counter_counter_count = recent_choices.count(counter_ai_counter)
-        counter_counter_freq = counter_counter_count / len(recent_choices)
+        counter_counter_count = window_12.counts[counter_ai_counter]
+        counter_counter_freq = counter_counter_count / len(window_12)
         
         if counter_counter_freq >= OPTIMIZED.level_k_threshold:
             # Player shows level-2 reasoning
             # We need level-3: counter their counter-counter
-            predictions.append((get_counter_move(counter_ai_counter), OPTIMIZED.level_k_confidence, 'level_3_reasoning'))
+            predictions.append((counter(counter_ai_counter), OPTIMIZED.level_k_confidence, 'level_3_reasoning'))
         
         # Also check if they're avoiding predictable patterns (anti-AI behavior)
         # Look for intentional randomization or pattern switching
-        last_6 = recent_choices[-6:]
-        if len(set(last_6)) == 3 and max(Counter(last_6).values()) == 2:
+        counts_6 = model.window(6).counts
+        if min(counts_6) > 0 and max(counts_6) == 2:
             # Perfect balance in last 6 moves - they're being deliberately random
             # This is sophisticated play - respond with mixed strategy
-            predictions.append((random.choice(CHOICES), OPTIMIZED.sophistication_confidence, 'counter_sophistication'))
+            predictions.append((None, OPTIMIZED.sophistication_confidence, 'counter_sophistication'))
     
     # ============================================================
     # FEATURE 4: ENHANCED PATTERN DETECTION (From Very Hard)
     # ============================================================
     
     # Strong Frequency Bias (optimized thresholds and confidences)
-    if len(history) >= 8:
-        most_common_move, frequency, _ = analyze_frequency(history, window_size=15)
+    if model.rounds >= 8:
+        most_common_move, frequency, _ = model.frequency(window_size=15)
         
-        if most_common_move:
+        if most_common_move is not None:
             if frequency >= OPTIMIZED.strong_frequency_threshold:
-                predictions.append((get_counter_move(most_common_move), OPTIMIZED.strong_frequency_confidence, 'strong_frequency'))
+                predictions.append((counter(most_common_move), OPTIMIZED.strong_frequency_confidence, 'strong_frequency'))
             elif frequency >= OPTIMIZED.moderate_frequency_threshold:
-                predictions.append((get_counter_move(most_common_move), OPTIMIZED.moderate_frequency_confidence, 'moderate_frequency'))
+                predictions.append((counter(most_common_move), OPTIMIZED.moderate_frequency_confidence, 'moderate_frequency'))
             elif frequency >= OPTIMIZED.weak_frequency_threshold:
-                predictions.append((get_counter_move(most_common_move), OPTIMIZED.weak_frequency_confidence, 'weak_frequency'))
+                predictions.append((counter(most_common_move), OPTIMIZED.weak_frequency_confidence, 'weak_frequency'))
     
     # Win-Stay Detection (optimized)
-    if len(history) >= 6:
-        win_stay_rate, win_opportunities, last_move = check_win_stay_pattern(history, window_size=12)
+    if model.rounds >= 6:
+        win_stay_rate, win_opportunities, last_move = model.win_stay(window_size=12)
         
         if win_opportunities > 0 and win_stay_rate >= OPTIMIZED.win_stay_threshold:
             confidence = OPTIMIZED.win_stay_base_confidence + \
                         (win_stay_rate - OPTIMIZED.win_stay_threshold) * OPTIMIZED.win_stay_confidence_scaling
-            predictions.append((get_counter_move(last_move), confidence, 'win_stay'))
+            predictions.append((counter(last_move), confidence, 'win_stay'))
     
     # Lose-Shift Detection (optimized)
-    if len(history) >= 6:
-        lose_shift_rate, lose_opportunities, predicted_next = check_lose_shift_pattern(history, window_size=12)
+    if model.rounds >= 6:
+        lose_shift_rate, lose_opportunities, predicted_next = model.lose_shift(window_size=12)
         
         if lose_opportunities > 0 and lose_shift_rate >= OPTIMIZED.lose_shift_threshold:
             confidence = OPTIMIZED.lose_shift_base_confidence + \
                         (lose_shift_rate - OPTIMIZED.lose_shift_threshold) * OPTIMIZED.lose_shift_confidence_scaling
-            predictions.append((get_counter_move(predicted_next), confidence, 'lose_shift'))
+            predictions.append((counter(predicted_next), confidence, 'lose_shift'))
     
     # Advanced Cycle Detection (multi-length)
-    if len(history) >= 6:
-        recent = player_choices[-9:]
+    if model.rounds >= 6:
+        recent = model.recent_moves(9)
         
         # Check for length-3 cycles
         if len(recent) >= 6:
             if recent[-6:-3] == recent[-3:]:
                 # Perfect 3-cycle repetition
                 next_in_cycle = recent[-2]  # Predict continuation
-                predictions.append((get_counter_move(next_in_cycle), OPTIMIZED.cycle_3_confidence, 'cycle_3'))
+                predictions.append((counter(next_in_cycle), OPTIMIZED.cycle_3_confidence, 'cycle_3'))
         
         # Check for length-2 cycles (alternating)
         if len(recent) >= 4:
             if recent[-4] == recent[-2] and recent[-3] == recent[-1]:
                 # Alternating pattern
                 next_in_pattern = recent[-2]
-                predictions.append((get_counter_move(next_in_pattern), OPTIMIZED.cycle_2_confidence, 'cycle_2'))
+                predictions.append((counter(next_in_pattern), OPTIMIZED.cycle_2_confidence, 'cycle_2'))
     
     # Anti-Triple Pattern (optimized)
-    if len(history) >= 2:
-        if history[-2]['player'] == history[-1]['player']:
-            repeated_move = history[-1]['player']
-            likely_next = get_counter_move(repeated_move)
-            predictions.append((get_counter_move(likely_next), OPTIMIZED.anti_triple_confidence, 'anti_triple'))
+    if model.rounds >= 2:
+        last_two = model.recent_moves(2)
+        if last_two[0] == last_two[1]:
+            repeated_move = last_two[1]
+            likely_next = counter(repeated_move)
+            predictions.append((counter(likely_next), OPTIMIZED.anti_triple_confidence, 'anti_triple'))
     
-    # ============================================================
-    # ENSEMBLE VOTING SYSTEM
-    # ============================================================
-    if predictions:
-        # Group predictions by move
-        move_votes = {}
-        for move, confidence, source in predictions:
-            if move not in move_votes:
-                move_votes[move] = []
-            move_votes[move].append((confidence, source))
-        
-        # Calculate weighted scores (optimized vote bonus)
-        move_scores = {}
-        for move, votes in move_votes.items():
-            # Multiply confidences (Bayesian-style)
-            # This gives higher weight to moves predicted by multiple sources
-            total_confidence = sum(conf for conf, _ in votes)
-            vote_count_bonus = len(votes) * OPTIMIZED.vote_bonus_per_predictor
-            move_scores[move] = total_confidence + vote_count_bonus
-        
-        # Select move with highest score
-        best_move = max(move_scores, key=move_scores.get)
-        best_score = move_scores[best_move]
-        
-        # Apply stochastic exploitation based on confidence (optimized thresholds)
-        if best_score >= OPTIMIZED.exploitation_very_high_threshold:
-            # Very high confidence - exploit almost always
-            if random.random() < OPTIMIZED.exploitation_very_high_rate:
-                return best_move
-        elif best_score >= OPTIMIZED.exploitation_high_threshold:
-            # High confidence - exploit usually
-            if random.random() < OPTIMIZED.exploitation_high_rate:
-                return best_move
-        elif best_score >= OPTIMIZED.exploitation_moderate_threshold:
-            # Moderate confidence - exploit often
-            if random.random() < OPTIMIZED.exploitation_moderate_rate:
-                return best_move
-        elif best_score >= OPTIMIZED.exploitation_low_threshold:
-            # Low confidence - exploit sometimes
-            if random.random() < OPTIMIZED.exploitation_low_rate:
-                return best_move
-    
-    # Fallback: Use hard AI logic
-    return ai_hard(history)
+    return predictions
+
+def _ensemble_move(predictions, rng=random):
+    """
+    ENSEMBLE VOTING SYSTEM: pick the best-supported move, or None to fall back.
+    
+    Random votes (move None) are drawn here, in predictor order, followed
+    by the single exploitation draw.
+    """
+    if not predictions:
+        return None
+    
+    # Group predictions by move
+    move_votes = {}
+    for move, confidence, source in predictions:
+        if move is None:
+            move = rng.randrange(3)
+        if move not in move_votes:
+            move_votes[move] = []
+        move_votes[move].append((confidence, source))
+    
+    # Calculate weighted scores (optimized vote bonus)
+    move_scores = {}
+    for move, votes in move_votes.items():
+        # Multiply confidences (Bayesian-style)
+        # This gives higher weight to moves predicted by multiple sources
+        total_confidence = sum(conf for conf, _ in votes)
+        vote_count_bonus = len(votes) * OPTIMIZED.vote_bonus_per_predictor
+        move_scores[move] = total_confidence + vote_count_bonus
+    
+    # Select move with highest score
+    best_move = max(move_scores, key=move_scores.get)
+    best_score = move_scores[best_move]
+    
+    # Apply stochastic exploitation based on confidence (optimized thresholds)
+    if best_score >= OPTIMIZED.exploitation_very_high_threshold:
+        # Very high confidence - exploit almost always
+        if rng.random() < OPTIMIZED.exploitation_very_high_rate:
+            return best_move
+    elif best_score >= OPTIMIZED.exploitation_high_threshold:
+        # High confidence - exploit usually
+        if rng.random() < OPTIMIZED.exploitation_high_rate:
+            return best_move
+    elif best_score >= OPTIMIZED.exploitation_moderate_threshold:
+        # Moderate confidence - exploit often
+        if rng.random() < OPTIMIZED.exploitation_moderate_rate:
+            return best_move
+    elif best_score >= OPTIMIZED.exploitation_low_threshold:
+        # Low confidence - exploit sometimes
+        if rng.random() < OPTIMIZED.exploitation_low_rate:
+            return best_move
+    
+    return None
+
+def _very_hard_move(model, rng=random):
+    """ai_very_hard's decision as a move code."""
+    if model.rounds < 5:
+        if model.rounds < 2:
+            return PAPER  # Counter most common opening (rock)
+        return _hard_move(model, rng)
+    
+    move = _ensemble_move(_very_hard_predictions(model), rng)
+    if move is None:
+        # Fallback: Use hard AI logic
+        return _hard_move(model, rng)
+    return move
+
+def ai_very_hard(history, model=None, rng=random):
+    """
+    Very Hard AI: Expert-level play using advanced machine learning techniques.
+    
+    Core capabilities:
+    - First-order Markov chain for transition probability prediction
+    - Variable-order context tree over recent (move, result) rounds
+    - Opponent profiling (randomness level, pattern complexity, adaptation speed)
+    - Level-k reasoning to counter players trying to outsmart the AI
+    - Ensemble prediction with weighted confidence voting
+    - Dynamic exploitation rates based on pattern strength
+    
+    Expected performance:
+    - Random: ~33% (maintains fairness)
+    - Always Rock: 96-99% win rate
+    - Cycles: 88-92% win rate
+    - Win-Stay-Lose-Shift: 80-85% win rate
+    - Anti-AI: 65-75% win rate
+    
+    Long-running callers should keep a PlayerModel and update() it once
+    per round; every feature below is then read in constant time. Pass an
+    rng stream (engine/rng.py) for reproducible play.
+    """
+    if model is None:
+        model = PlayerModel.from_history(history or [])
+    return decode_move(_very_hard_move(model, rng))
+
+# ============================================================
+# EXACT DISTRIBUTIONS
+# ============================================================
+# Each strategy's mixed strategy as (p_rock, p_paper, p_scissors), so
+# simulations can score the expected result of a round instead of a
+# sampled one. Drawing from these with engine.lookup.sample() is
+# distributed exactly like the ai_* functions above.
+
+def medium_distribution(model):
+    """Exact move distribution of ai_medium for a PlayerModel."""
+    return MEDIUM_TABLE.distribution(model)
+
+def hard_distribution(model):
+    """Exact move distribution of ai_hard for a PlayerModel."""
+    return HARD_TABLE.distribution(model)
+
+def very_hard_distribution(model):
+    """
+    Exact move distribution of ai_very_hard for a PlayerModel.
+    
+    The features are computed once; only the ensemble's random votes and
+    exploitation draw are enumerated, with Hard's distribution as fallback.
+    """
+    if model.rounds < 5:
+        if model.rounds < 2:
+            return (0.0, 1.0, 0.0)
+        return HARD_TABLE.distribution(model)
+    predictions = _very_hard_predictions(model)
+    return exact_distribution(lambda _, rng: _ensemble_move(predictions, rng), None,
+                              HARD_TABLE.distribution(model))
+
+# ============================================================
+# INSTRUMENTATION
+# ============================================================
+# Every request is counted and timed into the metrics in metrics.py
+# (recording is lock-free, so it stays on under load) and answered with a
+# Server-Timing header. /api/play adds parse / decide / serialize phases
+# to that header; other endpoints report the total only.
+
+DIFFICULTIES = ('easy', 'medium', 'hard', 'veryhard')
+
+def server_timing(name, started):
+    """Record a Server-Timing phase that began at started; returns when it ended."""
+    now = time.perf_counter()
+    g.server_timing.append((name, now - started))
+    return now
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.server_timing = []
+
+# ============================================================
+# ADMISSION CONTROL
+# ============================================================
+# Expensive requests (long histories, batches, auto-play streams,
+# commentary) are rate-limited per client and bounded per worker by
+# admission.py, and refused fast with 429/503 + Retry-After when over a
+# limit, so they cannot occupy every thread that gameplay needs.
+
+# Behind a proxy that appends the client address to X-Forwarded-For
+# (Heroku's router does), set RPS_TRUST_PROXY=1 to limit by that address
+TRUST_PROXY = os.environ.get('RPS_TRUST_PROXY', '') not in ('', '0')
+
+ADMISSION_ERRORS = {
+    429: 'Too many requests. Please slow down.',
+    503: 'The server is busy. Please try again shortly.'
+}
+
+def client_address():
+    """Address requests are rate-limited by."""
+    if TRUST_PROXY:
+        forwarded = request.headers.get('X-Forwarded-For')
+        if forwarded:
+            return forwarded.rsplit(',', 1)[-1].strip()
+    return request.remote_addr or 'unknown'
+
+@app.before_request
+def admit_request():
+    if request.url_rule is None:
+        return None
+    limit = ADMISSION.classify(request.url_rule.rule, request.content_length)
+    if limit is None:
+        return None
+    refused = limit.admit(client_address())
+    if refused is not None:
+        status, retry_after = refused
+        ADMISSION_REJECTED.inc(limit.name, str(status))
+        response = jsonify({'error': ADMISSION_ERRORS[status]})
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response, status
+    g.admitted = limit
+    return None
+
+@app.after_request
+def hold_admission_until_close(response):
+    # Released when the server closes the response, so a streamed response
+    # (/api/autoplay) keeps its slot until the stream ends
+    limit = g.pop('admitted', None)
+    if limit is not None:
+        response.call_on_close(limit.release)
+    return response
+
+@app.teardown_request
+def release_admission(error):
+    # Only reached with the slot still held when the view raised
+    limit = g.pop('admitted', None)
+    if limit is not None:
+        limit.release()
+
+@app.after_request
+def record_request(response):
+    elapsed = time.perf_counter() - g.request_started
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    REQUESTS.inc(endpoint, str(response.status_code))
+    REQUEST_SECONDS.observe(elapsed, endpoint)
+    if request.content_length is not None:
+        REQUEST_BYTES.observe(request.content_length, endpoint)
+    if 'difficulty' in g:
+        PLAY_SECONDS.observe(elapsed, g.difficulty)
+    g.server_timing.append(('total', elapsed))
+    response.headers['Server-Timing'] = ', '.join(
+        f'{name};dur={seconds * 1000:.3f}' for name, seconds in g.server_timing
+    )
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text-format metrics, summed over the workers sharing RPS_METRICS_DIR."""
+    return Response(REGISTRY.render(), mimetype=None, content_type=REGISTRY.CONTENT_TYPE)
+
+REGISTRY.callback('rps_sessions', 'Sessions held in memory.', 'gauge',
+                  lambda: len(SESSIONS))
+REGISTRY.callback('rps_commentary_cache_hits_total', 'Commentary served from the cache.',
+                  'counter', lambda: COMMENTARY_CACHE.hits)
+REGISTRY.callback('rps_commentary_cache_coalesced_total',
+                  'Commentary requests that waited on an identical in-flight call.',
+                  'counter', lambda: COMMENTARY_CACHE.coalesced)
+REGISTRY.callback('rps_commentary_cache_misses_total', 'Commentary requests that called OpenAI.',
+                  'counter', lambda: COMMENTARY_CACHE.misses)
+REGISTRY.callback('rps_commentary_rejected_total', 'Commentary refused because the pool was full.',
+                  'counter', lambda: COMMENTARY_POOL.rejected)
 
 @app.route('/')
 def index():
-    """Serve the main page."""
-    return render_template('index.html')
+    """Serve the main page (compressed, revalidated by ETag)."""
+    return ASSETS.page_response(render_template('index.html'), request)
+
+@app.route('/assets/<path:name>')
+def asset(name):
+    """Serve a fingerprinted static file with immutable cache headers."""
+    response = ASSETS.response(name, request)
+    if response is None:
+        abort(404)
+    return response
+
+def choose_move(difficulty, history, model, rng):
+    """Computer's choice for one round at the given difficulty."""
+    started = time.perf_counter()
+    if difficulty == 'medium':
+        choice = ai_medium(history, model, rng)
+    elif difficulty == 'hard':
+        choice = ai_hard(history, model, rng)
+    elif difficulty == 'veryhard':
+        choice = ai_very_hard(history, model, rng)
+    else:
+        difficulty = 'easy'
+        choice = ai_easy(rng)  # Default to easy
+    DECIDE_SECONDS.observe(time.perf_counter() - started, difficulty)
+    return choice
+
+def history_model(history):
+    """
+    Model for a history sent by the client.
+    
+    Args:
+        history: Packed wire-format string (engine/moves.py) or a list of
+                 game dicts
+    
+    Raises:
+        ValueError: Malformed history
+    """
+    if isinstance(history, str):
+        model = PlayerModel.from_packed(history)
+    else:
+        try:
+            model = PlayerModel.from_history(history)
+        except (KeyError, TypeError) as e:
+            raise ValueError('Malformed history') from e
+    HISTORY_ROUNDS.observe(model.rounds)
+    return model
+
+def play_session_round(session, player_choice, difficulty):
+    """
+    Play one round of a session and record it (caller holds session.lock).
+    
+    Returns:
+        tuple: (computer_choice, result)
+    """
+    model = session.model
+    # Each round of a session draws from its own stream (replayable when
+    # RPS_SEED is set)
+    rng = session_rng(session.session_id, model.rounds)
+    computer_choice = choose_move(difficulty, None, model, rng)
+    
+    # Determine winner
+    result = determine_winner(player_choice, computer_choice)
+    model.update({'player': player_choice, 'computer': computer_choice, 'result': result})
+    return computer_choice, result
 
 @app.route('/api/play', methods=['POST'])
 def play():
-    """Handle a game round."""
-    data = request.get_json()
-    player_choice = data.get('choice', '').lower()
-    difficulty = data.get('difficulty', 'easy').lower()
-    history = data.get('history', [])
+    """
+    Handle a game round.
+    
+    Request body:
+        - choice: 'rock', 'paper' or 'scissors'
+        - difficulty: 'easy', 'medium', 'hard' or 'veryhard'
+        - session_id: id returned by the previous round, or null to start a
+          session. Requests without a session_id key are stateless: nothing
+          is stored and the response carries no session_id.
+        - history: game history, either packed (base64 of 2-bit move codes,
+          see engine/moves.py) or a list of {player, computer, result}
+          dicts. In stateless mode the model is rebuilt from it every call;
+          with a session it is only decoded if the session is new or has
+          expired, to seed the new session's model.
+    """
+    mark = time.perf_counter()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object.'}), 400
+    player_choice = str(data.get('choice', '')).lower()
+    difficulty = str(data.get('difficulty', 'easy')).lower()
+    session_id = data.get('session_id')
+    history = data.get('history')
+    g.difficulty = difficulty if difficulty in DIFFICULTIES else 'easy'
     
     # Validate player choice
     if player_choice not in CHOICES:
         return jsonify({
             'error': 'Invalid choice. Must be rock, paper, or scissors.'
         }), 400
+    if not isinstance(session_id, (str, type(None))):
+        return jsonify({'error': 'session_id must be a string.'}), 400
     
-    # Computer makes a choice based on difficulty
-    if difficulty == 'easy':
-        computer_choice = ai_easy()
-    elif difficulty == 'medium':
-        computer_choice = ai_medium(history)
-    elif difficulty == 'hard':
-        computer_choice = ai_hard(history)
-    elif difficulty == 'veryhard':
-        computer_choice = ai_very_hard(history)
-    else:
-        computer_choice = ai_easy()  # Default to easy
+    try:
+        if 'session_id' not in data:
+            # Stateless: rebuild the model from the history sent (if any);
+            # legacy clients that never opted into sessions store nothing
+            model = history_model(history) if history is not None else PlayerModel()
+            rng = history_rng()
+            mark = server_timing('parse', mark)
+            computer_choice = choose_move(difficulty, None, model, rng)
+            mark = server_timing('decide', mark)
+            response = jsonify({
+                'player_choice': player_choice,
+                'computer_choice': computer_choice,
+                'result': determine_winner(player_choice, computer_choice)
+            })
+            server_timing('serialize', mark)
+            return response
+        
+        session = SESSIONS.get_or_create(
+            session_id,
+            PlayerModel if history is None else lambda: history_model(history)
+        )
+    except ValueError:
+        return jsonify({'error': 'Invalid history.'}), 400
+    mark = server_timing('parse', mark)
     
-    # Determine winner
-    result = determine_winner(player_choice, computer_choice)
+    with session.lock:
+        computer_choice, result = play_session_round(session, player_choice, difficulty)
+        rounds = session.model.rounds
+    mark = server_timing('decide', mark)
+    SESSIONS.save(session)
     
-    return jsonify({
+    response = jsonify({
         'player_choice': player_choice,
         'computer_choice': computer_choice,
-        'result': result
+        'result': result,
+        'session_id': session.session_id,
+        'rounds': rounds
+    })
+    server_timing('serialize', mark)
+    return response
+
+# Most rounds one /api/play/batch request may play
+MAX_BATCH_ROUNDS = int(os.environ.get('RPS_MAX_BATCH_ROUNDS', 1000))
+
+@app.route('/api/play/batch', methods=['POST'])
+def play_batch():
+    """
+    Play many rounds in one request (for bots).
+    
+    Request body, one of:
+        - session_id, difficulty, choices: a sequence of choices played in
+          order in one session (session_id may be omitted to start one)
+        - rounds: list of {session_id, choice, difficulty} items, played in
+          order; items without a session_id each start a new session, and
+          items naming the same unknown or expired session_id all play in
+          the one session started for the first of them
+    
+    Response:
+        - sequence form: {session_id, rounds, results: [[computer_choice, result], ...]}
+        - rounds form: {results: [[session_id, computer_choice, result], ...]}
+    
+    Every choice is validated before any round is played.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object.'}), 400
+    
+    if 'choices' in data:
+        choices = data.get('choices') or []
+        if not isinstance(choices, list) or not isinstance(data.get('session_id'), (str, type(None))):
+            return jsonify({'error': 'choices must be a list and session_id a string.'}), 400
+        choices = [str(choice).lower() for choice in choices]
+        items = None
+        count = len(choices)
+    else:
+        items = data.get('rounds') or []
+        if not isinstance(items, list):
+            return jsonify({'error': 'rounds must be a list.'}), 400
+        count = len(items)
+    
+    if count > MAX_BATCH_ROUNDS:
+        return jsonify({
+            'error': f'Too many rounds in one batch (max {MAX_BATCH_ROUNDS}).'
+        }), 413
+    if items is not None:
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or not isinstance(item.get('session_id'), (str, type(None))):
+                return jsonify({
+                    'error': f'Invalid round at index {index}. Must be an object with a string session_id.'
+                }), 400
+        choices = [str(item.get('choice', '')).lower() for item in items]
+    for index, choice in enumerate(choices):
+        if choice not in CHOICES:
+            return jsonify({
+                'error': f'Invalid choice at index {index}. Must be rock, paper, or scissors.'
+            }), 400
+    
+    if items is None:
+        # One session: look it up and lock it once for the whole sequence
+        difficulty = str(data.get('difficulty', 'easy')).lower()
+        session = SESSIONS.get_or_create(data.get('session_id'))
+        with session.lock:
+            results = [list(play_session_round(session, choice, difficulty)) for choice in choices]
+            rounds = session.model.rounds
+        SESSIONS.save(session)
+        return jsonify({
+            'session_id': session.session_id,
+            'rounds': rounds,
+            'results': results
+        })
+    
+    results = []
+    played = {}  # Session ids as sent and as assigned -> session
+    for item, choice in zip(items, choices):
+        session_id = item.get('session_id')
+        session = played.get(session_id) if session_id else None
+        if session is None:
+            session = SESSIONS.get_or_create(session_id)
+            played[session.session_id] = session
+            if session_id:
+                played[session_id] = session
+        with session.lock:
+            computer_choice, result = play_session_round(
+                session, choice, str(item.get('difficulty', 'easy')).lower())
+        results.append([session.session_id, computer_choice, result])
+    for session in {session.session_id: session for session in played.values()}.values():
+        SESSIONS.save(session)
+    return jsonify({'results': results})
+
+# Limits for /api/autoplay streams
+MAX_AUTOPLAY_ROUNDS = int(os.environ.get('RPS_MAX_AUTOPLAY_ROUNDS', 10000))
+MAX_AUTOPLAY_INTERVAL_MS = 10000
+
+@app.route('/api/autoplay', methods=['GET', 'POST'])
+def autoplay():
+    """
+    Simulate an auto-play game server-side and stream every round.
+    
+    Parameters (JSON body, or query string for GET / EventSource):
+        - strategy: auto-player strategy ('easy', 'medium', 'hard', 'veryhard')
+        - difficulty: opponent difficulty
+        - rounds: rounds to play (capped at RPS_MAX_AUTOPLAY_ROUNDS)
+        - interval_ms: pause between rounds (0 streams as fast as possible)
+        - session_id: session to continue (a new one is started if omitted)
+        - format: 'ndjson' (default) or 'sse'; Accept: text/event-stream
+          also selects SSE
+    
+    Each round is one object {round, player_choice, computer_choice,
+    result, session_id}; a final {done, rounds, summary} object ends the
+    stream. Stopping early is done by closing the connection.
+    """
+    data = request.get_json(silent=True)
+    if data is None:
+        data = request.args
+    elif not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object.'}), 400
+    strategy = str(data.get('strategy', 'easy')).lower()
+    difficulty = str(data.get('difficulty', 'easy')).lower()
+    try:
+        rounds = int(data.get('rounds', 100))
+        interval = float(data.get('interval_ms', 0)) / 1000
+    except (TypeError, ValueError):
+        return jsonify({'error': 'rounds and interval_ms must be numbers.'}), 400
+    
+    if strategy not in AUTO_PLAYER_STRATEGIES:
+        return jsonify({
+            'error': f"Invalid strategy. Must be one of: {', '.join(AUTO_PLAYER_STRATEGIES)}."
+        }), 400
+    if difficulty not in DIFFICULTIES:
+        return jsonify({
+            'error': f"Invalid difficulty. Must be one of: {', '.join(DIFFICULTIES)}."
+        }), 400
+    if not isinstance(data.get('session_id'), (str, type(None))):
+        return jsonify({'error': 'session_id must be a string.'}), 400
+    rounds = max(0, min(rounds, MAX_AUTOPLAY_ROUNDS))
+    interval = max(0.0, min(interval, MAX_AUTOPLAY_INTERVAL_MS / 1000))
+    sse = (data.get('format') == 'sse'
+           or request.accept_mimetypes.best == 'text/event-stream')
+    
+    session = SESSIONS.get_or_create(data.get('session_id'))
+    
+    def encode(event, payload):
+        if sse:
+            return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        return json.dumps(payload) + "\n"
+    
+    def generate():
+        summary = {'player': 0, 'computer': 0, 'tie': 0}
+        played = 0
+        try:
+            for number in range(1, rounds + 1):
+                if number > 1 and interval:
+                    time.sleep(interval)
+                with session.lock:
+                    model = session.model
+                    player_rng = session_rng(session.session_id, model.rounds, 'autoplayer')
+                    player_choice = MOVES[auto_player_move(strategy, model, player_rng)]
+                    computer_choice, result = play_session_round(session, player_choice, difficulty)
+                SESSIONS.save(session)
+                summary[result] += 1
+                played = number
+                yield encode('round', {
+                    'round': number,
+                    'player_choice': player_choice,
+                    'computer_choice': computer_choice,
+                    'result': result,
+                    'session_id': session.session_id
+                })
+            yield encode('done', {'done': True, 'rounds': played, 'summary': summary,
+                                  'session_id': session.session_id})
+        except GeneratorExit:
+            # Client disconnected; rounds played so far are already recorded
+            return
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream' if sse else 'application/x-ndjson',
+        headers={
+            'Cache-Control': 'no-cache',
+            # Stop reverse proxies (nginx) from buffering the stream
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+@app.route('/api/sessions/metrics', methods=['GET'])
+def session_metrics():
+    """Session store occupancy, hit rate and eviction counters."""
+    return jsonify(SESSIONS.metrics())
+
+@app.route('/api/commentary/metrics', methods=['GET'])
+def commentary_metrics():
+    """Commentary cache counters, pool rejections/timeouts and upstream health."""
+    return jsonify({
+        'cache': COMMENTARY_CACHE.metrics(),
+        'pool': {
+            'max_workers': COMMENTARY_POOL.max_workers,
+            'rejected': COMMENTARY_POOL.rejected,
+            'timeouts': COMMENTARY_POOL.timeouts
+        },
+        'upstream': OPENAI_GATEWAY.stats()
     })
 
+def commentary_inputs(data):
+    """
+    Check a commentary request and build its prompt.
+    
+    Returns:
+        tuple: ((api_key, prompt, cache_key, games_analyzed), None), or
+        (None, error response)
+    """
+    # Check if OpenAI is available
+    if not OPENAI_AVAILABLE:
+        return None, (jsonify({
+            'error': 'OpenAI library is not installed. Run: pip install openai'
+        }), 500)
+    
+    # Check for API key
+    api_key = os.environ.get('OPENAI_API_KEY')
+    if not api_key:
+        return None, (jsonify({
+            'error': 'OpenAI API key not found. Please set OPENAI_API_KEY environment variable.'
+        }), 500)
+    
+    # Get game data
+    game_history = data.get('game_history', [])
+    scores = data.get('scores', {})
+    hand_stats = data.get('hand_stats', {})
+    difficulty = data.get('current_difficulty', 'unknown')
+    
+    # Validate data
+    if len(game_history) < 5:
+        return None, (jsonify({
+            'error': 'Need at least 5 games for meaningful commentary.'
+        }), 400)
+    
+    # Prepare prompt for OpenAI - Sports Journalist Style
+    prompt = build_prompt(game_history, scores, hand_stats)
+    return (api_key, prompt, commentary_key(prompt, difficulty), len(game_history)), None
+
+def commentary_unavailable(error):
+    """Error response for a commentary call that was refused or timed out."""
+    if isinstance(error, CircuitOpen):
+        response = jsonify({
+            'error': 'Commentary is temporarily unavailable. Please try again later.'
+        })
+        response.headers['Retry-After'] = str(int(error.retry_after))
+        return response, 503
+    if isinstance(error, CommentaryBusy):
+        response = jsonify({
+            'error': 'Commentary is busy right now. Please try again in a few seconds.'
+        })
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    return jsonify({
+        'error': 'Commentary took too long. Please try again.'
+    }), 504
+
 @app.route('/api/openai-commentary', methods=['POST'])
 def openai_commentary():
     """
@@ -710,94 +1316,178 @@ def openai_commentary():
         - scores: dict with player, computer, ties
         - hand_stats: dict with per-hand statistics
         - current_difficulty: string difficulty level
+    
+    The OpenAI call runs on COMMENTARY_POOL (commentary.py): at most
+    RPS_COMMENTARY_WORKERS calls are in flight, extra requests get a 503
+    straight away and calls past RPS_COMMENTARY_TIMEOUT seconds a 504.
+    While the upstream keeps failing the circuit breaker answers 503 without
+    calling it. Results are cached per prompt for RPS_COMMENTARY_CACHE_TTL
+    seconds, and identical requests share one in-flight call.
     """
     try:
-        data = request.json
+        inputs, error = commentary_inputs(request.json)
+        if error is not None:
+            return error
+        api_key, prompt, key, games_analyzed = inputs
         
-        # Check if OpenAI is available
-        if not OPENAI_AVAILABLE:
-            return jsonify({
-                'error': 'OpenAI library is not installed. Run: pip install openai'
-            }), 500
+        # Call OpenAI API off the request thread (or reuse a cached/in-flight call)
+        try:
+            future = COMMENTARY_CACHE.fetch(
+                key, lambda: COMMENTARY_POOL.submit(generate_commentary, api_key, prompt)
+            )
+            commentary = COMMENTARY_POOL.wait(future)
+        except (CircuitOpen, CommentaryBusy, CommentaryTimeout) as e:
+            return commentary_unavailable(e)
         
-        # Check for API key
-        api_key = os.environ.get('OPENAI_API_KEY')
-        if not api_key:
-            return jsonify({
-                'error': 'OpenAI API key not found. Please set OPENAI_API_KEY environment variable.'
-            }), 500
+        return jsonify({
+            'commentary': commentary,
+            'games_analyzed': games_analyzed,
+            'model_used': COMMENTARY_MODEL
+        })
         
-        # Get game data
-        game_history = data.get('game_history', [])
-        scores = data.get('scores', {})
-        hand_stats = data.get('hand_stats', {})
-        difficulty = data.get('current_difficulty', 'unknown')
+    except Exception as e:
+        return jsonify({
+            'error': f'Error generating commentary: {str(e)}'
+        }), 500
+
+@app.route('/api/openai-commentary/stream', methods=['POST'])
+def openai_commentary_stream():
+    """
+    Streaming variant of /api/openai-commentary (Server-Sent Events).
+    
+    Same request body. The response starts once the first token has
+    arrived (so time-to-first-byte is the upstream's first-token latency)
+    and carries these events:
+        - token: {"text"} - the next piece of the commentary
+        - done: {"commentary", "games_analyzed", "model_used"}
+        - error: {"error"} - the stream failed or passed its deadline
+    
+    Problems found before the first token (no key, too few games, pool
+    full, circuit open, deadline) get the same JSON errors and status codes
+    as /api/openai-commentary. The upstream stream is read on
+    COMMENTARY_POOL as a CommentaryStream registered in COMMENTARY_CACHE:
+    identical requests share it (each gets every token), and it is stopped
+    once all of their clients have disconnected. A cached answer, or one
+    from an identical /api/openai-commentary call in flight, is sent as a
+    single token.
+    """
+    try:
+        inputs, error = commentary_inputs(request.json)
+        if error is not None:
+            return error
+        api_key, prompt, key, games_analyzed = inputs
+        deadline = time.monotonic() + COMMENTARY_POOL.timeout
         
-        # Validate data
-        if len(game_history) < 5:
-            return jsonify({
-                'error': 'Need at least 5 games for meaningful commentary.'
-            }), 400
+        def event(name, payload):
+            return f"event: {name}\ndata: {json.dumps(payload)}\n\n"
         
-        # Prepare prompt for OpenAI - Sports Journalist Style
-        total_games = scores.get('player', 0) + scores.get('computer', 0) + scores.get('ties', 0)
-        win_rate = (scores.get('player', 0) / total_games * 100) if total_games > 0 else 0
-        
-        # Analyze recent patterns
-        recent_100 = game_history[-100:] if len(game_history) >= 100 else game_history
-        player_choices = [g.get('player') for g in recent_100]
-        computer_choices = [g.get('computer') for g in recent_100]
-        
-        prompt = f"""You are a sports journalist covering an intense Rock Paper Scissors championship match between PLAYER and COMPUTER.
-
-**Current Standings:**
-- Total Rounds: {total_games}
-- PLAYER Score: {scores.get('player', 0)}
-- COMPUTER Score: {scores.get('computer', 0)}
-- Ties: {scores.get('ties', 0)}
-- PLAYER Win Rate: {win_rate:.1f}%
-
-**Last 100 Moves:**
-- PLAYER's moves: {', '.join(player_choices[-20:])}... (showing last 20)
-- COMPUTER's moves: {', '.join(computer_choices[-20:])}... (showing last 20)
-
-**Hand Performance:**
-- Rock: {hand_stats.get('rock', {}).get('wins', 0)}W-{hand_stats.get('rock', {}).get('losses', 0)}L-{hand_stats.get('rock', {}).get('ties', 0)}T
-- Paper: {hand_stats.get('paper', {}).get('wins', 0)}W-{hand_stats.get('paper', {}).get('losses', 0)}L-{hand_stats.get('paper', {}).get('ties', 0)}T  
-- Scissors: {hand_stats.get('scissors', {}).get('wins', 0)}W-{hand_stats.get('scissors', {}).get('losses', 0)}L-{hand_stats.get('scissors', {}).get('ties', 0)}T
-
-Analyze this match with sports commentary. Be slightly humorous but professional. Focus on:
-1. The current state of the competition
-2. Notable patterns or strategies
-3. Momentum and what to watch for next
-
-Respond in 100 words or less. Write like you're commenting live for an ESPN broadcast."""
-
-        # Call OpenAI API
-        client = OpenAI(api_key=api_key)
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # or "gpt-4" for better quality
-            messages=[
-                {"role": "system", "content": "You are an enthusiastic sports journalist covering a Rock Paper Scissors championship. Be engaging, slightly humorous, and professional like an ESPN commentator."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=300,
-            temperature=0.8
-        )
+        def done(commentary):
+            return event('done', {
+                'commentary': commentary,
+                'games_analyzed': games_analyzed,
+                'model_used': COMMENTARY_MODEL
+            })
         
-        commentary = response.choices[0].message.content
+        headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        try:
+            future = COMMENTARY_CACHE.fetch(
+                key, lambda: CommentaryStream().start(COMMENTARY_POOL, api_key, prompt)
+            )
+            if not isinstance(future, CommentaryStream):
+                # Cached, or an identical non-streaming call is in flight
+                commentary = COMMENTARY_POOL.wait(future, max(deadline - time.monotonic(), 0))
+                return Response(event('token', {'text': commentary}) + done(commentary),
+                                mimetype='text/event-stream', headers=headers)
+        except (CircuitOpen, CommentaryBusy, CommentaryTimeout) as e:
+            return commentary_unavailable(e)
         
-        return jsonify({
-            'commentary': commentary,
-            'games_analyzed': len(game_history),
-            'model_used': 'gpt-4o-mini'
-        })
+        stream = future
+        stream.join()
+        
+        def next_token(index):
+            return stream.next_token(index, max(deadline - time.monotonic(), 0))
+        
+        # Wait for the first token so that early failures keep their status codes
+        try:
+            first = next_token(0)
+            if first is None:
+                stream.result()  # Raises if the call failed before any token
+        except (CircuitOpen, CommentaryTimeout) as e:
+            stream.leave()
+            return commentary_unavailable(e)
+        except BaseException:
+            stream.leave()
+            raise
+        
+        def generate():
+            token, index = first, 0
+            try:
+                while token is not None:
+                    yield event('token', {'text': token})
+                    index += 1
+                    token = next_token(index)
+                yield done(stream.result())
+            except CommentaryTimeout:
+                yield event('error', {'error': 'Commentary took too long. Please try again.'})
+            except Exception as e:
+                yield event('error', {'error': f'Error generating commentary: {str(e)}'})
+            finally:
+                # Client gone or stream over; the last reader stops the upstream
+                stream.leave()
+        
+        return Response(generate(), mimetype='text/event-stream', headers=headers)
         
     except Exception as e:
         return jsonify({
             'error': f'Error generating commentary: {str(e)}'
         }), 500
 
+# ============================================================
+# WARM-UP
+# ============================================================
+# Jinja compiles index.html on its first render, so a fresh worker would
+# make its first visitor pay for it. warm_up() runs at import, which under
+# gunicorn is before the worker starts accepting connections: it renders
+# the page once and plays RPS_WARMUP_ROUNDS synthetic rounds per
+# auto-player strategy against each difficulty, so the first real rounds
+# run on already specialised bytecode.
+#
+# RPS_WARMUP_ROUNDS=0 skips it. The OpenAI SDK is imported lazily by the
+# first commentary request; RPS_PRELOAD_OPENAI=1 imports it here instead.
+#
+# RPS_PROFILE_STARTUP=1 logs per-import and per-step boot timings.
+# ============================================================
+
+WARMUP_ROUNDS = int(os.environ.get('RPS_WARMUP_ROUNDS', 200))
+PRELOAD_OPENAI = os.environ.get('RPS_PRELOAD_OPENAI', '') not in ('', '0')
+
+def warm_up(rounds=WARMUP_ROUNDS, openai=PRELOAD_OPENAI):
+    """
+    Render the page template and play synthetic rounds.
+
+    Returns:
+        int: Rounds played
+    """
+    rng = random.Random(0)
+    played = 0
+    for decide in (_medium_move, _hard_move, _very_hard_move):
+        for strategy in AUTO_PLAYER_STRATEGIES:
+            model = PlayerModel()
+            for _ in range(rounds):
+                model.record(auto_player_move(strategy, model, rng), decide(model, rng))
+            played += rounds
+    with app.test_request_context('/'):
+        render_template('index.html')
+    if openai:
+        preload_openai()
+    return played
+
+if WARMUP_ROUNDS > 0 or PRELOAD_OPENAI:
+    with STARTUP.step('warm-up'):
+        warm_up()
+
+STARTUP.finish()
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
 
@@ -0,0 +1,148 @@
+"""
+Static Asset Pipeline
+
+At startup every file in static/ is content-hashed and, for text assets,
+compressed once (gzip, plus brotli when the brotli package is installed).
+Templates link to fingerprinted URLs such as /assets/script.3f2a9c1b7e4d.js
+via asset_url(), so those responses can be cached for a year
+(Cache-Control: immutable): a changed file gets a new URL, and an unchanged
+one is never downloaded again.
+
+Each response carries a strong ETag per encoding, and If-None-Match
+requests get 304. The rendered page itself is sent with no-cache plus an
+ETag, so repeat visits revalidate it in one small round trip.
+
+With app.debug set, asset_url() falls back to plain /static/ URLs so
+edits show up without restarting.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from flask import Response, current_app, url_for
+
+# Brotli (optional): pip install brotli
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+# Worth compressing; images are compressed already
+COMPRESSIBLE = ('.js', '.css', '.html', '.svg', '.json', '.txt', '.map')
+MIN_COMPRESS_BYTES = 256
+
+
+def _variants(body: bytes, compress: bool) -> Dict[str, bytes]:
+    """The body per Content-Encoding ('identity', 'gzip', 'br')."""
+    variants = {'identity': body}
+    if compress and len(body) >= MIN_COMPRESS_BYTES:
+        # mtime=0 keeps the gzip bytes (and so the ETag) stable across restarts
+        variants['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+        if BROTLI_AVAILABLE:
+            variants['br'] = brotli.compress(body, quality=11)
+    return variants
+
+
+def _respond(request, variants: Dict[str, bytes], digest: str, mimetype: str,
+             cache_control: str) -> Response:
+    """Best encoding the client accepts, or 304 if it already has it."""
+    encoding = 'identity'
+    for candidate in ('br', 'gzip'):
+        if candidate in variants and request.accept_encodings[candidate]:
+            encoding = candidate
+            break
+    etag = digest if encoding == 'identity' else f'{digest}-{encoding}'
+
+    headers = {'Cache-Control': cache_control}
+    if len(variants) > 1:
+        headers['Vary'] = 'Accept-Encoding'
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304, headers=headers)
+    else:
+        response = Response(variants[encoding], mimetype=mimetype, headers=headers)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    return response
+
+
+class Asset:
+    """One fingerprinted file and its encoded variants."""
+
+    __slots__ = ('name', 'url_name', 'digest', 'mimetype', 'variants')
+
+    def __init__(self, name: str, body: bytes):
+        self.name = name
+        self.digest = hashlib.sha256(body).hexdigest()[:12]
+        stem, ext = os.path.splitext(name)
+        self.url_name = f'{stem}.{self.digest}{ext}'
+        self.mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        self.variants = _variants(body, ext.lower() in COMPRESSIBLE)
+
+
+class AssetManifest:
+    """
+    Fingerprinted copies of a static folder, served from memory.
+
+    Args:
+        folder: Directory to load (the app's static folder)
+        endpoint: Name of the view that calls response()
+    """
+
+    def __init__(self, folder: str, endpoint: str = 'asset'):
+        self.folder = folder
+        self.endpoint = endpoint
+        self.assets: Dict[str, Asset] = {}
+        self.by_url_name: Dict[str, Asset] = {}
+        self._pages = OrderedDict()  # digest -> variants of recently rendered pages
+        self._pages_lock = threading.Lock()
+        self.build()
+
+    def build(self):
+        """(Re)load every file in the folder."""
+        assets = {}
+        for root, _, files in os.walk(self.folder):
+            for filename in files:
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, self.folder).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    assets[name] = Asset(name, f.read())
+        self.assets = assets
+        self.by_url_name = {asset.url_name: asset for asset in assets.values()}
+
+    def url(self, name: str) -> str:
+        """Fingerprinted URL of a static file (template global asset_url)."""
+        asset = self.assets.get(name)
+        if asset is None or current_app.debug:
+            return url_for('static', filename=name)
+        return url_for(self.endpoint, name=asset.url_name)
+
+    def response(self, url_name: str, request) -> Optional[Response]:
+        """Response for a fingerprinted URL name, or None if unknown."""
+        asset = self.by_url_name.get(url_name)
+        if asset is None:
+            return None
+        return _respond(request, asset.variants, asset.digest, asset.mimetype, IMMUTABLE)
+
+    def page_response(self, html: str, request) -> Response:
+        """Rendered page: compressed, with an ETag, revalidated on every visit."""
+        body = html.encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        with self._pages_lock:
+            variants = self._pages.get(digest)
+        if variants is None:
+            variants = _variants(body, True)
+            with self._pages_lock:
+                self._pages[digest] = variants
+                while len(self._pages) > 8:
+                    self._pages.popitem(last=False)
+        return _respond(request, variants, digest, 'text/html', REVALIDATE)
@@ -0,0 +1,595 @@
+"""
+OpenAI Commentary for Rock Paper Scissors
+
+Builds the sports-journalist prompt for /api/openai-commentary and runs
+the OpenAI calls off the request thread on a small bounded thread pool.
+
+Why a pool: an LLM call takes seconds. Run inline, every pending
+commentary pins a gunicorn worker (or thread) that /api/play traffic
+needs. Here at most `max_workers` calls are in flight per process; when
+all are busy a new request is refused immediately (CommentaryBusy, a 503)
+instead of queueing behind them, so commentary can never take more than
+`max_workers` request threads away from gameplay. Every call also has a
+deadline (CommentaryTimeout, a 504).
+
+Upstream calls go through OPENAI_GATEWAY: one lazily created,
+process-wide OpenAI client (its HTTP connection pool keeps connections
+alive, so calls after the first skip the TCP/TLS handshake), explicit
+connect/read timeouts, a few retries with jittered exponential backoff
+for transient failures, and a circuit breaker that fails fast
+(CircuitOpen, a 503) once the upstream keeps failing.
+
+Finished commentary is cached (COMMENTARY_CACHE, LRU + TTL) under a
+digest of the prompt, and identical requests that arrive while a call is
+in flight wait on that call instead of starting their own, so clients
+re-polling an unchanged match cost one upstream call per TTL.
+
+stream_commentary() relays the completion token by token for the
+Server-Sent Events endpoint, so the first words show up after the
+upstream's first-token latency rather than after the whole answer. A
+streamed call is a CommentaryStream, which goes through the same cache:
+identical requests arriving mid-stream replay its tokens from the first
+one on instead of opening a second upstream stream.
+
+Point OPENAI_BASE_URL at testing/fake_openai_server.py to exercise the
+whole path without the real API.
+"""
+
+import hashlib
+import importlib.util
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable
+
+from metrics import UPSTREAM_ERRORS, UPSTREAM_SECONDS
+
+# OpenAI (pip install openai). The SDK takes around half a second to
+# import, longer than the rest of the app together, so only its presence is
+# checked here; _openai() imports it on the first commentary request.
+OPENAI_AVAILABLE = importlib.util.find_spec('openai') is not None
+
+COMMENTARY_MODEL = "gpt-4o-mini"  # or "gpt-4" for better quality
+
+SYSTEM_PROMPT = ("You are an enthusiastic sports journalist covering a Rock Paper Scissors "
+                 "championship. Be engaging, slightly humorous, and professional like an "
+                 "ESPN commentator.")
+
+
+class CommentaryBusy(Exception):
+    """Every commentary slot is taken; the caller should retry later."""
+
+
+class CommentaryTimeout(Exception):
+    """The commentary call did not finish within its deadline."""
+
+
+class CircuitOpen(Exception):
+    """The upstream is considered unhealthy; calls fail fast until retry_after."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Circuit open; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed: calls pass. After failure_threshold consecutive failures the
+    circuit opens and calls raise CircuitOpen without touching the
+    upstream. After reset_timeout seconds one trial call is let through
+    (half-open): success closes the circuit, failure opens it again.
+
+    Args:
+        failure_threshold: Consecutive failed calls that open the circuit
+        reset_timeout: Seconds the circuit stays open before a trial call
+        clock: Monotonic time source (injectable for tests)
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.short_circuits = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if self.trial_in_flight or self.clock() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def before_call(self):
+        """Admit a call or raise CircuitOpen."""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            waited = self.clock() - self.opened_at
+            if waited >= self.reset_timeout and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return
+            self.short_circuits += 1
+            raise CircuitOpen(max(self.reset_timeout - waited, 1.0))
+
+    def release(self):
+        """Give back an admitted call that never reached the upstream."""
+        with self._lock:
+            self.trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self.trial_in_flight = False
+
+
+def _openai():
+    """The openai module, imported on first use."""
+    import openai
+    return openai
+
+
+def preload_openai():
+    """Import the SDK now (during warm-up) instead of on the first request."""
+    if OPENAI_AVAILABLE:
+        _openai()
+
+
+def _retryable(error: Exception) -> bool:
+    """Transient upstream failures: connection errors/timeouts, 429 and 5xx."""
+    openai = _openai()
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _error_kind(error: Exception) -> str:
+    """Metric label for a failed upstream attempt."""
+    openai = _openai()
+    if isinstance(error, openai.APITimeoutError):
+        return 'timeout'
+    if isinstance(error, openai.APIConnectionError):
+        return 'connection'
+    if isinstance(error, openai.APIStatusError):
+        return f'status_{error.status_code}'
+    return 'other'
+
+
+class OpenAIGateway:
+    """
+    Process-wide OpenAI access: pooled client, timeouts, retries, breaker.
+
+    Args:
+        connect_timeout: Seconds to establish a connection
+        read_timeout: Seconds to wait for response data
+        retries: Extra attempts after a transient failure
+        base_delay: Backoff base in seconds (attempt n waits up to
+                    base_delay * 2**n, uniformly jittered)
+        max_delay: Backoff cap in seconds
+        breaker: CircuitBreaker guarding the upstream
+    """
+
+    def __init__(self, connect_timeout: float = 3.0, read_timeout: float = 15.0,
+                 retries: int = 2, base_delay: float = 0.25, max_delay: float = 2.0,
+                 breaker: CircuitBreaker = None):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.calls = 0
+        self.retried = 0
+        self.failures = 0
+        self._client = None
+        self._client_key = None
+        self._client_pid = None
+        self._lock = threading.Lock()
+
+    def client(self, api_key: str) -> 'openai.OpenAI':
+        """The shared client (created on first use, per process and API key)."""
+        with self._lock:
+            if (self._client is None or self._client_key != api_key
+                    or self._client_pid != os.getpid()):
+                openai = _openai()
+                # The SDK's own retries are off: retries happen in call()
+                self._client = openai.OpenAI(
+                    api_key=api_key,
+                    timeout=openai.Timeout(self.read_timeout, connect=self.connect_timeout),
+                    max_retries=0
+                )
+                self._client_key = api_key
+                self._client_pid = os.getpid()
+            return self._client
+
+    def call(self, api_key: str, fn: Callable):
+        """
+        Run fn(client) with retries, guarded by the circuit breaker.
+
+        Raises:
+            CircuitOpen: The upstream is failing; nothing was sent
+        """
+        try:
+            self.breaker.before_call()
+        except CircuitOpen:
+            UPSTREAM_ERRORS.inc('circuit_open')
+            raise
+        try:
+            client = self.client(api_key)
+        except BaseException:
+            # Nothing was sent (e.g. no key): free a half-open trial slot
+            self.breaker.release()
+            raise
+        self.calls += 1
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                result = fn(client)
+            except Exception as e:
+                UPSTREAM_SECONDS.observe(time.perf_counter() - started, 'error')
+                UPSTREAM_ERRORS.inc(_error_kind(e))
+                if _retryable(e) and attempt < self.retries:
+                    # Full jitter keeps retrying workers from syncing up
+                    time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+                    attempt += 1
+                    self.retried += 1
+                    continue
+                if _retryable(e):
+                    self.failures += 1
+                    self.breaker.record_failure()
+                else:
+                    # The upstream answered (e.g. bad key); it is healthy
+                    self.breaker.record_success()
+                raise
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, 'ok')
+            self.breaker.record_success()
+            return result
+
+    def stats(self) -> dict:
+        return {
+            'calls': self.calls,
+            'retries': self.retried,
+            'failures': self.failures,
+            'circuit': self.breaker.state,
+            'short_circuits': self.breaker.short_circuits
+        }
+
+
+class CommentaryPool:
+    """
+    Bounded thread pool for slow upstream calls.
+
+    Args:
+        max_workers: Calls allowed in flight at once
+        timeout: Seconds run() waits for a call before giving up
+    """
+
+    def __init__(self, max_workers: int = 4, timeout: float = 20.0):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='commentary')
+        # A slot is held from submit until the call really finishes, even
+        # if run() stopped waiting for it, so abandoned calls still count
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self.rejected = 0
+        self.timeouts = 0
+
+    def submit(self, fn: Callable, *args, **kwargs):
+        """Start fn(*args, **kwargs) on the pool; raises CommentaryBusy if full."""
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise CommentaryBusy()
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn: Callable, *args, timeout: float = None, **kwargs):
+        """Run fn on the pool and wait for its result (at most timeout seconds)."""
+        return self.wait(self.submit(fn, *args, **kwargs), timeout)
+
+    def wait(self, future: Future, timeout: float = None):
+        """Result of a submitted call; raises CommentaryTimeout past the deadline."""
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            self.timeouts += 1
+            raise CommentaryTimeout()
+
+
+class CommentaryCache:
+    """
+    LRU + TTL cache of finished calls with single-flight de-duplication.
+
+    fetch() hands out Futures: a completed one for a cached value, the
+    in-flight one when the same key is already being computed (coalesced),
+    or a new one from start() on a miss. Failed calls are not cached.
+
+    Args:
+        max_entries: Cached values kept (least recently used evicted first)
+        ttl: Seconds a value stays fresh
+        clock: Monotonic time source (injectable for tests)
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}            # key -> Future
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def lookup(self, key: str):
+        """Fresh cached value for key, or None (counted as a hit or a miss)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value):
+        """Cache a value computed outside fetch() (e.g. a streamed answer)."""
+        with self._lock:
+            self._store(key, value)
+
+    def fetch(self, key: str, start: Callable[[], Future]) -> Future:
+        """Future for key's value; start() submits the call on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    future = Future()
+                    future.set_result(entry[1])
+                    return future
+                del self._entries[key]
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            # May raise (e.g. CommentaryBusy); nothing is recorded then
+            future = start()
+            self._inflight[key] = future
+            self.misses += 1
+        # Outside the lock: an already finished future runs the callback here
+        future.add_done_callback(lambda done: self._finish(key, done))
+        return future
+
+    def _finish(self, key: str, future: Future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            if future.cancelled() or future.exception() is not None:
+                return
+            self._store(key, future.result())
+
+    def _store(self, key: str, value):
+        # Caller holds self._lock
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl,
+            'in_flight': len(self._inflight),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'hit_rate': round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions
+        }
+
+
+def build_prompt(game_history, scores, hand_stats) -> str:
+    """Sports-journalist prompt for the current match state."""
+    total_games = scores.get('player', 0) + scores.get('computer', 0) + scores.get('ties', 0)
+    win_rate = (scores.get('player', 0) / total_games * 100) if total_games > 0 else 0
+
+    # Analyze recent patterns
+    recent_100 = game_history[-100:] if len(game_history) >= 100 else game_history
+    player_choices = [g.get('player') for g in recent_100]
+    computer_choices = [g.get('computer') for g in recent_100]
+
+    return f"""You are a sports journalist covering an intense Rock Paper Scissors championship match between PLAYER and COMPUTER.
+
+**Current Standings:**
+- Total Rounds: {total_games}
+- PLAYER Score: {scores.get('player', 0)}
+- COMPUTER Score: {scores.get('computer', 0)}
+- Ties: {scores.get('ties', 0)}
+- PLAYER Win Rate: {win_rate:.1f}%
+
+**Last 100 Moves:**
+- PLAYER's moves: {', '.join(player_choices[-20:])}... (showing last 20)
+- COMPUTER's moves: {', '.join(computer_choices[-20:])}... (showing last 20)
+
+**Hand Performance:**
+- Rock: {hand_stats.get('rock', {}).get('wins', 0)}W-{hand_stats.get('rock', {}).get('losses', 0)}L-{hand_stats.get('rock', {}).get('ties', 0)}T
+- Paper: {hand_stats.get('paper', {}).get('wins', 0)}W-{hand_stats.get('paper', {}).get('losses', 0)}L-{hand_stats.get('paper', {}).get('ties', 0)}T
+- Scissors: {hand_stats.get('scissors', {}).get('wins', 0)}W-{hand_stats.get('scissors', {}).get('losses', 0)}L-{hand_stats.get('scissors', {}).get('ties', 0)}T
+
+Analyze this match with sports commentary. Be slightly humorous but professional. Focus on:
+1. The current state of the competition
+2. Notable patterns or strategies
+3. Momentum and what to watch for next
+
+Respond in 100 words or less. Write like you're commenting live for an ESPN broadcast."""
+
+
+def commentary_key(prompt: str, difficulty: str = '') -> str:
+    """Cache key: digest of everything that shapes the commentary."""
+    digest = hashlib.sha256()
+    for part in (COMMENTARY_MODEL, difficulty, prompt):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _completion(client, prompt: str, stream: bool = False):
+    return client.chat.completions.create(
+        model=COMMENTARY_MODEL,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=300,
+        temperature=0.8,
+        stream=stream
+    )
+
+
+def generate_commentary(api_key: str, prompt: str) -> str:
+    """Call the OpenAI chat API (blocking) and return the commentary text."""
+    response = OPENAI_GATEWAY.call(api_key, lambda client: _completion(client, prompt))
+    return response.choices[0].message.content
+
+
+def stream_commentary(api_key: str, prompt: str, on_token: Callable[[str], None],
+                      cancelled: threading.Event = None) -> str:
+    """
+    Call the OpenAI chat API with streaming and pass each piece of text to
+    on_token as it arrives (blocking until the stream ends).
+
+    Retries and the circuit breaker cover opening the stream; a failure
+    after the first token is raised as is. Setting cancelled stops reading
+    and closes the upstream connection.
+
+    Returns:
+        str: The whole commentary (shorter if cancelled)
+    """
+    stream = OPENAI_GATEWAY.call(api_key, lambda client: _completion(client, prompt, stream=True))
+    parts = []
+    try:
+        for chunk in stream:
+            if cancelled is not None and cancelled.is_set():
+                break
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if text:
+                parts.append(text)
+                on_token(text)
+    finally:
+        stream.close()
+    return ''.join(parts)
+
+
+class CommentaryStream(Future):
+    """
+    Future of a streamed commentary call that keeps its tokens for readers.
+
+    Every reader can read every token from the first one on, so requests
+    that join a stream already in flight (through CommentaryCache.fetch)
+    still get the whole text. The upstream is stopped once all readers
+    have left before the end; the call then fails with CommentaryTimeout
+    instead of leaving a truncated answer in the cache.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.tokens = []
+        self.readers = 0
+        self.stop = threading.Event()
+        self._changed = threading.Condition()
+
+    def start(self, pool: 'CommentaryPool', api_key: str, prompt: str) -> 'CommentaryStream':
+        """Run stream_commentary on pool; raises CommentaryBusy if it is full."""
+        call = pool.submit(stream_commentary, api_key, prompt, self._append, self.stop)
+        call.add_done_callback(self._end)
+        return self
+
+    def join(self):
+        with self._changed:
+            self.readers += 1
+
+    def leave(self):
+        with self._changed:
+            self.readers -= 1
+            if self.readers == 0 and not self.done():
+                self.stop.set()
+
+    def next_token(self, index: int, timeout: float):
+        """
+        Token number index, or None once the stream has ended.
+
+        Raises:
+            CommentaryTimeout: Nothing new within timeout seconds
+        """
+        with self._changed:
+            if not self._changed.wait_for(lambda: index < len(self.tokens) or self.done(), timeout):
+                raise CommentaryTimeout()
+            return self.tokens[index] if index < len(self.tokens) else None
+
+    def _append(self, token: str):
+        with self._changed:
+            self.tokens.append(token)
+            self._changed.notify_all()
+
+    def _end(self, call: Future):
+        if call.exception() is not None:
+            self.set_exception(call.exception())
+        elif self.stop.is_set():
+            self.set_exception(CommentaryTimeout())
+        else:
+            self.set_result(call.result())
+        with self._changed:
+            self._changed.notify_all()
+
+
+# Process-wide pool, cache and gateway used by app.py
+COMMENTARY_POOL = CommentaryPool(
+    max_workers=int(os.environ.get('RPS_COMMENTARY_WORKERS', 4)),
+    timeout=float(os.environ.get('RPS_COMMENTARY_TIMEOUT', 20))
+)
+
+COMMENTARY_CACHE = CommentaryCache(
+    max_entries=int(os.environ.get('RPS_COMMENTARY_CACHE_SIZE', 256)),
+    ttl=float(os.environ.get('RPS_COMMENTARY_CACHE_TTL', 60))
+)
+
+OPENAI_GATEWAY = OpenAIGateway(
+    connect_timeout=float(os.environ.get('RPS_OPENAI_CONNECT_TIMEOUT', 3)),
+    read_timeout=float(os.environ.get('RPS_OPENAI_READ_TIMEOUT', 15)),
+    retries=int(os.environ.get('RPS_OPENAI_RETRIES', 2)),
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.environ.get('RPS_OPENAI_BREAKER_FAILURES', 5)),
+        reset_timeout=float(os.environ.get('RPS_OPENAI_BREAKER_RESET', 30))
+    )
+)
@@ -0,0 +1,81 @@
+"""
+Shared Game Engine for the Rock Paper Scissors AI
+
+Integer move encoding and stateful building blocks used by the Flask app,
+the MCP server and the simulation tooling.
+"""
+
+from engine.moves import (
+    ROCK,
+    PAPER,
+    SCISSORS,
+    MOVES,
+    TIE,
+    PLAYER,
+    COMPUTER,
+    RESULTS,
+    encode_move,
+    decode_move,
+    encode_result,
+    decode_result,
+    outcome,
+    counter,
+    determine_winner,
+    get_counter_move,
+    encode_history,
+    decode_history,
+    pack_history,
+    unpack_history
+)
+
+from engine.context_tree import ContextTree
+from engine.lookup import LookupTable, exact_distribution
+from engine.player_model import PlayerModel
+from engine.window import MoveWindow
+from engine.rng import derive_seed, make_rng, make_generator, thread_rng
+from engine.sessions import Session, SessionStore
+from engine.snapshot import dump_model, load_model
+from engine.persistence import SessionBackend, SQLiteBackend, RedisBackend, open_backend
+from engine.autoplayer import AUTO_PLAYER_STRATEGIES, auto_player_move
+
+__all__ = [
+    'ROCK',
+    'PAPER',
+    'SCISSORS',
+    'MOVES',
+    'TIE',
+    'PLAYER',
+    'COMPUTER',
+    'RESULTS',
+    'encode_move',
+    'decode_move',
+    'encode_result',
+    'decode_result',
+    'outcome',
+    'counter',
+    'determine_winner',
+    'get_counter_move',
+    'encode_history',
+    'decode_history',
+    'pack_history',
+    'unpack_history',
+    'ContextTree',
+    'LookupTable',
+    'exact_distribution',
+    'PlayerModel',
+    'MoveWindow',
+    'derive_seed',
+    'make_rng',
+    'make_generator',
+    'thread_rng',
+    'Session',
+    'SessionStore',
+    'dump_model',
+    'load_model',
+    'SessionBackend',
+    'SQLiteBackend',
+    'RedisBackend',
+    'open_backend',
+    'AUTO_PLAYER_STRATEGIES',
+    'auto_player_move'
+]
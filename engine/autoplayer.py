@@ -0,0 +1,62 @@
+"""
+Auto-Play Player Strategies
+
+The simulated "player" side of auto-play, ported from the client-side
+auto-player in static/script.js so whole auto-play games can run on the
+server (/api/autoplay). Strategies read the opponent's recent moves from
+the session's PlayerModel (where the opponent is the computer) and return
+move codes.
+"""
+
+import random
+
+from engine.moves import COMPUTER, PLAYER, counter
+from engine.player_model import PlayerModel
+
+AUTO_PLAYER_STRATEGIES = ('easy', 'medium', 'hard', 'veryhard')
+
+
+def _most_common(moves) -> int:
+    """Most common move; ties go to the one seen last (as the JS reduce does)."""
+    counts = {}
+    for move in moves:
+        counts[move] = counts.get(move, 0) + 1
+    best = None
+    for move in counts:
+        if best is None or not counts[best] > counts[move]:
+            best = move
+    return best
+
+
+def auto_player_move(strategy: str, model: PlayerModel, rng=random) -> int:
+    """
+    Next move of the auto-player.
+
+    Args:
+        strategy: One of AUTO_PLAYER_STRATEGIES ('veryhard' plays randomly,
+                  as in the client)
+        model: The session's model (player = auto-player, computer = opponent)
+        rng: Random source
+
+    Returns:
+        Move code
+    """
+    if strategy == 'medium' and model.rounds >= 3:
+        # Counter the opponent's most common recent choice 70% of the time
+        most_common = _most_common(model.computer_moves[-10:])
+        if rng.random() < 0.7:
+            return counter(most_common)
+        return rng.randrange(3)
+
+    if strategy == 'hard' and model.rounds >= 5:
+        last_computer = model.last_computer_move
+        last_result = model.last_result
+        if last_result == COMPUTER and rng.random() < 0.6:
+            # Opponent repeats after winning
+            return counter(last_computer)
+        elif last_result == PLAYER and rng.random() < 0.6:
+            # Opponent switches to the next move after losing
+            return counter(counter(last_computer))
+        return counter(_most_common(model.computer_moves[-5:]))
+
+    return rng.randrange(3)
@@ -0,0 +1,286 @@
+"""
+Batched (NumPy) Very Hard Strategy
+
+Decides the next move for N independent games in a single vectorized
+call. The decision logic mirrors ai_very_hard_parameterized in
+optimization/ai_strategies.py feature for feature (Markov, opponent
+modeling, level-k, frequency, win-stay, lose-shift, cycles, anti-triple
+and ensemble voting, including its tie-breaking), so simulations can
+advance thousands of games in lockstep.
+
+Requires numpy (see testing/requirements.txt).
+"""
+
+from typing import Optional
+
+from engine.moves import COMPUTER, PAPER, PLAYER
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Rounds of per-game history kept in the window arrays. Matches
+# PlayerModel.MAX_WINDOW: the largest window any feature reads.
+WINDOW = 20
+
+# Marks window slots before the first round
+EMPTY = -1
+
+# Larger than any round index; marks transitions never observed
+_NEVER = np.iinfo(np.int32).max if NUMPY_AVAILABLE else None
+
+
+class BatchState:
+    """
+    Aggregate state for N games advanced in lockstep.
+
+    Attributes:
+        moves: int8[N, WINDOW] player move codes, newest in the last
+               column, EMPTY before the first round
+        results: int8[N, WINDOW] result codes aligned with moves
+        rounds: int32[N] rounds played per game
+        transitions: int32[N, 3, 3] counts of previous -> next player move
+        transition_first: int32[N, 3, 3] round at which each transition was
+                          first seen (breaks Markov ties like the scalar code)
+    """
+
+    def __init__(self, num_games: int):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("BatchState requires numpy. Run: pip install numpy")
+
+        self.num_games = num_games
+        self.moves = np.full((num_games, WINDOW), EMPTY, dtype=np.int8)
+        self.results = np.full((num_games, WINDOW), EMPTY, dtype=np.int8)
+        self.rounds = np.zeros(num_games, dtype=np.int32)
+        self.transitions = np.zeros((num_games, 3, 3), dtype=np.int32)
+        self.transition_first = np.full((num_games, 3, 3), _NEVER, dtype=np.int32)
+
+    def record(self, player, computer):
+        """
+        Record one round for every game.
+
+        Args:
+            player: int array [N] of player move codes
+            computer: int array [N] of computer move codes
+        """
+        player = np.asarray(player, dtype=np.int8)
+        computer = np.asarray(computer, dtype=np.int8)
+        result = ((player.astype(np.int16) - computer) % 3).astype(np.int8)
+
+        games = np.nonzero(self.rounds > 0)[0]
+        previous = self.moves[games, -1]
+        following = player[games]
+        self.transitions[games, previous, following] += 1
+        first = self.transition_first[games, previous, following]
+        self.transition_first[games, previous, following] = np.minimum(first, self.rounds[games])
+
+        self.moves[:, :-1] = self.moves[:, 1:]
+        self.moves[:, -1] = player
+        self.results[:, :-1] = self.results[:, 1:]
+        self.results[:, -1] = result
+        self.rounds += 1
+
+
+def _window_counts(window):
+    """Per-move counts [N, 3] and first index [N, 3] within a window [N, w]."""
+    # One 2-D mask per move is much cheaper than a [N, w, 3] comparison
+    hits = [window == move for move in range(3)]
+    counts = np.stack([np.count_nonzero(hit, axis=1) for hit in hits], axis=1)
+    first = np.stack([hit.argmax(axis=1) for hit in hits], axis=1)
+    first = np.where(counts > 0, first, window.shape[1])
+    return counts, first
+
+
+def _most_common(window):
+    """Most common move per row with ties to the earliest, and its count."""
+    counts, first = _window_counts(window)
+    # Higher count wins; equal counts go to the smaller first index
+    key = counts * (window.shape[1] + 1) - first
+    move = key.argmax(axis=1)
+    return move, np.take_along_axis(counts, move[:, None], axis=1)[:, 0]
+
+
+def very_hard_moves(state: BatchState, params, rng: Optional['np.random.Generator'] = None):
+    """
+    Choose the next computer move for every game in a batch.
+
+    Args:
+        state: BatchState for the N games
+        params: VeryHardHyperparameters (or any object with the same fields)
+        rng: numpy Generator for the stochastic parts (fresh one if omitted)
+
+    Returns:
+        int8 array [N] of move codes
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    n = state.num_games
+    rows = np.arange(n)
+    rounds = state.rounds
+    moves = state.moves.astype(np.int16)
+    results = state.results
+    last = moves[:, -1]
+
+    # Ensemble accumulators, filled in the scalar code's predictor order
+    scores = np.zeros((n, 3))
+    votes = np.zeros((n, 3), dtype=np.int32)
+    first_vote = np.full((n, 3), 99, dtype=np.int32)
+    predictor = [0]
+
+    def vote(mask, move, confidence):
+        move = np.broadcast_to(move, (n,))[mask]
+        confidence = np.broadcast_to(confidence, (n,))[mask]
+        idx = rows[mask]
+        scores[idx, move] += confidence
+        votes[idx, move] += 1
+        first_vote[idx, move] = np.minimum(first_vote[idx, move], predictor[0])
+        predictor[0] += 1
+
+    # FEATURE 1: MARKOV CHAIN PREDICTION
+    safe_last = np.where(last >= 0, last, 0)
+    row = state.transitions[rows, safe_last]
+    row_first = state.transition_first[rows, safe_last]
+    total = row.sum(axis=1)
+    most_likely = (row.astype(np.int64) * (2 ** 32) - row_first).argmax(axis=1)
+    probability = row[rows, most_likely] / np.maximum(total, 1)
+    markov = (rounds >= 10) & (total > 0)
+    strong = markov & (probability >= params.markov_strong_threshold)
+    moderate = markov & ~strong & (probability >= params.markov_moderate_threshold)
+    confidence = np.where(
+        strong,
+        params.markov_strong_base_confidence
+        + (probability - params.markov_strong_threshold) * params.markov_strong_scaling,
+        params.markov_moderate_base_confidence
+        + (probability - params.markov_moderate_threshold) * params.markov_moderate_scaling
+    )
+    vote(strong | moderate, (most_likely + 1) % 3, confidence)
+
+    # FEATURE 2: OPPONENT MODELING
+    counts_20, first_20 = _window_counts(moves[:, -20:])
+    total_20 = counts_20.sum(axis=1)
+    distinct = (counts_20 > 0).sum(axis=1)
+    ordered = np.sort(counts_20, axis=1)
+    two_ratio = ordered[:, 1] / np.maximum(ordered[:, 2], 1)
+    # Sum the variance terms in first-appearance order, like the scalar code
+    expected = total_20 / 3
+    terms = np.take_along_axis((counts_20 - expected[:, None]) ** 2, np.argsort(first_20, axis=1), axis=1)
+    variance = (terms[:, 0] + terms[:, 1] + terms[:, 2]) / 3
+    max_variance = (total_20 ** 2) / 3
+    three_score = 1.0 - variance / np.maximum(max_variance, 1)
+    randomness = np.where(distinct == 1, 0.0, np.where(distinct == 2, two_ratio, three_score))
+    modeled = rounds >= 15
+    predictable = modeled & (randomness < params.predictable_threshold)
+    random_play = modeled & ~predictable & (randomness > params.random_threshold)
+    most_common_15, _ = _most_common(moves[:, -15:])
+    nash_moves = rng.integers(0, 3, size=n)
+    vote(predictable | random_play,
+         np.where(predictable, (most_common_15 + 1) % 3, nash_moves),
+         np.where(predictable, params.predictable_confidence, params.random_confidence))
+
+    # FEATURE 3: COUNTER-COUNTER PREDICTION (Level-K Reasoning)
+    level_k = rounds >= 12
+    most_common_12, _ = _most_common(moves[:, -12:])
+    counter_ai_counter = (most_common_12 + 2) % 3
+    counter_counter_freq = (moves[:, -12:] == counter_ai_counter[:, None]).sum(axis=1) / 12
+    vote(level_k & (counter_counter_freq >= params.level_k_threshold),
+         (counter_ai_counter + 1) % 3, params.level_k_confidence)
+    counts_6, _ = _window_counts(moves[:, -6:])
+    balanced = level_k & (counts_6 == 2).all(axis=1)
+    vote(balanced, rng.integers(0, 3, size=n), params.sophistication_confidence)
+
+    # FEATURE 4: ENHANCED PATTERN DETECTION
+    # Strong Frequency Bias
+    most_common_freq, count_15 = _most_common(moves[:, -15:])
+    frequency = count_15 / np.minimum(rounds, 15).clip(min=1)
+    biased = rounds >= 8
+    strong = biased & (frequency >= params.strong_frequency_threshold)
+    moderate = biased & ~strong & (frequency >= params.moderate_frequency_threshold)
+    weak = biased & ~strong & ~moderate & (frequency >= params.weak_frequency_threshold)
+    vote(strong | moderate | weak, (most_common_freq + 1) % 3,
+         np.where(strong, params.strong_frequency_confidence,
+                  np.where(moderate, params.moderate_frequency_confidence, params.weak_frequency_confidence)))
+
+    # Win-Stay / Lose-Shift over the last 12 rounds
+    pair_moves = moves[:, -12:]
+    pair_results = results[:, -12:-1]
+    stayed = pair_moves[:, :-1] == pair_moves[:, 1:]
+    last_result = results[:, -1]
+
+    wins = pair_results == PLAYER
+    win_opportunities = wins.sum(axis=1)
+    win_stay_rate = (wins & stayed).sum(axis=1) / np.maximum(win_opportunities, 1)
+    win_stay = ((rounds >= 6) & (last_result == PLAYER) & (win_opportunities > 0)
+                & (win_stay_rate >= params.win_stay_threshold))
+    vote(win_stay, (last + 1) % 3,
+         params.win_stay_base_confidence
+         + (win_stay_rate - params.win_stay_threshold) * params.win_stay_confidence_scaling)
+
+    losses = pair_results == COMPUTER
+    lose_opportunities = losses.sum(axis=1)
+    lose_shift_rate = (losses & ~stayed).sum(axis=1) / np.maximum(lose_opportunities, 1)
+    lose_shift = ((rounds >= 6) & (last_result == COMPUTER) & (lose_opportunities > 0)
+                  & (lose_shift_rate >= params.lose_shift_threshold))
+    vote(lose_shift, (last + 2) % 3,
+         params.lose_shift_base_confidence
+         + (lose_shift_rate - params.lose_shift_threshold) * params.lose_shift_confidence_scaling)
+
+    # Advanced Cycle Detection
+    cycles = rounds >= 6
+    cycle_3 = cycles & (moves[:, -6:-3] == moves[:, -3:]).all(axis=1)
+    vote(cycle_3, (moves[:, -2] + 1) % 3, params.cycle_3_confidence)
+    cycle_2 = cycles & (moves[:, -4] == moves[:, -2]) & (moves[:, -3] == moves[:, -1])
+    vote(cycle_2, (moves[:, -2] + 1) % 3, params.cycle_2_confidence)
+
+    # Anti-Triple Pattern
+    anti_triple = (rounds >= 2) & (moves[:, -2] == moves[:, -1])
+    vote(anti_triple, (last + 2) % 3, params.anti_triple_confidence)
+
+    # ENSEMBLE VOTING SYSTEM
+    scores = scores + votes * params.vote_bonus_per_predictor
+    voted = votes > 0
+    best_score = np.where(voted, scores, -np.inf).max(axis=1)
+    # Ties go to the move whose first vote came earliest
+    tied = voted & (scores == best_score[:, None])
+    best_move = np.where(tied, first_vote, 99).argmin(axis=1)
+
+    rate = np.select(
+        [best_score >= params.exploitation_very_high_threshold,
+         best_score >= params.exploitation_high_threshold,
+         best_score >= params.exploitation_moderate_threshold,
+         best_score >= params.exploitation_low_threshold],
+        [params.exploitation_very_high_rate,
+         params.exploitation_high_rate,
+         params.exploitation_moderate_rate,
+         params.exploitation_low_rate],
+        default=0.0
+    )
+    exploit = voted.any(axis=1) & (rng.random(n) < rate)
+
+    # Fallback: Random choice (Nash equilibrium), and the early-game rules
+    choice = np.where(exploit, best_move, rng.integers(0, 3, size=n))
+    choice = np.where(rounds < 5, rng.integers(0, 3, size=n), choice)
+    choice = np.where(rounds < 2, PAPER, choice)
+    return choice.astype(np.int8)
+
+
+def play_round(state: BatchState, player, params, rng=None):
+    """
+    Play one round of every game: decide, score and record it.
+
+    Args:
+        state: BatchState for the N games
+        player: int array [N] of player move codes for this round
+        params: VeryHardHyperparameters
+        rng: numpy Generator
+
+    Returns:
+        (computer_moves, results) int8 arrays [N]
+    """
+    computer = very_hard_moves(state, params, rng)
+    player = np.asarray(player, dtype=np.int8)
+    state.record(player, computer)
+    return computer, state.results[:, -1].copy()
+
@@ -0,0 +1,127 @@
+"""
+Variable-Order Context Tree
+
+Predicts a player's next move from the longest recent context of
+(player move, result) rounds that has been seen often enough. Contexts are
+stored in a suffix trie keyed newest round first, so the nodes for every
+order 0..depth lie on a single root-to-leaf path: recording a round and
+predicting the next one each walk that path once, O(depth) per round.
+
+The trie is memory-bounded: once it grows past max_nodes, every count is
+halved and nodes whose count drops to zero are removed. Rare contexts go
+first, and old habits fade so long sessions keep tracking the player.
+"""
+
+from collections import deque
+from typing import Optional, Tuple
+
+
+class _Node:
+    """One context: next-move counts plus children keyed by the round before it."""
+
+    __slots__ = ('counts', 'total', 'children')
+
+    def __init__(self):
+        self.counts = [0, 0, 0]
+        self.total = 0
+        self.children = {}
+
+
+class ContextTree:
+    """
+    Suffix trie over a player's (move, result) stream.
+
+    Call record() once per finished round and predict() before the next.
+
+    Args:
+        depth: Longest context, in rounds
+        max_nodes: Node budget; exceeding it triggers pruning
+    """
+
+    def __init__(self, depth: int = 5, max_nodes: int = 4096):
+        self.depth = depth
+        self.max_nodes = max_nodes
+        self.root = _Node()
+        self.size = 1
+        self.prunes = 0
+
+        # Context symbols (player * 3 + result) of the last `depth` rounds
+        self._context = deque(maxlen=depth)
+
+    def record(self, player: int, result: int):
+        """
+        Record one finished round.
+
+        Args:
+            player: Player move code
+            result: Result code of the round
+        """
+        node = self.root
+        node.counts[player] += 1
+        node.total += 1
+        for symbol in reversed(self._context):
+            child = node.children.get(symbol)
+            if child is None:
+                child = node.children[symbol] = _Node()
+                self.size += 1
+            node = child
+            node.counts[player] += 1
+            node.total += 1
+        self._context.append(player * 3 + result)
+
+        if self.size > self.max_nodes:
+            self._prune()
+
+    def predict(self, min_count: int = 3, min_depth: int = 1) -> Tuple[Optional[int], float, int]:
+        """
+        Predict the player's next move from the deepest well-observed context.
+
+        Args:
+            min_count: Observations a context needs before it is trusted
+            min_depth: Shortest context considered (1 skips plain frequency)
+
+        Returns:
+            tuple: (predicted_move, probability, context_depth)
+            or (None, 0, 0) if no context qualifies
+        """
+        node = self.root
+        best = node if min_depth == 0 and node.total >= min_count else None
+        best_depth = 0
+        for order, symbol in enumerate(reversed(self._context), 1):
+            node = node.children.get(symbol)
+            if node is None or node.total < min_count:
+                # Deeper contexts are seen no more often than this one
+                break
+            if order >= min_depth:
+                best, best_depth = node, order
+
+        if best is None:
+            return None, 0, 0
+        counts = best.counts
+        move = max(range(3), key=counts.__getitem__)
+        return move, counts[move] / best.total, best_depth
+
+    def _prune(self):
+        """Halve every count and drop emptied nodes until well under budget."""
+        target = self.max_nodes * 3 // 4
+        while self.size > target:
+            self.size = 1 + self._halve(self.root)
+            self.prunes += 1
+
+    def _halve(self, node: _Node) -> int:
+        """Halve counts below node; return how many descendants survive."""
+        counts = node.counts
+        counts[0] >>= 1
+        counts[1] >>= 1
+        counts[2] >>= 1
+        node.total = counts[0] + counts[1] + counts[2]
+
+        survivors = 0
+        for symbol, child in list(node.children.items()):
+            if max(child.counts) < 2:
+                # Halves to all zeros, and so does everything below it
+                # (a child never counts a move more often than its parent)
+                del node.children[symbol]
+            else:
+                survivors += 1 + self._halve(child)
+        return survivors
@@ -0,0 +1,186 @@
+"""
+Precompiled Lookup-Table Strategies
+
+Many strategies only read a bounded window of the game (the last few
+moves and results plus a handful of summary codes). For those, the
+decision is fully described by a probability distribution over
+rock/paper/scissors per window state, so it can be compiled once and then
+replayed with one table lookup and one random draw.
+
+Distributions are compiled from the reference strategy itself: the
+strategy is re-run with a probe in place of the random module that walks
+every branch its random draws can take and multiplies out the exact
+probability of each path. The strategy must take the random source as an
+``rng`` argument and only use ``rng.random()`` in comparisons and
+``rng.randrange(3)``.
+"""
+
+import random
+import threading
+from functools import partial
+from typing import Callable, Hashable, List, Optional, Tuple
+
+Distribution = Tuple[float, float, float]
+
+
+class _Draw:
+    """A value of rng.random() that branches on every comparison made with it."""
+
+    def __init__(self, probe: '_ProbeRandom'):
+        self.probe = probe
+        self.low = 0.0
+        self.high = 1.0
+
+    def __lt__(self, threshold):
+        span = self.high - self.low
+        p_below = min(max((threshold - self.low) / span, 0.0), 1.0)
+        below = self.probe.branch([(True, p_below), (False, 1.0 - p_below)])
+        if below:
+            self.high = min(self.high, threshold)
+        else:
+            self.low = max(self.low, threshold)
+        return below
+
+    # Ties have probability zero for a continuous draw
+    __le__ = __lt__
+
+    def __gt__(self, threshold):
+        return not self.__lt__(threshold)
+
+    __ge__ = __gt__
+
+
+class _ProbeRandom:
+    """
+    Stand-in for the random module that follows one scripted path.
+
+    Branch points past the end of the script take their first feasible
+    option; the options seen at every branch point are kept so the caller
+    can queue the paths not taken.
+    """
+
+    def __init__(self, script: Tuple[int, ...]):
+        self.script = script
+        self.path = []
+        self.options = []
+        self.probability = 1.0
+
+    def branch(self, options):
+        options = [option for option in options if option[1] > 0]
+        depth = len(self.path)
+        index = self.script[depth] if depth < len(self.script) else 0
+        value, probability = options[index]
+        self.path.append(index)
+        self.options.append(options)
+        self.probability *= probability
+        return value
+
+    def random(self):
+        return _Draw(self)
+
+    def randrange(self, n):
+        return self.branch([(i, 1.0 / n) for i in range(n)])
+
+
+def exact_distribution(decide: Callable, model, fallback: Optional[Distribution] = None) -> Distribution:
+    """
+    Exact probability of each move code a strategy can return.
+
+    Args:
+        decide: Strategy as decide(model, rng) -> move code
+        model: PlayerModel to decide for (only read)
+        fallback: Distribution to spread a path over when decide() returns
+                  None (lets a strategy defer its fallback to the caller)
+
+    Returns:
+        tuple: (p_rock, p_paper, p_scissors)
+    """
+    distribution = [0.0, 0.0, 0.0]
+    pending = [()]
+    while pending:
+        script = pending.pop()
+        probe = _ProbeRandom(script)
+        move = decide(model, probe)
+        if move is None:
+            for code in range(3):
+                distribution[code] += probe.probability * fallback[code]
+        else:
+            distribution[move] += probe.probability
+
+        # Queue the alternatives of every branch point this run discovered
+        for depth in range(len(script), len(probe.path)):
+            for index in range(1, len(probe.options[depth])):
+                pending.append(tuple(probe.path[:depth]) + (index,))
+    return tuple(distribution)
+
+
+def sample(distribution: Distribution, rng=random) -> int:
+    """Draw one move code from a distribution with a single rng.random() call."""
+    draw = rng.random()
+    if draw < distribution[0]:
+        return 0
+    if draw < distribution[0] + distribution[1]:
+        return 1
+    return 2
+
+
+class LookupTable:
+    """
+    Memoized distributions of a windowed strategy.
+
+    Hits are a plain dict read with no lock; only compiling a new state
+    takes the lock, and when the table is full the oldest compiled state
+    is dropped.
+
+    Args:
+        decide: Reference strategy as decide(model, rng) -> move code
+        key: Function mapping a model to a hashable encoding of everything
+             decide() reads; models with equal keys must get equal
+             distributions
+        max_entries: Compiled states kept (oldest go first)
+        compiler: Optional faster compiler(model) -> distribution; must agree
+                  with exact_distribution(decide, model)
+    """
+
+    def __init__(self, decide: Callable, key: Callable[..., Hashable], max_entries: int = 65536,
+                 compiler: Optional[Callable] = None):
+        self.decide = decide
+        self.key = key
+        self.compiler = compiler or partial(exact_distribution, decide)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._table = {}  # Insertion order is compile order
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._table)
+
+    def distribution(self, model) -> Distribution:
+        """Compiled distribution for the model's current window state."""
+        state = self.key(model)
+        distribution = self._table.get(state)
+        if distribution is not None:
+            self.hits += 1
+            return distribution
+
+        distribution = self.compiler(model)
+        with self._lock:
+            self.misses += 1
+            table = self._table
+            if state not in table:
+                table[state] = distribution
+                if len(table) > self.max_entries:
+                    del table[next(iter(table))]
+        return distribution
+
+    def choose(self, model, rng=random) -> int:
+        """A move code drawn from the compiled distribution (one random draw)."""
+        return sample(self.distribution(model), rng)
+
+    def compile(self, models: List) -> int:
+        """Precompile the states of the given models; returns how many were new."""
+        before = self.misses
+        for model in models:
+            self.distribution(model)
+        return self.misses - before
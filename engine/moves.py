@@ -0,0 +1,149 @@
+"""
+Integer Move and Result Encoding
+
+Moves are encoded as 0/1/2 (rock/paper/scissors) so that every rule of the
+game is modular arithmetic:
+
+    outcome(player, computer) == (player - computer) % 3
+    counter(move)             == (move + 1) % 3
+
+Strings are only produced at the API boundary via decode_move() and
+decode_result(); the AI strategies and simulators work on codes throughout.
+"""
+
+import base64
+from typing import Dict, List, Sequence, Tuple
+
+# Move codes
+ROCK, PAPER, SCISSORS = 0, 1, 2
+MOVES = ('rock', 'paper', 'scissors')
+MOVE_CODES = {move: code for code, move in enumerate(MOVES)}
+
+# Result codes, chosen so that outcome() is a single subtraction
+TIE, PLAYER, COMPUTER = 0, 1, 2
+RESULTS = ('tie', 'player', 'computer')
+RESULT_CODES = {result: code for code, result in enumerate(RESULTS)}
+
+
+def encode_move(move: str) -> int:
+    """Convert 'rock' / 'paper' / 'scissors' to its move code."""
+    return MOVE_CODES[move]
+
+
+def decode_move(code: int) -> str:
+    """Convert a move code back to its name."""
+    return MOVES[code]
+
+
+def encode_result(result: str) -> int:
+    """Convert 'tie' / 'player' / 'computer' to its result code."""
+    return RESULT_CODES[result]
+
+
+def decode_result(code: int) -> str:
+    """Convert a result code back to its name."""
+    return RESULTS[code]
+
+
+def outcome(player: int, computer: int) -> int:
+    """Result code of a round given both move codes."""
+    return (player - computer) % 3
+
+
+def counter(move: int) -> int:
+    """Code of the move that beats the given move code."""
+    return (move + 1) % 3
+
+
+def determine_winner(player_choice: str, computer_choice: str) -> str:
+    """Determine the winner of a round ('player', 'computer' or 'tie')."""
+    return RESULTS[(MOVE_CODES[player_choice] - MOVE_CODES[computer_choice]) % 3]
+
+
+def get_counter_move(predicted_move: str) -> str:
+    """Get the move that beats the predicted move."""
+    return MOVES[(MOVE_CODES[predicted_move] + 1) % 3]
+
+
+# ============================================================
+# COMPACT HISTORY
+# ============================================================
+# One byte per round: bits 0-1 player move, bits 2-3 computer move,
+# bits 4-5 result.
+
+def pack_round(player: int, computer: int, result: int) -> int:
+    """Pack one round of codes into a single byte."""
+    return player | (computer << 2) | (result << 4)
+
+
+def unpack_round(packed: int):
+    """Unpack a byte produced by pack_round() into (player, computer, result)."""
+    return packed & 3, (packed >> 2) & 3, (packed >> 4) & 3
+
+
+def encode_history(history: List[Dict]) -> bytearray:
+    """Encode a list of game dictionaries as one packed byte per round."""
+    return bytearray(
+        pack_round(MOVE_CODES[game['player']], MOVE_CODES[game['computer']], RESULT_CODES[game['result']])
+        for game in history
+    )
+
+
+def decode_history(data: bytes) -> List[Dict]:
+    """Decode packed rounds back into game dictionaries."""
+    history = []
+    for packed in data:
+        player, computer, result = unpack_round(packed)
+        history.append({
+            'player': MOVES[player],
+            'computer': MOVES[computer],
+            'result': RESULTS[result]
+        })
+    return history
+
+
+# ============================================================
+# PACKED WIRE FORMAT
+# ============================================================
+# History as sent by clients: two bits per move, four moves per byte
+# (lowest bits first), each round's player move followed by its computer
+# move, base64 encoded. Unused slots of the last byte hold 3 (not a move),
+# so the round count needs no separate field. Results are implied by the
+# moves. About 0.7 characters per round instead of ~50 for game dicts.
+
+NO_MOVE = 3
+
+# Byte value -> its four 2-bit slots
+_BYTE_SLOTS = [bytes((value >> shift) & 3 for shift in (0, 2, 4, 6)) for value in range(256)]
+
+
+def pack_history(player_moves: Sequence[int], computer_moves: Sequence[int]) -> str:
+    """Encode two equal-length sequences of move codes in the packed wire format."""
+    slots = bytearray(2 * len(player_moves))
+    slots[0::2] = bytes(player_moves)
+    slots[1::2] = bytes(computer_moves)
+    slots.extend([NO_MOVE] * (-len(slots) % 4))
+    data = bytes(
+        slots[i] | (slots[i + 1] << 2) | (slots[i + 2] << 4) | (slots[i + 3] << 6)
+        for i in range(0, len(slots), 4)
+    )
+    return base64.b64encode(data).decode('ascii')
+
+
+def unpack_history(text: str) -> Tuple[bytearray, bytearray]:
+    """
+    Decode the packed wire format into (player_moves, computer_moves).
+
+    Raises:
+        ValueError: Not valid base64, or slots that do not form whole rounds
+    """
+    data = base64.b64decode(text, validate=True)
+    slots = bytearray(b''.join(_BYTE_SLOTS[value] for value in data))
+    end = slots.find(NO_MOVE)
+    if end != -1:
+        if end % 2 or len(slots) - end > 3 or slots.count(NO_MOVE) != len(slots) - end:
+            raise ValueError('Malformed packed history')
+        del slots[end:]
+    elif len(slots) % 2:
+        raise ValueError('Malformed packed history')
+    return slots[0::2], slots[1::2]
@@ -0,0 +1,210 @@
+"""
+Shared Session Backends
+
+Storage behind SessionStore (engine/sessions.py) for deployments that run
+several worker processes (gunicorn) or must survive worker recycling.
+Sessions are stored as binary PlayerModel snapshots (engine/snapshot.py)
+together with their round count, which serves as the version: a worker
+re-reads a session only when another worker has played a round since.
+
+Backends:
+    SQLiteBackend - a local SQLite file in WAL mode, shared by every
+                    worker on the host
+    RedisBackend  - any Redis-protocol server (Redis, Valkey, KeyDB, or a
+                    local stand-in such as testing/fake_redis.py) via a
+                    redis-py style client
+
+open_backend(url) picks one from a URL: sqlite:///path/to/file.db or
+redis://host:port/db.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from engine.snapshot import HEADER_SIZE, snapshot_rounds
+
+
+class SessionBackend:
+    """
+    Interface of a shared snapshot store.
+
+    Snapshots carry their round count in a fixed-size header, so version()
+    can be answered without transferring the whole snapshot.
+    """
+
+    def version(self, session_id: str) -> Optional[int]:
+        """Round count of the stored snapshot, or None if absent/expired."""
+        raise NotImplementedError
+
+    def load(self, session_id: str) -> Optional[bytes]:
+        """Stored snapshot, or None if absent/expired."""
+        raise NotImplementedError
+
+    def save_many(self, snapshots: Dict[str, bytes]):
+        """Write a batch of snapshots in one round trip / transaction."""
+        raise NotImplementedError
+
+    def delete(self, session_id: str):
+        """Remove a session."""
+        raise NotImplementedError
+
+    def close(self):
+        """Release connections."""
+
+
+class SQLiteBackend(SessionBackend):
+    """
+    Snapshots in a local SQLite database in WAL mode.
+
+    WAL lets every worker read while one writes, and each batch of
+    snapshots is committed in a single transaction. Connections are per
+    thread. Sessions idle for longer than ttl are purged as batches are
+    written.
+
+    Args:
+        path: Database file (created if missing)
+        ttl: Seconds an unwritten session is kept
+        purge_interval: Minimum seconds between purges of expired rows
+    """
+
+    def __init__(self, path: str, ttl: float = 1800.0, purge_interval: float = 60.0):
+        self.path = path
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._last_purge = 0.0
+        self._local = threading.local()
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS sessions ('
+                ' id TEXT PRIMARY KEY,'
+                ' rounds INTEGER NOT NULL,'
+                ' data BLOB NOT NULL,'
+                ' updated REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated)')
+
+    def _connection(self) -> sqlite3.Connection:
+        # Per thread and per process: a connection opened before a fork
+        # (gunicorn preload_app) must not be shared with the workers
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30.0)
+            connection.execute('PRAGMA journal_mode=WAL')
+            # Durable at every checkpoint rather than every commit; a crash
+            # loses at most the last few batches, never corrupts the file
+            connection.execute('PRAGMA synchronous=NORMAL')
+            local.connection = connection
+            local.pid = os.getpid()
+        return local.connection
+
+    def version(self, session_id: str) -> Optional[int]:
+        row = self._connection().execute(
+            'SELECT rounds FROM sessions WHERE id = ? AND updated > ?',
+            (session_id, time.time() - self.ttl)
+        ).fetchone()
+        return row[0] if row else None
+
+    def load(self, session_id: str) -> Optional[bytes]:
+        row = self._connection().execute(
+            'SELECT data FROM sessions WHERE id = ? AND updated > ?',
+            (session_id, time.time() - self.ttl)
+        ).fetchone()
+        return row[0] if row else None
+
+    def save_many(self, snapshots: Dict[str, bytes]):
+        now = time.time()
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO sessions (id, rounds, data, updated) VALUES (?, ?, ?, ?)',
+                [(session_id, snapshot_rounds(data), data, now) for session_id, data in snapshots.items()]
+            )
+            if now - self._last_purge >= self.purge_interval:
+                self._last_purge = now
+                connection.execute('DELETE FROM sessions WHERE updated <= ?', (now - self.ttl,))
+
+    def delete(self, session_id: str):
+        connection = self._connection()
+        with connection:
+            connection.execute('DELETE FROM sessions WHERE id = ?', (session_id,))
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+            self._local.pid = None
+
+
+class RedisBackend(SessionBackend):
+    """
+    Snapshots in a Redis-protocol server, one key per session.
+
+    Works with any client exposing redis-py's get/getrange/set/delete/
+    pipeline methods. Keys expire after ttl seconds without a write; a
+    batch is sent as one pipeline.
+
+    Args:
+        client: redis.Redis (or compatible) client
+        ttl: Seconds a session is kept after its last write
+        prefix: Key prefix
+    """
+
+    def __init__(self, client, ttl: float = 1800.0, prefix: str = 'rps:session:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'RedisBackend':
+        """Connect with redis-py (pip install redis)."""
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("RedisBackend.from_url requires redis. Run: pip install redis")
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def version(self, session_id: str) -> Optional[int]:
+        header = self.client.getrange(self.prefix + session_id, 0, HEADER_SIZE - 1)
+        return snapshot_rounds(header) if header else None
+
+    def load(self, session_id: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + session_id)
+
+    def save_many(self, snapshots: Dict[str, bytes]):
+        pipeline = self.client.pipeline(transaction=False)
+        for session_id, data in snapshots.items():
+            pipeline.set(self.prefix + session_id, data, ex=int(self.ttl))
+        pipeline.execute()
+
+    def delete(self, session_id: str):
+        self.client.delete(self.prefix + session_id)
+
+    def close(self):
+        self.client.close()
+
+
+def open_backend(url: Optional[str], ttl: float = 1800.0) -> Optional[SessionBackend]:
+    """
+    Backend for a URL, or None for in-process sessions only.
+
+    Args:
+        url: sqlite:///relative.db, sqlite:////absolute/path.db,
+             redis://host:port/db (rediss:// for TLS), or None/''
+        ttl: Idle lifetime of stored sessions, in seconds
+    """
+    if not url:
+        return None
+    if url.startswith('sqlite:///'):
+        path = url[len('sqlite:///'):]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return SQLiteBackend(path, ttl)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBackend.from_url(url, ttl=ttl)
+    raise ValueError(f"Unsupported session backend URL: {url}")
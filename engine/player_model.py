@@ -0,0 +1,271 @@
+"""
+Incremental Player Model
+
+Keeps the running statistics the AI strategies read every round, so a
+long session does not rebuild them from the full history on each move.
+Moves and results are stored as integer codes (see engine/moves.py).
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from engine.context_tree import ContextTree
+from engine.moves import (
+    COMPUTER, PLAYER, counter, encode_move, encode_result, outcome, unpack_history
+)
+from engine.window import MoveWindow
+
+
+class PlayerModel:
+    """
+    Running model of one player's behaviour.
+
+    Call update() (game dictionaries) or record() (move codes) once per
+    finished round. Full-history aggregates (overall move counts and Markov
+    transitions) are kept as running counters, and the window sizes the
+    strategies use are kept as sliding-window aggregates (TRACKED_WINDOWS),
+    so every read costs the same no matter how long the game is. Other
+    window sizes up to MAX_WINDOW are answered by slicing recent rounds.
+
+    All moves returned by this class are move codes.
+    """
+
+    # Largest window any strategy reads (opponent modeling uses 20 rounds)
+    MAX_WINDOW = 20
+
+    # Windows read by ai_medium / ai_hard / ai_very_hard, kept up to date
+    # incrementally (see engine/window.py)
+    TRACKED_WINDOWS = (5, 6, 8, 10, 12, 15, 20)
+
+    def __init__(self):
+        self.rounds = 0
+
+        # Recent rounds, newest last; trimmed back to MAX_WINDOW once they
+        # reach twice that, so appends stay amortized O(1)
+        self.moves = bytearray()
+        self.computer_moves = bytearray()
+        self.results = bytearray()
+
+        # Full-history aggregates. The *_order lists remember the order in
+        # which moves were first seen so ties break like Counter.most_common.
+        self.move_counts = [0, 0, 0]
+        self._move_order = []
+        self.transitions = [[0, 0, 0] for _ in range(3)]  # previous -> next counts
+        self._transition_order = [[], [], []]
+
+        self.windows = {size: MoveWindow(size) for size in self.TRACKED_WINDOWS}
+        self._window_list = list(self.windows.values())
+
+        # Variable-order contexts over the (move, result) stream
+        self.context = ContextTree()
+
+    @classmethod
+    def from_history(cls, history: List[Dict]) -> 'PlayerModel':
+        """Build a model by replaying a list of game dictionaries."""
+        model = cls()
+        for game in history:
+            model.update(game)
+        return model
+
+    @classmethod
+    def from_packed(cls, text: str) -> 'PlayerModel':
+        """Build a model from history in the packed wire format (engine/moves.py)."""
+        model = cls()
+        for player, computer in zip(*unpack_history(text)):
+            model.record(player, computer)
+        return model
+
+    def update(self, game: Dict):
+        """
+        Record one finished round given as a game dictionary.
+
+        Args:
+            game: Dict with 'player', 'computer' and 'result' keys
+        """
+        self.record(encode_move(game['player']), encode_move(game['computer']),
+                    encode_result(game['result']))
+
+    def record(self, player: int, computer: int, result: Optional[int] = None):
+        """
+        Record one finished round given as codes.
+
+        Args:
+            player: Player move code
+            computer: Computer move code
+            result: Result code (derived from the moves if omitted)
+        """
+        if result is None:
+            result = outcome(player, computer)
+
+        if self.moves:
+            previous = self.moves[-1]
+            row = self.transitions[previous]
+            if not row[player]:
+                self._transition_order[previous].append(player)
+            row[player] += 1
+
+        if not self.move_counts[player]:
+            self._move_order.append(player)
+        self.move_counts[player] += 1
+
+        self.moves.append(player)
+        self.computer_moves.append(computer)
+        self.results.append(result)
+        self.rounds += 1
+        for window in self._window_list:
+            window.push(player, result)
+        self.context.record(player, result)
+
+        if len(self.moves) >= 2 * self.MAX_WINDOW:
+            del self.moves[:-self.MAX_WINDOW]
+            del self.computer_moves[:-self.MAX_WINDOW]
+            del self.results[:-self.MAX_WINDOW]
+
+    @property
+    def last_move(self) -> Optional[int]:
+        """Player's most recent move, or None before the first round."""
+        return self.moves[-1] if self.moves else None
+
+    @property
+    def last_computer_move(self) -> Optional[int]:
+        """Computer's most recent move, or None before the first round."""
+        return self.computer_moves[-1] if self.computer_moves else None
+
+    @property
+    def last_result(self) -> Optional[int]:
+        """Result of the most recent round, or None before the first round."""
+        return self.results[-1] if self.results else None
+
+    def recent_moves(self, window_size: int) -> bytearray:
+        """Player moves from the last window_size rounds, oldest first."""
+        if window_size > self.MAX_WINDOW:
+            raise ValueError(f"window_size {window_size} exceeds MAX_WINDOW {self.MAX_WINDOW}")
+        return self.moves[-window_size:]
+
+    def window(self, window_size: int) -> MoveWindow:
+        """Sliding-window aggregates for one of TRACKED_WINDOWS."""
+        return self.windows[window_size]
+
+    def window_counts(self, window_size: int) -> Dict[int, int]:
+        """
+        Counts of each move played in the last window_size rounds.
+
+        Keys appear in the order the moves were first played inside the
+        window, like a Counter built from the same moves.
+        """
+        window = self.windows.get(window_size)
+        if window is not None:
+            return window.ordered_counts()
+        recent = self.recent_moves(window_size)
+        return {move: recent.count(move) for move in sorted(set(recent), key=recent.index)}
+
+    def most_common(self, window_size: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Most common player move and its count.
+
+        Ties go to the move seen first, matching Counter.most_common.
+
+        Args:
+            window_size: Rounds to look at, or None for the whole game
+        """
+        if window_size is None:
+            move = max(self._move_order, key=self.move_counts.__getitem__)
+            return move, self.move_counts[move]
+        window = self.windows.get(window_size)
+        if window is not None:
+            return window.most_common()
+        counts = self.window_counts(window_size)
+        move = max(counts, key=counts.get)
+        return move, counts[move]
+
+    def frequency(self, window_size: int = 12) -> Tuple[Optional[int], float, int]:
+        """
+        Frequency bias over the last window_size rounds.
+
+        Returns:
+            tuple: (most_common_move, frequency, total_moves)
+            or (None, 0, 0) if insufficient data
+        """
+        if self.rounds < 3:
+            return None, 0, 0
+
+        total = min(window_size, len(self.moves))
+        most_common_move, count = self.most_common(window_size)
+        return most_common_move, count / total, total
+
+    def win_stay(self, window_size: int = 8) -> Tuple[float, int, Optional[int]]:
+        """
+        Win-stay tendency over the last window_size rounds.
+
+        Returns:
+            tuple: (win_stay_rate, win_opportunities, last_move)
+            or (0, 0, None) if insufficient data or no win opportunities
+        """
+        if self.rounds < 2 or self.last_result != PLAYER:
+            return 0, 0, None
+
+        window = self.windows.get(window_size)
+        if window is not None:
+            win_stay_count, win_opportunities = window.win_stays, window.win_opportunities
+        else:
+            moves = self.recent_moves(window_size)
+            results = self.results[-window_size:]
+            win_stay_count = 0
+            win_opportunities = 0
+            for move, following, result in zip(moves, moves[1:], results):
+                if result == PLAYER:
+                    win_opportunities += 1
+                    if move == following:
+                        win_stay_count += 1
+
+        if win_opportunities == 0:
+            return 0, 0, None
+        return win_stay_count / win_opportunities, win_opportunities, self.last_move
+
+    def lose_shift(self, window_size: int = 8) -> Tuple[float, int, Optional[int]]:
+        """
+        Lose-shift tendency over the last window_size rounds.
+
+        Returns:
+            tuple: (lose_shift_rate, lose_opportunities, predicted_next_move)
+            or (0, 0, None) if insufficient data or no lose opportunities
+        """
+        if self.rounds < 2 or self.last_result != COMPUTER:
+            return 0, 0, None
+
+        window = self.windows.get(window_size)
+        if window is not None:
+            lose_shift_count, lose_opportunities = window.lose_shifts, window.lose_opportunities
+        else:
+            moves = self.recent_moves(window_size)
+            results = self.results[-window_size:]
+            lose_shift_count = 0
+            lose_opportunities = 0
+            for move, following, result in zip(moves, moves[1:], results):
+                if result == COMPUTER:
+                    lose_opportunities += 1
+                    if move != following:
+                        lose_shift_count += 1
+
+        if lose_opportunities == 0:
+            return 0, 0, None
+
+        # Predict sequential shift (rock -> paper -> scissors -> rock)
+        return lose_shift_count / lose_opportunities, lose_opportunities, counter(self.last_move)
+
+    def markov_prediction(self) -> Tuple[Optional[int], float]:
+        """
+        First-order Markov prediction from the player's last move.
+
+        Returns:
+            tuple: (most_likely_next_move, probability)
+            or (None, 0) if the last move has never been followed before
+        """
+        if not self.moves:
+            return None, 0
+        last_move = self.moves[-1]
+        row = self.transitions[last_move]
+        total = sum(row)
+        if not total:
+            return None, 0
+        most_likely = max(self._transition_order[last_move], key=row.__getitem__)
+        return most_likely, row[most_likely] / total
@@ -0,0 +1,76 @@
+"""
+Per-Session Random Streams
+
+Strategies, opponent agents and simulators take an explicit random source
+instead of the module-global `random`. Streams are derived from a root
+seed plus any number of identifiers (session id, opponent name, game
+number, ...), so:
+
+    - the same (seed, ids) always replays the same stream, bit for bit;
+    - different ids give statistically independent streams, and parallel
+      workers never share RNG state.
+
+Without a root seed, streams are seeded from OS entropy. Code that draws
+on every request should use thread_rng() instead: seeding a fresh
+random.Random from OS entropy costs several times an AI decision.
+"""
+
+import hashlib
+import importlib.util
+import os
+import random
+import threading
+
+# numpy is imported by make_generator() itself: the app never needs it,
+# and importing it would add to every worker's boot time
+NUMPY_AVAILABLE = importlib.util.find_spec('numpy') is not None
+
+_local = threading.local()
+
+
+def derive_seed(root_seed, *ids) -> int:
+    """
+    Stable 64-bit seed for a stream identified by ids under root_seed.
+
+    Uses SHA-256 rather than hash() so values survive process restarts
+    and differ between nearby ids.
+    """
+    key = '\x1f'.join(str(part) for part in (root_seed,) + ids)
+    return int.from_bytes(hashlib.sha256(key.encode('utf-8')).digest()[:8], 'big')
+
+
+def make_rng(root_seed=None, *ids) -> random.Random:
+    """
+    random.Random stream for the given ids.
+
+    Args:
+        root_seed: Root seed (any str/int), or None for an unseeded stream
+        *ids: Session / game identifiers that select the stream
+    """
+    if root_seed is None:
+        return random.Random()
+    return random.Random(derive_seed(root_seed, *ids))
+
+
+def thread_rng() -> random.Random:
+    """
+    Unseeded random.Random owned by the calling thread.
+
+    Seeded from OS entropy once per thread and process (a forked worker
+    gets a new one), so threads never share RNG state.
+    """
+    pid = os.getpid()
+    if getattr(_local, 'pid', None) != pid:
+        _local.rng = random.Random()
+        _local.pid = pid
+    return _local.rng
+
+
+def make_generator(root_seed=None, *ids) -> 'np.random.Generator':
+    """NumPy Generator counterpart of make_rng() (requires numpy)."""
+    if not NUMPY_AVAILABLE:
+        raise ImportError("make_generator requires numpy. Run: pip install numpy")
+    import numpy as np
+    if root_seed is None:
+        return np.random.default_rng()
+    return np.random.default_rng(derive_seed(root_seed, *ids))
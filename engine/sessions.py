@@ -0,0 +1,273 @@
+"""
+Server-Side Game Sessions
+
+Keeps each player's PlayerModel on the server between rounds, so a client
+only sends its session id and the new move instead of re-uploading (and
+the server re-parsing) the whole game history every round.
+
+Memory is bounded two ways: at most `max_sessions` sessions are kept (the
+least recently used is evicted first), and sessions idle for longer than
+`ttl` seconds expire. Both evictions are O(1) per session because the
+store is ordered by last use.
+
+With a backend (engine/persistence.py) the store becomes a write-behind
+cache over storage shared by every worker process: played rounds are
+snapshotted and written in batches, and a worker picks up rounds another
+worker played by comparing round counts before each round. No sticky
+routing is needed as long as a player's next round arrives after the
+previous one's batch was written (flush_interval, 20 ms by default).
+"""
+
+import atexit
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from engine.player_model import PlayerModel
+from engine.snapshot import dump_model, load_model
+
+
+class Session:
+    """
+    One player's game state.
+
+    Rounds of the same session must be played one at a time; hold
+    session.lock while deciding and recording a round.
+    """
+
+    __slots__ = ('session_id', 'model', 'lock', 'last_seen')
+
+    def __init__(self, session_id: str, model: Optional[PlayerModel] = None, now: float = 0.0):
+        self.session_id = session_id
+        self.model = model if model is not None else PlayerModel()
+        self.lock = threading.Lock()
+        self.last_seen = now
+
+
+class SessionStore:
+    """
+    In-process LRU + idle-TTL store of Sessions.
+
+    Args:
+        max_sessions: Sessions kept before the least recently used is evicted
+        ttl: Seconds a session may sit idle before it expires
+        clock: Monotonic time source (injectable for tests)
+        backend: Optional shared SessionBackend (engine/persistence.py)
+        flush_interval: Seconds between batched backend writes
+        batch_size: Pending sessions that trigger an immediate write
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl: float = 1800.0,
+                 clock: Callable[[], float] = time.monotonic, backend=None,
+                 flush_interval: float = 0.02, batch_size: int = 64):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.clock = clock
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+        self.lru_evictions = 0
+        self.ttl_evictions = 0
+        self.backend_loads = 0
+        self.flushes = 0
+        self.flushed_sessions = 0
+        self.flush_errors = 0
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Sessions with rounds not yet written to the backend, and the batch
+        # being written; both are newer than what the backend holds
+        self._pending = {}
+        self._flushing = {}
+        self._flush_lock = threading.Lock()
+        self._flusher_pid = None
+        if backend is not None:
+            atexit.register(self.flush)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, session_id: Optional[str]) -> Optional[Session]:
+        """
+        Live session for session_id (marking it used), or None. Unknown
+        and expired ids count as misses; a missing id is not a lookup.
+        """
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            if not session_id:
+                return None
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_seen = now
+                self._sessions.move_to_end(session_id)
+            unwritten = session_id in self._pending or session_id in self._flushing
+
+        if self.backend is not None and not unwritten:
+            session = self._refresh(session_id, session, now)
+
+        with self._lock:
+            if session is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return session
+
+    def _refresh(self, session_id: str, session: Optional[Session], now: float) -> Optional[Session]:
+        """Bring a session up to date with the backend if another worker played it."""
+        version = self.backend.version(session_id)
+        if version is None or (session is not None and session.model.rounds >= version):
+            return session
+        data = self.backend.load(session_id)
+        if data is None:
+            return session
+        model = load_model(data)
+        if session is not None:
+            # Swap under session.lock so a round in progress keeps the model
+            # it started with; if that round (or one since the version check)
+            # has caught up with the snapshot, the local model stays
+            with session.lock:
+                if session.model.rounds < model.rounds:
+                    session.model = model
+            with self._lock:
+                self.backend_loads += 1
+            return session
+        with self._lock:
+            self.backend_loads += 1
+            # Another thread may have loaded the same session meanwhile
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = Session(session_id, model, now)
+                self._insert(session)
+        return session
+
+    def create(self, model: Optional[PlayerModel] = None) -> Session:
+        """Start a new session under a fresh random id."""
+        now = self.clock()
+        session = Session(uuid.uuid4().hex, model, now)
+        with self._lock:
+            self._expire(now)
+            self._insert(session)
+            self.created += 1
+        return session
+
+    def _insert(self, session: Session):
+        """Add a session as most recently used, evicting past max_sessions (lock held)."""
+        self._sessions[session.session_id] = session
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.lru_evictions += 1
+
+    def get_or_create(self, session_id: Optional[str],
+                      model_factory: Callable[[], PlayerModel] = PlayerModel) -> Session:
+        """
+        Session for session_id, or a new one (with a new id) if it is
+        unknown or has expired. model_factory builds the new session's model.
+        """
+        session = self.get(session_id)
+        if session is None:
+            session = self.create(model_factory())
+        return session
+
+    def discard(self, session_id: str) -> bool:
+        """Drop a session; returns whether it existed locally."""
+        with self._lock:
+            self._pending.pop(session_id, None)
+            existed = self._sessions.pop(session_id, None) is not None
+        if self.backend is not None:
+            self.backend.delete(session_id)
+        return existed
+
+    def save(self, session: Session):
+        """
+        Queue a session for the next batched backend write (call after each
+        round, outside session.lock). No-op without a backend.
+        """
+        if self.backend is None:
+            return
+        with self._lock:
+            self._pending[session.session_id] = session
+            full = len(self._pending) >= self.batch_size
+            if self._flusher_pid != os.getpid():
+                # Started lazily so forked workers each get their own thread
+                self._flusher_pid = os.getpid()
+                threading.Thread(target=self._flush_loop, name='session-flush', daemon=True).start()
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write every pending session to the backend now; returns how many."""
+        if self.backend is None:
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                self._flushing, self._pending = self._pending, {}
+            snapshots = {}
+            for session_id, session in self._flushing.items():
+                with session.lock:
+                    snapshots[session_id] = dump_model(session.model)
+            try:
+                self.backend.save_many(snapshots)
+            except Exception:
+                # Keep the batch for the next write (sessions played since
+                # are already queued with newer state)
+                with self._lock:
+                    for session_id, session in self._flushing.items():
+                        self._pending.setdefault(session_id, session)
+                    self._flushing = {}
+                    self.flush_errors += 1
+                raise
+            with self._lock:
+                self._flushing = {}
+                self.flushes += 1
+                self.flushed_sessions += len(snapshots)
+            return len(snapshots)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            if self._pending:
+                try:
+                    self.flush()
+                except Exception:
+                    pass  # Counted in flush_errors; retried next interval
+
+    def _expire(self, now: float):
+        """Evict idle sessions; they sit at the front since the store is in LRU order."""
+        sessions = self._sessions
+        deadline = now - self.ttl
+        while sessions:
+            oldest = next(iter(sessions.values()))
+            if oldest.last_seen > deadline:
+                break
+            sessions.popitem(last=False)
+            self.ttl_evictions += 1
+
+    def metrics(self) -> Dict[str, float]:
+        """Occupancy, hit rate and eviction counters."""
+        lookups = self.hits + self.misses
+        return {
+            'sessions': len(self._sessions),
+            'max_sessions': self.max_sessions,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'created': self.created,
+            'lru_evictions': self.lru_evictions,
+            'ttl_evictions': self.ttl_evictions,
+            'backend': type(self.backend).__name__ if self.backend is not None else None,
+            'backend_loads': self.backend_loads,
+            'pending_writes': len(self._pending),
+            'flushes': self.flushes,
+            'flushed_sessions': self.flushed_sessions,
+            'flush_errors': self.flush_errors
+        }
@@ -0,0 +1,188 @@
+"""
+Binary PlayerModel Snapshots
+
+Serializes a PlayerModel into a compact byte string so sessions can be
+shared between worker processes and survive restarts (see
+engine/persistence.py).
+
+Layout (all integers unsigned LEB128 varints unless noted):
+
+    header      b'R', format version (1 byte), rounds (4 bytes big-endian)
+    recent      count, then one packed round per byte (engine/moves.py)
+    moves       move_counts[3], first-seen order (count + codes)
+    markov      transitions[3][3], first-seen order per row (count + codes)
+    context     depth, max_nodes, prunes, size, context symbols
+                (count + symbols), node count N, then the trie nodes in
+                preorder as three arrays: child counts (N bytes), child
+                symbols (N - 1 bytes) and the zlib-compressed move counts
+                (3N little-endian uint32)
+
+The header is fixed-size so stores can read a snapshot's round count (its
+version) without decoding the rest. Sliding windows are not stored: they
+are rebuilt exactly by replaying the recent rounds.
+"""
+
+import sys
+import zlib
+from array import array
+from typing import List
+
+from engine.context_tree import ContextTree, _Node
+from engine.moves import pack_round, unpack_round
+from engine.player_model import PlayerModel
+
+MAGIC = b'R'
+FORMAT_VERSION = 1
+HEADER_SIZE = 6
+
+
+def snapshot_rounds(data: bytes) -> int:
+    """Round count stored in a snapshot's header."""
+    if data[:1] != MAGIC or data[1] != FORMAT_VERSION:
+        raise ValueError("Not a PlayerModel snapshot (or unsupported format version)")
+    return int.from_bytes(data[2:HEADER_SIZE], 'big')
+
+
+def dump_model(model: PlayerModel) -> bytes:
+    """Serialize a PlayerModel."""
+    out = bytearray(MAGIC)
+    out.append(FORMAT_VERSION)
+    out += model.rounds.to_bytes(4, 'big')
+
+    recent = [pack_round(player, computer, result) for player, computer, result in
+              zip(model.moves[-model.MAX_WINDOW:], model.computer_moves[-model.MAX_WINDOW:],
+                  model.results[-model.MAX_WINDOW:])]
+    _write_codes(out, recent)
+
+    _write_ints(out, model.move_counts)
+    _write_codes(out, model._move_order)
+    for previous in range(3):
+        _write_ints(out, model.transitions[previous])
+    for previous in range(3):
+        _write_codes(out, model._transition_order[previous])
+
+    tree = model.context
+    _write_ints(out, (tree.depth, tree.max_nodes, tree.prunes, tree.size))
+    _write_codes(out, tree._context)
+
+    # Trie in preorder (explicit stack: tries can be far deeper than the
+    # recursion limit in principle) as three flat arrays, so loading is a
+    # few bulk copies plus one pass that links the nodes
+    fanout = bytearray()
+    symbols = bytearray()
+    counts = array('I')
+    stack = [tree.root]
+    while stack:
+        node = stack.pop()
+        children = node.children
+        fanout.append(len(children))
+        symbols += bytes(children)
+        counts.extend(node.counts)
+        stack.extend(reversed(list(children.values())))
+    if sys.byteorder != 'little':
+        counts.byteswap()
+    _write_varint(out, len(fanout))
+    out += fanout
+    out += symbols
+    out += zlib.compress(counts.tobytes(), 1)
+    return bytes(out)
+
+
+def load_model(data: bytes) -> PlayerModel:
+    """Rebuild a PlayerModel from dump_model() output."""
+    rounds = snapshot_rounds(data)
+    reader = _Reader(data, HEADER_SIZE)
+    model = PlayerModel()
+    model.rounds = rounds
+
+    for packed in reader.codes():
+        player, computer, result = unpack_round(packed)
+        model.moves.append(player)
+        model.computer_moves.append(computer)
+        model.results.append(result)
+        for window in model._window_list:
+            window.push(player, result)
+
+    model.move_counts = reader.ints(3)
+    model._move_order = reader.codes()
+    model.transitions = [reader.ints(3) for _ in range(3)]
+    model._transition_order = [reader.codes() for _ in range(3)]
+
+    depth, max_nodes, prunes, size = reader.ints(4)
+    tree = model.context = ContextTree(depth, max_nodes)
+    tree.prunes = prunes
+    tree.size = size
+    tree._context.extend(reader.codes())
+
+    # Mirror of the preorder walk in dump_model
+    node_count = reader.varint()
+    fanout = reader.take(node_count)
+    symbols = reader.take(node_count - 1)
+    counts = array('I')
+    counts.frombytes(zlib.decompress(data[reader.offset:]))
+    if sys.byteorder != 'little':
+        counts.byteswap()
+
+    stack = [tree.root]
+    next_symbol = 0
+    for index in range(node_count):
+        node = stack.pop()
+        node_counts = node.counts = counts[3 * index:3 * index + 3].tolist()
+        node.total = node_counts[0] + node_counts[1] + node_counts[2]
+        width = fanout[index]
+        if width:
+            children = [_Node() for _ in range(width)]
+            node.children = dict(zip(symbols[next_symbol:next_symbol + width], children))
+            next_symbol += width
+            children.reverse()
+            stack += children
+    return model
+
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _write_ints(out: bytearray, values):
+    for value in values:
+        _write_varint(out, value)
+
+
+def _write_codes(out: bytearray, codes):
+    """Count followed by one byte per code (codes are < 256)."""
+    _write_varint(out, len(codes))
+    out += bytes(codes)
+
+
+class _Reader:
+    """Sequential varint reader over a snapshot."""
+
+    def __init__(self, data: bytes, offset: int = 0):
+        self.data = data
+        self.offset = offset
+
+    def varint(self) -> int:
+        data = self.data
+        shift = 0
+        value = 0
+        while True:
+            byte = data[self.offset]
+            self.offset += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def ints(self, count: int) -> List[int]:
+        return [self.varint() for _ in range(count)]
+
+    def take(self, count: int) -> bytes:
+        start = self.offset
+        self.offset += count
+        return self.data[start:self.offset]
+
+    def codes(self) -> List[int]:
+        return list(self.take(self.varint()))
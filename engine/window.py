@@ -0,0 +1,101 @@
+"""
+Sliding-Window Aggregates
+
+A MoveWindow holds the last `size` rounds in a ring buffer and keeps
+every statistic the strategies read over that window up to date as
+rounds are pushed in and fall out: per-move counts, the position of each
+move's first appearance (for Counter-style tie-breaking), and the
+win-stay / lose-shift opportunity tallies. Every read is O(1).
+"""
+
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+from engine.moves import COMPUTER, PLAYER
+
+
+class MoveWindow:
+    """
+    Running aggregates over the last `size` rounds.
+
+    Pair statistics follow PlayerModel's slicing semantics: a round counts
+    as a win (loss) opportunity only if the round after it is also inside
+    the window.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.moves = deque()
+        self.results = deque()
+        self.counts = [0, 0, 0]
+
+        # Absolute round numbers of each move inside the window, oldest
+        # first; the head of each deque is that move's first appearance
+        self._positions = (deque(), deque(), deque())
+        self._pushed = 0
+
+        self.win_opportunities = 0
+        self.win_stays = 0
+        self.lose_opportunities = 0
+        self.lose_shifts = 0
+
+    def __len__(self):
+        return len(self.moves)
+
+    def push(self, move: int, result: int):
+        """Add the newest round, dropping the oldest once the window is full."""
+        moves = self.moves
+        results = self.results
+        if moves:
+            previous_result = results[-1]
+            if previous_result == PLAYER:
+                self.win_opportunities += 1
+                if moves[-1] == move:
+                    self.win_stays += 1
+            elif previous_result == COMPUTER:
+                self.lose_opportunities += 1
+                if moves[-1] != move:
+                    self.lose_shifts += 1
+
+        moves.append(move)
+        results.append(result)
+        self.counts[move] += 1
+        self._positions[move].append(self._pushed)
+        self._pushed += 1
+
+        if len(moves) > self.size:
+            # Drop the oldest round and the pair it started
+            oldest = moves.popleft()
+            oldest_result = results.popleft()
+            if oldest_result == PLAYER:
+                self.win_opportunities -= 1
+                if oldest == moves[0]:
+                    self.win_stays -= 1
+            elif oldest_result == COMPUTER:
+                self.lose_opportunities -= 1
+                if oldest != moves[0]:
+                    self.lose_shifts -= 1
+            self.counts[oldest] -= 1
+            self._positions[oldest].popleft()
+
+    def first_seen(self, move: int) -> Optional[int]:
+        """Round number at which move first appears in the window, or None."""
+        positions = self._positions[move]
+        return positions[0] if positions else None
+
+    def ordered_counts(self) -> Dict[int, int]:
+        """Counts of the moves present, keyed in order of first appearance."""
+        present = [move for move in range(3) if self.counts[move]]
+        present.sort(key=self.first_seen)
+        return {move: self.counts[move] for move in present}
+
+    def most_common(self) -> Tuple[int, int]:
+        """Most common move and its count; ties go to the move seen first."""
+        counts = self.counts
+        best = None
+        for move in range(3):
+            if counts[move] and (best is None or counts[move] > counts[best]
+                                 or (counts[move] == counts[best]
+                                     and self._positions[move][0] < self._positions[best][0])):
+                best = move
+        return best, counts[best]
@@ -0,0 +1,107 @@
+"""
+Gunicorn Settings for the Rock Paper Scissors App
+
+gunicorn reads this file from the working directory on its own, so the
+Procfile only names the app. Every setting can be overridden from the
+environment (Heroku config vars) without a deploy.
+
+Worker profiles (RPS_WORKER_CLASS):
+
+    gthread  (default) CPUs + 1 workers x RPS_THREADS (8) threads. A thread
+             waiting on OpenAI leaves the others serving /api/play;
+             commentary is bounded by RPS_COMMENTARY_WORKERS per worker.
+    gevent   CPUs workers x RPS_WORKER_CONNECTIONS (200) greenlets, for
+             commentary-heavy traffic with many slow streams open at once
+             (pip install gevent).
+    sync     2 x CPUs + 1 single-threaded workers: lowest /api/play latency
+             when nothing waits on upstreams, but one commentary call
+             blocks its worker for seconds.
+
+WEB_CONCURRENCY (set by Heroku per dyno size) overrides the worker count,
+which is otherwise capped at RPS_MAX_WORKERS (8) because every worker
+holds its own sessions, tables and caches.
+
+preload_app imports app.py, and so runs its warm-up, once in the master;
+workers fork with the lookup tables and assets already built (shared
+copy-on-write) and start serving at once. Per-process state (the session
+flusher, SQLite connections, the OpenAI client, thread pools) is created
+lazily in each worker.
+
+Workers are recycled after RPS_MAX_REQUESTS (+ up to RPS_MAX_REQUESTS_JITTER,
+so they do not all restart together) to cap slow memory growth. A recycled
+worker loses the sessions it held in memory unless RPS_SESSION_BACKEND is
+set; RPS_MAX_REQUESTS=0 turns recycling off.
+
+/metrics sums every worker's numbers through files in RPS_METRICS_DIR
+(a fresh temporary directory unless set; see metrics.py). The hooks below
+clear it at startup, start each worker's periodic flush, flush a worker as
+it exits and fold a reaped worker into the retired totals.
+
+testing/load_generator.py measures the profiles against each other.
+"""
+
+import importlib.util
+import multiprocessing
+import os
+import tempfile
+
+WORKER_CLASSES = ('gthread', 'gevent', 'sync')
+
+profile = os.environ.get('RPS_WORKER_CLASS', 'gthread')
+if profile not in WORKER_CLASSES:
+    raise ValueError(f"RPS_WORKER_CLASS must be one of {', '.join(WORKER_CLASSES)}, got {profile!r}")
+if profile == 'gevent' and importlib.util.find_spec('gevent') is None:
+    raise ImportError("RPS_WORKER_CLASS=gevent requires gevent. Run: pip install gevent")
+
+# Set before the app is imported (preload_app) so every process shares it
+os.environ.setdefault('RPS_METRICS_DIR', tempfile.mkdtemp(prefix='rps-metrics-'))
+
+cpus = multiprocessing.cpu_count()
+default_workers = {'gthread': cpus + 1, 'gevent': cpus, 'sync': 2 * cpus + 1}[profile]
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+worker_class = profile
+workers = int(os.environ.get('WEB_CONCURRENCY')
+              or min(default_workers, int(os.environ.get('RPS_MAX_WORKERS', 8))))
+threads = int(os.environ.get('RPS_THREADS', 8)) if profile == 'gthread' else 1
+worker_connections = int(os.environ.get('RPS_WORKER_CONNECTIONS', 200))
+
+preload_app = os.environ.get('RPS_PRELOAD_APP', '1') not in ('', '0')
+
+max_requests = int(os.environ.get('RPS_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('RPS_MAX_REQUESTS_JITTER', 200))
+
+# Heroku's router reuses connections to the dyno; idle ones are closed
+# after keepalive seconds (ignored by sync workers)
+keepalive = int(os.environ.get('RPS_KEEPALIVE', 5))
+
+# Heroku's router gives up on a request after 30 s
+timeout = int(os.environ.get('RPS_WORKER_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('RPS_GRACEFUL_TIMEOUT', 20))
+
+
+def when_ready(server):
+    server.log.info(f"Profile {worker_class}: {workers} workers"
+                    + (f" x {threads} threads" if worker_class == 'gthread' else '')
+                    + (f" x {worker_connections} connections" if worker_class == 'gevent' else '')
+                    + f", preload={preload_app}, max_requests={max_requests}+{max_requests_jitter}")
+
+
+def on_starting(server):
+    from metrics import REGISTRY
+    REGISTRY.clear()
+
+
+def post_fork(server, worker):
+    from metrics import METRICS_FLUSH_INTERVAL, REGISTRY
+    REGISTRY.start_flushing(METRICS_FLUSH_INTERVAL)
+
+
+def worker_exit(server, worker):
+    from metrics import REGISTRY
+    REGISTRY.flush()
+
+
+def child_exit(server, worker):
+    from metrics import REGISTRY
+    REGISTRY.retire(worker.pid)
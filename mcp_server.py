@@ -2,19 +2,404 @@
 """
 MCP Server for Rock Paper Scissors Game
 Implements the Model Context Protocol for Claude Desktop integration
+
+play_rps and get_stats take an optional session_id, so one server process
+can host several independent games (players, agents, conversations).
+Each session keeps an incremental PlayerModel, which the AI reads
+through move codes like the Flask app's strategies, running win/loss/tie
+totals and only the last RPS_MCP_HISTORY rounds as game dictionaries
+(for get_stats), so a session's memory stays flat however long it plays.
+At most RPS_MCP_MAX_SESSIONS sessions are kept; the one idle longest is
+evicted first and starts over if it plays again.
 """
 
 import asyncio
+import contextlib
 import json
+import logging
+import os
 import sys
-from typing import Any
-import random
-import math
-from collections import Counter
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from collections import OrderedDict
+
+from engine import (
+    COMPUTER, MOVES, PAPER, PLAYER, PlayerModel, counter, decode_move, determine_winner, make_rng
+)
+
+logger = logging.getLogger(__name__)
+
+# Longest request line accepted (asyncio's default limit is 64 KiB)
+MAX_LINE_BYTES = 16 * 1024 * 1024
+
+
+class _BlockingWriter:
+    """StreamWriter stand-in that writes straight to a binary file."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data: bytes):
+        self.stream.write(data)
+
+    async def drain(self):
+        self.stream.flush()
+
+
+def _pump_stdin(loop, reader: asyncio.StreamReader):
+    """Feed stdin into reader from a thread (stdin the loop cannot watch)."""
+    stream = sys.stdin.buffer
+    try:
+        while True:
+            chunk = stream.read1(65536)
+            if not chunk:
+                break
+            loop.call_soon_threadsafe(reader.feed_data, chunk)
+        loop.call_soon_threadsafe(reader.feed_eof)
+    except RuntimeError:
+        pass  # Event loop closed
+
+
+async def open_stdio(limit: int = MAX_LINE_BYTES):
+    """
+    asyncio (reader, writer) streams over this process's stdin/stdout.
+
+    Pipes, which is how MCP clients start the server, are registered with
+    the event loop directly: no thread hop per line. stdin/stdout the loop
+    cannot watch (a redirected regular file, or the Windows console) fall
+    back to a reader thread and blocking writes.
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=limit)
+    try:
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    except (ValueError, OSError, NotImplementedError):
+        threading.Thread(target=_pump_stdin, args=(loop, reader), daemon=True).start()
+    try:
+        transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin,
+                                                            sys.stdout)
+        writer = asyncio.StreamWriter(transport, protocol, None, loop)
+    except (ValueError, OSError, NotImplementedError):
+        writer = _BlockingWriter(sys.stdout.buffer)
+    return reader, writer
+
+
+# Rounds get_stats reports as recent_games
+RECENT_GAMES = 5
+
+
+class GameSession:
+    """
+    One session's game state.
+
+    Args:
+        session_id: Session / player id
+        rng: Random source of this session's AI
+        history_limit: Rounds kept as game dictionaries for get_stats
+                       (at least RECENT_GAMES)
+    """
+
+    __slots__ = ('session_id', 'rng', 'model', 'stats', 'history', 'history_limit')
+
+    def __init__(self, session_id: str, rng, history_limit: int = 100):
+        self.session_id = session_id
+        self.rng = rng
+        self.model = PlayerModel()
+        self.stats = {
+            "wins": 0,
+            "losses": 0,
+            "ties": 0
+        }
+        # Newest last; trimmed back to history_limit once it reaches twice
+        # that, so appends stay amortized O(1)
+        self.history: List[Dict] = []
+        self.history_limit = max(history_limit, RECENT_GAMES)
+
+    @property
+    def rounds(self) -> int:
+        return self.model.rounds
+
+    def record(self, game: Dict):
+        """Add one finished round to the model, the totals and the recent rounds."""
+        if game['result'] == 'player':
+            self.stats['wins'] += 1
+        elif game['result'] == 'computer':
+            self.stats['losses'] += 1
+        else:
+            self.stats['ties'] += 1
+        self.model.update(game)
+        self.history.append(game)
+        if len(self.history) >= 2 * self.history_limit:
+            del self.history[:-self.history_limit]
+
+
+# ============================================================
+# AI STRATEGIES
+# ============================================================
+# The MCP server's own tuning of the four difficulties, read from the
+# session's PlayerModel (engine/player_model.py) with integer move codes,
+# as app.py's strategies are: every feature is an O(1) window aggregate
+# instead of a scan over game dictionaries. Random draws are made in the
+# same order as the original list-based versions, so a seeded session
+# plays the same moves.
+
+def _medium_move(model, rng):
+    """Medium AI as a move code: frequency analysis plus basic psychological patterns."""
+    if model.rounds < 3:
+        return rng.randrange(3)
+    
+    most_common = model.most_common(10)[0]
+    
+    # Add psychological patterns if enough history
+    if model.rounds >= 5:
+        if model.last_result == PLAYER and rng.random() < 0.65:
+            return counter(model.last_move)
+        
+        if model.last_result == COMPUTER:
+            what_would_have_won = counter(model.last_computer_move)
+            if rng.random() < 0.65:
+                return counter(what_would_have_won)
+    
+    if rng.random() < 0.70:
+        return counter(most_common)
+    return rng.randrange(3)
+
+def _hard_move(model, rng):
+    """Hard AI as a move code: the first of the prioritized tiers that fires."""
+    if model.rounds < 5:
+        if model.rounds < 2:
+            return PAPER  # Counter most common opening (rock)
+        return _medium_move(model, rng)  # Fall back to simpler AI
+    
+    # TIER 1: Exploit Strong Frequency Bias (HIGHEST PRIORITY)
+    if model.rounds >= 8:
+        most_common_move, frequency, _ = model.frequency(window_size=12)
+        
+        # Strong bias (55%+) - exploit aggressively
+        if frequency >= 0.55:
+            if rng.random() < 0.87:  # 87% exploitation rate
+                return counter(most_common_move)
+        
+        # Moderate bias (45%+) - still exploit firmly
+        elif frequency >= 0.45:
+            if rng.random() < 0.76:  # 76% exploitation rate
+                return counter(most_common_move)
+    
+    # TIER 2: Win-Stay Pattern Detection (HIGH PRIORITY)
+    # (only after a player win; over the last 8 rounds)
+    if model.rounds >= 4:
+        win_stay_rate, win_opportunities, last_move = model.win_stay(window_size=8)
+        
+        # If they've shown win-stay pattern at least 40% of the time
+        if win_opportunities > 0 and win_stay_rate >= 0.4:
+            if rng.random() < 0.73:  # 73% confidence
+                return counter(last_move)
+    
+    # TIER 3: Anti-Triple Detection (MEDIUM-HIGH PRIORITY)
+    if model.rounds >= 2:
+        last_two = model.recent_moves(2)
+        if last_two[0] == last_two[1]:
+            # Predict they'll switch to what beats the repeated move
+            likely_next = counter(last_two[0])
+            
+            if rng.random() < 0.69:  # 69% confidence
+                return counter(likely_next)
+    
+    # TIER 4: Lose-Shift Pattern Detection (MEDIUM PRIORITY)
+    # (only after a computer win; predicts the sequential shift
+    # rock -> paper -> scissors -> rock)
+    if model.rounds >= 4:
+        lose_shift_rate, lose_opportunities, predicted_next = model.lose_shift(window_size=8)
+        
+        # If they shift after losing at least 50% of the time
+        if lose_opportunities > 0 and lose_shift_rate >= 0.5:
+            if rng.random() < 0.66:  # 66% confidence
+                return counter(predicted_next)
+    
+    # TIER 5: Cycle Detection (MEDIUM PRIORITY)
+    if model.rounds >= 4:
+        last_three = model.recent_moves(3)
+        
+        # Check for rock->paper->scissors or similar cycle
+        if len(set(last_three)) == 3:  # All different in last 3
+            # Every all-different triple predicts a return to its first move
+            if rng.random() < 0.62:  # 62% confidence
+                return counter(last_three[0])
+    
+    # TIER 6: General Frequency Counter (LOW PRIORITY)
+    if model.rounds >= 5:
+        most_common = model.most_common(10)[0]
+        
+        if rng.random() < 0.58:  # 58% confidence
+            return counter(most_common)
+    
+    # Final Fallback: Random choice
+    return rng.randrange(3)
+
+def _very_hard_move(model, rng):
+    """Very Hard AI as a move code: weighted ensemble of pattern detectors."""
+    if model.rounds < 5:
+        if model.rounds < 2:
+            return PAPER
+        return _hard_move(model, rng)
+    
+    predictions = []
+    
+    # Markov Chain Prediction (whole-game transition counts)
+    if model.rounds >= 10:
+        most_likely, probability = model.markov_prediction()
+        
+        if most_likely is not None:
+            if probability >= 0.5:
+                confidence = 0.85 + (probability - 0.5) * 0.2
+                predictions.append((counter(most_likely), confidence, 'markov'))
+            elif probability >= 0.4:
+                confidence = 0.70 + (probability - 0.4) * 0.15
+                predictions.append((counter(most_likely), confidence, 'markov'))
+    
+    # Opponent Modeling
+    if model.rounds >= 15:
+        choice_counts = model.window_counts(20)
+        total_recent = sum(choice_counts.values())
+        
+        if len(choice_counts) == 1:
+            randomness_score = 0.0
+        elif len(choice_counts) == 2:
+            counts = sorted(choice_counts.values(), reverse=True)
+            randomness_score = counts[1] / counts[0]
+        else:
+            expected = total_recent / 3
+            variance = sum((count - expected) ** 2 for count in choice_counts.values()) / 3
+            max_variance = (total_recent ** 2) / 3
+            randomness_score = 1.0 - (variance / max_variance) if max_variance > 0 else 0.5
+        
+        if randomness_score < 0.3:
+            most_common = model.most_common(15)[0]
+            predictions.append((counter(most_common), 0.92, 'exploit_predictable'))
+        elif randomness_score > 0.7:
+            predictions.append((rng.randrange(3), 0.40, 'nash_equilibrium'))
+    
+    # Counter-Counter Prediction
+    if model.rounds >= 12:
+        window_12 = model.window(12)
+        most_common_move, _ = window_12.most_common()
+        ai_would_counter = counter(most_common_move)
+        counter_ai_counter = counter(ai_would_counter)
+        counter_counter_freq = window_12.counts[counter_ai_counter] / len(window_12)
+        
+        if counter_counter_freq >= 0.4:
+            predictions.append((counter(counter_ai_counter), 0.78, 'level_3_reasoning'))
+        
+        # All three moves in the last 6, none more than twice
+        counts_6 = model.window(6).counts
+        if min(counts_6) > 0 and max(counts_6) == 2:
+            predictions.append((rng.randrange(3), 0.45, 'counter_sophistication'))
+    
+    # Enhanced Pattern Detection
+    if model.rounds >= 8:
+        most_common_move, frequency, _ = model.frequency(window_size=15)
+        
+        if frequency >= 0.60:
+            predictions.append((counter(most_common_move), 0.94, 'strong_frequency'))
+        elif frequency >= 0.50:
+            predictions.append((counter(most_common_move), 0.84, 'moderate_frequency'))
+        elif frequency >= 0.42:
+            predictions.append((counter(most_common_move), 0.72, 'weak_frequency'))
+    
+    # Win-Stay Detection (only after a player win)
+    if model.rounds >= 6:
+        win_stay_rate, win_opportunities, last_move = model.win_stay(window_size=12)
+        
+        if win_opportunities > 0 and win_stay_rate >= 0.5:
+            confidence = 0.70 + (win_stay_rate - 0.5) * 0.3
+            predictions.append((counter(last_move), confidence, 'win_stay'))
+    
+    # Lose-Shift Detection (only after a computer win)
+    if model.rounds >= 6:
+        lose_shift_rate, lose_opportunities, predicted_next = model.lose_shift(window_size=12)
+        
+        if lose_opportunities > 0 and lose_shift_rate >= 0.55:
+            confidence = 0.68 + (lose_shift_rate - 0.55) * 0.25
+            predictions.append((counter(predicted_next), confidence, 'lose_shift'))
+    
+    # Cycle Detection
+    if model.rounds >= 6:
+        recent = model.recent_moves(9)
+        if recent[-6:-3] == recent[-3:]:
+            predictions.append((counter(recent[-2]), 0.87, 'cycle_3'))
+        if recent[-4] == recent[-2] and recent[-3] == recent[-1]:
+            predictions.append((counter(recent[-2]), 0.80, 'cycle_2'))
+    
+    # Anti-Triple Pattern
+    last_two = model.recent_moves(2)
+    if last_two[0] == last_two[1]:
+        likely_next = counter(last_two[1])
+        predictions.append((counter(likely_next), 0.74, 'anti_triple'))
+    
+    # Ensemble Voting
+    if predictions:
+        move_scores = {}
+        for move, confidence, _ in predictions:
+            total, votes = move_scores.get(move, (0.0, 0))
+            move_scores[move] = (total + confidence, votes + 1)
+        move_scores = {move: total + votes * 0.15 for move, (total, votes) in move_scores.items()}
+        
+        best_move = max(move_scores, key=move_scores.get)
+        best_score = move_scores[best_move]
+        
+        if best_score >= 1.5 and rng.random() < 0.96:
+            return best_move
+        elif best_score >= 1.0 and rng.random() < 0.88:
+            return best_move
+        elif best_score >= 0.7 and rng.random() < 0.75:
+            return best_move
+        elif best_score >= 0.5 and rng.random() < 0.60:
+            return best_move
+    
+    return _hard_move(model, rng)
 
 # MCP protocol messages
 class MCPServer:
-    def __init__(self):
+    """
+    Args:
+        seed: Root seed; with it every session's AI replays the same stream
+              for the same session id (see engine/rng.py)
+        session_id: Session used when a call names none
+        max_sessions: Sessions kept before the least recently used is evicted
+        history_limit: Rounds per session kept as game dictionaries
+    """
+
+    # Tools whose work runs on the worker pool; the rest run on the event loop.
+    # None of the built-in ones: a round takes 20-70 us, less than the hop
+    # to a pool thread. Add slow or CPU-heavy tools here.
+    POOL_TOOLS = frozenset()
+
+    def __init__(self, seed=None, session_id='stdio', max_sessions: int = 1000,
+                 history_limit: int = 100, workers: int = 4, max_pending: int = 256):
+        self.seed = seed
+        self.default_session = session_id
+        self.max_sessions = max_sessions
+        self.history_limit = history_limit
+        self.sessions = OrderedDict()  # session id -> GameSession, least recently used first
+        self._sessions_lock = threading.Lock()  # Pool threads create sessions too
+        self.evictions = 0
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mcp-tool')
+        self.max_pending = max_pending
+        self._turns = {}  # session id -> [asyncio.Lock, calls waiting or running]
+        self.tool_handlers = {
+            "play_rps": lambda arguments: self.play_game(
+                arguments.get("choice"),
+                arguments.get("difficulty", "medium"),
+                arguments.get("session_id")
+            ),
+            "get_stats": lambda arguments: self.get_statistics(arguments.get("session_id"))
+        }
+        session_property = {
+            "type": "string",
+            "description": "Optional session or player id; each id plays its own game "
+                           "with its own statistics"
+        }
         self.tools = {
             "play_rps": {
                 "name": "play_rps",
@@ -32,7 +417,8 @@ class MCPServer:
                             "enum": ["easy", "medium", "hard", "veryhard"],
                             "default": "medium",
                             "description": "AI difficulty level"
-                        }
+                        },
+                        "session_id": session_property
                     },
                     "required": ["choice"]
                 }
@@ -42,400 +428,95 @@ class MCPServer:
                 "description": "Get current game statistics",
                 "inputSchema": {
                     "type": "object",
-                    "properties": {}
+                    "properties": {
+                        "session_id": session_property
+                    }
                 }
             }
         }
-        
-        self.game_history = []
-        self.stats = {
-            "wins": 0,
-            "losses": 0,
-            "ties": 0
-        }
     
-    def determine_winner(self, player_choice, computer_choice):
-        """Determine the winner of the game."""
-        if player_choice == computer_choice:
-            return 'tie'
-        
-        winning_combinations = {
-            'rock': 'scissors',
-            'paper': 'rock',
-            'scissors': 'paper'
-        }
-        
-        if winning_combinations[player_choice] == computer_choice:
-            return 'player'
-        else:
-            return 'computer'
-    
-    def get_counter_move(self, predicted_move):
-        """Get the move that beats the predicted move."""
-        counter_moves = {
-            'rock': 'paper',
-            'paper': 'scissors',
-            'scissors': 'rock'
-        }
-        return counter_moves[predicted_move]
+    def session(self, session_id: Optional[str] = None, create: bool = True) -> Optional[GameSession]:
+        """
+        The session for session_id (the default session if None), marked as
+        most recently used. Unknown ids get a new session, or None with
+        create=False.
+        """
+        session_id = session_id or self.default_session
+        with self._sessions_lock:
+            session = self.sessions.get(session_id)
+            if session is not None:
+                self.sessions.move_to_end(session_id)
+                return session
+            if not create:
+                return None
+            rng = make_rng(self.seed, 'mcp', session_id)
+            session = self.sessions[session_id] = GameSession(session_id, rng, self.history_limit)
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+                self.evictions += 1
+            return session
     
-    def ai_easy(self):
+    def ai_easy(self, session):
         """Easy AI: Random choice."""
-        return random.choice(['rock', 'paper', 'scissors'])
+        return decode_move(session.rng.randrange(3))
     
-    def ai_medium(self):
+    def ai_medium(self, session):
         """Medium AI: Combines frequency analysis with basic psychological patterns."""
-        if len(self.game_history) < 3:
-            return self.ai_easy()
-        
-        recent_player_moves = [game['player'] for game in self.game_history[-10:]]
-        most_common = Counter(recent_player_moves).most_common(1)[0][0]
-        
-        # Add psychological patterns if enough history
-        if len(self.game_history) >= 5:
-            last_game = self.game_history[-1]
-            
-            if last_game['result'] == 'player' and random.random() < 0.65:
-                return self.get_counter_move(last_game['player'])
-            
-            if last_game['result'] == 'computer':
-                what_would_have_won = self.get_counter_move(last_game['computer'])
-                if random.random() < 0.65:
-                    return self.get_counter_move(what_would_have_won)
-        
-        if random.random() < 0.70:
-            return self.get_counter_move(most_common)
-        return self.ai_easy()
+        return decode_move(_medium_move(session.model, session.rng))
     
-    def ai_hard(self):
+    def ai_hard(self, session):
         """
         Hard AI: Master-level play using tiered strategy prioritization.
         (Formerly Very Hard)
         """
-        if len(self.game_history) < 5:
-            if len(self.game_history) < 2:
-                return 'paper'  # Counter most common opening (rock)
-            return self.ai_medium()  # Fall back to simpler AI
-        
-        last_game = self.game_history[-1]
-        
-        # TIER 1: Exploit Strong Frequency Bias (HIGHEST PRIORITY)
-        if len(self.game_history) >= 8:
-            recent_choices = [game['player'] for game in self.game_history[-12:]]
-            choice_counts = Counter(recent_choices)
-            most_common_move, count = choice_counts.most_common(1)[0]
-            frequency = count / len(recent_choices)
-            
-            # Strong bias (55%+) - exploit aggressively
-            if frequency >= 0.55:
-                if random.random() < 0.87:  # 87% exploitation rate
-                    return self.get_counter_move(most_common_move)
-            
-            # Moderate bias (45%+) - still exploit firmly
-            elif frequency >= 0.45:
-                if random.random() < 0.76:  # 76% exploitation rate
-                    return self.get_counter_move(most_common_move)
-        
-        # TIER 2: Win-Stay Pattern Detection (HIGH PRIORITY)
-        if last_game['result'] == 'player' and len(self.game_history) >= 4:
-            win_stay_count = 0
-            win_opportunities = 0
-            
-            # Look at last 8 games for win-stay pattern
-            for i in range(max(0, len(self.game_history) - 8), len(self.game_history) - 1):
-                if self.game_history[i]['result'] == 'player':
-                    win_opportunities += 1
-                    if i + 1 < len(self.game_history) and self.game_history[i]['player'] == self.game_history[i + 1]['player']:
-                        win_stay_count += 1
-            
-            # If they've shown win-stay pattern at least 40% of the time
-            if win_opportunities > 0 and (win_stay_count / win_opportunities) >= 0.4:
-                if random.random() < 0.73:  # 73% confidence
-                    return self.get_counter_move(last_game['player'])
-        
-        # TIER 3: Anti-Triple Detection (MEDIUM-HIGH PRIORITY)
-        if len(self.game_history) >= 2:
-            last_two = [self.game_history[-2]['player'], self.game_history[-1]['player']]
-            if last_two[0] == last_two[1]:
-                repeated_move = last_two[0]
-                # Predict they'll switch to what beats the repeated move
-                likely_next = self.get_counter_move(repeated_move)
-                
-                if random.random() < 0.69:  # 69% confidence
-                    return self.get_counter_move(likely_next)
-        
-        # TIER 4: Lose-Shift Pattern Detection (MEDIUM PRIORITY)
-        if last_game['result'] == 'computer' and len(self.game_history) >= 4:
-            lose_shift_count = 0
-            lose_opportunities = 0
-            
-            # Analyze lose-shift behavior
-            for i in range(max(0, len(self.game_history) - 8), len(self.game_history) - 1):
-                if self.game_history[i]['result'] == 'computer':
-                    lose_opportunities += 1
-                    if i + 1 < len(self.game_history) and self.game_history[i]['player'] != self.game_history[i + 1]['player']:
-                        lose_shift_count += 1
-            
-            # If they shift after losing at least 50% of the time
-            if lose_opportunities > 0 and (lose_shift_count / lose_opportunities) >= 0.5:
-                sequence_shift = {
-                    'rock': 'paper',
-                    'paper': 'scissors',
-                    'scissors': 'rock'
-                }
-                predicted_next = sequence_shift[last_game['player']]
-                
-                if random.random() < 0.66:  # 66% confidence
-                    return self.get_counter_move(predicted_next)
-        
-        # TIER 5: Cycle Detection (MEDIUM PRIORITY)
-        if len(self.game_history) >= 4:
-            recent_choices = [game['player'] for game in self.game_history[-4:]]
-            
-            # Check for rock->paper->scissors or similar cycle
-            if len(set(recent_choices[-3:])) == 3:  # All different in last 3
-                cycle_patterns = {
-                    ('rock', 'paper', 'scissors'): 'rock',
-                    ('rock', 'scissors', 'paper'): 'rock',
-                    ('paper', 'scissors', 'rock'): 'paper',
-                    ('paper', 'rock', 'scissors'): 'paper',
-                    ('scissors', 'rock', 'paper'): 'scissors',
-                    ('scissors', 'paper', 'rock'): 'scissors',
-                }
-                
-                last_three = tuple(recent_choices[-3:])
-                predicted = cycle_patterns.get(last_three)
-                
-                if predicted and random.random() < 0.62:  # 62% confidence
-                    return self.get_counter_move(predicted)
-        
-        # TIER 6: General Frequency Counter (LOW PRIORITY)
-        if len(self.game_history) >= 5:
-            recent_choices = [game['player'] for game in self.game_history[-10:]]
-            choice_counts = Counter(recent_choices)
-            most_common = choice_counts.most_common(1)[0][0]
-            
-            if random.random() < 0.58:  # 58% confidence
-                return self.get_counter_move(most_common)
-        
-        # Final Fallback: Random choice
-        return random.choice(['rock', 'paper', 'scissors'])
+        return decode_move(_hard_move(session.model, session.rng))
     
-    def ai_very_hard(self):
+    def ai_very_hard(self, session):
         """
         Very Hard AI: Expert-level play with cutting-edge techniques.
         
         Implements advanced pattern recognition and strategic play.
         """
-        if len(self.game_history) < 5:
-            if len(self.game_history) < 2:
-                return 'paper'
-            return self.ai_hard()
-        
-        predictions = []
-        last_game = self.game_history[-1]
-        player_choices = [game['player'] for game in self.game_history]
-        
-        # Markov Chain Prediction
-        if len(self.game_history) >= 10:
-            transitions = {}
-            for i in range(len(self.game_history) - 1):
-                current = self.game_history[i]['player']
-                next_move = self.game_history[i + 1]['player']
-                if current not in transitions:
-                    transitions[current] = []
-                transitions[current].append(next_move)
-            
-            if last_game['player'] in transitions:
-                transition_counts = Counter(transitions[last_game['player']])
-                total = len(transitions[last_game['player']])
-                most_likely, count = transition_counts.most_common(1)[0]
-                probability = count / total
-                
-                if probability >= 0.5:
-                    confidence = 0.85 + (probability - 0.5) * 0.2
-                    predictions.append((self.get_counter_move(most_likely), confidence, 'markov'))
-                elif probability >= 0.4:
-                    confidence = 0.70 + (probability - 0.4) * 0.15
-                    predictions.append((self.get_counter_move(most_likely), confidence, 'markov'))
-        
-        # Opponent Modeling
-        if len(self.game_history) >= 15:
-            choice_counts = Counter(player_choices[-20:])
-            total_recent = len(player_choices[-20:])
-            
-            if len(choice_counts) == 1:
-                randomness_score = 0.0
-            elif len(choice_counts) == 2:
-                counts = sorted(choice_counts.values(), reverse=True)
-                randomness_score = counts[1] / counts[0]
-            else:
-                expected = total_recent / 3
-                variance = sum((count - expected) ** 2 for count in choice_counts.values()) / 3
-                max_variance = (total_recent ** 2) / 3
-                randomness_score = 1.0 - (variance / max_variance) if max_variance > 0 else 0.5
-            
-            if randomness_score < 0.3:
-                most_common = Counter(player_choices[-15:]).most_common(1)[0][0]
-                predictions.append((self.get_counter_move(most_common), 0.92, 'exploit_predictable'))
-            elif randomness_score > 0.7:
-                predictions.append((random.choice(['rock', 'paper', 'scissors']), 0.40, 'nash_equilibrium'))
-        
-        # Counter-Counter Prediction
-        if len(self.game_history) >= 12:
-            recent_choices = player_choices[-12:]
-            choice_counts = Counter(recent_choices)
-            most_common_move, _ = choice_counts.most_common(1)[0]
-            ai_would_counter = self.get_counter_move(most_common_move)
-            counter_ai_counter = self.get_counter_move(ai_would_counter)
-            counter_counter_count = recent_choices.count(counter_ai_counter)
-            counter_counter_freq = counter_counter_count / len(recent_choices)
-            
-            if counter_counter_freq >= 0.4:
-                predictions.append((self.get_counter_move(counter_ai_counter), 0.78, 'level_3_reasoning'))
-            
-            last_6 = recent_choices[-6:]
-            if len(set(last_6)) == 3 and max(Counter(last_6).values()) == 2:
-                predictions.append((random.choice(['rock', 'paper', 'scissors']), 0.45, 'counter_sophistication'))
-        
-        # Enhanced Pattern Detection
-        if len(self.game_history) >= 8:
-            recent_choices = player_choices[-15:]
-            choice_counts = Counter(recent_choices)
-            most_common_move, count = choice_counts.most_common(1)[0]
-            frequency = count / len(recent_choices)
-            
-            if frequency >= 0.60:
-                predictions.append((self.get_counter_move(most_common_move), 0.94, 'strong_frequency'))
-            elif frequency >= 0.50:
-                predictions.append((self.get_counter_move(most_common_move), 0.84, 'moderate_frequency'))
-            elif frequency >= 0.42:
-                predictions.append((self.get_counter_move(most_common_move), 0.72, 'weak_frequency'))
-        
-        # Win-Stay Detection
-        if last_game['result'] == 'player' and len(self.game_history) >= 6:
-            win_stay_count = 0
-            win_opportunities = 0
-            for i in range(max(0, len(self.game_history) - 12), len(self.game_history) - 1):
-                if self.game_history[i]['result'] == 'player':
-                    win_opportunities += 1
-                    if i + 1 < len(self.game_history) and self.game_history[i]['player'] == self.game_history[i + 1]['player']:
-                        win_stay_count += 1
-            
-            if win_opportunities > 0:
-                win_stay_rate = win_stay_count / win_opportunities
-                if win_stay_rate >= 0.5:
-                    confidence = 0.70 + (win_stay_rate - 0.5) * 0.3
-                    predictions.append((self.get_counter_move(last_game['player']), confidence, 'win_stay'))
-        
-        # Lose-Shift Detection
-        if last_game['result'] == 'computer' and len(self.game_history) >= 6:
-            lose_shift_count = 0
-            lose_opportunities = 0
-            for i in range(max(0, len(self.game_history) - 12), len(self.game_history) - 1):
-                if self.game_history[i]['result'] == 'computer':
-                    lose_opportunities += 1
-                    if i + 1 < len(self.game_history) and self.game_history[i]['player'] != self.game_history[i + 1]['player']:
-                        lose_shift_count += 1
-            
-            if lose_opportunities > 0:
-                lose_shift_rate = lose_shift_count / lose_opportunities
-                if lose_shift_rate >= 0.55:
-                    sequence_shift = {'rock': 'paper', 'paper': 'scissors', 'scissors': 'rock'}
-                    predicted_next = sequence_shift[last_game['player']]
-                    confidence = 0.68 + (lose_shift_rate - 0.55) * 0.25
-                    predictions.append((self.get_counter_move(predicted_next), confidence, 'lose_shift'))
-        
-        # Cycle Detection
-        if len(self.game_history) >= 6:
-            recent = player_choices[-9:]
-            if len(recent) >= 6:
-                if recent[-6:-3] == recent[-3:]:
-                    next_in_cycle = recent[-2]
-                    predictions.append((self.get_counter_move(next_in_cycle), 0.87, 'cycle_3'))
-            if len(recent) >= 4:
-                if recent[-4] == recent[-2] and recent[-3] == recent[-1]:
-                    next_in_pattern = recent[-2]
-                    predictions.append((self.get_counter_move(next_in_pattern), 0.80, 'cycle_2'))
-        
-        # Anti-Triple Pattern
-        if len(self.game_history) >= 2:
-            if self.game_history[-2]['player'] == self.game_history[-1]['player']:
-                repeated_move = self.game_history[-1]['player']
-                likely_next = self.get_counter_move(repeated_move)
-                predictions.append((self.get_counter_move(likely_next), 0.74, 'anti_triple'))
-        
-        # Ensemble Voting
-        if predictions:
-            move_votes = {}
-            for move, confidence, source in predictions:
-                if move not in move_votes:
-                    move_votes[move] = []
-                move_votes[move].append((confidence, source))
-            
-            move_scores = {}
-            for move, votes in move_votes.items():
-                total_confidence = sum(conf for conf, _ in votes)
-                vote_count_bonus = len(votes) * 0.15
-                move_scores[move] = total_confidence + vote_count_bonus
-            
-            best_move = max(move_scores, key=move_scores.get)
-            best_score = move_scores[best_move]
-            
-            if best_score >= 1.5 and random.random() < 0.96:
-                return best_move
-            elif best_score >= 1.0 and random.random() < 0.88:
-                return best_move
-            elif best_score >= 0.7 and random.random() < 0.75:
-                return best_move
-            elif best_score >= 0.5 and random.random() < 0.60:
-                return best_move
-        
-        return self.ai_hard()
-    
-    def play_game(self, choice: str, difficulty: str = "medium"):
-        """Play a game and return the result."""
+        return decode_move(_very_hard_move(session.model, session.rng))
+    
+    def play_game(self, choice: str, difficulty: str = "medium", session_id: Optional[str] = None):
+        """Play a game in the given session and return the result."""
         choice = choice.lower()
         difficulty = difficulty.lower()
         
-        if choice not in ['rock', 'paper', 'scissors']:
+        if choice not in MOVES:
             return {"error": "Invalid choice. Must be rock, paper, or scissors."}
         
+        session = self.session(session_id)
+        
         # AI makes its choice
         if difficulty == 'easy':
-            computer_choice = self.ai_easy()
+            computer_choice = self.ai_easy(session)
         elif difficulty == 'hard':
-            computer_choice = self.ai_hard()
+            computer_choice = self.ai_hard(session)
         elif difficulty == 'veryhard':
-            computer_choice = self.ai_very_hard()
+            computer_choice = self.ai_very_hard(session)
         else:  # medium is default
-            computer_choice = self.ai_medium()
+            computer_choice = self.ai_medium(session)
         
         # Determine winner
-        result = self.determine_winner(choice, computer_choice)
-        
-        # Update stats
-        if result == 'player':
-            self.stats['wins'] += 1
-        elif result == 'computer':
-            self.stats['losses'] += 1
-        else:
-            self.stats['ties'] += 1
+        result = determine_winner(choice, computer_choice)
         
-        # Record game
-        self.game_history.append({
+        # Record game (updates the session's running stats)
+        session.record({
             'player': choice,
             'computer': computer_choice,
             'result': result
         })
         
         return {
+            "session_id": session.session_id,
             "player_choice": choice,
             "computer_choice": computer_choice,
             "result": result,
             "message": self._get_result_message(choice, computer_choice, result),
-            "stats": self.stats.copy(),
-            "total_games": len(self.game_history)
+            "stats": session.stats.copy(),
+            "total_games": session.rounds
         }
     
     def _get_result_message(self, player, computer, result):
@@ -447,16 +528,27 @@ class MCPServer:
         else:
             return f"You lose! {computer.capitalize()} beats {player}."
     
-    def get_statistics(self):
-        """Get current game statistics."""
-        total = len(self.game_history)
-        win_rate = (self.stats['wins'] / total * 100) if total > 0 else 0
+    def get_statistics(self, session_id: Optional[str] = None):
+        """Get a session's statistics from its running totals."""
+        session = self.session(session_id, create=False)
+        if session is None:
+            # Unknown (or evicted) sessions have not played yet; not created
+            return {
+                "session_id": session_id or self.default_session,
+                "stats": {"wins": 0, "losses": 0, "ties": 0},
+                "total_games": 0,
+                "win_rate": 0,
+                "recent_games": []
+            }
+        total = session.rounds
+        win_rate = (session.stats['wins'] / total * 100) if total > 0 else 0
         
         return {
-            "stats": self.stats.copy(),
+            "session_id": session.session_id,
+            "stats": session.stats.copy(),
             "total_games": total,
             "win_rate": round(win_rate, 1),
-            "recent_games": self.game_history[-5:] if self.game_history else []
+            "recent_games": session.history[-RECENT_GAMES:]
         }
     
     async def handle_request(self, request: dict) -> dict:
@@ -493,27 +585,8 @@ class MCPServer:
             tool_name = params.get("name")
             arguments = params.get("arguments", {})
             
-            if tool_name == "play_rps":
-                result = self.play_game(
-                    arguments.get("choice"),
-                    arguments.get("difficulty", "medium")
-                )
-                
-                return {
-                    "jsonrpc": "2.0",
-                    "id": request.get("id"),
-                    "result": {
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": json.dumps(result, indent=2)
-                            }
-                        ]
-                    }
-                }
-            
-            elif tool_name == "get_stats":
-                result = self.get_statistics()
+            if tool_name in self.tool_handlers:
+                result = await self.call_tool(tool_name, arguments)
                 
                 return {
                     "jsonrpc": "2.0",
@@ -548,17 +621,151 @@ class MCPServer:
                 }
             }
     
+    async def call_tool(self, name: str, arguments: dict) -> dict:
+        """
+        Run one tool. Calls for the same session take turns in arrival
+        order; POOL_TOOLS run on the worker pool so the event loop keeps
+        reading, answering quick calls and writing responses meanwhile.
+        """
+        handler = self.tool_handlers[name]
+        async with self._turn(arguments.get("session_id")):
+            if name not in self.POOL_TOOLS:
+                return handler(arguments)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, handler, arguments)
+    
+    @contextlib.asynccontextmanager
+    async def _turn(self, session_id: Optional[str]):
+        """Hold a session's turn (an asyncio.Lock, so waiters queue FIFO)."""
+        key = session_id or self.default_session
+        turn = self._turns.get(key)
+        if turn is None:
+            turn = self._turns[key] = [asyncio.Lock(), 0]
+        turn[1] += 1
+        try:
+            async with turn[0]:
+                yield
+        finally:
+            turn[1] -= 1
+            if not turn[1]:
+                del self._turns[key]
+    
+    async def handle_line(self, line: bytes) -> Optional[dict]:
+        """Response to one JSON-RPC line, or None for notifications."""
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON parse error: {e}")
+            # Per JSON-RPC spec, parse errors must have id: null
+            return {
+                "jsonrpc": "2.0",
+                "id": None,  # null for parse errors
+                "error": {
+                    "code": -32700,
+                    "message": f"Parse error: {str(e)}"
+                }
+            }
+        
+        if not isinstance(request, dict):
+            # Valid JSON but not a request object (arrays, strings, numbers);
+            # no id can be read from it, so the error carries id: null
+            logger.error(f"Invalid request: {type(request).__name__} instead of an object")
+            return {
+                "jsonrpc": "2.0",
+                "id": None,
+                "error": {
+                    "code": -32600,
+                    "message": "Invalid Request: expected a JSON object"
+                }
+            }
+        
+        logger.debug(f"Received request: {request.get('method', 'unknown')}")
+        
+        # Handle notifications (no id field, no response needed)
+        if "id" not in request:
+            logger.debug(f"Notification received (no response): {request.get('method')}")
+            return None
+        
+        try:
+            return await self.handle_request(request)
+        except Exception as e:
+            logger.error(f"Internal error: {e}", exc_info=True)
+            return {
+                "jsonrpc": "2.0",
+                "id": request.get("id"),
+                "error": {
+                    "code": -32603,
+                    "message": f"Internal error: {str(e)}"
+                }
+            }
+    
+    async def serve(self, reader, writer, max_pending: int = 256):
+        """
+        Answer JSON-RPC lines from reader until EOF.
+        
+        Each request runs as its own task and its response is written as
+        soon as it is ready, so responses may come back out of order
+        (clients match them by id). With max_pending requests in flight,
+        reading pauses until one finishes, which pushes back on the client
+        through the pipe.
+        """
+        slots = asyncio.Semaphore(max_pending)
+        write_lock = asyncio.Lock()
+        in_flight = set()
+        
+        async def send(message):
+            async with write_lock:
+                writer.write(json.dumps(message).encode('utf-8') + b"\n")
+                await writer.drain()
+            logger.debug(f"Sent response for request id: {message.get('id')}")
+        
+        async def dispatch(line):
+            try:
+                response = await self.handle_line(line)
+                if response is not None:
+                    await send(response)
+            finally:
+                slots.release()
+        
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError as e:
+                # Longer than the reader's limit; the line has been skipped
+                logger.error(f"Request too large: {e}")
+                await send({
+                    "jsonrpc": "2.0",
+                    "id": None,
+                    "error": {
+                        "code": -32700,
+                        "message": "Parse error: request line too long"
+                    }
+                })
+                continue
+            
+            if not line:
+                break
+            if not line.strip():
+                continue
+            
+            await slots.acquire()
+            task = asyncio.create_task(dispatch(line))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        
+        # EOF: finish what was already read
+        if in_flight:
+            await asyncio.gather(*in_flight)
+    
     async def run(self):
         """Run the MCP server using stdio."""
         # Configure logging to stderr only (stdout must be clean JSON-RPC)
-        import logging
-        import os
+        # RPS_MCP_LOG_LEVEL=DEBUG logs every request and response id
         logging.basicConfig(
-            level=logging.INFO,
+            level=os.environ.get('RPS_MCP_LOG_LEVEL', 'INFO').upper(),
             stream=sys.stderr,
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
-        logger = logging.getLogger(__name__)
         
         # Write startup banner to stderr for debugging
         logger.info("=" * 50)
@@ -568,65 +775,21 @@ class MCPServer:
         logger.info("Waiting for JSON-RPC requests on stdin...")
         logger.info("=" * 50)
         
-        while True:
-            try:
-                # Read from stdin
-                line = await asyncio.get_event_loop().run_in_executor(
-                    None, sys.stdin.readline
-                )
-                
-                if not line:
-                    logger.info("EOF received, shutting down")
-                    break
-                
-                # Parse JSON-RPC request
-                request = json.loads(line.strip())
-                logger.info(f"Received request: {request.get('method', 'unknown')}")
-                
-                # Handle notifications (no id field, no response needed)
-                if "id" not in request:
-                    logger.info(f"Notification received (no response): {request.get('method')}")
-                    continue
-                
-                # Handle request
-                response = await self.handle_request(request)
-                
-                # Write response to stdout
-                sys.stdout.write(json.dumps(response) + "\n")
-                sys.stdout.flush()
-                logger.info(f"Sent response for request id: {request.get('id')}")
-                
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON parse error: {e}")
-                # Per JSON-RPC spec, parse errors must have id: null
-                error_response = {
-                    "jsonrpc": "2.0",
-                    "id": None,  # null for parse errors
-                    "error": {
-                        "code": -32700,
-                        "message": f"Parse error: {str(e)}"
-                    }
-                }
-                sys.stdout.write(json.dumps(error_response) + "\n")
-                sys.stdout.flush()
-            
-            except Exception as e:
-                logger.error(f"Internal error: {e}", exc_info=True)
-                # Include request id if available
-                request_id = request.get("id") if 'request' in locals() else None
-                error_response = {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "error": {
-                        "code": -32603,
-                        "message": f"Internal error: {str(e)}"
-                    }
-                }
-                sys.stdout.write(json.dumps(error_response) + "\n")
-                sys.stdout.flush()
+        reader, writer = await open_stdio()
+        try:
+            await self.serve(reader, writer, self.max_pending)
+        finally:
+            self.executor.shutdown(wait=False)
+        logger.info("EOF received, shutting down")
 
 async def main():
-    server = MCPServer()
+    server = MCPServer(
+        seed=os.environ.get('RPS_SEED'),
+        max_sessions=int(os.environ.get('RPS_MCP_MAX_SESSIONS', 1000)),
+        history_limit=int(os.environ.get('RPS_MCP_HISTORY', 100)),
+        workers=int(os.environ.get('RPS_MCP_WORKERS', 4)),
+        max_pending=int(os.environ.get('RPS_MCP_MAX_PENDING', 256))
+    )
     await server.run()
 
 if __name__ == "__main__":
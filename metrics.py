@@ -0,0 +1,341 @@
+"""
+Prometheus Metrics for the Rock Paper Scissors App
+
+Counters and histograms rendered in the Prometheus text format by the
+/metrics endpoint in app.py, without the prometheus_client dependency.
+
+Recording is lock-free: every thread writes to its own shard (a plain
+dict reached through threading.local), and only a scrape walks the
+shards and sums them. Shards of threads that have exited are folded into
+one retired shard at scrape time, so per-request threads (the Flask dev
+server) do not pile up.
+
+With RPS_METRICS_DIR set (gunicorn.conf.py sets it to a fresh temporary
+directory), /metrics covers every worker, whichever one answers the
+scrape. Each worker writes its totals to <pid>.json in that directory
+every RPS_METRICS_FLUSH seconds and when it exits. A scrape first writes
+the answering worker's own file, then sums all of them. When the master
+reaps a worker, retire() folds that worker's counters and histograms
+into retired.json and deletes its file. Totals therefore keep growing
+across worker restarts, and there is one file per live worker, however
+often workers are recycled. Gauges only count live workers.
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; covers sub-millisecond AI decisions up to slow commentary calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UPSTREAM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0)
+HISTORY_BUCKETS = (0, 5, 10, 20, 50, 100, 200, 500, 1000, 5000, 10000)
+PAYLOAD_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _add(into: Dict, samples: Dict):
+    """Add samples ({labels: number or histogram row}) into a total."""
+    for labels, value in samples.items():
+        current = into.get(labels)
+        if current is None:
+            into[labels] = list(value) if isinstance(value, list) else value
+        elif isinstance(value, list):
+            for i, part in enumerate(value):
+                current[i] += part
+        else:
+            into[labels] = current + value
+
+
+class _ShardedMetric:
+    """Base for metrics whose samples live in per-thread shards."""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, Dict]] = []
+        self._retired: Dict = {}
+        self._lock = threading.Lock()  # Guards shard registration and scrapes only
+
+    def _shard(self) -> Dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+
+    def collect(self) -> Dict:
+        """Sum of all shards (dead threads' shards are retired on the way)."""
+        with self._lock:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    _add(self._retired, shard)
+            self._shards = live
+            total = {}
+            _add(total, self._retired)
+            for _, shard in live:
+                _add(total, shard.copy())
+        return total
+
+    def samples(self, total: Dict) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_ShardedMetric):
+    """Monotonic counter; inc(*label_values)."""
+
+    kind = 'counter'
+
+    def inc(self, *labels, amount: float = 1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def samples(self, total):
+        return [f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}'
+                for labels, value in sorted(total.items())]
+
+
+class Histogram(_ShardedMetric):
+    """Bucketed distribution; observe(value, *label_values)."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        shard = self._shard()
+        row = shard.get(labels)
+        if row is None:
+            # One slot per bucket plus +Inf, then the sum
+            row = shard[labels] = [0] * (len(self.buckets) + 2)
+        row[bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def samples(self, total):
+        lines = []
+        for labels, row in sorted(total.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), row):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}')
+            label_text = _labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {_number(row[-1])}')
+            lines.append(f'{self.name}_count{label_text} {cumulative}')
+        return lines
+
+
+class CallbackMetric:
+    """Counter or gauge read from fn() at scrape time (e.g. store counters)."""
+
+    def __init__(self, name: str, documentation: str, kind: str, fn: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.fn = fn
+
+    def collect(self) -> Dict:
+        return {(): self.fn()}
+
+    def samples(self, total: Dict) -> List[str]:
+        return [f'{self.name} {_number(value)}' for value in total.values()]
+
+
+class Registry:
+    """
+    Ordered collection of metrics rendered together.
+
+    Args:
+        directory: Directory shared by the worker processes (see module
+                   docstring), or None to render this process only
+    """
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+    RETIRED = 'retired.json'
+
+    def __init__(self, directory: Optional[str] = None):
+        self.metrics = []
+        self.directory = directory
+        self.flushes = 0
+        self._flusher_pid = None
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name, documentation, kind, fn) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, kind, fn))
+
+    def collect(self) -> Dict[str, Dict]:
+        """This process's totals by metric name."""
+        return {metric.name: metric.collect() for metric in self.metrics}
+
+    def render(self) -> str:
+        totals = self.collect() if self.directory is None else self.collect_all()
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples(totals.get(metric.name, {})))
+        return '\n'.join(lines) + '\n'
+
+    # Shared directory (multi-process mode)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        # Readers must not see a worker both in retired.json and in its own file
+        import fcntl
+        with open(self._path('.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read(self, name: str) -> Dict[str, Tuple[str, Dict]]:
+        """A metrics file as {name: (kind, {labels: value})}; empty if missing."""
+        try:
+            with open(self._path(name)) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        return {metric: (kind, {tuple(labels): value for labels, value in samples})
+                for metric, (kind, samples) in data.items()}
+
+    def _write(self, name: str, metrics: Dict[str, Tuple[str, Dict]]):
+        data = {metric: (kind, [(list(labels), value) for labels, value in samples.items()])
+                for metric, (kind, samples) in metrics.items()}
+        temporary = self._path(f'.{name}.{os.getpid()}.tmp')
+        with open(temporary, 'w') as f:
+            json.dump(data, f)
+        os.replace(temporary, self._path(name))
+
+    def flush(self):
+        """Write this process's totals to <pid>.json (no-op without a directory)."""
+        if self.directory is None:
+            return
+        kinds = {metric.name: metric.kind for metric in self.metrics}
+        self._write(f'{os.getpid()}.json',
+                    {name: (kinds[name], total) for name, total in self.collect().items()})
+        self.flushes += 1
+
+    def collect_all(self) -> Dict[str, Dict]:
+        """Totals summed over every worker's file, this process's made fresh first."""
+        self.flush()
+        totals = {}
+        with self._locked(exclusive=False):
+            for name in sorted(os.listdir(self.directory)):
+                if name.endswith('.json'):
+                    for metric, (_, samples) in self._read(name).items():
+                        _add(totals.setdefault(metric, {}), samples)
+        return totals
+
+    def retire(self, pid: int):
+        """Fold an exited worker's counters and histograms into retired.json."""
+        name = f'{pid}.json'
+        with self._locked(exclusive=True):
+            worker = self._read(name)
+            if worker:
+                retired = self._read(self.RETIRED)
+                for metric, (kind, samples) in worker.items():
+                    if kind != 'gauge':
+                        _add(retired.setdefault(metric, (kind, {}))[1], samples)
+                self._write(self.RETIRED, retired)
+            try:
+                os.remove(self._path(name))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        """Delete every metrics file (a new server starts from zero)."""
+        for name in os.listdir(self.directory):
+            if name.endswith(('.json', '.tmp')):
+                os.remove(self._path(name))
+
+    def start_flushing(self, interval: float):
+        """Flush every interval seconds from a daemon thread (once per process)."""
+        if self.directory is None or self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.flush()
+                except OSError:
+                    pass  # Retried on the next tick
+
+        threading.Thread(target=loop, name='metrics-flush', daemon=True).start()
+
+
+# ============================================================
+# APP METRICS
+# ============================================================
+
+REGISTRY = Registry(os.environ.get('RPS_METRICS_DIR'))
+METRICS_FLUSH_INTERVAL = float(os.environ.get('RPS_METRICS_FLUSH', 5))
+
+REQUESTS = REGISTRY.counter(
+    'rps_http_requests_total', 'HTTP requests by endpoint and status.', ('endpoint', 'status'))
+REQUEST_SECONDS = REGISTRY.histogram(
+    'rps_http_request_duration_seconds', 'Request handling time by endpoint.', ('endpoint',))
+REQUEST_BYTES = REGISTRY.histogram(
+    'rps_http_request_payload_bytes', 'Request body size by endpoint.', ('endpoint',),
+    PAYLOAD_BUCKETS)
+PLAY_SECONDS = REGISTRY.histogram(
+    'rps_play_duration_seconds', '/api/play handling time by difficulty.', ('difficulty',))
+DECIDE_SECONDS = REGISTRY.histogram(
+    'rps_ai_decide_seconds', 'Time the AI takes to choose a move, by difficulty.', ('difficulty',))
+HISTORY_ROUNDS = REGISTRY.histogram(
+    'rps_history_rounds', 'Rounds in client-sent histories that were decoded.', (),
+    HISTORY_BUCKETS)
+ADMISSION_REJECTED = REGISTRY.counter(
+    'rps_admission_rejected_total', 'Requests refused by admission control, by class and status.',
+    ('class', 'status'))
+UPSTREAM_SECONDS = REGISTRY.histogram(
+    'rps_commentary_upstream_seconds', 'OpenAI call time per attempt, by outcome.', ('outcome',),
+    UPSTREAM_BUCKETS)
+UPSTREAM_ERRORS = REGISTRY.counter(
+    'rps_commentary_upstream_errors_total', 'Failed OpenAI attempts and refused calls, by kind.',
+    ('kind',))
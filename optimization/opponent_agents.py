@@ -6,11 +6,20 @@ Each agent represents a different human playing pattern.
 """
 
 import random
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+
+from engine import encode_move, get_counter_move
 
 
 class OpponentAgent:
-    """Base class for opponent agents."""
+    """
+    Base class for opponent agents.
+    
+    Agents draw from self.rng (the global random module unless seed() was
+    given a stream from engine/rng.py).
+    """
+    
+    rng = random
     
     def __init__(self, name: str):
         self.name = name
@@ -28,9 +37,23 @@ class OpponentAgent:
         """
         raise NotImplementedError
     
+    def distribution(self, history: List[Dict]) -> Optional[Tuple[float, float, float]]:
+        """
+        Exact probabilities of the next choose() result, by move code.
+        
+        Only agents whose next move depends on nothing but the history can
+        answer; the rest return None.
+        """
+        return None
+    
     def reset(self):
         """Reset agent state."""
         self.history = []
+    
+    def seed(self, rng):
+        """Draw from rng from now on, starting a fresh game with it."""
+        self.rng = rng
+        self.reset()
 
 
 class RandomAgent(OpponentAgent):
@@ -40,7 +63,10 @@ class RandomAgent(OpponentAgent):
         super().__init__("Random")
     
     def choose(self, history: List[Dict]) -> str:
-        return random.choice(['rock', 'paper', 'scissors'])
+        return self.rng.choice(['rock', 'paper', 'scissors'])
+    
+    def distribution(self, history: List[Dict]) -> Tuple[float, float, float]:
+        return (1 / 3, 1 / 3, 1 / 3)
 
 
 class AlwaysRockAgent(OpponentAgent):
@@ -118,7 +144,7 @@ class WinStayLoseShiftAgent(OpponentAgent):
     def __init__(self, shift_type='sequential'):
         super().__init__(f"Win-Stay-Lose-Shift ({shift_type})")
         self.shift_type = shift_type
-        self.last_choice = random.choice(['rock', 'paper', 'scissors'])
+        self.last_choice = self.rng.choice(['rock', 'paper', 'scissors'])
     
     def choose(self, history: List[Dict]) -> str:
         if not history:
@@ -134,26 +160,24 @@ class WinStayLoseShiftAgent(OpponentAgent):
         # If we lost or tied, shift
         if self.shift_type == 'sequential':
             # Sequential shift: rock -> paper -> scissors -> rock
-            sequence = {'rock': 'paper', 'paper': 'scissors', 'scissors': 'rock'}
-            self.last_choice = sequence[last_game['player']]
+            self.last_choice = get_counter_move(last_game['player'])
         elif self.shift_type == 'random':
             # Random shift to different move
             choices = ['rock', 'paper', 'scissors']
             choices.remove(last_game['player'])
-            self.last_choice = random.choice(choices)
+            self.last_choice = self.rng.choice(choices)
         else:
             # Counter shift: what would have won
-            counter = {'rock': 'paper', 'paper': 'scissors', 'scissors': 'rock'}
             if last_game['result'] == 'computer':
-                self.last_choice = counter[last_game['computer']]
+                self.last_choice = get_counter_move(last_game['computer'])
             else:  # tie
-                self.last_choice = counter[last_game['player']]
+                self.last_choice = get_counter_move(last_game['player'])
         
         return self.last_choice
     
     def reset(self):
         super().reset()
-        self.last_choice = random.choice(['rock', 'paper', 'scissors'])
+        self.last_choice = self.rng.choice(['rock', 'paper', 'scissors'])
 
 
 class FrequencyBiasAgent(OpponentAgent):
@@ -166,10 +190,15 @@ class FrequencyBiasAgent(OpponentAgent):
         self.others = [c for c in ['rock', 'paper', 'scissors'] if c != favorite]
     
     def choose(self, history: List[Dict]) -> str:
-        if random.random() < self.bias:
+        if self.rng.random() < self.bias:
             return self.favorite
         else:
-            return random.choice(self.others)
+            return self.rng.choice(self.others)
+    
+    def distribution(self, history: List[Dict]) -> Tuple[float, float, float]:
+        probabilities = [(1 - self.bias) / 2] * 3
+        probabilities[encode_move(self.favorite)] = self.bias
+        return tuple(probabilities)
 
 
 class AntiTripleAgent(OpponentAgent):
@@ -180,7 +209,7 @@ class AntiTripleAgent(OpponentAgent):
     
     def choose(self, history: List[Dict]) -> str:
         if len(history) < 2:
-            return random.choice(['rock', 'paper', 'scissors'])
+            return self.rng.choice(['rock', 'paper', 'scissors'])
         
         last_two = [history[-2]['player'], history[-1]['player']]
         
@@ -188,9 +217,16 @@ class AntiTripleAgent(OpponentAgent):
         if last_two[0] == last_two[1]:
             choices = ['rock', 'paper', 'scissors']
             choices.remove(last_two[0])
-            return random.choice(choices)
+            return self.rng.choice(choices)
         else:
-            return random.choice(['rock', 'paper', 'scissors'])
+            return self.rng.choice(['rock', 'paper', 'scissors'])
+    
+    def distribution(self, history: List[Dict]) -> Tuple[float, float, float]:
+        if len(history) < 2 or history[-2]['player'] != history[-1]['player']:
+            return (1 / 3, 1 / 3, 1 / 3)
+        probabilities = [0.5, 0.5, 0.5]
+        probabilities[encode_move(history[-1]['player'])] = 0.0
+        return tuple(probabilities)
 
 
 class AlternatingAgent(OpponentAgent):
@@ -224,26 +260,21 @@ class CounterAIAgent(OpponentAgent):
     def choose(self, history: List[Dict]) -> str:
         # Establish fake rock bias early
         if len(history) < 10:
-            if random.random() < 0.7:
+            if self.rng.random() < 0.7:
                 return self.favorite
             else:
-                return random.choice(['paper', 'scissors'])
+                return self.rng.choice(['paper', 'scissors'])
         
         # Then counter the AI's expected counter
         # AI expects rock, will play paper, so we play scissors
-        counter_moves = {
-            'rock': 'paper',
-            'paper': 'scissors',
-            'scissors': 'rock'
-        }
-        ai_expected_counter = counter_moves[self.favorite]
-        our_counter = counter_moves[ai_expected_counter]
+        ai_expected_counter = get_counter_move(self.favorite)
+        our_counter = get_counter_move(ai_expected_counter)
         
         # Play with 60% confidence
-        if random.random() < 0.6:
+        if self.rng.random() < 0.6:
             return our_counter
         else:
-            return random.choice(['rock', 'paper', 'scissors'])
+            return self.rng.choice(['rock', 'paper', 'scissors'])
 
 
 class MarkovAgent(OpponentAgent):
@@ -259,7 +290,7 @@ class MarkovAgent(OpponentAgent):
             'paper': 'scissors',
             'scissors': 'rock'
         }
-        self.last_choice = random.choice(['rock', 'paper', 'scissors'])
+        self.last_choice = self.rng.choice(['rock', 'paper', 'scissors'])
     
     def choose(self, history: List[Dict]) -> str:
         if not history:
@@ -270,7 +301,7 @@ class MarkovAgent(OpponentAgent):
     
     def reset(self):
         super().reset()
-        self.last_choice = random.choice(['rock', 'paper', 'scissors'])
+        self.last_choice = self.rng.choice(['rock', 'paper', 'scissors'])
 
 
 class MixedStrategyAgent(OpponentAgent):
@@ -281,11 +312,11 @@ class MixedStrategyAgent(OpponentAgent):
     
     def __init__(self):
         super().__init__("Mixed Strategy")
-        self.favorite = random.choice(['rock', 'paper', 'scissors'])
+        self.favorite = self.rng.choice(['rock', 'paper', 'scissors'])
         self.last_choice = self.favorite
     
     def choose(self, history: List[Dict]) -> str:
-        strategy = random.random()
+        strategy = self.rng.random()
         
         # 30% Win-Stay-Lose-Shift
         if strategy < 0.3 and history:
@@ -294,23 +325,22 @@ class MixedStrategyAgent(OpponentAgent):
                 self.last_choice = last_game['player']
                 return self.last_choice
             else:
-                sequence = {'rock': 'paper', 'paper': 'scissors', 'scissors': 'rock'}
-                self.last_choice = sequence[last_game['player']]
+                self.last_choice = get_counter_move(last_game['player'])
                 return self.last_choice
         
         # 30% Frequency Bias
         elif strategy < 0.6:
-            if random.random() < 0.55:
+            if self.rng.random() < 0.55:
                 self.last_choice = self.favorite
                 return self.last_choice
         
         # 40% Random
-        self.last_choice = random.choice(['rock', 'paper', 'scissors'])
+        self.last_choice = self.rng.choice(['rock', 'paper', 'scissors'])
         return self.last_choice
     
     def reset(self):
         super().reset()
-        self.favorite = random.choice(['rock', 'paper', 'scissors'])
+        self.favorite = self.rng.choice(['rock', 'paper', 'scissors'])
         self.last_choice = self.favorite
 
 
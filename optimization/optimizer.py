@@ -13,6 +13,12 @@ from typing import List, Dict, Tuple, Callable, Any
 from collections import defaultdict
 import time
 
+from engine import (
+    MOVES, RESULTS, TIE, PLAYER, COMPUTER, PlayerModel,
+    decode_move, determine_winner, encode_move, outcome, make_generator, make_rng
+)
+from engine.lookup import sample
+from engine.batched import BatchState, very_hard_moves
 from optimization.hyperparameters import VeryHardHyperparameters
 from optimization.opponent_agents import get_weighted_opponent_suite, OpponentAgent
 
@@ -22,34 +28,45 @@ class SimulationEngine:
     Engine for running games between AI and opponent agents.
     """
     
-    def __init__(self, ai_function: Callable):
+    def __init__(self, ai_function: Callable, distribution_function: Callable = None,
+                 seed=None):
         """
         Initialize simulation engine.
         
         Args:
-            ai_function: AI strategy function that takes (history, params) and returns choice
+            ai_function: AI strategy function that takes (history, params, model, rng)
+                         and returns choice; model is a PlayerModel kept in sync
+                         with history by the engine
+            distribution_function: Optional exact form of the same strategy,
+                                   taking (model, params) and returning move
+                                   code probabilities. When given, games are
+                                   scored by the expected result of every
+                                   round rather than the sampled one.
+            seed: Optional root seed. Each game then gets its own AI and
+                  opponent streams derived from (seed, opponent, game), so
+                  every tournament replays the same opponent moves and
+                  configurations are compared on common random numbers.
         """
         self.ai_function = ai_function
-        self.choices = ['rock', 'paper', 'scissors']
+        self.distribution_function = distribution_function
+        self.seed = seed
+        self.choices = list(MOVES)
     
     def determine_winner(self, player_choice: str, computer_choice: str) -> str:
         """Determine winner of a round."""
-        if player_choice == computer_choice:
-            return 'tie'
-        
-        winning_combinations = {
-            'rock': 'scissors',
-            'paper': 'rock',
-            'scissors': 'paper'
-        }
-        
-        if winning_combinations[player_choice] == computer_choice:
-            return 'player'
-        else:
-            return 'computer'
+        return determine_winner(player_choice, computer_choice)
+    
+    def game_rngs(self, opponent_name: str, game: int = 0):
+        """
+        (ai_rng, opponent_rng) for one game; the random module if unseeded.
+        """
+        if self.seed is None:
+            return random, random
+        return (make_rng(self.seed, opponent_name, game, 'ai'),
+                make_rng(self.seed, opponent_name, game, 'opponent'))
     
     def run_game(self, opponent: OpponentAgent, params: VeryHardHyperparameters, 
-                 num_rounds: int = 100) -> Dict[str, Any]:
+                 num_rounds: int = 100, game: int = 0) -> Dict[str, Any]:
         """
         Run a single game between AI and opponent.
         
@@ -57,42 +74,61 @@ class SimulationEngine:
             opponent: Opponent agent
             params: Hyperparameters for AI
             num_rounds: Number of rounds to play
+            game: Game number against this opponent (selects the random
+                  streams when the engine is seeded)
         
         Returns:
-            Dict with game statistics
+            Dict with game statistics (expected counts, possibly fractional,
+            when the engine has a distribution_function)
         """
         history = []
-        opponent.reset()
+        model = PlayerModel()
+        rng, opponent_rng = self.game_rngs(opponent.name, game)
+        opponent.seed(opponent_rng)
         
-        wins = 0
-        losses = 0
-        ties = 0
+        result_counts = [0, 0, 0]  # Indexed by result code
         
         for _ in range(num_rounds):
             # Opponent chooses
+            if self.distribution_function is not None:
+                opponent_distribution = opponent.distribution(history)
+                if opponent_distribution is not None:
+                    opponent_distribution = list(enumerate(opponent_distribution))
             player_choice = opponent.choose(history)
             
-            # AI chooses using current hyperparameters
-            computer_choice = self.ai_function(history, params)
+            player = encode_move(player_choice)
             
-            # Determine winner
-            result = self.determine_winner(player_choice, computer_choice)
-            
-            # Update stats
-            if result == 'computer':
-                wins += 1
-            elif result == 'player':
-                losses += 1
+            if self.distribution_function is not None:
+                # Score the AI's whole mixed strategy against the opponent's
+                # (or against the move it chose, if it cannot say), then draw
+                # the move actually played from it
+                distribution = self.distribution_function(model, params)
+                for player_move, player_probability in opponent_distribution or ((player, 1.0),):
+                    for move, probability in enumerate(distribution):
+                        result_counts[outcome(player_move, move)] += player_probability * probability
+                computer = sample(distribution, rng)
+                computer_choice = decode_move(computer)
+                result = outcome(player, computer)
             else:
-                ties += 1
+                # AI chooses using current hyperparameters
+                computer_choice = self.ai_function(history, params, model, rng)
+                
+                # Determine winner on move codes
+                computer = encode_move(computer_choice)
+                result = outcome(player, computer)
+                result_counts[result] += 1
             
-            # Update history
+            # Update model and history
+            model.record(player, computer, result)
             history.append({
                 'player': player_choice,
                 'computer': computer_choice,
-                'result': result
+                'result': RESULTS[result]
             })
         
+        wins = result_counts[COMPUTER]
+        losses = result_counts[PLAYER]
+        ties = result_counts[TIE]
         win_rate = wins / num_rounds if num_rounds > 0 else 0
         
         return {
@@ -104,9 +140,69 @@ class SimulationEngine:
             'rounds': num_rounds
         }
     
+    def run_games_batched(self, opponents: List[OpponentAgent], params: VeryHardHyperparameters,
+                          num_rounds: int = 100, rng=None) -> List[Dict[str, Any]]:
+        """
+        Run one game against each opponent, advancing all games in lockstep.
+        
+        The AI side of every game is decided in a single vectorized call per
+        round by engine/batched.py, which implements ai_very_hard_parameterized;
+        self.ai_function is not used on this path. Requires numpy.
+        
+        Args:
+            opponents: Opponent agents (one game each; pass copies to play
+                       several independent games against the same strategy)
+            params: Hyperparameters for AI
+            num_rounds: Number of rounds to play
+            rng: Optional numpy Generator for the AI's stochastic choices
+                 (derived from the engine's seed if omitted)
+        
+        Returns:
+            List of per-game statistics dicts, as returned by run_game
+        """
+        state = BatchState(len(opponents))
+        histories = [[] for _ in opponents]
+        result_counts = [[0, 0, 0] for _ in opponents]
+        if rng is None and self.seed is not None:
+            rng = make_generator(self.seed, 'batched', len(opponents))
+        games = defaultdict(int)
+        for opponent in opponents:
+            opponent.seed(self.game_rngs(opponent.name, games[opponent.name])[1])
+            games[opponent.name] += 1
+        
+        for _ in range(num_rounds):
+            # Opponents choose (scalar agents), AI chooses for all games at once
+            player = [encode_move(opponent.choose(history))
+                      for opponent, history in zip(opponents, histories)]
+            computer = very_hard_moves(state, params, rng)
+            state.record(player, computer)
+            
+            for i, (player_move, computer_move, result) in enumerate(
+                    zip(player, computer.tolist(), state.results[:, -1].tolist())):
+                result_counts[i][result] += 1
+                histories[i].append({
+                    'player': MOVES[player_move],
+                    'computer': MOVES[computer_move],
+                    'result': RESULTS[result]
+                })
+        
+        return [
+            {
+                'wins': counts[COMPUTER],
+                'losses': counts[PLAYER],
+                'ties': counts[TIE],
+                'win_rate': counts[COMPUTER] / num_rounds if num_rounds > 0 else 0,
+                'opponent': opponent.name,
+                'rounds': num_rounds
+            }
+            for opponent, counts in zip(opponents, result_counts)
+        ]
+    
     def run_tournament(self, params: VeryHardHyperparameters, 
                       rounds_per_opponent: int = 100,
-                      verbose: bool = False) -> Dict[str, Any]:
+                      verbose: bool = False,
+                      batched: bool = False,
+                      games_per_opponent: int = 1) -> Dict[str, Any]:
         """
         Run a tournament against all opponents.
         
@@ -114,24 +210,58 @@ class SimulationEngine:
             params: Hyperparameters for AI
             rounds_per_opponent: Rounds to play against each opponent
             verbose: Print progress
+            batched: Play every game in lockstep with the vectorized engine
+                     (see run_games_batched)
+            games_per_opponent: Independent games per opponent when batched;
+                                their win rates are averaged
         
         Returns:
             Dict with tournament statistics
+        
+        Raises:
+            ValueError: batched with a distribution_function; the batched
+                        engine only plays sampled moves
         """
+        if batched and self.distribution_function is not None:
+            raise ValueError("Expected-value scoring (distribution_function) is not "
+                             "supported by the batched engine")
+        
         weighted_opponents = get_weighted_opponent_suite()
         results = []
         total_weight = sum(weight for _, weight in weighted_opponents)
         
-        for opponent, weight in weighted_opponents:
-            if verbose:
-                print(f"  Playing vs {opponent.name}...", end='', flush=True)
-            
-            game_result = self.run_game(opponent, params, rounds_per_opponent)
-            game_result['weight'] = weight
-            results.append(game_result)
+        if batched:
+            opponents = [copy.deepcopy(opponent)
+                         for opponent, _ in weighted_opponents
+                         for _ in range(games_per_opponent)]
+            games = self.run_games_batched(opponents, params, rounds_per_opponent)
             
-            if verbose:
-                print(f" Win Rate: {game_result['win_rate']*100:.1f}%")
+            for index, (opponent, weight) in enumerate(weighted_opponents):
+                opponent_games = games[index * games_per_opponent:(index + 1) * games_per_opponent]
+                game_result = {
+                    'wins': sum(g['wins'] for g in opponent_games),
+                    'losses': sum(g['losses'] for g in opponent_games),
+                    'ties': sum(g['ties'] for g in opponent_games),
+                    'win_rate': sum(g['win_rate'] for g in opponent_games) / games_per_opponent,
+                    'opponent': opponent.name,
+                    'rounds': rounds_per_opponent * games_per_opponent,
+                    'weight': weight
+                }
+                results.append(game_result)
+                
+                if verbose:
+                    print(f"  vs {opponent.name}: Win Rate: {game_result['win_rate']*100:.1f}%")
+        else:
+            for opponent, weight in weighted_opponents:
+                if verbose:
+                    print(f"  Playing vs {opponent.name}...", end='', flush=True)
+                
+                game_result = self.run_game(opponent, params, rounds_per_opponent)
+                game_result['weight'] = weight
+                results.append(game_result)
+                
+                if verbose:
+                    print(f" Win Rate: {game_result['win_rate']*100:.1f}%")
         
         # Calculate weighted average win rate
         weighted_win_rate = sum(
@@ -169,16 +299,33 @@ class FitnessEvaluator:
     Evaluates fitness of hyperparameter configurations.
     """
     
-    def __init__(self, ai_function: Callable, rounds_per_opponent: int = 100):
+    def __init__(self, ai_function: Callable, rounds_per_opponent: int = 100,
+                 batched: bool = False, games_per_opponent: int = 1,
+                 distribution_function: Callable = None, seed=None):
         """
         Initialize fitness evaluator.
         
         Args:
             ai_function: AI strategy function
             rounds_per_opponent: Number of rounds per opponent in tournaments
+            batched: Run tournaments on the vectorized engine (requires numpy)
+            games_per_opponent: Independent games per opponent when batched
+            distribution_function: Exact form of ai_function; scores rounds by
+                                   expected value (see SimulationEngine)
+            seed: Root seed; every evaluation then replays the same random
+                  streams, so fitness differences come from the parameters
+        
+        Raises:
+            ValueError: batched together with distribution_function
         """
-        self.engine = SimulationEngine(ai_function)
+        if batched and distribution_function is not None:
+            raise ValueError("Expected-value scoring (distribution_function) is not "
+                             "supported by the batched engine")
+        
+        self.engine = SimulationEngine(ai_function, distribution_function, seed)
         self.rounds_per_opponent = rounds_per_opponent
+        self.batched = batched
+        self.games_per_opponent = games_per_opponent
         self.evaluation_count = 0
     
     def evaluate(self, params: VeryHardHyperparameters, verbose: bool = False) -> float:
@@ -199,7 +346,8 @@ class FitnessEvaluator:
         if verbose:
             print(f"\nEvaluation #{self.evaluation_count}")
         
-        results = self.engine.run_tournament(params, self.rounds_per_opponent, verbose)
+        results = self.engine.run_tournament(params, self.rounds_per_opponent, verbose,
+                                             self.batched, self.games_per_opponent)
         
         # Fitness is weighted win rate * 100
         # We want to maximize this
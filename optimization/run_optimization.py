@@ -26,7 +26,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from optimization.hyperparameters import VeryHardHyperparameters, DEFAULT_VERY_HARD_PARAMS
-from optimization.ai_strategies import ai_very_hard_parameterized
+from optimization.ai_strategies import ai_very_hard_parameterized, very_hard_distribution
 from optimization.optimizer import (
     FitnessEvaluator,
     RandomSearchOptimizer,
@@ -35,13 +35,16 @@ from optimization.optimizer import (
 )
 
 
-def run_baseline_evaluation():
+def run_baseline_evaluation(batched=False, games_per_opponent=1, expected=False, seed=None):
     """Evaluate baseline (current default parameters)."""
     print("\n" + "=" * 70)
     print("BASELINE EVALUATION - Current Default Parameters")
     print("=" * 70)
     
-    evaluator = FitnessEvaluator(ai_very_hard_parameterized, rounds_per_opponent=100)
+    evaluator = FitnessEvaluator(ai_very_hard_parameterized, rounds_per_opponent=100,
+                                 batched=batched, games_per_opponent=games_per_opponent,
+                                 distribution_function=very_hard_distribution if expected else None,
+                                 seed=seed)
     baseline_params = DEFAULT_VERY_HARD_PARAMS
     baseline_fitness = evaluator.evaluate(baseline_params, verbose=True)
     
@@ -49,13 +52,17 @@ def run_baseline_evaluation():
     return baseline_fitness
 
 
-def run_random_search(iterations=50, rounds_per_opponent=100):
+def run_random_search(iterations=50, rounds_per_opponent=100, batched=False, games_per_opponent=1,
+                      expected=False, seed=None):
     """Run random search optimization."""
     print("\n" + "=" * 70)
     print("RANDOM SEARCH OPTIMIZATION")
     print("=" * 70)
     
-    evaluator = FitnessEvaluator(ai_very_hard_parameterized, rounds_per_opponent=rounds_per_opponent)
+    evaluator = FitnessEvaluator(ai_very_hard_parameterized, rounds_per_opponent=rounds_per_opponent,
+                                 batched=batched, games_per_opponent=games_per_opponent,
+                                 distribution_function=very_hard_distribution if expected else None,
+                                 seed=seed)
     optimizer = RandomSearchOptimizer(evaluator, DEFAULT_VERY_HARD_PARAMS)
     
     best_params, best_fitness = optimizer.optimize(iterations=iterations, verbose=True)
@@ -71,13 +78,17 @@ def run_random_search(iterations=50, rounds_per_opponent=100):
     return best_params, best_fitness
 
 
-def run_simulated_annealing(iterations=100, rounds_per_opponent=100):
+def run_simulated_annealing(iterations=100, rounds_per_opponent=100, batched=False, games_per_opponent=1,
+                            expected=False, seed=None):
     """Run simulated annealing optimization."""
     print("\n" + "=" * 70)
     print("SIMULATED ANNEALING OPTIMIZATION")
     print("=" * 70)
     
-    evaluator = FitnessEvaluator(ai_very_hard_parameterized, rounds_per_opponent=rounds_per_opponent)
+    evaluator = FitnessEvaluator(ai_very_hard_parameterized, rounds_per_opponent=rounds_per_opponent,
+                                 batched=batched, games_per_opponent=games_per_opponent,
+                                 distribution_function=very_hard_distribution if expected else None,
+                                 seed=seed)
     optimizer = SimulatedAnnealingOptimizer(evaluator, DEFAULT_VERY_HARD_PARAMS)
     
     best_params, best_fitness = optimizer.optimize(
@@ -112,6 +123,9 @@ Examples:
   
   # Compare both methods
   python run_optimization.py --method both --iterations 50 --rounds 100
+  
+  # Expected-value scoring (far less noise, so fewer rounds are needed)
+  python run_optimization.py --method random --iterations 50 --rounds 30 --expected
         """
     )
     
@@ -130,11 +144,30 @@ Examples:
                        default=100,
                        help='Rounds per opponent in fitness evaluation (default: 100)')
     
+    parser.add_argument('--batched',
+                       action='store_true',
+                       help='Play all games in lockstep with the NumPy engine (requires numpy)')
+    
+    parser.add_argument('--games',
+                       type=int,
+                       default=1,
+                       help='Independent games per opponent with --batched (default: 1)')
+    
+    parser.add_argument('--expected',
+                       action='store_true',
+                       help='Score rounds by the AI\'s exact expected result instead of a sampled move')
+    
+    parser.add_argument('--seed',
+                       help='Root seed for the simulations; every evaluation replays the same '
+                            'random streams (common random numbers)')
+    
     parser.add_argument('--skip-baseline',
                        action='store_true',
                        help='Skip baseline evaluation')
     
     args = parser.parse_args()
+    if args.batched and args.expected:
+        parser.error('--expected is not supported with --batched (the NumPy engine only plays sampled moves)')
     
     # Create results directory
     os.makedirs('optimization/results', exist_ok=True)
@@ -145,18 +178,25 @@ Examples:
     print(f"Method: {args.method}")
     print(f"Iterations: {args.iterations}")
     print(f"Rounds per opponent: {args.rounds}")
+    if args.batched:
+        print(f"Batched: {args.games} game(s) per opponent")
+    if args.expected:
+        print("Scoring: expected value per round")
+    if args.seed is not None:
+        print(f"Seed: {args.seed}")
     print("=" * 70)
     
     # Evaluate baseline
     baseline_fitness = None
     if not args.skip_baseline:
-        baseline_fitness = run_baseline_evaluation()
+        baseline_fitness = run_baseline_evaluation(args.batched, args.games, args.expected, args.seed)
     
     results = {}
     
     # Run optimization
     if args.method == 'random' or args.method == 'both':
-        params, fitness = run_random_search(args.iterations, args.rounds)
+        params, fitness = run_random_search(args.iterations, args.rounds, args.batched, args.games,
+                                            args.expected, args.seed)
         results['random_search'] = (params, fitness)
         
         if baseline_fitness:
@@ -164,7 +204,8 @@ Examples:
             print(f"\n✓ Random Search Improvement: {improvement:+.2f} ({improvement/baseline_fitness*100:+.1f}%)")
     
     if args.method == 'annealing' or args.method == 'both':
-        params, fitness = run_simulated_annealing(args.iterations, args.rounds)
+        params, fitness = run_simulated_annealing(args.iterations, args.rounds, args.batched, args.games,
+                                                  args.expected, args.seed)
         results['simulated_annealing'] = (params, fitness)
         
         if baseline_fitness:
@@ -0,0 +1,162 @@
+"""
+Startup Profiling for the Rock Paper Scissors App
+
+With RPS_PROFILE_STARTUP=1, app.py reports where a worker's boot time
+goes before it takes traffic: how long each import took (cumulative,
+including the modules it pulled in) and how long each initialization
+step took (asset manifest, session store, warm-up, ...). The report is
+written to stderr once app.py has finished loading, so it shows up in
+the gunicorn / Heroku log of every worker boot.
+
+    RPS_PROFILE_STARTUP=1 python -c "import app"
+    python startup.py                      # the same, plus a summary line
+
+Import timing wraps the loader of every module imported after
+STARTUP.install() (the first thing app.py does); it is only installed
+when profiling is on, so normal boots pay nothing.
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+# Imports faster than this are left out of the report (seconds)
+MIN_REPORTED_IMPORT = 0.001
+
+
+class _TimedLoader:
+    """Loader wrapper that times exec_module and delegates everything else."""
+
+    def __init__(self, loader, profile: 'StartupProfile', name: str):
+        self._loader = loader
+        self._profile = profile
+        self._name = name
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profile._enter(self._name)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profile._exit()
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+
+class _TimingFinder:
+    """Meta path finder that asks the other finders, then wraps the loader."""
+
+    def __init__(self, profile: 'StartupProfile'):
+        self.profile = profile
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader, self.profile, fullname)
+                return spec
+        return None
+
+
+class StartupProfile:
+    """
+    Per-import and per-step boot timings.
+
+    Args:
+        enabled: Record anything at all (steps are plain no-ops otherwise)
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.imports: List[Tuple[int, str, float]] = []  # (depth, module, seconds), in finish order
+        self.steps: List[Tuple[str, float]] = []
+        self._stack = []  # [module, started] of the imports in progress
+        self._finder = None
+
+    def install(self):
+        """Start timing imports (no-op unless enabled)."""
+        if self.enabled and self._finder is None:
+            self._finder = _TimingFinder(self)
+            sys.meta_path.insert(0, self._finder)
+
+    def uninstall(self):
+        if self._finder is not None:
+            sys.meta_path.remove(self._finder)
+            self._finder = None
+
+    def _enter(self, name: str):
+        self._stack.append([name, time.perf_counter()])
+
+    def _exit(self):
+        name, started = self._stack.pop()
+        self.imports.append((len(self._stack), name, time.perf_counter() - started))
+
+    @contextmanager
+    def step(self, name: str):
+        """Time one initialization step."""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - started))
+
+    def report(self, max_depth: int = 1) -> str:
+        """
+        Imports (direct ones, and what they pulled in down to max_depth)
+        and steps, slowest first within each level.
+        """
+        total = time.perf_counter() - self.started
+        lines = [f'Startup profile (pid {os.getpid()}): {total * 1000:.1f} ms', 'Imports (cumulative ms):']
+
+        # Rebuild the import tree; children finish before their parent
+        children, pending = [], {}
+        for depth, name, seconds in self.imports:
+            node = (name, seconds, pending.pop(depth + 1, []))
+            if depth == 0:
+                children.append(node)
+            else:
+                pending.setdefault(depth, []).append(node)
+
+        def walk(nodes, depth):
+            for name, seconds, nested in sorted(nodes, key=lambda node: -node[1]):
+                if seconds < MIN_REPORTED_IMPORT:
+                    continue
+                lines.append(f'  {"  " * depth}{seconds * 1000:8.1f}  {name}')
+                if depth < max_depth:
+                    walk(nested, depth + 1)
+
+        walk(children, 0)
+        lines.append('Steps (ms):')
+        for name, seconds in self.steps:
+            lines.append(f'  {seconds * 1000:8.1f}  {name}')
+        return '\n'.join(lines)
+
+    def finish(self, out=None):
+        """Stop timing imports and write the report (no-op unless enabled)."""
+        if not self.enabled:
+            return
+        self.uninstall()
+        print(self.report(), file=out or sys.stderr, flush=True)
+
+
+# Process-wide profile used by app.py
+STARTUP = StartupProfile(os.environ.get('RPS_PROFILE_STARTUP', '') not in ('', '0'))
+
+
+if __name__ == '__main__':
+    os.environ['RPS_PROFILE_STARTUP'] = '1'
+    started = time.perf_counter()
+    import app  # noqa: F401  (prints the report)
+    print(f'app imported in {(time.perf_counter() - started) * 1000:.1f} ms', file=sys.stderr)
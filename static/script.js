@@ -17,9 +17,14 @@ let gameInProgress = false;
 
 // Auto-play mode
 let autoPlayActive = false;
-let autoPlayInterval = null;
+let autoPlayController = null; // Aborts the /api/autoplay stream
 let autoPlayerDifficulty = 'easy';
 let autoPlaySpeed = 1500;
+// Rounds per /api/autoplay stream: short streams free the server's
+// auto-play slot between them, so other players get a turn
+const AUTO_PLAY_STREAM_ROUNDS = 20;
+// Longest wait before retrying a stream the server refused (ms)
+const AUTO_PLAY_MAX_BACKOFF = 30000;
 
 // Difficulty level
 let currentDifficulty = 'easy';
@@ -27,6 +32,9 @@ let currentDifficulty = 'easy';
 // Game history for AI
 let gameHistory = [];
 
+// Server-side session holding the AI's model of this player (see /api/play)
+let sessionId = null;
+
 // Streak tracking
 let currentStreak = 0;
 let currentStreakType = null; // 'win' or 'loss'
@@ -896,6 +904,163 @@ function displayWinningHand(winningHand) {
     }
 }
 
+// Show one finished round and update scores, stats and history
+function applyRoundResult(data) {
+    // A new id means the server started a new session (first round or expired)
+    sessionId = data.session_id;
+    
+    // Display battle
+    battleDisplay.innerHTML = `
+        <div style="display: flex; align-items: center; justify-content: center; gap: 20px; margin-top: 10px;">
+            <div style="text-align: center;">
+                <div style="font-size: 2.0rem; color: #666; margin-bottom: 5px; font-weight: 600;">${t('battle.you')}</div>
+                <span class="battle-emoji">${emojiMap[data.player_choice]}</span>
+            </div>
+            <div style="font-size: 2rem; color: #667eea;">VS</div>
+            <div style="text-align: center;">
+                <div style="font-size: 2.0rem; color: #666; margin-bottom: 5px; font-weight: 600;">${t('battle.computer')}</div>
+                <span class="battle-emoji">${emojiMap[data.computer_choice]}</span>
+            </div>
+        </div>
+    `;
+    
+    // Update result message
+    resultMessage.classList.remove('win', 'lose', 'tie');
+    
+    let winningHand = null;
+    
+    if (data.result === 'player') {
+        resultMessage.textContent = t('game.youWin');
+        resultMessage.classList.add('win');
+        scores.player++;
+        winningHand = data.player_choice;
+    } else if (data.result === 'computer') {
+        resultMessage.textContent = t('game.youLose');
+        resultMessage.classList.add('lose');
+        scores.computer++;
+        winningHand = data.computer_choice;
+    } else {
+        resultMessage.textContent = t('game.tie');
+        resultMessage.classList.add('tie');
+        scores.ties++;
+        winningHand = null; // No winner in a tie
+    }
+    
+    // Display winning hand
+    displayWinningHand(winningHand);
+    
+    // Update hand statistics
+    updateHandStats(data.player_choice, data.result);
+    
+    // Update streak
+    if (data.result === 'player') {
+        if (currentStreakType === 'win') {
+            currentStreak++;
+        } else {
+            currentStreak = 1;
+            currentStreakType = 'win';
+        }
+    } else if (data.result === 'computer') {
+        if (currentStreakType === 'loss') {
+            currentStreak--;
+        } else {
+            currentStreak = -1;
+            currentStreakType = 'loss';
+        }
+    }
+    
+    // Update best streak
+    if (Math.abs(currentStreak) > Math.abs(bestStreak)) {
+        bestStreak = currentStreak;
+        saveStreaks();
+    }
+    
+    // Update longest winning/losing streaks
+    if (currentStreak > longestWinningStreak) {
+        longestWinningStreak = currentStreak;
+        updateLongestStreaksDisplay();
+        saveStreaks();
+    }
+    if (Math.abs(currentStreak) > longestLosingStreak && currentStreak < 0) {
+        longestLosingStreak = Math.abs(currentStreak);
+        updateLongestStreaksDisplay();
+        saveStreaks();
+    }
+    
+    // Update streak display
+    updateStreakDisplay();
+    
+    // Add to trend data
+    trendData.push({
+        player: scores.player,
+        computer: scores.computer
+    });
+    // Keep last 100 data points
+    if (trendData.length > 100) {
+        trendData.shift();
+    }
+    saveTrend();
+    
+    // MOBILE FIX: Redraw chart if visible (always visible on mobile)
+    if (trendChart && trendModal) {
+        setTimeout(() => {
+            drawTrendChart(trendChart, trendData);
+            
+            // Update the stats below the chart
+            const totalGames = scores.player + scores.computer + scores.ties;
+            if (totalGamesStat) totalGamesStat.textContent = totalGames;
+            if (currentStreakStat) currentStreakStat.textContent = currentStreak >= 0 ? `+${currentStreak}` : currentStreak;
+            if (bestStreakStat) bestStreakStat.textContent = bestStreak >= 0 ? `+${bestStreak}` : bestStreak;
+            
+            // Update the title
+            const trendTitle = document.getElementById('trend-graph-title');
+            if (trendTitle) {
+                const displayGames = Math.min(totalGames, 100);
+                trendTitle.textContent = `📈 Data from last ${displayGames} games`;
+            }
+        }, 50);
+    }
+    
+    // Detect patterns
+    detectPatterns();
+    generateStrategies();
+    
+    // Add to game history for AI learning
+    gameHistory.push({
+        player: data.player_choice,
+        computer: data.computer_choice,
+        result: data.result
+    });
+    
+    // Keep only last 50 games in history
+    if (gameHistory.length > 50) {
+        gameHistory.shift();
+    }
+    
+    // Update and save scores
+    updateScoreDisplay();
+    saveScores();
+    
+    // Update trend graph if it's open
+    updateTrendGraphIfOpen();
+}
+
+// Pack game history for /api/play: 2 bits per move (rock 0, paper 1,
+// scissors 2), four moves per byte lowest bits first, each round's player
+// move then computer move, unused slots set to 3, base64 encoded
+const MOVE_CODES = { rock: 0, paper: 1, scissors: 2 };
+
+function packHistory(games) {
+    const bytes = new Uint8Array(Math.ceil(games.length / 2));
+    bytes.fill(0xFF);
+    games.forEach((game, i) => {
+        const shift = (i % 2) * 4;
+        const packed = MOVE_CODES[game.player] | (MOVE_CODES[game.computer] << 2);
+        bytes[i >> 1] = (bytes[i >> 1] & ~(0xF << shift)) | (packed << shift);
+    });
+    return btoa(String.fromCharCode(...bytes));
+}
+
 // Play game
 async function playGame(playerChoice, isAutoPlay = false) {
     // Prevent multiple simultaneous games
@@ -923,7 +1088,9 @@ async function playGame(playerChoice, isAutoPlay = false) {
         const requestData = {
             choice: playerChoice,
             difficulty: currentDifficulty, // This is the opponent's difficulty
-            history: gameHistory.slice(-10)
+            session_id: sessionId, // The server keeps the full history
+            // Only decoded if the session expired, to seed the new one
+            history: packHistory(gameHistory)
         };
         
         const response = await fetch('/api/play', {
@@ -941,140 +1108,7 @@ async function playGame(playerChoice, isAutoPlay = false) {
             return;
         }
         
-        // Display battle
-        battleDisplay.innerHTML = `
-            <div style="display: flex; align-items: center; justify-content: center; gap: 20px; margin-top: 10px;">
-                <div style="text-align: center;">
-                    <div style="font-size: 2.0rem; color: #666; margin-bottom: 5px; font-weight: 600;">${t('battle.you')}</div>
-                    <span class="battle-emoji">${emojiMap[data.player_choice]}</span>
-                </div>
-                <div style="font-size: 2rem; color: #667eea;">VS</div>
-                <div style="text-align: center;">
-                    <div style="font-size: 2.0rem; color: #666; margin-bottom: 5px; font-weight: 600;">${t('battle.computer')}</div>
-                    <span class="battle-emoji">${emojiMap[data.computer_choice]}</span>
-                </div>
-            </div>
-        `;
-        
-        // Update result message
-        resultMessage.classList.remove('win', 'lose', 'tie');
-        
-        let winningHand = null;
-        
-        if (data.result === 'player') {
-            resultMessage.textContent = t('game.youWin');
-            resultMessage.classList.add('win');
-            scores.player++;
-            winningHand = data.player_choice;
-        } else if (data.result === 'computer') {
-            resultMessage.textContent = t('game.youLose');
-            resultMessage.classList.add('lose');
-            scores.computer++;
-            winningHand = data.computer_choice;
-        } else {
-            resultMessage.textContent = t('game.tie');
-            resultMessage.classList.add('tie');
-            scores.ties++;
-            winningHand = null; // No winner in a tie
-        }
-        
-        // Display winning hand
-        displayWinningHand(winningHand);
-        
-        // Update hand statistics
-        updateHandStats(data.player_choice, data.result);
-        
-        // Update streak
-        if (data.result === 'player') {
-            if (currentStreakType === 'win') {
-                currentStreak++;
-            } else {
-                currentStreak = 1;
-                currentStreakType = 'win';
-            }
-        } else if (data.result === 'computer') {
-            if (currentStreakType === 'loss') {
-                currentStreak--;
-            } else {
-                currentStreak = -1;
-                currentStreakType = 'loss';
-            }
-        }
-        
-        // Update best streak
-        if (Math.abs(currentStreak) > Math.abs(bestStreak)) {
-            bestStreak = currentStreak;
-            saveStreaks();
-        }
-        
-        // Update longest winning/losing streaks
-        if (currentStreak > longestWinningStreak) {
-            longestWinningStreak = currentStreak;
-            updateLongestStreaksDisplay();
-            saveStreaks();
-        }
-        if (Math.abs(currentStreak) > longestLosingStreak && currentStreak < 0) {
-            longestLosingStreak = Math.abs(currentStreak);
-            updateLongestStreaksDisplay();
-            saveStreaks();
-        }
-        
-        // Update streak display
-        updateStreakDisplay();
-        
-        // Add to trend data
-        trendData.push({
-            player: scores.player,
-            computer: scores.computer
-        });
-        // Keep last 100 data points
-        if (trendData.length > 100) {
-            trendData.shift();
-        }
-        saveTrend();
-        
-        // MOBILE FIX: Redraw chart if visible (always visible on mobile)
-        if (trendChart && trendModal) {
-            setTimeout(() => {
-                drawTrendChart(trendChart, trendData);
-                
-                // Update the stats below the chart
-                const totalGames = scores.player + scores.computer + scores.ties;
-                if (totalGamesStat) totalGamesStat.textContent = totalGames;
-                if (currentStreakStat) currentStreakStat.textContent = currentStreak >= 0 ? `+${currentStreak}` : currentStreak;
-                if (bestStreakStat) bestStreakStat.textContent = bestStreak >= 0 ? `+${bestStreak}` : bestStreak;
-                
-                // Update the title
-                const trendTitle = document.getElementById('trend-graph-title');
-                if (trendTitle) {
-                    const displayGames = Math.min(totalGames, 100);
-                    trendTitle.textContent = `📈 Data from last ${displayGames} games`;
-                }
-            }, 50);
-        }
-        
-        // Detect patterns
-        detectPatterns();
-        generateStrategies();
-        
-        // Add to game history for AI learning
-        gameHistory.push({
-            player: data.player_choice,
-            computer: data.computer_choice,
-            result: data.result
-        });
-        
-        // Keep only last 50 games in history
-        if (gameHistory.length > 50) {
-            gameHistory.shift();
-        }
-        
-        // Update and save scores
-        updateScoreDisplay();
-        saveScores();
-        
-        // Update trend graph if it's open
-        updateTrendGraphIfOpen();
+        applyRoundResult(data);
         
     } catch (error) {
         console.error('=== GAME ERROR ===');
@@ -1112,6 +1146,7 @@ function resetScores() {
         scissors: { wins: 0, losses: 0, ties: 0 }
     };
     gameHistory = []; // Clear game history
+    sessionId = null; // Start a fresh server-side session
     trendData = [];
     currentStreak = 0;
     currentStreakType = null;
@@ -1367,7 +1402,8 @@ async function fetchOpenAICommentary() {
     console.log('Sending request to OpenAI endpoint...');
     
     try {
-        const response = await fetch('/api/openai-commentary', {
+        // Streamed over Server-Sent Events: text appears as the model writes it
+        const response = await fetch('/api/openai-commentary/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -1381,49 +1417,36 @@ async function fetchOpenAICommentary() {
         });
         
         console.log('Response received:', response.status);
-        const data = await response.json();
-        console.log('Data:', data);
-        
-        // Hide loading
-        openaiLoading.style.display = 'none';
-        openaiContent.style.display = 'block';
         
-        if (data.error) {
+        // Problems found before the first token come back as JSON
+        if (!(response.headers.get('Content-Type') || '').startsWith('text/event-stream')) {
+            const data = await response.json();
+            console.log('Data:', data);
+            openaiLoading.style.display = 'none';
+            openaiContent.style.display = 'block';
             openaiContent.innerHTML = `<div class="openai-error"><p>${data.error}</p></div>`;
-        } else {
-            // Store the timestamp when commentary was received
-            const commentaryTimestamp = Date.now();
-            const totalGames = scores.player + scores.computer + scores.ties;
-            
-            // Format the commentary with game info, timer and refresh button
-            const commentaryHTML = `
-                <div class="commentary-controls">
-                    <div class="commentary-game-info">
-                        📊 Commentary refreshed on game ${totalGames}
-                    </div>
-                    <div class="commentary-timer" id="commentary-timer">
-                        <span class="timer-icon">⏱️</span>
-                        <span id="commentary-time-elapsed">0</span> seconds ago
-                    </div>
-                    <button class="refresh-commentary-btn" id="refresh-commentary-btn">
-                        🔄 Refresh
-                    </button>
-                </div>
-                <div class="openai-commentary">
-                    ${data.commentary.split('\n').map(line => line.trim() ? `<p>${line}</p>` : '').join('')}
-                </div>
-            `;
-            openaiContent.innerHTML = commentaryHTML;
-            
-            // Add event listener to refresh button
-            const refreshBtn = document.getElementById('refresh-commentary-btn');
-            if (refreshBtn) {
-                refreshBtn.addEventListener('click', refreshOpenAICommentary);
-            }
-            
-            // Start the timer
-            startCommentaryTimer(commentaryTimestamp);
+            return;
         }
+        
+        const totalGames = scores.player + scores.computer + scores.ties;
+        let commentaryEl = null;
+        let commentary = '';
+        
+        await readServerSentEvents(response, (event, data) => {
+            if (!commentaryEl) {
+                commentaryEl = showCommentaryPanel(totalGames);
+            }
+            if (event === 'token') {
+                commentary += data.text;
+                renderCommentaryText(commentaryEl, commentary);
+            } else if (event === 'done') {
+                renderCommentaryText(commentaryEl, data.commentary);
+                // Store the timestamp when commentary was received
+                startCommentaryTimer(Date.now());
+            } else if (event === 'error') {
+                commentaryEl.insertAdjacentHTML('beforeend', `<div class="openai-error"><p>${data.error}</p></div>`);
+            }
+        });
     } catch (error) {
         console.error('Error fetching OpenAI commentary:', error);
         openaiLoading.style.display = 'none';
@@ -1432,6 +1455,69 @@ async function fetchOpenAICommentary() {
     }
 }
 
+// Read a text/event-stream response, calling onEvent(name, data) per event
+async function readServerSentEvents(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) {
+            break;
+        }
+        buffered += decoder.decode(value, { stream: true });
+        const events = buffered.split('\n\n');
+        buffered = events.pop(); // Keep any partial event for the next chunk
+        events.forEach(block => {
+            let name = 'message';
+            let data = '';
+            block.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) {
+                    name = line.slice(7);
+                } else if (line.startsWith('data: ')) {
+                    data += line.slice(6);
+                }
+            });
+            if (data) {
+                onEvent(name, JSON.parse(data));
+            }
+        });
+    }
+}
+
+// Replace the loading indicator with the commentary panel (game info, timer
+// and refresh button); returns the element the text goes into
+function showCommentaryPanel(totalGames) {
+    openaiLoading.style.display = 'none';
+    openaiContent.style.display = 'block';
+    openaiContent.innerHTML = `
+        <div class="commentary-controls">
+            <div class="commentary-game-info">
+                📊 Commentary refreshed on game ${totalGames}
+            </div>
+            <div class="commentary-timer" id="commentary-timer">
+                <span class="timer-icon">⏱️</span>
+                <span id="commentary-time-elapsed">0</span> seconds ago
+            </div>
+            <button class="refresh-commentary-btn" id="refresh-commentary-btn">
+                🔄 Refresh
+            </button>
+        </div>
+        <div class="openai-commentary"></div>
+    `;
+    
+    // Add event listener to refresh button
+    const refreshBtn = document.getElementById('refresh-commentary-btn');
+    if (refreshBtn) {
+        refreshBtn.addEventListener('click', refreshOpenAICommentary);
+    }
+    return openaiContent.querySelector('.openai-commentary');
+}
+
+function renderCommentaryText(element, text) {
+    element.innerHTML = text.split('\n').map(line => line.trim() ? `<p>${line}</p>` : '').join('');
+}
+
 // Refresh OpenAI commentary with latest game data
 async function refreshOpenAICommentary() {
     console.log('=== REFRESH OPENAI COMMENTARY CALLED ===');
@@ -1462,77 +1548,103 @@ function startCommentaryTimer(timestamp) {
     }, 1000);
 }
 
-// Start auto-play loop
-function startAutoPlay() {
-    const choices = ['rock', 'paper', 'scissors'];
-    
-    // Play immediately
-    playAutoRound();
-    
-    // Then continue playing at intervals
-    autoPlayInterval = setInterval(() => {
-        playAutoRound();
-    }, autoPlaySpeed);
+// Resolve after ms milliseconds, or reject with an AbortError once signal aborts
+function sleepUnlessAborted(ms, signal) {
+    return new Promise((resolve, reject) => {
+        const timer = setTimeout(resolve, ms);
+        signal.addEventListener('abort', () => {
+            clearTimeout(timer);
+            reject(new DOMException('Aborted', 'AbortError'));
+        }, { once: true });
+    });
 }
 
-// Play one auto round
-function playAutoRound() {
-    if (!autoPlayActive) return;
-    
-    const choices = ['rock', 'paper', 'scissors'];
-    let playerChoice;
-    
-    // Use AI to select player's choice based on auto-player difficulty
-    if (autoPlayerDifficulty === 'easy') {
-        playerChoice = choices[Math.floor(Math.random() * choices.length)];
-    } else if (autoPlayerDifficulty === 'medium' && gameHistory.length >= 3) {
-        // Auto-player analyzes opponent (computer) patterns
-        const opponentChoices = gameHistory.slice(-10).map(g => g.computer);
-        const counts = {};
-        opponentChoices.forEach(c => counts[c] = (counts[c] || 0) + 1);
-        const mostCommon = Object.keys(counts).reduce((a, b) => counts[a] > counts[b] ? a : b);
-        
-        // Counter the opponent's most common choice 70% of the time
-        const counters = { rock: 'paper', paper: 'scissors', scissors: 'rock' };
-        playerChoice = Math.random() < 0.7 ? counters[mostCommon] : choices[Math.floor(Math.random() * choices.length)];
-    } else if (autoPlayerDifficulty === 'hard' && gameHistory.length >= 5) {
-        // Advanced auto-player strategy
-        const recent = gameHistory.slice(-5);
-        const lastGame = recent[recent.length - 1];
-        
-        // Analyze opponent's patterns
-        const opponentChoices = recent.map(g => g.computer);
-        const counts = {};
-        opponentChoices.forEach(c => counts[c] = (counts[c] || 0) + 1);
-        
-        // Check if opponent repeats after winning
-        if (lastGame.result === 'computer' && Math.random() < 0.6) {
-            const counters = { rock: 'paper', paper: 'scissors', scissors: 'rock' };
-            playerChoice = counters[lastGame.computer];
-        } else if (lastGame.result === 'player' && Math.random() < 0.6) {
-            // Check if opponent switches after losing
-            const nextInSequence = { rock: 'paper', paper: 'scissors', scissors: 'rock' };
-            const predicted = nextInSequence[lastGame.computer];
-            const counters = { rock: 'paper', paper: 'scissors', scissors: 'rock' };
-            playerChoice = counters[predicted];
-        } else {
-            // Counter most common
-            const mostCommon = Object.keys(counts).reduce((a, b) => counts[a] > counts[b] ? a : b);
-            const counters = { rock: 'paper', paper: 'scissors', scissors: 'rock' };
-            playerChoice = counters[mostCommon];
+// Start auto-play: the server simulates the rounds between the auto-player
+// strategy and the opponent and streams them back (NDJSON) at the chosen
+// speed, so one request replaces a request per round
+async function startAutoPlay() {
+    const controller = new AbortController();
+    autoPlayController = controller;
+    let refusals = 0;
+    
+    try {
+        // Play short streams back to back until auto-play is stopped
+        while (autoPlayActive && autoPlayController === controller) {
+            const response = await fetch('/api/autoplay', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({
+                    strategy: autoPlayerDifficulty,
+                    difficulty: currentDifficulty, // Opponent's difficulty
+                    rounds: AUTO_PLAY_STREAM_ROUNDS,
+                    interval_ms: autoPlaySpeed,
+                    session_id: sessionId
+                }),
+                signal: controller.signal
+            });
+            
+            if (response.status === 429 || response.status === 503) {
+                // Rate-limited or every auto-play slot is busy: back off
+                // (at least Retry-After, doubling with jitter) and try again
+                const data = await response.json();
+                resultMessage.textContent = data.error;
+                const retryAfter = (parseFloat(response.headers.get('Retry-After')) || 1) * 1000;
+                const backoff = Math.min(AUTO_PLAY_MAX_BACKOFF, 1000 * 2 ** refusals);
+                refusals++;
+                await sleepUnlessAborted(Math.max(retryAfter, backoff * (0.5 + Math.random() / 2)),
+                                         controller.signal);
+                continue;
+            }
+            if (!response.ok) {
+                const data = await response.json();
+                resultMessage.textContent = data.error;
+                break;
+            }
+            refusals = 0;
+            
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffered = '';
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) {
+                    break;
+                }
+                buffered += decoder.decode(value, { stream: true });
+                const lines = buffered.split('\n');
+                buffered = lines.pop(); // Keep any partial line for the next chunk
+                lines.filter(line => line.trim()).forEach(line => playAutoRound(JSON.parse(line)));
+            }
+            // The next stream starts with a round at once; keep the pace
+            await sleepUnlessAborted(autoPlaySpeed, controller.signal);
         }
-    } else {
-        playerChoice = choices[Math.floor(Math.random() * choices.length)];
+    } catch (error) {
+        if (error.name === 'AbortError') {
+            return; // Stopped by the user
+        }
+        console.error('Auto-play stream error:', error);
+        resultMessage.textContent = 'Error connecting to server! Check console (Cmd+Option+I)';
     }
     
-    playGame(playerChoice, true);
+    // The stream failed or was rejected; leave auto-play mode
+    if (autoPlayActive && autoPlayController === controller) {
+        toggleAutoPlay();
+    }
+}
+
+// Show one streamed auto-play round
+function playAutoRound(data) {
+    if (!autoPlayActive || data.done) return;
+    applyRoundResult(data);
 }
 
-// Stop auto-play loop
+// Stop auto-play (closing the stream stops the server-side game)
 function stopAutoPlay() {
-    if (autoPlayInterval) {
-        clearInterval(autoPlayInterval);
-        autoPlayInterval = null;
+    if (autoPlayController) {
+        autoPlayController.abort();
+        autoPlayController = null;
     }
 }
 
@@ -14,8 +14,10 @@ from datetime import datetime
 
 
 class AIEvaluator:
-    def __init__(self, base_url="http://localhost:5000"):
+    def __init__(self, base_url="http://localhost:5000", seed=None):
         self.base_url = base_url
+        # Simulated players draw from a seeded stream when a seed is given
+        self.rng = random.Random(seed) if seed is not None else random
         self.results = defaultdict(lambda: {
             'wins': 0, 'losses': 0, 'ties': 0,
             'games': []
@@ -36,7 +38,7 @@ class AIEvaluator:
         choices = ['rock', 'paper', 'scissors']
         
         if strategy == 'random':
-            return random.choice(choices)
+            return self.rng.choice(choices)
         
         elif strategy == 'always_rock':
             return 'rock'
@@ -55,7 +57,7 @@ class AIEvaluator:
         
         elif strategy == 'win_stay_lose_shift':
             if not self.current_history:
-                return random.choice(choices)
+                return self.rng.choice(choices)
             last = self.current_history[-1]
             if last['result'] == 'agent_win':
                 return last['agent_choice']  # Stay
@@ -79,14 +81,14 @@ class AIEvaluator:
         elif strategy == 'anti_ai':
             # Try to counter AI patterns
             if len(self.current_history) < 3:
-                return random.choice(choices)
+                return self.rng.choice(choices)
             # Find AI's most common choice
             ai_choices = [g['opponent_choice'] for g in self.current_history[-10:]]
             most_common = Counter(ai_choices).most_common(1)[0][0]
             counters = {'rock': 'paper', 'paper': 'scissors', 'scissors': 'rock'}
             return counters[most_common]
         
-        return random.choice(choices)
+        return self.rng.choice(choices)
     
     def run_test_suite(self, difficulty, num_games=1000, strategy='random', verbose=True):
         """
@@ -12,12 +12,20 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app import ai_easy, ai_medium, ai_hard, ai_very_hard, determine_winner
+from engine import PlayerModel, make_rng
 import json
+import random
 from datetime import datetime
 
 
 class AIvsAIEvaluator:
-    def __init__(self):
+    def __init__(self, seed=None):
+        """
+        Args:
+            seed: Optional root seed; each side of each matchup then draws
+                  from its own stream, so results are reproducible
+        """
+        self.seed = seed
         self.results = {}
         self.ai_functions = {
             'easy': ai_easy,
@@ -26,7 +34,7 @@ class AIvsAIEvaluator:
             'veryhard': ai_very_hard
         }
     
-    def get_ai_choice(self, difficulty, history):
+    def get_ai_choice(self, difficulty, history, model=None, rng=random):
         """
         Get AI's choice based on difficulty and history
         
@@ -34,6 +42,8 @@ class AIvsAIEvaluator:
             difficulty: 'easy', 'medium', 'hard', or 'veryhard'
             history: List of previous games in format:
                      [{'player': choice, 'computer': choice, 'result': result}, ...]
+            model: Optional PlayerModel kept in sync with history
+            rng: Random stream for the AI's choices
         
         Returns:
             str: The AI's choice ('rock', 'paper', or 'scissors')
@@ -41,9 +51,9 @@ class AIvsAIEvaluator:
         ai_func = self.ai_functions.get(difficulty)
         
         if difficulty == 'easy':
-            return ai_func()
+            return ai_func(rng)
         else:
-            return ai_func(history)
+            return ai_func(history, model, rng)
     
     def simulate_ai_vs_ai(self, player1_difficulty, player2_difficulty, num_games=1000, verbose=True):
         """
@@ -72,14 +82,21 @@ class AIvsAIEvaluator:
         # Separate history for each player (from their own perspective)
         player1_history = []  # P1 sees itself as 'player', P2 as 'computer'
         player2_history = []  # P2 sees itself as 'player', P1 as 'computer'
+        player1_model = PlayerModel()
+        player2_model = PlayerModel()
+        if self.seed is None:
+            player1_rng = player2_rng = random
+        else:
+            player1_rng = make_rng(self.seed, player1_difficulty, player2_difficulty, 'player1')
+            player2_rng = make_rng(self.seed, player1_difficulty, player2_difficulty, 'player2')
         
         for game_num in range(num_games):
             try:
                 # Player 1 makes its choice
-                p1_choice = self.get_ai_choice(player1_difficulty, player1_history)
+                p1_choice = self.get_ai_choice(player1_difficulty, player1_history, player1_model, player1_rng)
                 
                 # Player 2 makes its choice
-                p2_choice = self.get_ai_choice(player2_difficulty, player2_history)
+                p2_choice = self.get_ai_choice(player2_difficulty, player2_history, player2_model, player2_rng)
                 
                 # Determine winner
                 winner = determine_winner(p1_choice, p2_choice)
@@ -110,6 +127,8 @@ class AIvsAIEvaluator:
                     'computer': p1_choice,
                     'result': p2_result
                 })
+                player1_model.update(player1_history[-1])
+                player2_model.update(player2_history[-1])
                 
                 # Progress indicator
                 if verbose and (game_num + 1) % 100 == 0:
@@ -303,7 +322,7 @@ class AIvsAIEvaluator:
 if __name__ == "__main__":
     import sys
     
-    evaluator = AIvsAIEvaluator()
+    evaluator = AIvsAIEvaluator(seed=os.environ.get('RPS_SEED'))
     
     if len(sys.argv) > 1 and sys.argv[1] == '--full':
         num_games = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
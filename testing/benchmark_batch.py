@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Batch Play Throughput Benchmark
+
+Plays the same number of rounds through single-round /api/play calls and
+through /api/play/batch, and reports rounds per second for each. By
+default requests go through Flask's in-process test client (no network);
+pass --url to measure a running server over HTTP, where the per-request
+overhead the batch endpoint saves is much larger.
+
+Usage:
+    python benchmark_batch.py
+    python benchmark_batch.py --rounds 5000 --batch 500 --difficulty veryhard
+    python benchmark_batch.py --url http://localhost:5000
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import time
+
+# Measure the endpoints, not the per-client rate limits (admission.py)
+os.environ.setdefault('RPS_LIMIT_PLAY', '0,0,0')
+os.environ.setdefault('RPS_LIMIT_BULK', '0,0,0')
+
+from app import CHOICES
+
+
+class InProcessClient:
+    """POSTs through the Flask test client."""
+
+    def __init__(self):
+        from app import app
+        self.client = app.test_client()
+
+    def post(self, path, payload):
+        return self.client.post(path, json=payload).get_json()
+
+
+class HTTPClient:
+    """POSTs to a running server over a keep-alive connection."""
+
+    def __init__(self, url):
+        import requests
+        self.url = url.rstrip('/')
+        self.session = requests.Session()
+
+    def post(self, path, payload):
+        return self.session.post(self.url + path, json=payload).json()
+
+
+def run_single(client, choices, difficulty):
+    """Play every choice with one /api/play call each; returns seconds."""
+    session_id = None
+    start = time.perf_counter()
+    for choice in choices:
+        data = client.post('/api/play', {
+            'choice': choice,
+            'difficulty': difficulty,
+            'session_id': session_id
+        })
+        session_id = data['session_id']
+    return time.perf_counter() - start
+
+
+def run_batched(client, choices, difficulty, batch_size):
+    """Play every choice in /api/play/batch calls of batch_size; returns seconds."""
+    session_id = None
+    start = time.perf_counter()
+    for offset in range(0, len(choices), batch_size):
+        data = client.post('/api/play/batch', {
+            'choices': choices[offset:offset + batch_size],
+            'difficulty': difficulty,
+            'session_id': session_id
+        })
+        session_id = data['session_id']
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark /api/play/batch against /api/play')
+    parser.add_argument('--rounds', type=int, default=2000, help='Rounds per run (default: 2000)')
+    parser.add_argument('--batch', type=int, default=200, help='Rounds per batch request (default: 200)')
+    parser.add_argument('--difficulty', default='hard',
+                        choices=['easy', 'medium', 'hard', 'veryhard'],
+                        help='Opponent difficulty (default: hard)')
+    parser.add_argument('--url', help='Benchmark a running server instead of the in-process app')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the player moves')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    choices = [random.choice(CHOICES) for _ in range(args.rounds)]
+    client = HTTPClient(args.url) if args.url else InProcessClient()
+
+    single = run_single(client, choices, args.difficulty)
+    batched = run_batched(client, choices, args.difficulty, args.batch)
+
+    print("=" * 60)
+    print("BATCH PLAY THROUGHPUT")
+    print("=" * 60)
+    print(f"Target:     {args.url or 'in-process test client'}")
+    print(f"Difficulty: {args.difficulty}, rounds: {args.rounds}, batch size: {args.batch}")
+    print("-" * 60)
+    print(f"{'Endpoint':<20} {'Requests':>9} {'Seconds':>9} {'Rounds/s':>10} {'µs/round':>9}")
+    print(f"{'/api/play':<20} {args.rounds:>9} {single:>9.2f} "
+          f"{args.rounds / single:>10.0f} {single / args.rounds * 1e6:>9.1f}")
+    requests_made = -(-args.rounds // args.batch)
+    print(f"{'/api/play/batch':<20} {requests_made:>9} {batched:>9.2f} "
+          f"{args.rounds / batched:>10.0f} {batched / args.rounds * 1e6:>9.1f}")
+    print("-" * 60)
+    print(f"Speedup: {single / batched:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
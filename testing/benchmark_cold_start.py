@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Cold-Start Benchmark
+
+Boots the app in fresh Python processes, the way a restarted dyno or a
+recycled gunicorn worker does, and measures how long it takes until the
+first /api/play answer is out:
+
+    boot        process start -> app imported (interpreter start, imports,
+                asset manifest, session store, warm-up)
+    first play  the first /api/play request (Hard, rebuilt from a history)
+    ready       process start -> first /api/play answered
+    rounds      the first --rounds rounds of a fresh Hard session
+
+for each startup configuration:
+
+    eager       OpenAI SDK imported at boot, no warm-up (the old behaviour)
+    lazy        OpenAI SDK imported on first use, no warm-up
+    lazy+warm   the default: lazy imports plus warm_up() before traffic
+
+Medians over --runs processes per configuration. Requests go through
+Flask's test client, so the numbers exclude the network and gunicorn.
+
+Usage:
+    python benchmark_cold_start.py
+    python benchmark_cold_start.py --runs 10 --rounds 100
+"""
+
+import sys
+import os
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import json
+import statistics
+import subprocess
+import time
+
+CONFIGS = [
+    ('eager', {'RPS_PRELOAD_OPENAI': '1', 'RPS_WARMUP_ROUNDS': '0'}),
+    ('lazy', {'RPS_PRELOAD_OPENAI': '0', 'RPS_WARMUP_ROUNDS': '0'}),
+    ('lazy+warm', {'RPS_PRELOAD_OPENAI': '0'})
+]
+
+# Runs in the fresh process; prints one JSON line of timings
+CHILD = '''
+import json, random, sys, time
+booted = time.perf_counter()
+import app
+from engine import MOVES, determine_winner
+booted = time.perf_counter() - booted
+client = app.app.test_client()
+rng = random.Random(7)
+
+history = []
+for _ in range(30):
+    player, computer = rng.choice(MOVES), rng.choice(MOVES)
+    history.append({'player': player, 'computer': computer,
+                    'result': determine_winner(player, computer)})
+started = time.perf_counter()
+response = client.post('/api/play', json={'choice': 'rock', 'difficulty': 'hard',
+                                          'history': history})
+assert response.status_code == 200, response.status_code
+first_play = time.perf_counter() - started
+ready_at = time.time()
+
+session_id = None
+started = time.perf_counter()
+for _ in range(int(sys.argv[1])):
+    payload = {'choice': rng.choice(MOVES), 'difficulty': 'hard', 'session_id': session_id}
+    session_id = client.post('/api/play', json=payload).get_json()['session_id']
+rounds = time.perf_counter() - started
+
+print(json.dumps({'imported': booted, 'first_play': first_play, 'ready_at': ready_at,
+                  'rounds': rounds}))
+'''
+
+
+def run_once(overrides, rounds):
+    """Boot one process; returns its timings in seconds."""
+    env = dict(os.environ, RPS_LIMIT_PLAY='0,0,0', RPS_PROFILE_STARTUP='0', **overrides)
+    spawned_at = time.time()
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD, str(rounds)], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings['ready'] = timings.pop('ready_at') - spawned_at
+    timings['boot'] = timings['ready'] - timings['first_play']
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold-start benchmark')
+    parser.add_argument('--runs', type=int, default=5, help='Processes per configuration (default: 5)')
+    parser.add_argument('--rounds', type=int, default=50,
+                        help='Session rounds timed after the first play (default: 50)')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("COLD START: TIME TO FIRST /api/play")
+    print("=" * 70)
+    print(f"Medians of {args.runs} fresh processes per configuration (ms)")
+    print("-" * 70)
+    print(f"{'Config':<12} {'Boot':>9} {'Import':>9} {'1st play':>9} {'Ready':>9} "
+          f"{f'{args.rounds} rounds':>12}")
+    for name, overrides in CONFIGS:
+        runs = [run_once(overrides, args.rounds) for _ in range(args.runs)]
+
+        def median(key):
+            return statistics.median(run[key] for run in runs) * 1000
+
+        print(f"{name:<12} {median('boot'):>9.1f} {median('imported'):>9.1f} "
+              f"{median('first_play'):>9.2f} {median('ready'):>9.1f} {median('rounds'):>12.2f}")
+    print("-" * 70)
+    print("Boot and Ready include interpreter start-up; Import is app.py alone.")
+
+
+if __name__ == "__main__":
+    main()
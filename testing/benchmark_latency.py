@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+AI Decision Latency Benchmark
+
+Measures per-call latency of ai_hard and ai_very_hard across history
+lengths and reports how many passes through ai_hard's tier list each
+decision needed (the depth). ai_hard used to retry its tiers recursively
+until one fired; the depth column shows the bound actually holds: a Hard
+decision takes one pass, and Very Hard only takes one when its ensemble
+falls back to Hard.
+
+Usage:
+    python benchmark_latency.py
+    python benchmark_latency.py --calls 5000 --lengths 10 100 1000
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import time
+from collections import Counter
+
+import app
+from app import CHOICES, ai_hard, ai_very_hard, determine_winner
+from engine import PlayerModel
+
+
+def make_history(length, bias=0.5):
+    """Random history where the player favours rock with the given bias."""
+    history = []
+    for _ in range(length):
+        player = 'rock' if random.random() < bias else random.choice(CHOICES)
+        computer = random.choice(CHOICES)
+        history.append({
+            'player': player,
+            'computer': computer,
+            'result': determine_winner(player, computer)
+        })
+    return history
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a sorted list."""
+    index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+    return samples[index]
+
+
+def benchmark(ai_func, history, calls, use_model):
+    """
+    Time repeated decisions on one history.
+
+    Returns:
+        tuple: (sorted latencies in microseconds, Counter of depths)
+    """
+    original = app._hard_tiers
+    depth = [0]
+
+    def counting_hard_tiers(model):
+        depth[0] += 1
+        return original(model)
+
+    model = PlayerModel.from_history(history) if use_model else None
+    latencies = []
+    depths = Counter()
+    app._hard_tiers = counting_hard_tiers
+    try:
+        for _ in range(calls):
+            depth[0] = 0
+            start = time.perf_counter()
+            ai_func(history, model)
+            latencies.append((time.perf_counter() - start) * 1e6)
+            depths[depth[0]] += 1
+    finally:
+        app._hard_tiers = original
+
+    latencies.sort()
+    return latencies, depths
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark AI decision latency')
+    parser.add_argument('--calls', type=int, default=2000,
+                        help='Decisions timed per history length (default: 2000)')
+    parser.add_argument('--lengths', type=int, nargs='+', default=[5, 10, 50, 100, 500, 1000],
+                        help='History lengths to test')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+
+    print("=" * 88)
+    print("AI DECISION LATENCY")
+    print("=" * 88)
+    print(f"{'AI':<10} {'Mode':<10} {'Rounds':>7} {'p50 µs':>9} {'p99 µs':>9} {'max µs':>9}  Depth (passes: calls)")
+    print("-" * 88)
+
+    for name, ai_func in [('hard', ai_hard), ('veryhard', ai_very_hard)]:
+        for length in args.lengths:
+            history = make_history(length)
+            for mode, use_model in [('history', False), ('model', True)]:
+                latencies, depths = benchmark(ai_func, history, args.calls, use_model)
+                depth_text = ', '.join(f"{d}: {n}" for d, n in sorted(depths.items()))
+                print(f"{name:<10} {mode:<10} {length:>7} "
+                      f"{percentile(latencies, 50):>9.1f} {percentile(latencies, 99):>9.1f} "
+                      f"{latencies[-1]:>9.1f}  {depth_text}")
+        print("-" * 88)
+
+    print("\nMode 'history' rebuilds the player model per call (as stateless /api/play does);")
+    print("mode 'model' reuses an incrementally updated PlayerModel (as /api/play sessions do).")
+
+
+if __name__ == "__main__":
+    main()
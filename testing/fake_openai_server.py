@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Fake OpenAI Server
+
+A local stand-in for the OpenAI chat completions API, for exercising the
+commentary path without an API key or network access. Responses can be
+delayed and errors injected to see how the app behaves when the upstream
+is slow or failing. Requests with "stream": true get the answer as
+Server-Sent Events chunks, one word at a time.
+
+Point the app at it with:
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake python3 app.py
+
+Usage:
+    python fake_openai_server.py
+    python fake_openai_server.py --port 8765 --latency 2.5 --error-rate 0.2
+    python fake_openai_server.py --latency 0.5 --token-interval 0.1
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenAIState:
+    """Behaviour knobs, adjustable while the server runs."""
+
+    def __init__(self, latency=0.0, error_rate=0.0, error_status=500, token_interval=0.0):
+        self.latency = latency
+        self.token_interval = token_interval
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+
+        def log_message(self, format, *args):
+            pass  # Quiet
+
+        def setup(self):
+            super().setup()
+            with state.lock:
+                state.connections += 1
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            with state.lock:
+                state.requests += 1
+                number = state.requests
+
+            if state.latency:
+                time.sleep(state.latency)
+
+            if not self.path.endswith('/chat/completions'):
+                self._send(404, {'error': {'message': f'Unknown path {self.path}'}})
+                return
+            if random.random() < state.error_rate:
+                self._send(state.error_status, {
+                    'error': {'message': 'Injected failure', 'type': 'server_error'}
+                })
+                return
+
+            content = f'Fake commentary #{number}: what a match!'
+            if request.get('stream'):
+                self._stream(number, request.get('model', 'gpt-4o-mini'), content)
+                return
+
+            self._send(200, {
+                'id': f'chatcmpl-fake-{number}',
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': request.get('model', 'gpt-4o-mini'),
+                'choices': [{
+                    'index': 0,
+                    'message': {
+                        'role': 'assistant',
+                        'content': content
+                    },
+                    'finish_reason': 'stop'
+                }],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+            })
+
+        def _stream(self, number, model, content):
+            """Send content as chat.completion.chunk events, a word at a time."""
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+
+            def chunk(delta, finish_reason=None):
+                payload = json.dumps({
+                    'id': f'chatcmpl-fake-{number}',
+                    'object': 'chat.completion.chunk',
+                    'created': int(time.time()),
+                    'model': model,
+                    'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+                })
+                self._write_chunk(f'data: {payload}\n\n')
+
+            try:
+                for i, word in enumerate(content.split(' ')):
+                    if i and state.token_interval:
+                        time.sleep(state.token_interval)
+                    delta = {'content': word if i == 0 else ' ' + word}
+                    if i == 0:
+                        delta['role'] = 'assistant'
+                    chunk(delta)
+                chunk({}, 'stop')
+                self._write_chunk('data: [DONE]\n\n')
+                self.wfile.write(b'0\r\n\r\n')
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True  # The client stopped reading
+
+        def _write_chunk(self, text):
+            data = text.encode('utf-8')
+            self.wfile.write(f'{len(data):x}\r\n'.encode('ascii') + data + b'\r\n')
+            self.wfile.flush()
+
+    return Handler
+
+
+def start_fake_openai(port=0, latency=0.0, error_rate=0.0, error_status=500, token_interval=0.0):
+    """
+    Start the fake server on a background thread.
+
+    Returns:
+        tuple: (server, state, base_url); call server.shutdown() to stop
+    """
+    state = FakeOpenAIState(latency, error_rate, error_status, token_interval)
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}/v1'
+    return server, state, base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake OpenAI chat completions server')
+    parser.add_argument('--port', type=int, default=8765, help='Port (default: 8765)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds before each response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests that fail')
+    parser.add_argument('--error-status', type=int, default=500, help='HTTP status of injected failures')
+    parser.add_argument('--token-interval', type=float, default=0.0,
+                        help='Seconds between streamed words')
+    args = parser.parse_args()
+
+    server, _, base_url = start_fake_openai(args.port, args.latency, args.error_rate,
+                                            args.error_status, args.token_interval)
+    print(f"Fake OpenAI server at {base_url} (latency {args.latency}s, error rate {args.error_rate})")
+    print("Press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Fake Redis Client
+
+An in-process stand-in for a redis-py client, covering the commands
+RedisBackend (engine/persistence.py) uses: get, getrange, set (with ex),
+delete and non-transactional pipelines. Keys expire like Redis keys do,
+against an injectable clock, so the backend can be exercised without a
+Redis server or the redis package:
+
+    from engine import RedisBackend, SessionStore
+    from fake_redis import FakeRedis
+
+    store = SessionStore(backend=RedisBackend(FakeRedis()))
+
+Several stores given the same FakeRedis share it, like workers sharing
+one server. Usage statistics (commands, pipelines) are kept for tests.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+
+class FakeRedis:
+    """
+    Thread-safe dict of bytes values with per-key expiry.
+
+    Args:
+        clock: Time source for expiry (seconds)
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.commands = 0
+        self.pipelines = 0
+        self.closed = False
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str) -> Optional[bytes]:
+        """Value of key, dropping it if it has expired (lock held)."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and expires <= self.clock():
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            self.commands += 1
+            return self._live(key)
+
+    def getrange(self, key: str, start: int, end: int) -> bytes:
+        """Bytes start..end inclusive, like GETRANGE (b'' for a missing key)."""
+        with self._lock:
+            self.commands += 1
+            value = self._live(key) or b''
+            return value[start:end + 1 if end != -1 else None]
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None) -> bool:
+        with self._lock:
+            self.commands += 1
+            self._data[key] = (bytes(value), self.clock() + ex if ex else None)
+            return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            self.commands += 1
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def pipeline(self, transaction: bool = True) -> '_Pipeline':
+        return _Pipeline(self)
+
+    def close(self):
+        self.closed = True
+
+    def __len__(self):
+        with self._lock:
+            return sum(self._live(key) is not None for key in list(self._data))
+
+
+class _Pipeline:
+    """Queues set/delete calls and runs them on execute(), as one batch."""
+
+    def __init__(self, client: FakeRedis):
+        self.client = client
+        self.queued = []
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None) -> '_Pipeline':
+        self.queued.append(('set', (key, value, ex)))
+        return self
+
+    def delete(self, *keys: str) -> '_Pipeline':
+        self.queued.append(('delete', keys))
+        return self
+
+    def execute(self):
+        client = self.client
+        client.pipelines += 1
+        results = [getattr(client, name)(*args) for name, args in self.queued]
+        self.queued = []
+        return results
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Load Generator for the gunicorn Profiles
+
+Starts gunicorn with gunicorn.conf.py once per worker profile (see
+RPS_WORKER_CLASS there) and replays a realistic request mix against it
+from --concurrency keep-alive clients:
+
+    play/<difficulty>   session rounds (session_id only), all difficulties
+    play/history=<n>    stateless rounds rebuilt from a packed history of
+                        10, 100 or 1000 rounds
+    commentary          /api/openai-commentary against
+                        testing/fake_openai_server.py (--stub-latency)
+
+Each profile gets the same mix for --duration seconds after --warmup
+seconds of unmeasured traffic; the report gives throughput and
+p50/p95/p99 latency per request kind. Admission control is turned off on
+the spawned servers so the numbers measure the worker model, not the
+rate limits. Non-200 answers are listed by status: a 503 from commentary
+is the commentary pool shedding load (RPS_COMMENTARY_WORKERS per worker),
+not a crash.
+
+Usage:
+    python load_generator.py
+    python load_generator.py --profiles gthread sync --duration 20 --concurrency 64
+    python load_generator.py --url http://localhost:5000     # a running server
+"""
+
+import sys
+import os
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import argparse
+import importlib.util
+import random
+import socket
+import subprocess
+import threading
+import time
+from collections import Counter, defaultdict
+
+import requests
+
+from engine import MOVES, pack_history
+from fake_openai_server import start_fake_openai
+
+HISTORY_SIZES = (10, 100, 1000)
+
+# Share of requests per kind of traffic
+MIX = (
+    ('session', 0.60),
+    ('history', 0.35),
+    ('commentary', 0.05)
+)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a sorted list."""
+    index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+    return samples[index]
+
+
+def start_server(profile, port, base_url):
+    """gunicorn with gunicorn.conf.py and the given worker class; returns the process."""
+    env = dict(
+        os.environ, PORT=str(port), RPS_WORKER_CLASS=profile,
+        OPENAI_API_KEY='fake', OPENAI_BASE_URL=base_url,
+        RPS_LIMIT_PLAY='0,0,0', RPS_LIMIT_HEAVY='0,0,0', RPS_LIMIT_COMMENTARY='0,0,0'
+    )
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', 'app:app'], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn ({profile}) exited with status {process.returncode}')
+        try:
+            requests.get(url + '/api/sessions/metrics', timeout=1)
+            return process, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'gunicorn ({profile}) did not start')
+
+
+class VirtualUser(threading.Thread):
+    """One keep-alive client replaying the mix until stop is set."""
+
+    def __init__(self, url, seed, stop, measuring):
+        super().__init__(daemon=True)
+        self.url = url
+        self.rng = random.Random(seed)
+        self.stop = stop
+        self.measuring = measuring
+        self.http = requests.Session()
+        self.sessions = {}  # difficulty -> session_id
+        self.samples = defaultdict(list)  # kind -> latencies (s)
+        self.errors = defaultdict(int)
+        self.statuses = Counter()  # non-200 statuses ('failed' for no response)
+        self.histories = {
+            size: pack_history([self.rng.randrange(3) for _ in range(size)],
+                               [self.rng.randrange(3) for _ in range(size)])
+            for size in HISTORY_SIZES
+        }
+
+    def request(self):
+        """One request of the mix; returns (kind, path, payload)."""
+        traffic = self.rng.choices([name for name, _ in MIX], [share for _, share in MIX])[0]
+        difficulty = self.rng.choice(('easy', 'medium', 'hard', 'veryhard'))
+        choice = self.rng.choice(MOVES)
+        if traffic == 'session':
+            payload = {'choice': choice, 'difficulty': difficulty,
+                       'session_id': self.sessions.get(difficulty)}
+            return f'play/{difficulty}', '/api/play', payload
+        if traffic == 'history':
+            size = self.rng.choice(HISTORY_SIZES)
+            return (f'play/history={size}', '/api/play',
+                    {'choice': choice, 'difficulty': difficulty, 'history': self.histories[size]})
+        player, computer = self.rng.randrange(50), self.rng.randrange(50)
+        return 'commentary', '/api/openai-commentary', {
+            'game_history': [{'player': 'rock', 'computer': 'paper', 'result': 'computer'}] * 10,
+            'scores': {'player': player, 'computer': computer, 'ties': 0},
+            'hand_stats': {},
+            'current_difficulty': difficulty
+        }
+
+    def run(self):
+        while not self.stop.is_set():
+            kind, path, payload = self.request()
+            started = time.perf_counter()
+            try:
+                response = self.http.post(self.url + path, json=payload, timeout=60)
+                status = response.status_code
+                if status == 200 and kind.startswith('play/') and 'history' not in payload:
+                    self.sessions[payload['difficulty']] = response.json()['session_id']
+            except requests.RequestException:
+                status = 'failed'
+            elapsed = time.perf_counter() - started
+            if self.measuring.is_set():
+                self.samples[kind].append(elapsed)
+                if status != 200:
+                    self.errors[kind] += 1
+                    self.statuses[status] += 1
+
+
+def run_load(url, concurrency, warmup, duration, seed):
+    """Drive the mix; returns (samples by kind, errors by kind, statuses, seconds measured)."""
+    stop, measuring = threading.Event(), threading.Event()
+    users = [VirtualUser(url, seed + i, stop, measuring) for i in range(concurrency)]
+    for user in users:
+        user.start()
+    time.sleep(warmup)
+    measuring.set()
+    started = time.perf_counter()
+    time.sleep(duration)
+    measuring.clear()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for user in users:
+        user.join()
+
+    samples, errors, statuses = defaultdict(list), defaultdict(int), Counter()
+    for user in users:
+        statuses.update(user.statuses)
+        for kind, values in user.samples.items():
+            samples[kind].extend(values)
+        for kind, count in user.errors.items():
+            errors[kind] += count
+    return samples, errors, statuses, elapsed
+
+
+def report(name, samples, errors, statuses, elapsed):
+    every = sorted(value for values in samples.values() for value in values)
+    print("-" * 78)
+    print(f"{name}: {len(every) / elapsed:.0f} req/s, {sum(errors.values())} errors"
+          + (f" ({', '.join(f'{status} x{count}' for status, count in statuses.most_common())})"
+             if statuses else ''))
+    print(f"{'Kind':<22} {'Requests':>9} {'Errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = sorted(samples.items()) + [('all', every)]
+    for kind, values in rows:
+        if not values:
+            continue
+        values = sorted(values)
+        failed = sum(errors.values()) if kind == 'all' else errors.get(kind, 0)
+        print(f"{kind:<22} {len(values):>9} {failed:>7} "
+              + ' '.join(f'{percentile(values, pct) * 1000:>9.1f}' for pct in (50, 95, 99)))
+
+
+def main():
+    available = ['gthread', 'sync'] + (['gevent'] if importlib.util.find_spec('gevent') else [])
+    parser = argparse.ArgumentParser(description='Load generator for the gunicorn profiles')
+    parser.add_argument('--profiles', nargs='+', default=available,
+                        help=f"Worker classes to compare (default: {' '.join(available)})")
+    parser.add_argument('--url', help='Load a running server instead of starting gunicorn')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent clients (default: 32)')
+    parser.add_argument('--duration', type=float, default=10.0, help='Measured seconds (default: 10)')
+    parser.add_argument('--warmup', type=float, default=2.0, help='Unmeasured seconds first (default: 2)')
+    parser.add_argument('--stub-latency', type=float, default=1.0,
+                        help='Seconds the fake OpenAI takes per call (default: 1.0)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the mix')
+    args = parser.parse_args()
+
+    print("=" * 78)
+    print("LOAD TEST")
+    print("=" * 78)
+    print(f"{args.concurrency} clients, {args.duration:.0f}s measured after {args.warmup:.0f}s warm-up; "
+          f"mix: {', '.join(f'{name} {share:.0%}' for name, share in MIX)}")
+
+    if args.url:
+        report(args.url, *run_load(args.url, args.concurrency, args.warmup, args.duration,
+                                   args.seed))
+        return
+
+    stub, _, base_url = start_fake_openai(latency=args.stub_latency)
+    print(f"Fake OpenAI latency {args.stub_latency:.1f}s, {os.cpu_count()} CPUs")
+    try:
+        for profile in args.profiles:
+            process, url = start_server(profile, free_port(), base_url)
+            try:
+                results = run_load(url, args.concurrency, args.warmup, args.duration, args.seed)
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+            report(f'{profile} (gunicorn.conf.py)', *results)
+    finally:
+        stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
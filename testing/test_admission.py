@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Admission Control Test
+
+Serves the app with tight limits (see admission.py) and checks that:
+
+1. /api/play answers 429 + Retry-After once a client exceeds its rate
+2. Long-history /api/play requests fall into the stricter 'heavy' class
+3. Auto-play streams hold a concurrency slot until they end; extra
+   streams get 503 + Retry-After at once
+4. Ordinary rounds and batches stay available while every auto-play slot
+   is taken
+5. Refusals show up in /metrics
+
+Usage:
+    python test_admission.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import time
+
+# Tight limits: play 5/s burst 10, heavy 1/s burst 2, bulk and autoplay
+# 2 concurrent
+os.environ['RPS_LIMIT_PLAY'] = '5,10,0'
+os.environ['RPS_LIMIT_HEAVY'] = '1,2,0'
+os.environ['RPS_LIMIT_BULK'] = '0,0,2'
+os.environ['RPS_LIMIT_AUTOPLAY'] = '0,0,2'
+
+import requests
+
+from test_commentary_offload import check, start_app
+
+LONG_HISTORY = [{'player': 'rock', 'computer': 'paper', 'result': 'computer'}] * 400
+
+
+def main():
+    app, server, url = start_app()
+
+    print("=" * 60)
+    print("ADMISSION CONTROL TEST")
+    print("=" * 60)
+    results = []
+
+    # 1. Per-client rate limit
+    responses = [requests.post(f'{url}/api/play', json={'choice': 'rock'}) for _ in range(12)]
+    statuses = [response.status_code for response in responses]
+    results.append(check(
+        "rate limit",
+        statuses[:10] == [200] * 10 and statuses[10:] == [429, 429]
+        and responses[-1].headers.get('Retry-After') == '1',
+        f"burst of 12: {statuses.count(200)} served, {statuses.count(429)} refused, "
+        f"Retry-After {responses[-1].headers.get('Retry-After')}"
+    ))
+    time.sleep(2.2)  # Refill
+
+    # 2. Heavy class
+    statuses = [requests.post(f'{url}/api/play', json={
+        'choice': 'rock', 'history': LONG_HISTORY
+    }).status_code for _ in range(4)]
+    results.append(check(
+        "heavy class",
+        statuses == [200, 200, 429, 429],
+        f"400-round histories: {statuses}"
+    ))
+
+    # 3. Concurrency bound on streams
+    def stream():
+        with requests.get(f'{url}/api/autoplay?rounds=5&interval_ms=300', stream=True) as response:
+            for _ in response.iter_lines():
+                pass
+
+    streams = [threading.Thread(target=stream) for _ in range(2)]
+    for thread in streams:
+        thread.start()
+    time.sleep(0.3)
+    start = time.perf_counter()
+    response = requests.get(f'{url}/api/autoplay?rounds=1')
+    elapsed = time.perf_counter() - start
+    results.append(check(
+        "autoplay slots",
+        response.status_code == 503 and response.headers.get('Retry-After') == '1',
+        f"third stream got {response.status_code} in {elapsed * 1000:.1f} ms"
+    ))
+
+    # 4. Gameplay while bulk is saturated
+    latencies = []
+    for _ in range(5):
+        start = time.perf_counter()
+        status = requests.post(f'{url}/api/play', json={'choice': 'paper'}).status_code
+        latencies.append((status, time.perf_counter() - start))
+    batch = requests.post(f'{url}/api/play/batch', json={'choices': ['rock', 'paper']}).status_code
+    results.append(check(
+        "gameplay unaffected",
+        all(status == 200 and elapsed < 0.1 for status, elapsed in latencies) and batch == 200,
+        f"5 rounds, max {max(elapsed for _, elapsed in latencies) * 1000:.1f} ms; batch {batch}"
+    ))
+    for thread in streams:
+        thread.join()
+    response = requests.get(f'{url}/api/autoplay?rounds=1')
+    results.append(check(
+        "slots released",
+        response.status_code == 200,
+        f"after the streams ended: {response.status_code}"
+    ))
+
+    # 5. Metrics
+    refused = [line for line in requests.get(f'{url}/metrics').text.splitlines()
+               if line.startswith('rps_admission_rejected_total')]
+    results.append(check(
+        "metrics",
+        len(refused) == 3,
+        '; '.join(line.split('{')[1].split('}')[0] + ' ' + line.rsplit(' ', 1)[1]
+                  for line in refused)
+    ))
+
+    server.shutdown()
+    print("=" * 60)
+    print("ALL PASSED" if all(results) else "SOME CHECKS FAILED")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,12 +13,13 @@ import random
 
 # Import AI functions directly from app.py
 from app import ai_easy, ai_medium, ai_hard, ai_very_hard, determine_winner, CHOICES
+from engine import PlayerModel, make_rng
 
-def simulate_player(strategy, history):
-    """Simulate different player strategies"""
+def simulate_player(strategy, history, rng=random):
+    """Simulate different player strategies (drawing from rng)"""
     
     if strategy == 'random':
-        return random.choice(CHOICES)
+        return rng.choice(CHOICES)
     
     elif strategy == 'always_rock':
         return 'rock'
@@ -31,7 +32,7 @@ def simulate_player(strategy, history):
     
     elif strategy == 'win_stay_lose_shift':
         if not history:
-            return random.choice(CHOICES)
+            return rng.choice(CHOICES)
         last = history[-1]
         if last['result'] == 'player':
             return last['player']  # Stay
@@ -43,18 +44,29 @@ def simulate_player(strategy, history):
     elif strategy == 'anti_ai':
         # Try to counter AI patterns
         if len(history) < 3:
-            return random.choice(CHOICES)
+            return rng.choice(CHOICES)
         # Find AI's most common choice
         ai_choices = [g['computer'] for g in history[-10:]]
         most_common = Counter(ai_choices).most_common(1)[0][0]
         counters = {'rock': 'paper', 'paper': 'scissors', 'scissors': 'rock'}
         return counters[most_common]
     
-    return random.choice(CHOICES)
+    return rng.choice(CHOICES)
 
-def run_test(ai_func, ai_name, strategy, num_games=1000):
-    """Run test for a specific AI difficulty against a specific strategy"""
+def run_test(ai_func, ai_name, strategy, num_games=1000, seed=None):
+    """
+    Run test for a specific AI difficulty against a specific strategy.
+    
+    With a seed, the player and the AI draw from their own streams derived
+    from (seed, difficulty, strategy), so a run can be replayed exactly.
+    """
+    if seed is None:
+        player_rng = ai_rng = random
+    else:
+        player_rng = make_rng(seed, ai_name, strategy, 'player')
+        ai_rng = make_rng(seed, ai_name, strategy, 'ai')
     history = []
+    model = PlayerModel()  # Updated once per round so long runs stay linear
     results = {'player': 0, 'computer': 0, 'tie': 0}
     
     print(f"\n{'='*60}")
@@ -64,13 +76,13 @@ def run_test(ai_func, ai_name, strategy, num_games=1000):
     
     for game_num in range(num_games):
         # Player makes choice
-        player_choice = simulate_player(strategy, history)
+        player_choice = simulate_player(strategy, history, player_rng)
         
         # AI makes choice
         if ai_name == 'Easy':
-            computer_choice = ai_func()
+            computer_choice = ai_func(ai_rng)
         else:
-            computer_choice = ai_func(history)
+            computer_choice = ai_func(history, model, ai_rng)
         
         # Determine winner
         result = determine_winner(player_choice, computer_choice)
@@ -84,6 +96,7 @@ def run_test(ai_func, ai_name, strategy, num_games=1000):
             'computer': computer_choice,
             'result': result
         })
+        model.update(history[-1])
         
         # Progress indicator
         if (game_num + 1) % 200 == 0:
@@ -129,6 +142,7 @@ def main():
     ]
     strategies = ['random', 'always_rock', 'cycle', 'win_stay_lose_shift', 'anti_ai']
     num_games = 1000
+    seed = os.environ.get('RPS_SEED')  # Set to replay a run exactly
     
     print("\n" + "="*60)
     print("COMPREHENSIVE AI DIFFICULTY EVALUATION")
@@ -136,6 +150,8 @@ def main():
     print(f"Testing {len(difficulties)} difficulties × {len(strategies)} strategies")
     print(f"Games per test: {num_games}")
     print(f"Total games: {len(difficulties) * len(strategies) * num_games}")
+    if seed is not None:
+        print(f"Seed: {seed}")
     print("="*60)
     
     all_results = []
@@ -149,7 +165,7 @@ def main():
         
         difficulty_results = []
         for strategy in strategies:
-            result = run_test(ai_func, ai_name, strategy, num_games)
+            result = run_test(ai_func, ai_name, strategy, num_games, seed)
             difficulty_results.append(result)
             all_results.append(result)
         
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Static Asset Test
+
+Checks the asset pipeline (assets.py) through the Flask test client:
+
+1. The page links every static file by a content-hashed /assets/ URL
+2. Assets are served gzip-compressed with immutable cache headers
+3. Conditional requests with the ETag get an empty 304
+4. The page itself is compressed and revalidates with 304
+
+Usage:
+    python test_assets.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gzip
+import re
+
+from app import ASSETS, app
+from test_commentary_offload import check
+
+GZIP = {'Accept-Encoding': 'gzip'}
+
+
+def main():
+    client = app.test_client()
+
+    print("=" * 60)
+    print("STATIC ASSET TEST")
+    print("=" * 60)
+    results = []
+
+    # 1. Fingerprinted links
+    page = client.get('/', headers=GZIP)
+    html = gzip.decompress(page.data).decode('utf-8')
+    urls = re.findall(r'(?:href|src)="(/assets/[^"]+)"', html)
+    expected = {asset.url_name for asset in ASSETS.assets.values()
+                if asset.name.endswith(('.css', '.js'))}
+    results.append(check(
+        "fingerprinted links",
+        {url.rsplit('/', 1)[1] for url in urls} == expected and '/static/' not in html,
+        f"{len(urls)} assets linked, e.g. {urls[-1] if urls else '-'}"
+    ))
+
+    # 2-3. Assets
+    plain_bytes = sent_bytes = 0
+    immutable = revalidated = True
+    for url in urls:
+        plain = client.get(url)
+        response = client.get(url, headers=GZIP)
+        plain_bytes += len(plain.data)
+        sent_bytes += len(response.data)
+        immutable &= ('immutable' in response.headers['Cache-Control']
+                      and gzip.decompress(response.data) == plain.data)
+        again = client.get(url, headers={**GZIP, 'If-None-Match': response.headers['ETag']})
+        revalidated &= again.status_code == 304 and not again.data
+    results.append(check(
+        "compressed, immutable",
+        immutable and sent_bytes < plain_bytes / 3,
+        f"{plain_bytes / 1024:.0f} KB -> {sent_bytes / 1024:.0f} KB with gzip"
+    ))
+    results.append(check(
+        "asset 304",
+        revalidated,
+        "every asset revalidates with an empty 304"
+    ))
+
+    # 4. Page
+    again = client.get('/', headers={**GZIP, 'If-None-Match': page.headers['ETag']})
+    results.append(check(
+        "page",
+        page.headers.get('Content-Encoding') == 'gzip' and again.status_code == 304
+        and page.headers['Cache-Control'] == 'no-cache',
+        f"{len(html.encode()) / 1024:.0f} KB -> {len(page.data) / 1024:.0f} KB, "
+        f"repeat visit {again.status_code}"
+    ))
+
+    print("=" * 60)
+    print("ALL PASSED" if all(results) else "SOME CHECKS FAILED")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Auto-Play Test
+
+Checks the server-side auto-player (engine/autoplayer.py) and the
+/api/autoplay stream through Flask's test client:
+
+1. Strategies: Medium counters the opponent's most common recent move,
+   Hard reads win-stay/lose-shift, ties in the most-common count break
+   like the client's reduce, Easy and Very Hard play uniformly
+2. NDJSON stream: one line per round, a summary that adds up, rounds
+   recorded in the session and continued with its session_id
+3. SSE format, the round cap, and replay of the same session under RPS_SEED
+4. Unknown strategies or difficulties and malformed bodies get 400
+
+Usage:
+    python test_autoplay.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import random
+
+from engine import MOVES, PlayerModel, auto_player_move, counter
+from engine.autoplayer import _most_common
+
+from test_commentary_offload import check
+
+MAX_ROUNDS = 200
+
+
+class FixedRng:
+    """random() and randrange() always give the same values."""
+
+    def __init__(self, value, move=0):
+        self.value = value
+        self.move = move
+
+    def random(self):
+        return self.value
+
+    def randrange(self, n):
+        return self.move
+
+
+def model_of(player, computer):
+    model = PlayerModel()
+    for p, c in zip(player, computer):
+        model.record(p, c)
+    return model
+
+
+def frequencies(strategy, model, rounds=6000):
+    rng = random.Random(5)
+    counts = [0, 0, 0]
+    for _ in range(rounds):
+        counts[auto_player_move(strategy, model, rng)] += 1
+    return [count / rounds for count in counts]
+
+
+def check_strategies():
+    results = []
+    ties = _most_common([0, 1, 1, 0]), _most_common([2, 0]), _most_common([1, 2, 2])
+    results.append(check('most common', ties == (1, 0, 2), f'ties broken to {ties}, like the JS reduce'))
+
+    # Opponent (computer) plays mostly rock: Medium answers paper
+    rocky = model_of([0, 1, 2, 0, 1], [0, 0, 1, 0, 2])
+    medium = frequencies('medium', rocky)
+    results.append(check('medium counters', abs(medium[1] - 0.8) < 0.03
+                         and auto_player_move('medium', rocky, FixedRng(0.5)) == 1
+                         and auto_player_move('medium', rocky, FixedRng(0.9, 2)) == 2,
+                         f'paper {medium[1]:.2f} of the time (0.7 + 0.3/3 expected)'))
+
+    # Hard: the opponent's last move was scissors (2)
+    won = model_of([0, 0, 0, 0, 1], [1, 1, 1, 1, 2])  # Computer won the last round
+    lost = model_of([0, 0, 0, 0, 0], [1, 1, 1, 1, 2])  # Player won the last round
+    tied = model_of([0, 0, 0, 0, 2], [1, 1, 1, 1, 2])
+    moves = (auto_player_move('hard', won, FixedRng(0.1)), auto_player_move('hard', lost, FixedRng(0.1)),
+             auto_player_move('hard', won, FixedRng(0.9)), auto_player_move('hard', tied, FixedRng(0.1)))
+    expected = (counter(2), counter(counter(2)), counter(1), counter(1))
+    results.append(check('hard reads the last result', moves == expected,
+                         f'stay after a win, shift after a loss, else most common: {moves}'))
+
+    early = model_of([0, 0], [0, 0])
+    uniform = [frequencies(strategy, model) for strategy, model in
+               (('easy', rocky), ('veryhard', rocky), ('medium', early), ('hard', PlayerModel()))]
+    results.append(check('random strategies', all(abs(p - 1 / 3) < 0.03 for f in uniform for p in f),
+                         'Easy, Very Hard and early Medium/Hard rounds play uniformly'))
+    return all(results)
+
+
+def stream(client, **body):
+    response = client.post('/api/autoplay', json=body)
+    return response, [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+
+
+def check_ndjson(app, client):
+    response, events = stream(client, strategy='medium', difficulty='hard', rounds=40, session_id=None)
+    rounds, done = events[:-1], events[-1]
+    session_id = done['session_id']
+    tally = {'player': 0, 'computer': 0, 'tie': 0}
+    for event in rounds:
+        tally[event['result']] += 1
+    ok = (response.mimetype == 'application/x-ndjson' and len(rounds) == 40
+          and [event['round'] for event in rounds] == list(range(1, 41))
+          and all(event['player_choice'] in MOVES and event['computer_choice'] in MOVES for event in rounds)
+          and done['done'] and done['rounds'] == 40 and done['summary'] == tally
+          and app.SESSIONS.get(session_id).model.rounds == 40)
+    _, more = stream(client, strategy='hard', difficulty='veryhard', rounds=10, session_id=session_id)
+    ok &= more[-1]['session_id'] == session_id and app.SESSIONS.get(session_id).model.rounds == 50
+    return check('ndjson stream', ok, f'40 rounds summed to {tally}, then 10 more in the same session')
+
+
+def check_sse(client):
+    response = client.get('/api/autoplay?strategy=hard&difficulty=medium&rounds=5&format=sse')
+    blocks = [block for block in response.get_data(as_text=True).split('\n\n') if block]
+    events = [block.split('\n')[0] for block in blocks]
+    ok = (response.mimetype == 'text/event-stream'
+          and events == ['event: round'] * 5 + ['event: done']
+          and json.loads(blocks[-1].split('data: ', 1)[1])['rounds'] == 5)
+    return check('sse stream', ok, f'{len(events)} events over GET')
+
+
+def check_cap_and_replay(app, client):
+    _, events = stream(client, strategy='easy', difficulty='easy', rounds=MAX_ROUNDS * 10)
+    capped = events[-1]['rounds']
+    session_id = events[-1]['session_id']
+    session = app.SESSIONS.get(session_id)
+    with session.lock:
+        session.model = PlayerModel()  # Same id, same RPS_SEED streams
+    _, again = stream(client, strategy='easy', difficulty='easy', rounds=MAX_ROUNDS, session_id=session_id)
+    return check('cap and replay', capped == MAX_ROUNDS and again == events,
+                 f'{MAX_ROUNDS * 10} requested, {capped} played; replayed round for round')
+
+
+def check_invalid(client):
+    bad = [
+        client.post('/api/autoplay', json={'strategy': 'hard', 'difficulty': 'impossible'}),
+        client.post('/api/autoplay', json={'strategy': 'hard', 'difficulty': 'Very Hard'}),
+        client.get('/api/autoplay?strategy=hard&difficulty=extreme'),
+        client.post('/api/autoplay', json={'strategy': 'genius', 'difficulty': 'hard'}),
+        client.post('/api/autoplay', json={'rounds': 'many'}),
+        client.post('/api/autoplay', json={'session_id': ['x']}),
+        client.post('/api/autoplay', json=[1, 2]),
+        client.post('/api/autoplay', json='hard')
+    ]
+    statuses = [response.status_code for response in bad]
+    return check('invalid parameters', set(statuses) == {400} and 'difficulty' in bad[0].get_json()['error'],
+                 f'statuses {sorted(set(statuses))}')
+
+
+def main():
+    os.environ.setdefault('RPS_SEED', '12345')
+    os.environ['RPS_MAX_AUTOPLAY_ROUNDS'] = str(MAX_ROUNDS)
+    os.environ.setdefault('RPS_LIMIT_AUTOPLAY', '0,0,0')
+    os.environ.setdefault('RPS_WARMUP_ROUNDS', '0')
+    import app
+    client = app.app.test_client()
+
+    print("=" * 60)
+    print("AUTO-PLAY TEST")
+    print("=" * 60)
+
+    results = [
+        check_strategies(),
+        check_ndjson(app, client),
+        check_sse(client),
+        check_cap_and_replay(app, client),
+        check_invalid(client)
+    ]
+
+    print("=" * 60)
+    print("ALL PASSED" if all(results) else "SOME CHECKS FAILED")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
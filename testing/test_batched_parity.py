@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Parity test for the batched (NumPy) Very Hard engine
+
+engine/batched.py reimplements ai_very_hard_parameterized
+(optimization/ai_strategies.py) on arrays. Games against the weighted
+opponent suite are played with the scalar strategy, and after every round
+each game's BatchState is copied --copies times and decided in one
+very_hard_moves() call. For every state:
+
+1. Moves the scalar strategy can never play (probability 0 in
+   very_hard_distribution) are never drawn by the batched engine
+2. The batched draws match the scalar distribution within sampling error
+
+It also checks that a seeded batched run replays exactly, and that the
+optimizer refuses expected-value scoring on the batched engine instead of
+silently ignoring it.
+
+Usage:
+    python test_batched_parity.py
+    python test_batched_parity.py --games 4 --rounds 80 --copies 4000
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import copy
+import math
+
+import numpy as np
+
+from engine import MOVES, RESULTS, PlayerModel, decode_move, make_generator, make_rng, outcome
+from engine.batched import BatchState, very_hard_moves
+from engine.lookup import sample
+from optimization.ai_strategies import ai_very_hard_parameterized, very_hard_distribution
+from optimization.hyperparameters import DEFAULT_VERY_HARD_PARAMS
+from optimization.opponent_agents import get_weighted_opponent_suite
+from optimization.optimizer import FitnessEvaluator, SimulationEngine
+
+from test_commentary_offload import check
+
+PARAMS = DEFAULT_VERY_HARD_PARAMS
+
+
+def replicate(state, copies):
+    """BatchState with every game of state repeated copies times in a row."""
+    replica = BatchState(state.num_games * copies)
+    for name in ('moves', 'results', 'rounds', 'transitions', 'transition_first'):
+        setattr(replica, name, np.repeat(getattr(state, name), copies, axis=0))
+    return replica
+
+
+def play_games(games, rounds, copies, seed):
+    """
+    Play the opponent suite against the scalar strategy, comparing every state.
+
+    Returns:
+        (states compared, impossible moves drawn, worst deviation in sigma)
+    """
+    opponents = [copy.deepcopy(opponent)
+                 for opponent, _ in get_weighted_opponent_suite() for _ in range(games)]
+    for index, opponent in enumerate(opponents):
+        opponent.seed(make_rng(seed, opponent.name, index))
+    models = [PlayerModel() for _ in opponents]
+    histories = [[] for _ in opponents]
+    state = BatchState(len(opponents))
+    rng = make_rng(seed, 'scalar')
+    generator = make_generator(seed, 'batched')
+
+    impossible = 0
+    worst = 0.0
+    for _ in range(rounds):
+        batched = very_hard_moves(replicate(state, copies), PARAMS, generator)
+        counts = np.stack([np.bincount(batched[i * copies:(i + 1) * copies], minlength=3)
+                           for i in range(len(opponents))])
+
+        player, computer = [], []
+        for i, (opponent, model, history) in enumerate(zip(opponents, models, histories)):
+            distribution = very_hard_distribution(model, PARAMS)
+            for move in range(3):
+                p = distribution[move]
+                if p == 0:
+                    impossible += int(counts[i, move])
+                    continue
+                sigma = math.sqrt(p * (1 - p) / copies) or 1e-12
+                worst = max(worst, abs(counts[i, move] / copies - p) / sigma)
+
+            player_move = MOVES.index(opponent.choose(history))
+            computer_move = sample(distribution, rng)
+            model.record(player_move, computer_move)
+            history.append({'player': MOVES[player_move], 'computer': decode_move(computer_move),
+                            'result': RESULTS[outcome(player_move, computer_move)]})
+            player.append(player_move)
+            computer.append(computer_move)
+        state.record(player, computer)
+
+    return len(opponents) * rounds, impossible, worst
+
+
+def check_replay(seed):
+    """Two seeded batched tournaments must produce identical games."""
+    def run():
+        engine = SimulationEngine(ai_very_hard_parameterized, seed=seed)
+        opponents = [copy.deepcopy(opponent) for opponent, _ in get_weighted_opponent_suite()]
+        return engine.run_games_batched(opponents, PARAMS, num_rounds=50)
+    return run() == run()
+
+
+def check_expected_rejected():
+    """FitnessEvaluator must refuse batched + distribution_function."""
+    try:
+        FitnessEvaluator(ai_very_hard_parameterized, batched=True,
+                         distribution_function=very_hard_distribution)
+    except ValueError:
+        return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batched engine parity test')
+    parser.add_argument('--games', type=int, default=2, help='Games per suite opponent (default: 2)')
+    parser.add_argument('--rounds', type=int, default=60, help='Rounds per game (default: 60)')
+    parser.add_argument('--copies', type=int, default=2000,
+                        help='Batched draws per state (default: 2000)')
+    parser.add_argument('--seed', type=int, default=42, help='Root seed')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BATCHED ENGINE PARITY")
+    print("=" * 60)
+
+    states, impossible, worst = play_games(args.games, args.rounds, args.copies, args.seed)
+    results = [
+        check('impossible moves', impossible == 0,
+              f'{impossible} draws of moves the scalar strategy never plays ({states} states)'),
+        check('distribution parity', worst < 5,
+              f'worst deviation {worst:.2f} sigma ({states} states x {args.copies} draws)'),
+        check('seeded replay', check_replay(args.seed), 'same seed, same batched games'),
+        check('expected scoring rejected', check_expected_rejected(),
+              'batched=True with distribution_function raises ValueError')
+    ]
+
+    print("=" * 60)
+    print("ALL PASSED" if all(results) else "SOME CHECKS FAILED")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Commentary Cache Test
+
+Runs the app against testing/fake_openai_server.py and checks that:
+
+1. Concurrent identical commentary requests share one upstream call
+2. A repeated request is served from the cache without an upstream call
+3. Different match state is a miss and gets its own call
+4. /api/commentary/metrics reports the hits, misses and coalesced requests
+
+Usage:
+    python test_commentary_cache.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import time
+
+import requests
+
+from fake_openai_server import start_fake_openai
+from test_commentary_offload import GAME_HISTORY, check, start_app
+
+LATENCY = 1.0
+CONCURRENT = 8
+
+
+def commentary_request(player_score):
+    return {
+        'game_history': GAME_HISTORY,
+        'scores': {'player': player_score, 'computer': 10, 'ties': 0},
+        'hand_stats': {},
+        'current_difficulty': 'hard'
+    }
+
+
+def main():
+    fake_server, fake_state, base_url = start_fake_openai(latency=LATENCY)
+    os.environ['OPENAI_API_KEY'] = 'fake'
+    os.environ['OPENAI_BASE_URL'] = base_url
+    os.environ['RPS_COMMENTARY_WORKERS'] = '2'
+    app, server, url = start_app()
+
+    print("=" * 60)
+    print("COMMENTARY CACHE TEST")
+    print(f"Fake OpenAI latency {LATENCY}s, {CONCURRENT} concurrent identical requests")
+    print("=" * 60)
+    results = []
+
+    # 1. Single-flight
+    responses = []
+
+    def request_commentary():
+        responses.append(requests.post(f'{url}/api/openai-commentary',
+                                       json=commentary_request(0)))
+
+    workers = [threading.Thread(target=request_commentary) for _ in range(CONCURRENT)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    texts = {response.json().get('commentary') for response in responses}
+    results.append(check(
+        "single-flight",
+        all(r.status_code == 200 for r in responses) and len(texts) == 1
+        and fake_state.requests == 1,
+        f"{CONCURRENT} requests, {fake_state.requests} upstream call(s), "
+        f"{len(texts)} distinct answer(s)"
+    ))
+
+    # 2. Cache hit
+    start = time.perf_counter()
+    response = requests.post(f'{url}/api/openai-commentary', json=commentary_request(0))
+    elapsed = time.perf_counter() - start
+    results.append(check(
+        "cache hit",
+        response.status_code == 200 and fake_state.requests == 1 and elapsed < LATENCY / 4,
+        f"answered in {elapsed * 1000:.1f} ms, {fake_state.requests} upstream call(s) total"
+    ))
+
+    # 3. Different inputs
+    response = requests.post(f'{url}/api/openai-commentary', json=commentary_request(1))
+    results.append(check(
+        "new inputs miss",
+        response.status_code == 200 and fake_state.requests == 2,
+        f"{fake_state.requests} upstream call(s) total"
+    ))
+
+    # 4. Counters
+    cache = requests.get(f'{url}/api/commentary/metrics').json()['cache']
+    results.append(check(
+        "metrics",
+        cache['misses'] == 2 and cache['hits'] == 1 and cache['coalesced'] == CONCURRENT - 1,
+        f"hits {cache['hits']}, misses {cache['misses']}, coalesced {cache['coalesced']}, "
+        f"hit rate {cache['hit_rate']:.0%}"
+    ))
+
+    server.shutdown()
+    fake_server.shutdown()
+    print("=" * 60)
+    print("ALL PASSED" if all(results) else "SOME CHECKS FAILED")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
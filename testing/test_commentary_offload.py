@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Commentary Offload Test
+
+Runs the app against testing/fake_openai_server.py with slow responses and
+checks that:
+
+1. /api/play stays fast while commentary calls are pending
+2. Commentary calls beyond the pool size are refused at once (503)
+3. Calls past the deadline return 504 instead of hanging
+
+Usage:
+    python test_commentary_offload.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+import threading
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+from fake_openai_server import start_fake_openai
+
+POOL_SIZE = 2
+LATENCY = 2.0
+
+GAME_HISTORY = [{'player': 'rock', 'computer': 'paper', 'result': 'computer'}] * 10
+
+
+def commentary_request(number):
+    """Distinct inputs per request, so the commentary cache cannot merge them."""
+    return {
+        'game_history': GAME_HISTORY,
+        'scores': {'player': number, 'computer': 10, 'ties': 0},
+        'hand_stats': {},
+        'current_difficulty': 'hard'
+    }
+
+
+def start_app():
+    """Serve app.py on a free port (threaded, like a gthread worker)."""
+    # These tests exercise the commentary pool, not admission control
+    os.environ.setdefault('RPS_LIMIT_COMMENTARY', '0,0,0')
+    # Time the calls, not the OpenAI SDK's one-off lazy import
+    os.environ.setdefault('RPS_PRELOAD_OPENAI', '1')
+    import app
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)  # No per-request log lines
+    server = make_server('127.0.0.1', 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return app, server, f'http://127.0.0.1:{server.server_port}'
+
+
+def check(name, passed, detail):
+    print(f"{'✓ PASS' if passed else '✗ FAIL'}  {name}: {detail}")
+    return passed
+
+
+def main():
+    fake_server, fake_state, base_url = start_fake_openai(latency=LATENCY)
+    os.environ['OPENAI_API_KEY'] = 'fake'
+    os.environ['OPENAI_BASE_URL'] = base_url
+    os.environ['RPS_COMMENTARY_WORKERS'] = str(POOL_SIZE)
+    app, server, url = start_app()
+
+    print("=" * 60)
+    print("COMMENTARY OFFLOAD TEST")
+    print(f"Fake OpenAI latency {LATENCY}s, commentary pool size {POOL_SIZE}")
+    print("=" * 60)
+
+    # Fire more commentary requests than the pool allows
+    statuses = []
+    started = time.perf_counter()
+
+    def request_commentary(number):
+        response = requests.post(f'{url}/api/openai-commentary', json=commentary_request(number))
+        statuses.append((response.status_code, time.perf_counter() - started))
+
+    workers = [threading.Thread(target=request_commentary, args=(number,))
+               for number in range(POOL_SIZE + 2)]
+    for worker in workers:
+        worker.start()
+    time.sleep(0.2)
+
+    # Gameplay while commentary is pending
+    latencies = []
+    session_id = None
+    with requests.Session() as client:
+        for _ in range(50):
+            start = time.perf_counter()
+            data = client.post(f'{url}/api/play', json={
+                'choice': 'rock', 'difficulty': 'veryhard', 'session_id': session_id
+            }).json()
+            latencies.append(time.perf_counter() - start)
+            session_id = data['session_id']
+    for worker in workers:
+        worker.join()
+
+    results = []
+    results.append(check(
+        "gameplay during commentary",
+        max(latencies) < LATENCY / 4,
+        f"50 rounds, max {max(latencies) * 1000:.1f} ms"
+    ))
+    ok = [elapsed for status, elapsed in statuses if status == 200]
+    busy = [elapsed for status, elapsed in statuses if status == 503]
+    results.append(check(
+        "pool bound",
+        len(ok) == POOL_SIZE and len(busy) == 2 and max(busy) < LATENCY / 2,
+        f"{len(ok)} served in ~{max(ok, default=0):.1f}s, {len(busy)} refused in "
+        f"{max(busy, default=0) * 1000:.0f} ms"
+    ))
+
+    # Deadline
+    app.COMMENTARY_POOL.timeout = 0.5
+    start = time.perf_counter()
+    response = requests.post(f'{url}/api/openai-commentary', json=commentary_request(99))
+    elapsed = time.perf_counter() - start
+    results.append(check(
+        "timeout",
+        response.status_code == 504 and elapsed < LATENCY,
+        f"status {response.status_code} after {elapsed:.2f}s"
+    ))
+
+    server.shutdown()
+    fake_server.shutdown()
+    print("=" * 60)
+    print("ALL PASSED" if all(results) else "SOME CHECKS FAILED")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
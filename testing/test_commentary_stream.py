@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Streaming Commentary Test
+
+Runs the app against testing/fake_openai_server.py in streaming mode
+(first-token latency plus a delay between words) and checks that:
+
+1. The first token reaches the client after about the upstream's
+   first-token latency, well before the whole answer is done
+2. The streamed tokens add up to the final 'done' event's commentary
+3. A repeated request is replayed from the cache at once, and the
+   non-streaming endpoint shares that cache
+4. A client that disconnects mid-stream frees its commentary pool slot
+5. Upstream failures before the first token keep JSON error responses
+6. Identical requests made while a stream is in flight share its single
+   upstream call (even with a pool of one), and one that joins after
+   tokens have gone out still gets the whole text
+
+Usage:
+    python test_commentary_stream.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import threading
+import time
+
+import requests
+
+from fake_openai_server import start_fake_openai
+from test_commentary_offload import GAME_HISTORY, check, start_app
+
+FIRST_TOKEN_LATENCY = 0.5
+TOKEN_INTERVAL = 0.2
+
+
+def commentary_request(player_score):
+    return {
+        'game_history': GAME_HISTORY,
+        'scores': {'player': player_score, 'computer': 10, 'ties': 0},
+        'hand_stats': {},
+        'current_difficulty': 'hard'
+    }
+
+
+def read_events(url, body):
+    """POST to the stream endpoint; returns (status, [(seconds, event, payload)])."""
+    start = time.perf_counter()
+    events = []
+    with requests.post(f'{url}/api/openai-commentary/stream', json=body, stream=True) as response:
+        if response.headers.get('Content-Type', '').startswith('application/json'):
+            return response.status_code, [(0.0, 'json', response.json())]
+        name = None
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith('event: '):
+                name = line[len('event: '):]
+            elif line.startswith('data: '):
+                events.append((time.perf_counter() - start, name, json.loads(line[len('data: '):])))
+        return response.status_code, events
+
+
+def main():
+    fake_server, fake_state, base_url = start_fake_openai(
+        latency=FIRST_TOKEN_LATENCY, token_interval=TOKEN_INTERVAL
+    )
+    os.environ['OPENAI_API_KEY'] = 'fake'
+    os.environ['OPENAI_BASE_URL'] = base_url
+    os.environ['RPS_COMMENTARY_WORKERS'] = '1'
+    os.environ['RPS_OPENAI_RETRIES'] = '0'
+    app, server, url = start_app()
+
+    print("=" * 60)
+    print("STREAMING COMMENTARY TEST")
+    print(f"Fake OpenAI first token after {FIRST_TOKEN_LATENCY}s, "
+          f"then a word every {TOKEN_INTERVAL}s")
+    print("=" * 60)
+    results = []
+
+    # 1-2. Streaming
+    status, events = read_events(url, commentary_request(0))
+    tokens = [(at, payload['text']) for at, name, payload in events if name == 'token']
+    done = [payload for _, name, payload in events if name == 'done']
+    total = events[-1][0] if events else 0
+    results.append(check(
+        "time to first token",
+        status == 200 and tokens and tokens[0][0] < FIRST_TOKEN_LATENCY + 0.3
+        and total > tokens[0][0] + 3 * TOKEN_INTERVAL,
+        f"first token after {tokens[0][0]:.2f}s, done after {total:.2f}s, {len(tokens)} tokens"
+        if tokens else f"status {status}, no tokens"
+    ))
+    results.append(check(
+        "tokens add up",
+        len(done) == 1 and ''.join(text for _, text in tokens) == done[0]['commentary'],
+        repr(done[0]['commentary']) if done else "no done event"
+    ))
+
+    # 3. Cache
+    status, events = read_events(url, commentary_request(0))
+    json_start = time.perf_counter()
+    plain = requests.post(f'{url}/api/openai-commentary', json=commentary_request(0))
+    json_elapsed = time.perf_counter() - json_start
+    results.append(check(
+        "cached replay",
+        [name for _, name, _ in events] == ['token', 'done'] and events[-1][0] < 0.1
+        and plain.status_code == 200 and json_elapsed < 0.1 and fake_state.requests == 1,
+        f"stream in {events[-1][0] * 1000:.1f} ms, JSON endpoint in {json_elapsed * 1000:.1f} ms, "
+        f"{fake_state.requests} upstream call(s)"
+    ))
+
+    # 4. Disconnect mid-stream (pool size 1)
+    with requests.post(f'{url}/api/openai-commentary/stream', json=commentary_request(1),
+                       stream=True) as response:
+        next(response.iter_lines())
+    time.sleep(2 * TOKEN_INTERVAL)
+    status, events = read_events(url, commentary_request(2))
+    results.append(check(
+        "disconnect frees slot",
+        status == 200 and events[-1][1] == 'done',
+        f"next stream: status {status}, last event {events[-1][1]}"
+    ))
+
+    # 5. Failure before the first token
+    fake_state.error_rate = 1.0
+    status, events = read_events(url, commentary_request(3))
+    results.append(check(
+        "upstream error",
+        status == 500 and events[0][1] == 'json' and 'error' in events[0][2],
+        f"status {status}: {events[0][2].get('error', '')[:60]}"
+    ))
+
+    # 6. Identical concurrent streams
+    fake_state.error_rate = 0.0
+    before = fake_state.requests
+    outcomes = [None, None]
+
+    def stream_into(slot):
+        outcomes[slot] = read_events(url, commentary_request(4))
+
+    readers = [threading.Thread(target=stream_into, args=(slot,)) for slot in range(2)]
+    readers[0].start()
+    time.sleep(FIRST_TOKEN_LATENCY + 2 * TOKEN_INTERVAL)  # Join after some tokens went out
+    readers[1].start()
+    for reader in readers:
+        reader.join()
+    texts = [''.join(payload['text'] for _, name, payload in events if name == 'token')
+             for _, events in outcomes]
+    finals = [events[-1][2].get('commentary') for _, events in outcomes]
+    results.append(check(
+        "shared stream",
+        [status for status, _ in outcomes] == [200, 200] and texts[0] and texts == finals
+        and texts[0] == texts[1] and fake_state.requests - before == 1,
+        f"2 identical streams, {fake_state.requests - before} upstream call(s), same {len(texts[0])} chars"
+    ))
+
+    server.shutdown()
+    fake_server.shutdown()
+    print("=" * 60)
+    print("ALL PASSED" if all(results) else "SOME CHECKS FAILED")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Parity test for the precompiled Medium / Hard lookup tables
+
+1. Key parity: over many simulated games, every distribution served from
+   MEDIUM_TABLE / HARD_TABLE (mostly cache hits compiled from *other*
+   games) must equal the exact distribution of the reference function on
+   the current model. The tables are keyed on derived features rather
+   than raw windows, so the Hard table must also answer nearly every
+   round from a compiled entry (at least MIN_HIT_RATE of the lookups).
+2. Sampling parity: for a sample of states, the moves the reference
+   function actually draws must match the compiled distribution within
+   sampling error.
+
+Usage:
+    python test_lookup_tables.py
+    python test_lookup_tables.py --games 500 --rounds 60
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import math
+import random
+from collections import Counter
+
+from app import MEDIUM_TABLE, HARD_TABLE, _medium_move, _hard_move
+from engine import PlayerModel, exact_distribution
+
+# Share of lookups during the key parity run that must be hits
+MIN_HIT_RATE = 0.9
+
+TABLES = [
+    ('medium', MEDIUM_TABLE, _medium_move),
+    ('hard', HARD_TABLE, _hard_move),
+]
+
+
+def biased_player(rng):
+    """Player with a random mix of bias, cycling and win-stay habits."""
+    bias = rng.randrange(3)
+    strength = rng.random()
+    cycle = rng.random() < 0.3
+
+    def play(model):
+        if cycle and model.last_move is not None and rng.random() < strength:
+            return (model.last_move + 1) % 3
+        if rng.random() < strength:
+            return bias
+        return rng.randrange(3)
+    return play
+
+
+def check_key_parity(games, rounds, seed):
+    """Compare table distributions with fresh reference enumerations."""
+    rng = random.Random(seed)
+    mismatches = {name: 0 for name, _, _ in TABLES}
+    checked = 0
+
+    for _ in range(games):
+        model = PlayerModel()
+        player = biased_player(rng)
+        for _ in range(rounds):
+            for name, table, reference in TABLES:
+                compiled = table.distribution(model)
+                expected = exact_distribution(reference, model)
+                if any(abs(a - b) > 1e-12 for a, b in zip(compiled, expected)):
+                    mismatches[name] += 1
+            checked += 1
+            model.record(player(model), rng.randrange(3))
+
+    return checked, mismatches
+
+
+def check_sampling_parity(states, draws, seed):
+    """Compare reference draws with compiled distributions (z-test per move)."""
+    rng = random.Random(seed)
+    worst = 0.0
+
+    for _ in range(states):
+        model = PlayerModel()
+        player = biased_player(rng)
+        for _ in range(rng.randrange(1, 40)):
+            model.record(player(model), rng.randrange(3))
+
+        for _, table, reference in TABLES:
+            distribution = table.distribution(model)
+            counts = Counter(reference(model, rng) for _ in range(draws))
+            for move in range(3):
+                p = distribution[move]
+                sigma = math.sqrt(max(p * (1 - p), 1e-12) / draws)
+                worst = max(worst, abs(counts[move] / draws - p) / sigma)
+
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Lookup table parity test')
+    parser.add_argument('--games', type=int, default=200, help='Simulated games for key parity')
+    parser.add_argument('--rounds', type=int, default=50, help='Rounds per simulated game')
+    parser.add_argument('--states', type=int, default=40, help='States for sampling parity')
+    parser.add_argument('--draws', type=int, default=5000, help='Reference draws per state')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("LOOKUP TABLE PARITY")
+    print("=" * 60)
+
+    before = {name: (table.hits, table.misses) for name, table, _ in TABLES}
+    checked, mismatches = check_key_parity(args.games, args.rounds, args.seed)
+    print(f"\nKey parity: {checked} states checked")
+    hit_rates = {}
+    for name, table, _ in TABLES:
+        hits = table.hits - before[name][0]
+        misses = table.misses - before[name][1]
+        hit_rates[name] = hits / max(hits + misses, 1)
+        print(f"  {name:<7} mismatches: {mismatches[name]:>5}   entries: {len(table):>6}   "
+              f"hits: {hits:>7}   misses: {misses:>6}   hit rate: {hit_rates[name]:.1%}")
+
+    worst = check_sampling_parity(args.states, args.draws, args.seed + 1)
+    print(f"\nSampling parity: worst deviation {worst:.2f} sigma "
+          f"({args.states} states x {args.draws} draws)")
+
+    passed = not any(mismatches.values()) and worst < 5 and hit_rates['hard'] >= MIN_HIT_RATE
+    print("\n" + ("✓ PASS" if passed else "✗ FAIL"))
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
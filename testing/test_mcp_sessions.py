@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+MCP Session Test
+
+Checks MCPServer's per-session games in-process (no stdio transport):
+
+1. Session isolation: sessions played interleaved on one server make the
+   same moves and keep the same statistics as each played alone
+2. The AI reads the session's PlayerModel only: the same seeded game plays
+   out identically whatever history_limit is, and still exploits a
+   biased player
+3. LRU eviction: at most max_sessions are kept, the least recently used
+   goes first, get_stats on an evicted session creates nothing, and an
+   evicted session starts over
+4. Memory bound: the game dictionaries kept per session never reach twice
+   history_limit, and recent_games are the latest rounds
+
+Usage:
+    python test_mcp_sessions.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+
+from engine import MOVES
+from mcp_server import MCPServer
+
+from test_commentary_offload import check
+
+DIFFICULTIES = ('easy', 'medium', 'hard', 'veryhard')
+SEED = 21
+
+
+def player(seed):
+    """A player biased towards rock, with its own random stream."""
+    rng = random.Random(seed)
+    return lambda: 'rock' if rng.random() < 0.5 else rng.choice(MOVES)
+
+
+def play_alone(session_id, difficulty, rounds, **kwargs):
+    server = MCPServer(seed=SEED, **kwargs)
+    choose = player(session_id)
+    results = [server.play_game(choose(), difficulty, session_id) for _ in range(rounds)]
+    return results, server
+
+
+def check_isolation():
+    rounds = 150
+    sessions = {f'player-{i}': DIFFICULTIES[i % 4] for i in range(8)}
+    server = MCPServer(seed=SEED)
+    choosers = {session_id: player(session_id) for session_id in sessions}
+    interleaved = {session_id: [] for session_id in sessions}
+    for _ in range(rounds):
+        for session_id, difficulty in sessions.items():
+            interleaved[session_id].append(server.play_game(choosers[session_id](), difficulty, session_id))
+
+    alone = {session_id: play_alone(session_id, difficulty, rounds)[0]
+             for session_id, difficulty in sessions.items()}
+    same = all(interleaved[s] == alone[s] for s in sessions)
+    stats = [server.get_statistics(session_id) for session_id in sessions]
+    counted = all(s['total_games'] == rounds and sum(s['stats'].values()) == rounds for s in stats)
+    default = server.get_statistics()['total_games'] == 0
+    return check('session isolation', same and counted and default,
+                 f'{len(sessions)} sessions x {rounds} interleaved rounds = each played alone')
+
+
+def check_model_only():
+    ok = True
+    for difficulty in DIFFICULTIES:
+        short, _ = play_alone('model', difficulty, 300, history_limit=1)
+        long, _ = play_alone('model', difficulty, 300, history_limit=10000)
+        ok &= [r['computer_choice'] for r in short] == [r['computer_choice'] for r in long]
+
+    always_rock = MCPServer(seed=SEED)
+    results = [always_rock.play_game('rock', 'veryhard', 'rock') for _ in range(200)]
+    losses = sum(r['result'] == 'computer' for r in results[20:]) / 180
+    return check('AI reads the model', ok and losses > 0.8,
+                 f'history_limit 1 and 10000 play identically; Very Hard beats always-rock {losses:.0%}')
+
+
+def check_lru():
+    server = MCPServer(seed=SEED, max_sessions=3)
+    for session_id in ('a', 'b', 'c'):
+        server.play_game('rock', 'medium', session_id)
+    server.play_game('paper', 'medium', 'a')  # a is now the most recently used
+    server.play_game('rock', 'medium', 'd')  # evicts b
+    kept = list(server.sessions)
+    evicted = server.get_statistics('b')
+    not_created = 'b' not in server.sessions and len(server.sessions) == 3
+    again = server.play_game('rock', 'medium', 'b')  # starts over, evicts c
+    ok = (kept == ['c', 'a', 'd'] and evicted['total_games'] == 0 and not_created
+          and again['total_games'] == 1 and list(server.sessions) == ['a', 'd', 'b']
+          and server.evictions == 2 and server.get_statistics('a')['total_games'] == 2)
+    return check('LRU eviction', ok, f'kept {kept} after a 4th session in a server of 3; '
+                 f'{server.evictions} evictions')
+
+
+def check_history_bound():
+    limit = 10
+    server = MCPServer(seed=SEED, history_limit=limit)
+    choose = player('bound')
+    sizes = []
+    latest = []
+    for _ in range(1000):
+        result = server.play_game(choose(), 'veryhard', 'bound')
+        latest = (latest + [result])[-5:]
+        sizes.append(len(server.session('bound').history))
+    stats = server.get_statistics('bound')
+    recent = [(game['player'], game['computer'], game['result']) for game in stats['recent_games']]
+    expected = [(r['player_choice'], r['computer_choice'], r['result']) for r in latest]
+    model = server.session('bound').model
+    ok = (max(sizes) == 2 * limit - 1 and min(sizes[2 * limit:]) == limit and recent == expected
+          and stats['total_games'] == 1000 and len(model.moves) < 2 * model.MAX_WINDOW)
+    return check('history bound', ok, f'1000 rounds kept {min(sizes[2 * limit:])}-{max(sizes)} game dicts '
+                 f'(history_limit {limit}); recent_games are the last 5')
+
+
+def main():
+    print("=" * 60)
+    print("MCP SESSION TEST")
+    print("=" * 60)
+
+    results = [
+        check_isolation(),
+        check_model_only(),
+        check_lru(),
+        check_history_bound()
+    ]
+
+    print("=" * 60)
+    print("ALL PASSED" if all(results) else "SOME CHECKS FAILED")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+MCP stdio Transport Test
+
+Runs mcp_server.py as a subprocess, the way Claude Desktop does, and
+checks the asyncio transport:
+
+1. Pipelined requests (sent without waiting for replies) are all answered
+   exactly once, rounds of each session stay in arrival order, and
+   throughput beats lockstep request/response
+2. A slow pool tool does not hold up quick calls for other sessions
+3. Request lines longer than asyncio's default 64 KiB limit are accepted
+4. JSON that is not a request object gets an Invalid Request error with
+   id null, and the server keeps serving
+
+Usage:
+    python test_mcp_transport.py
+    python test_mcp_transport.py --requests 5000
+"""
+
+import sys
+import os
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import json
+import subprocess
+import threading
+import time
+
+from test_commentary_offload import check
+
+# A server with one extra pool tool that sleeps, for the isolation check
+SLOW_SERVER = '''
+import asyncio, time
+import mcp_server
+
+class SlowServer(mcp_server.MCPServer):
+    POOL_TOOLS = mcp_server.MCPServer.POOL_TOOLS | {"slow"}
+
+    def __init__(self):
+        super().__init__()
+        self.tools["slow"] = {"name": "slow", "description": "Sleeps",
+                              "inputSchema": {"type": "object", "properties": {}}}
+        self.tool_handlers["slow"] = lambda arguments: time.sleep(arguments["seconds"]) or {}
+
+asyncio.run(SlowServer().run())
+'''
+
+
+def start_server(code=None):
+    """mcp_server.py (or code) as a subprocess, initialized and ready for calls."""
+    command = [sys.executable, '-c', code] if code else [sys.executable, 'mcp_server.py']
+    server = subprocess.Popen(command, cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL)
+    server.stdin.write(b'{"jsonrpc": "2.0", "id": "init", "method": "initialize"}\n')
+    server.stdin.flush()
+    server.stdout.readline()
+    return server
+
+
+def call(request_id, tool, **arguments):
+    return json.dumps({'jsonrpc': '2.0', 'id': request_id, 'method': 'tools/call',
+                       'params': {'name': tool, 'arguments': arguments}}).encode() + b'\n'
+
+
+def play_requests(count, sessions):
+    return [call(i, 'play_rps', choice=('rock', 'paper', 'scissors')[i % 3], difficulty='veryhard',
+                 session_id=f'player-{i % sessions}')
+            for i in range(count)]
+
+
+def read_response(server):
+    response = json.loads(server.stdout.readline())
+    text = response.get('result', {}).get('content', [{}])[0].get('text')
+    return response['id'], json.loads(text) if text else response
+
+
+def lockstep(requests):
+    """One request at a time; returns seconds."""
+    server = start_server()
+    started = time.perf_counter()
+    for line in requests:
+        server.stdin.write(line)
+        server.stdin.flush()
+        read_response(server)
+    elapsed = time.perf_counter() - started
+    server.stdin.close()
+    server.wait()
+    return elapsed
+
+
+def pipelined(requests):
+    """Everything written up front from a second thread; returns (seconds, responses in arrival order)."""
+    server = start_server()
+
+    def write_all():
+        for line in requests:
+            server.stdin.write(line)
+        server.stdin.flush()
+
+    started = time.perf_counter()
+    writer = threading.Thread(target=write_all)
+    writer.start()
+    responses = [read_response(server) for _ in requests]
+    elapsed = time.perf_counter() - started
+    writer.join()
+    server.stdin.close()
+    server.wait()
+    return elapsed, responses
+
+
+def check_pipelining(count, sessions):
+    print(f"\n1. {count} play_rps calls over {sessions} sessions")
+    requests = play_requests(count, sessions)
+    serial = lockstep(requests)
+    elapsed, responses = pipelined(requests)
+
+    ids = sorted(request_id for request_id, _ in responses)
+    ok = check('every request answered once', ids == list(range(count)),
+               f'{len(set(ids))} distinct ids for {count} requests')
+
+    # Rounds of one session must be played in the order they were sent
+    by_id = dict(responses)
+    in_order = all(
+        [by_id[i]['total_games'] for i in range(session, count, sessions)]
+        == list(range(1, len(range(session, count, sessions)) + 1))
+        for session in range(sessions)
+    )
+    ok &= check('per-session order', in_order, 'total_games counts up in request order per session')
+    ok &= check('pipelined throughput', elapsed < serial,
+                f'lockstep {count / serial:.0f} req/s, pipelined {count / elapsed:.0f} req/s '
+                f'({serial / elapsed:.1f}x)')
+    return ok
+
+
+def check_slow_tool():
+    print("\n2. Slow tool call followed by quick calls")
+    server = start_server(SLOW_SERVER)
+    started = time.perf_counter()
+    server.stdin.write(call('slow', 'slow', seconds=1.0, session_id='batch'))
+    for i in range(20):
+        server.stdin.write(call(f'quick-{i}', 'get_stats', session_id='someone-else'))
+    server.stdin.flush()
+
+    arrivals = []
+    for _ in range(21):
+        request_id, _ = read_response(server)
+        arrivals.append((request_id, time.perf_counter() - started))
+    server.stdin.close()
+    server.wait()
+
+    quick = [seconds for request_id, seconds in arrivals if request_id != 'slow']
+    slow = next(seconds for request_id, seconds in arrivals if request_id == 'slow')
+    ok = check('quick calls not blocked', max(quick) < 0.5 and arrivals[-1][0] == 'slow',
+               f'20 get_stats answered within {max(quick) * 1000:.0f} ms, slow call after {slow:.2f}s')
+    return ok
+
+
+def check_long_line():
+    print("\n3. Request line over 64 KiB")
+    server = start_server()
+    server.stdin.write(call(1, 'get_stats', session_id='x', padding='.' * 200000))
+    server.stdin.flush()
+    request_id, result = read_response(server)
+    server.stdin.close()
+    server.wait()
+    return check('long line accepted', request_id == 1 and result.get('session_id') == 'x',
+                 f'{200000 // 1024} KiB argument answered')
+
+
+def check_invalid_requests():
+    print("\n4. Valid JSON that is not a request object")
+    server = start_server()
+    lines = [b'[1]\n', b'"x"\n', b'3\n', b'null\n', b'[]\n']
+    for line in lines:
+        server.stdin.write(line)
+    server.stdin.write(call('after', 'get_stats', session_id='x'))
+    server.stdin.flush()
+    responses = [json.loads(server.stdout.readline()) for _ in lines]
+    request_id, result = read_response(server)
+    server.stdin.close()
+    server.wait()
+    codes = [response.get('error', {}).get('code') for response in responses]
+    ok = (codes == [-32600] * len(lines) and all(response['id'] is None for response in responses)
+          and request_id == 'after' and result.get('session_id') == 'x')
+    return check('invalid requests rejected', ok,
+                 f'{len(lines)} non-object lines -> error codes {sorted(set(codes), key=str)}, id null; '
+                 f'next call answered')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MCP stdio transport test')
+    parser.add_argument('--requests', type=int, default=2000, help='Pipelined calls (default: 2000)')
+    parser.add_argument('--sessions', type=int, default=8, help='Sessions they are spread over')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("MCP STDIO TRANSPORT TEST")
+    print("=" * 60)
+
+    results = [
+        check_pipelining(args.requests, args.sessions),
+        check_slow_tool(),
+        check_long_line(),
+        check_invalid_requests()
+    ]
+
+    print("\n" + "=" * 60)
+    print("ALL PASSED" if all(results) else "SOME CHECKS FAILED")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Metrics Test
+
+Checks metrics.py (per-thread shards merged at scrape time) and the
+/metrics endpoint, parsing the Prometheus text exposition format:
+
+1. Counters and histograms incremented from many threads, scraped while
+   they run and after they exit, add up exactly (retired shards included)
+2. Histogram buckets: a value equal to a bound counts in that bound's
+   le bucket, buckets are cumulative, +Inf equals _count, _sum adds up
+3. Exposition format: HELP/TYPE lines before every family, label values
+   escaped, no per-process labels
+4. Worker processes sharing a metrics directory: any one of them renders
+   the sum of all, totals survive retired workers, gauges only count live
+   ones, and the directory holds one file per live worker
+5. /metrics counts requests made from several threads
+
+Usage:
+    python test_metrics.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import multiprocessing
+import re
+import tempfile
+import threading
+
+from metrics import Registry
+
+from test_commentary_offload import check
+
+THREADS = 8
+PER_THREAD = 5000
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (\S+)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\\n]|\\[\\"n])*)"(,|$)')
+UNESCAPE = re.compile(r'\\(.)')
+
+
+def parse_labels(text):
+    """Label pairs of a sample; raises ValueError if they are malformed."""
+    labels, position = {}, 0
+    while position < len(text):
+        match = LABEL.match(text, position)
+        if match is None:
+            raise ValueError(f'Malformed labels: {text}')
+        labels[match.group(1)] = UNESCAPE.sub(lambda m: {'n': '\n'}.get(m.group(1), m.group(1)),
+                                              match.group(2))
+        position = match.end()
+    return labels
+
+
+def parse(text):
+    """
+    Parse an exposition; raises ValueError on any malformed line.
+
+    Returns:
+        ({(name, sorted label items): value}, {family: type})
+    """
+    samples, types, helped = {}, {}, set()
+    if not text.endswith('\n'):
+        raise ValueError('Exposition must end with a newline')
+    for line in text.splitlines():
+        if line.startswith('# HELP '):
+            helped.add(line.split(' ')[2])
+        elif line.startswith('# TYPE '):
+            _, _, family, kind = line.split(' ')
+            if family not in helped or kind not in ('counter', 'gauge', 'histogram'):
+                raise ValueError(f'Bad TYPE line: {line}')
+            types[family] = kind
+        else:
+            match = SAMPLE.match(line)
+            if match is None:
+                raise ValueError(f'Bad sample line: {line!r}')
+            name, labels, value = match.groups()
+            family = re.sub(r'_(bucket|sum|count)$', '', name) if name not in types else name
+            if family not in types:
+                raise ValueError(f'Sample before its TYPE line: {line}')
+            labels = parse_labels(labels or '')
+            if 'pid' in labels:
+                raise ValueError(f'Per-process pid label: {line}')
+            samples[name, tuple(sorted(labels.items()))] = float(value)
+    return samples, types
+
+
+def value(samples, metric, **labels):
+    """Value of the sample with these labels."""
+    return samples.get((metric, tuple(sorted(labels.items()))))
+
+
+def check_threads():
+    registry = Registry()
+    hits = registry.counter('test_hits_total', 'Hits.', ('kind',))
+    sizes = registry.histogram('test_sizes', 'Sizes.', (), (1, 10, 100))
+    start = threading.Barrier(THREADS + 1)
+    scrapes = []
+
+    def work(index):
+        start.wait()
+        for i in range(PER_THREAD):
+            hits.inc('even' if i % 2 == 0 else 'odd')
+            hits.inc('weighted', amount=index)
+            sizes.observe(i % 200)
+
+    workers = [threading.Thread(target=work, args=(index,)) for index in range(THREADS)]
+    for worker in workers:
+        worker.start()
+    start.wait()
+    while any(worker.is_alive() for worker in workers):
+        samples, _ = parse(registry.render())
+        scrapes.append((value(samples, 'test_hits_total', kind='even') or 0,
+                        value(samples, 'test_sizes_count') or 0))
+    for worker in workers:
+        worker.join()
+
+    samples, _ = parse(registry.render())
+    totals = (value(samples, 'test_hits_total', kind='even'), value(samples, 'test_hits_total', kind='odd'),
+              value(samples, 'test_hits_total', kind='weighted'), value(samples, 'test_sizes_count'))
+    expected = (THREADS * PER_THREAD / 2, THREADS * PER_THREAD / 2,
+                PER_THREAD * sum(range(THREADS)), THREADS * PER_THREAD)
+    monotonic = all(a[0] <= b[0] and a[1] <= b[1] for a, b in zip(scrapes, scrapes[1:]))
+    # Exited threads' shards are folded into the retired shard on scrape
+    retired = not hits._shards and not sizes._shards
+    again, _ = parse(registry.render())
+    return check('threaded totals', totals == expected and monotonic and retired and again == samples,
+                 f'{THREADS} threads x {PER_THREAD}: {totals[:3]} hits, {totals[3]:.0f} observations; '
+                 f'{len(scrapes)} scrapes during the run never went backwards')
+
+
+def check_buckets():
+    registry = Registry()
+    histogram = registry.histogram('test_latency_seconds', 'Latency.', ('route',), (0.005, 0.01, 0.1))
+    observed = [0.001, 0.005, 0.005, 0.0051, 0.01, 0.05, 0.1, 0.5, 7, -1]
+    for observation in observed:
+        histogram.observe(observation, '/a')
+    histogram.observe(0.2, '/b')
+    samples, types = parse(registry.render())
+    buckets = {bound: value(samples, 'test_latency_seconds_bucket', route='/a', le=bound)
+               for bound in ('0.005', '0.01', '0.1', '+Inf')}
+    ok = (types == {'test_latency_seconds': 'histogram'}
+          and buckets == {'0.005': 4, '0.01': 6, '0.1': 8, '+Inf': 10}
+          and value(samples, 'test_latency_seconds_count', route='/a') == len(observed)
+          and abs(value(samples, 'test_latency_seconds_sum', route='/a') - sum(observed)) < 1e-9
+          and value(samples, 'test_latency_seconds_bucket', route='/b', le='0.1') == 0
+          and value(samples, 'test_latency_seconds_bucket', route='/b', le='+Inf') == 1)
+    return check('histogram buckets', ok, f'cumulative le buckets {buckets}, bounds inclusive')
+
+
+def check_format():
+    registry = Registry()
+    counter = registry.counter('test_events_total', 'Events by name.', ('name', 'source'))
+    counter.inc('quote " backslash \\ newline \n', 'a')
+    counter.inc('plain', 'b', amount=2.5)
+    registry.histogram('test_empty_seconds', 'Never observed.')
+    registry.callback('test_items', 'Items.', 'gauge', lambda: 3)
+    text = registry.render()
+    try:
+        samples, types = parse(text)
+    except ValueError as e:
+        return check('exposition format', False, str(e))
+    ok = (value(samples, 'test_events_total', name='quote " backslash \\ newline \n', source='a') == 1
+          and value(samples, 'test_events_total', name='plain', source='b') == 2.5
+          and value(samples, 'test_items') == 3
+          and types == {'test_events_total': 'counter', 'test_empty_seconds': 'histogram',
+                        'test_items': 'gauge'}
+          and Registry.CONTENT_TYPE.startswith('text/plain; version=0.0.4'))
+    return check('exposition format', ok, f'{len(text.splitlines())} lines parse, escaped labels round-trip')
+
+
+def worker_registry(directory):
+    registry = Registry(directory)
+    hits = registry.counter('test_hits_total', 'Hits.', ('kind',))
+    sizes = registry.histogram('test_sizes', 'Sizes.', (), (1, 10))
+    registry.callback('test_live', 'Live workers.', 'gauge', lambda: 1)
+    return registry, hits, sizes
+
+
+def worker(directory, index, ready, stop):
+    """A worker process: records its share, flushes, waits to be told to exit."""
+    registry, hits, sizes = worker_registry(directory)
+    for i in range(100 * (index + 1)):
+        hits.inc('a')
+        sizes.observe(i % 20)
+    registry.flush()
+    ready.put(os.getpid())
+    stop.wait()
+
+
+def check_processes():
+    directory = tempfile.mkdtemp(prefix='rps-metrics-test-')
+    context = multiprocessing.get_context('spawn')
+    ready, stop = context.Queue(), context.Event()
+    workers = [context.Process(target=worker, args=(directory, index, ready, stop)) for index in range(3)]
+    for process in workers:
+        process.start()
+    pids = [ready.get(timeout=60) for _ in workers]
+    scraper, hits, _ = worker_registry(directory)
+    hits.inc('a', amount=5)
+
+    samples, _ = parse(scraper.render())
+    live = (value(samples, 'test_hits_total', kind='a'), value(samples, 'test_sizes_count'),
+            value(samples, 'test_live'))
+
+    # Two workers exit and are reaped, as gunicorn's child_exit hook does
+    stop.set()
+    for process in workers:
+        process.join()
+    for pid in pids[:2]:
+        scraper.retire(pid)
+    samples, _ = parse(scraper.render())
+    after = (value(samples, 'test_hits_total', kind='a'), value(samples, 'test_sizes_count'),
+             value(samples, 'test_live'))
+    files = sorted(name for name in os.listdir(directory) if name.endswith('.json'))
+    scraper.retire(pids[2])
+    scraper.retire(pids[2])  # Reaping twice changes nothing
+    again, _ = parse(scraper.render())
+    ok = (live == (605, 600, 4) and after == (605, 600, 2)
+          and files == sorted([f'{pids[2]}.json', f'{os.getpid()}.json', 'retired.json'])
+          and value(again, 'test_hits_total', kind='a') == 605 and value(again, 'test_live') == 1)
+    return check('worker processes', ok, f'3 workers + scraper: {live[0]:.0f} hits, {live[2]:.0f} live; '
+                 f'after 2 retired: {after[0]:.0f} hits, {after[2]:.0f} live, files {len(files)}')
+
+
+def check_endpoint(app):
+    def requests_for(endpoint):
+        samples, _ = parse(app.app.test_client().get('/metrics').get_data(as_text=True))
+        return value(samples, 'rps_http_requests_total', endpoint=endpoint, status='200') or 0
+
+    before = requests_for('/api/play')
+
+    def play():
+        client = app.app.test_client()
+        for _ in range(50):
+            client.post('/api/play', json={'choice': 'rock', 'difficulty': 'medium'})
+
+    workers = [threading.Thread(target=play) for _ in range(THREADS)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    response = app.app.test_client().get('/metrics')
+    samples, _ = parse(response.get_data(as_text=True))
+    played = requests_for('/api/play') - before
+    timed = value(samples, 'rps_play_duration_seconds_count', difficulty='medium')
+    return check('/metrics endpoint', played == THREADS * 50 and timed >= THREADS * 50
+                 and response.content_type == app.REGISTRY.CONTENT_TYPE,
+                 f'{THREADS} threads x 50 /api/play calls counted as {played:.0f}')
+
+
+def main():
+    os.environ.setdefault('RPS_LIMIT_PLAY', '0,0,0')
+    os.environ.setdefault('RPS_WARMUP_ROUNDS', '0')
+    import app
+
+    print("=" * 60)
+    print("METRICS TEST")
+    print("=" * 60)
+
+    results = [
+        check_threads(),
+        check_buckets(),
+        check_format(),
+        check_processes(),
+        check_endpoint(app)
+    ]
+
+    print("=" * 60)
+    print("ALL PASSED" if all(results) else "SOME CHECKS FAILED")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
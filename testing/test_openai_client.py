@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+OpenAI Client Resilience Test
+
+Drives commentary.OpenAIGateway against testing/fake_openai_server.py with
+injected latency and errors and checks that:
+
+1. Sequential calls reuse one keep-alive connection
+2. Transient 5xx errors are retried and mostly recovered
+3. The read timeout cuts off a slow upstream
+4. Repeated failures open the circuit, which then fails fast without
+   touching the upstream, and closes again after a successful trial call
+5. A trial call that fails before reaching the upstream (the client cannot
+   be created) does not leave the circuit stuck half-open
+
+Usage:
+    python test_openai_client.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import time
+
+from fake_openai_server import start_fake_openai
+
+
+def check(name, passed, detail):
+    print(f"{'✓ PASS' if passed else '✗ FAIL'}  {name}: {detail}")
+    return passed
+
+
+def ask(gateway):
+    from commentary import SYSTEM_PROMPT
+    return gateway.call('fake', lambda client: client.chat.completions.create(
+        model='gpt-4o-mini',
+        messages=[{'role': 'system', 'content': SYSTEM_PROMPT},
+                  {'role': 'user', 'content': 'Comment on the match.'}],
+        max_tokens=50
+    ))
+
+
+def main():
+    fake_server, state, base_url = start_fake_openai()
+    os.environ['OPENAI_BASE_URL'] = base_url
+    from commentary import CircuitBreaker, CircuitOpen, OpenAIGateway
+    random.seed(0)  # Repeatable injected errors and backoff
+
+    print("=" * 60)
+    print("OPENAI CLIENT RESILIENCE TEST")
+    print("=" * 60)
+    results = []
+
+    # 1. Keep-alive
+    gateway = OpenAIGateway(read_timeout=2.0, retries=0)
+    start = time.perf_counter()
+    for _ in range(20):
+        ask(gateway)
+    elapsed = time.perf_counter() - start
+    results.append(check(
+        "keep-alive",
+        state.connections == 1,
+        f"20 calls over {state.connections} connection(s), {elapsed / 20 * 1000:.1f} ms/call"
+    ))
+
+    # 2. Retries
+    state.error_rate = 0.5
+    gateway = OpenAIGateway(read_timeout=2.0, retries=4, base_delay=0.01,
+                            breaker=CircuitBreaker(failure_threshold=1000))
+    succeeded = 0
+    for _ in range(40):
+        try:
+            ask(gateway)
+            succeeded += 1
+        except Exception:
+            pass
+    results.append(check(
+        "retries",
+        succeeded >= 36 and gateway.retried > 0,
+        f"{succeeded}/40 succeeded at 50% upstream errors, {gateway.retried} retries"
+    ))
+    state.error_rate = 0.0
+
+    # 3. Read timeout
+    state.latency = 2.0
+    gateway = OpenAIGateway(read_timeout=0.3, retries=0)
+    start = time.perf_counter()
+    try:
+        ask(gateway)
+        timed_out = False
+    except Exception as e:
+        timed_out = 'timed out' in str(e).lower() or 'timeout' in type(e).__name__.lower()
+    elapsed = time.perf_counter() - start
+    results.append(check(
+        "read timeout",
+        timed_out and elapsed < 1.0,
+        f"gave up after {elapsed:.2f}s (upstream takes {state.latency}s)"
+    ))
+    state.latency = 0.0
+
+    # 4. Circuit breaker
+    state.error_rate = 1.0
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.5)
+    gateway = OpenAIGateway(read_timeout=2.0, retries=1, base_delay=0.01, breaker=breaker)
+    for _ in range(3):
+        try:
+            ask(gateway)
+        except Exception:
+            pass
+    before = state.requests
+    fast = 0
+    start = time.perf_counter()
+    for _ in range(50):
+        try:
+            ask(gateway)
+        except CircuitOpen:
+            fast += 1
+    elapsed = time.perf_counter() - start
+    results.append(check(
+        "breaker opens",
+        breaker.state == 'open' and fast == 50 and state.requests == before,
+        f"50 calls refused in {elapsed * 1000:.1f} ms, {state.requests - before} reached upstream"
+    ))
+
+    state.error_rate = 0.0
+    time.sleep(0.6)
+    half_open = breaker.state
+    ask(gateway)
+    results.append(check(
+        "breaker recovers",
+        half_open == 'half_open' and breaker.state == 'closed',
+        f"{half_open} after reset timeout, {breaker.state} after a successful trial"
+    ))
+
+    # 5. Client creation fails during the half-open trial
+    state.error_rate = 1.0
+    for _ in range(3):
+        try:
+            ask(gateway)
+        except Exception:
+            pass
+    state.error_rate = 0.0
+    time.sleep(0.6)
+    working_client = gateway.client
+
+    def broken_client(api_key):
+        raise RuntimeError('no API key configured')
+
+    gateway.client = broken_client
+    try:
+        ask(gateway)
+    except RuntimeError:
+        pass
+    stuck = breaker.trial_in_flight
+    gateway.client = working_client
+    ask(gateway)
+    results.append(check(
+        "trial without client",
+        not stuck and breaker.state == 'closed',
+        "failed client creation released the trial; next call closed the circuit"
+    ))
+
+    fake_server.shutdown()
+    print("=" * 60)
+    print("ALL PASSED" if all(results) else "SOME CHECKS FAILED")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Batch Endpoint Test
+
+Checks /api/play/batch against /api/play through Flask's test client, with
+RPS_SEED fixed so every round of a session draws from a replayable stream:
+
+1. Sequence form: a batch of choices gives the same computer moves and
+   results as the same choices sent one /api/play call at a time
+2. Rounds form: interleaved sessions match their single-call games too
+3. Rounds naming the same unknown session_id share one new session
+4. Malformed bodies and items are rejected with 400, not 500
+5. Stateless /api/play rounds are not seeded: resending the same history
+   does not reveal the AI's next move
+
+Usage:
+    python test_play_batch.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+
+from engine import PlayerModel
+
+from test_commentary_offload import check
+
+ROUNDS = 60
+
+
+def play_singles(client, session_id, choices, difficulty):
+    """Play choices one /api/play call each; returns [[computer_choice, result], ...]."""
+    results = []
+    for choice in choices:
+        data = client.post('/api/play', json={'choice': choice, 'difficulty': difficulty,
+                                              'session_id': session_id}).get_json()
+        results.append([data['computer_choice'], data['result']])
+    return results
+
+
+def start_session(client):
+    """A new session with no rounds played (session_rng is keyed by its id)."""
+    return client.post('/api/play/batch', json={'session_id': None, 'choices': []}).get_json()['session_id']
+
+
+def reset(app, session_id):
+    """Forget a session's rounds, keeping its id and so its random streams."""
+    session = app.SESSIONS.get(session_id)
+    with session.lock:
+        session.model = PlayerModel()
+
+
+def check_sequence(app, client, choices):
+    ok = True
+    for difficulty in ('easy', 'medium', 'hard', 'veryhard'):
+        session_id = start_session(client)
+        singles = play_singles(client, session_id, choices, difficulty)
+        reset(app, session_id)
+        data = client.post('/api/play/batch', json={'session_id': session_id, 'difficulty': difficulty,
+                                                    'choices': choices}).get_json()
+        ok &= data['results'] == singles and data['session_id'] == session_id and data['rounds'] == ROUNDS
+    return check('sequence form = single calls', ok, f'{ROUNDS} rounds at each difficulty, same seed')
+
+
+def check_rounds(app, client, choices):
+    sessions = {start_session(client): difficulty for difficulty in ('hard', 'veryhard')}
+    singles = {session_id: play_singles(client, session_id, choices, difficulty)
+               for session_id, difficulty in sessions.items()}
+    for session_id in sessions:
+        reset(app, session_id)
+    items = [{'session_id': session_id, 'choice': choice, 'difficulty': difficulty}
+             for choice in choices for session_id, difficulty in sessions.items()]
+    results = client.post('/api/play/batch', json={'rounds': items}).get_json()['results']
+    batched = {session_id: [result[1:] for result in results if result[0] == session_id]
+               for session_id in sessions}
+    return check('rounds form = single calls', batched == singles,
+                 f'{len(sessions)} interleaved sessions x {ROUNDS} rounds')
+
+
+def check_unknown_ids(app, client):
+    before = app.SESSIONS.created
+    items = [{'session_id': 'expired-a', 'choice': 'rock'}, {'session_id': 'expired-b', 'choice': 'rock'},
+             {'session_id': 'expired-a', 'choice': 'paper'}, {'session_id': 'expired-a', 'choice': 'rock'},
+             {'session_id': None, 'choice': 'rock'}, {'session_id': None, 'choice': 'rock'}]
+    results = client.post('/api/play/batch', json={'rounds': items}).get_json()['results']
+    ids = [result[0] for result in results]
+    created = app.SESSIONS.created - before
+    first = app.SESSIONS.get(ids[0])
+    ok = (ids[0] == ids[2] == ids[3] and len(set(ids)) == 4 and created == 4
+          and first.model.rounds == 3 and 'expired-a' not in ids)
+    return check('unknown session_id reused', ok,
+                 f'3 rounds for one unknown id -> 1 session with {first.model.rounds} rounds; '
+                 f'{created} sessions for 6 items')
+
+
+def check_malformed(client):
+    bodies = [
+        [1, 2], 'rock', 3, None,
+        {'rounds': [1]}, {'rounds': ['rock']}, {'rounds': {'choice': 'rock'}},
+        {'rounds': [{'choice': 'rock', 'session_id': ['x']}]},
+        {'choices': 'rock'}, {'choices': ['rock'], 'session_id': {'id': 1}},
+        {'choices': ['lizard']}
+    ]
+    statuses = [client.post('/api/play/batch', json=body).status_code for body in bodies]
+    statuses.append(client.post('/api/play/batch', data='not json', content_type='application/json').status_code)
+    return check('malformed bodies', set(statuses) == {400}, f'statuses {sorted(set(statuses))}')
+
+
+def check_stateless_unseeded(client):
+    body = {'choice': 'rock', 'difficulty': 'easy', 'history': 'mPI='}
+    moves = {client.post('/api/play', json=body).get_json()['computer_choice'] for _ in range(ROUNDS)}
+    return check('stateless rounds unseeded', len(moves) == 3,
+                 f'{ROUNDS} resends of one history under RPS_SEED drew {sorted(moves)}')
+
+
+def main():
+    os.environ.setdefault('RPS_SEED', '12345')
+    os.environ.setdefault('RPS_LIMIT_PLAY', '0,0,0')
+    os.environ.setdefault('RPS_LIMIT_BULK', '0,0,0')
+    os.environ.setdefault('RPS_WARMUP_ROUNDS', '0')
+    import app
+    client = app.app.test_client()
+    rng = random.Random(4)
+    # Mostly rock, so the stronger strategies have something to exploit
+    choices = [rng.choice(['rock', 'rock', 'paper', 'scissors']) for _ in range(ROUNDS)]
+
+    print("=" * 60)
+    print("BATCH ENDPOINT TEST")
+    print("=" * 60)
+
+    results = [
+        check_sequence(app, client, choices),
+        check_rounds(app, client, choices),
+        check_unknown_ids(app, client),
+        check_malformed(client),
+        check_stateless_unseeded(client)
+    ]
+
+    print("=" * 60)
+    print("ALL PASSED" if all(results) else "SOME CHECKS FAILED")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
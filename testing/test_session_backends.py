@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Session Backend Test
+
+Checks the shared session storage behind SessionStore (engine/sessions.py,
+engine/persistence.py, engine/snapshot.py):
+
+1. Snapshots round-trip: a model rebuilt from dump_model() dumps the same
+   bytes and keeps deciding like the original as play continues
+2. SQLite: the database is in WAL mode; saved rounds are written in
+   batches; a second store on the same file (another worker) sees the
+   first store's rounds and vice versa; sessions survive a worker restart
+3. Redis: the same two-store and restart checks against the in-process
+   stand-in testing/fake_redis.py, one pipeline per batch, key expiry
+4. A backend refresh never swaps the model under a round in progress
+
+Usage:
+    python test_session_backends.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import tempfile
+import threading
+import time
+
+from engine import PlayerModel, RedisBackend, SessionStore, SQLiteBackend, dump_model, load_model
+from engine.lookup import exact_distribution
+
+from fake_redis import FakeRedis
+from test_commentary_offload import check
+
+# Long flush interval: the tests flush explicitly
+FLUSH_INTERVAL = 60.0
+
+
+def play(model, rounds, rng):
+    """Record rounds of a biased player against a random computer."""
+    for _ in range(rounds):
+        move = 0 if rng.random() < 0.5 else rng.randrange(3)
+        model.record(move, rng.randrange(3))
+
+
+def decisions(model):
+    """What the strategies read, as one comparable value."""
+    import app
+    return (model.rounds, model.move_counts, model.transitions, model.markov_prediction(),
+            model.context.predict(4), [window.ordered_counts() for window in model._window_list],
+            exact_distribution(app._very_hard_move, model), app.HARD_TABLE.distribution(model))
+
+
+def check_snapshot():
+    rng = random.Random(1)
+    ok = True
+    for rounds in (0, 1, 7, 40, 500):
+        original = PlayerModel()
+        play(original, rounds, rng)
+        data = dump_model(original)
+        restored = load_model(data)
+        ok &= dump_model(restored) == data and decisions(restored) == decisions(original)
+        # Windows and the context tree must keep evolving identically
+        for _ in range(30):
+            move, computer = rng.randrange(3), rng.randrange(3)
+            original.record(move, computer)
+            restored.record(move, computer)
+        ok &= decisions(restored) == decisions(original) and dump_model(restored) == dump_model(original)
+    return check('snapshot round-trip', ok, 'dump/load of 0-500 round models, then 30 more rounds each')
+
+
+def stores(make_backend):
+    """Two stores ("workers") over one backend location."""
+    return (SessionStore(backend=make_backend(), flush_interval=FLUSH_INTERVAL),
+            SessionStore(backend=make_backend(), flush_interval=FLUSH_INTERVAL))
+
+
+def check_shared(name, make_backend):
+    """Both stores see each other's rounds; a fresh store sees them after a restart."""
+    rng = random.Random(2)
+    first, second = stores(make_backend)
+    session = first.create()
+    with session.lock:
+        play(session.model, 25, rng)
+    first.save(session)
+    first.flush()
+
+    seen = second.get(session.session_id)
+    ok = seen is not None and seen.model.rounds == 25 and second.backend_loads == 1
+    with seen.lock:
+        play(seen.model, 5, rng)
+    second.save(seen)
+    second.flush()
+    back = first.get(session.session_id)
+    ok &= back is session and back.model.rounds == 30 and dump_model(back.model) == dump_model(seen.model)
+    results = [check(f'{name}: two stores', ok,
+                     'second store loads 25 rounds, first picks up the 5 played there')]
+
+    # Worker restart: nothing in memory, everything from the backend
+    first.backend.close()
+    restarted = SessionStore(backend=make_backend(), flush_interval=FLUSH_INTERVAL)
+    revived = restarted.get(session.session_id)
+    results.append(check(f'{name}: restart', revived is not None and revived.model.rounds == 30,
+                         f"session back with {revived.model.rounds if revived else 0} rounds"))
+    return all(results)
+
+
+def check_sqlite(directory):
+    path = os.path.join(directory, 'sessions.db')
+
+    def make_backend():
+        return SQLiteBackend(path)
+
+    backend = make_backend()
+    mode = backend._connection().execute('PRAGMA journal_mode').fetchone()[0]
+    results = [check('sqlite: WAL mode', mode == 'wal', f'journal_mode={mode}')]
+
+    # Batching: saves queue up, one flush writes them in one transaction
+    store = SessionStore(backend=backend, flush_interval=FLUSH_INTERVAL, batch_size=64)
+    changes = backend._connection().total_changes
+    sessions = [store.create() for _ in range(10)]
+    for session in sessions:
+        session.model.record(0, 1)
+        store.save(session)
+    queued = store.metrics()['pending_writes']
+    written = store.flush()
+    results.append(check('sqlite: batched writes',
+                         queued == 10 and written == 10 and store.flushes == 1
+                         and backend._connection().total_changes - changes == 10,
+                         f'10 saves queued ({queued} pending), written by {store.flushes} flush'))
+
+    small = SessionStore(backend=backend, flush_interval=FLUSH_INTERVAL, batch_size=4)
+    for session in sessions[:4]:
+        small.save(session)
+    results.append(check('sqlite: batch size', small.flushes == 1 and not small.metrics()['pending_writes'],
+                         'the 4th save of a batch_size=4 store writes at once'))
+
+    results.append(check_shared('sqlite', make_backend))
+    return all(results)
+
+
+def check_redis():
+    clock = [0.0]
+    client = FakeRedis(clock=lambda: clock[0])
+
+    def make_backend():
+        return RedisBackend(client, ttl=1800)
+
+    store = SessionStore(backend=make_backend(), flush_interval=FLUSH_INTERVAL)
+    for _ in range(10):
+        session = store.create()
+        session.model.record(2, 0)
+        store.save(session)
+    store.flush()
+    results = [check('redis: batched writes', client.pipelines == 1 and len(client) == 10,
+                     f'10 sessions in {client.pipelines} pipeline')]
+
+    results.append(check_shared('redis', make_backend))
+
+    clock[0] += 1801
+    results.append(check('redis: expiry', len(client) == 0, 'keys gone after the TTL'))
+    return all(results)
+
+
+def check_refresh_waits_for_round(directory):
+    """Round in progress on one store while the other store's snapshot arrives."""
+    path = os.path.join(directory, 'refresh.db')
+    first = SessionStore(backend=SQLiteBackend(path), flush_interval=FLUSH_INTERVAL)
+    second = SessionStore(backend=SQLiteBackend(path), flush_interval=FLUSH_INTERVAL)
+    rng = random.Random(3)
+
+    session = first.create()
+    play(session.model, 10, rng)
+    first.save(session)
+    first.flush()
+    other = second.get(session.session_id)
+    play(other.model, 5, rng)  # 15 rounds, written by the other worker
+    second.save(other)
+    second.flush()
+
+    # Hold the round lock, as play_session_round does, while a get() refreshes
+    refreshed = threading.Event()
+    refresher = threading.Thread(target=lambda: (first.get(session.session_id), refreshed.set()))
+    with session.lock:
+        model = session.model
+        refresher.start()
+        blocked = not refreshed.wait(0.3)
+        swapped_mid_round = session.model is not model
+    refresher.join()
+    ok = blocked and not swapped_mid_round and session.model.rounds == 15
+
+    # A local round that catches up with the snapshot keeps the local model
+    play(other.model, 1, rng)  # 16 rounds on the other worker
+    second.save(other)
+    second.flush()
+    refresher = threading.Thread(target=first.get, args=(session.session_id,))
+    with session.lock:
+        refresher.start()
+        time.sleep(0.1)
+        play(session.model, 2, rng)  # 17 rounds played here meanwhile
+        local = session.model
+    refresher.join()
+    ok &= session.model is local and session.model.rounds == 17
+    return check('refresh waits for the round', ok,
+                 'swap blocked while session.lock is held; a model that caught up is kept')
+
+
+def main():
+    os.environ.setdefault('RPS_WARMUP_ROUNDS', '0')
+
+    print("=" * 60)
+    print("SESSION BACKEND TEST")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = [
+            check_snapshot(),
+            check_sqlite(directory),
+            check_redis(),
+            check_refresh_waits_for_round(directory)
+        ]
+
+    print("=" * 60)
+    print("ALL PASSED" if all(results) else "SOME CHECKS FAILED")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
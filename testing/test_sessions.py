@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Session Store Test
+
+Checks engine/sessions.py directly (with a fake clock) and /api/play's
+use of it through Flask's test client:
+
+1. LRU eviction: the least recently used session goes first
+2. TTL expiry: idle sessions expire, used ones are kept alive
+3. Requests without a session_id key stay stateless and store nothing;
+   "session_id": null opts in
+4. An expired session id starts a new session seeded from the history sent
+5. Concurrent rounds on one session are all recorded, one at a time
+
+Usage:
+    python test_sessions.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+
+from engine import SessionStore, pack_history
+
+from test_commentary_offload import check
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def check_lru():
+    store = SessionStore(max_sessions=3, ttl=60, clock=FakeClock())
+    first, second, third = (store.create() for _ in range(3))
+    store.get(first.session_id)  # first is now the most recently used
+    fourth = store.create()
+    kept = [store.get(s.session_id) is not None for s in (first, second, third, fourth)]
+    return check('LRU eviction', kept == [True, False, True, True] and store.lru_evictions == 1,
+                 f'kept {kept} after a 4th session in a store of 3')
+
+
+def check_ttl():
+    clock = FakeClock()
+    store = SessionStore(max_sessions=10, ttl=60, clock=clock)
+    idle, active = store.create(), store.create()
+    clock.now = 40
+    store.get(active.session_id)
+    clock.now = 80  # idle last used 80 s ago, active 40 s ago
+    kept = store.get(idle.session_id) is None, store.get(active.session_id) is not None
+    return check('TTL expiry', all(kept) and store.ttl_evictions == 1,
+                 f'idle expired: {kept[0]}, active kept: {kept[1]}')
+
+
+def check_opt_in(app, client):
+    before = app.SESSIONS.created
+    stateless = [client.post('/api/play', json={'choice': 'rock', 'difficulty': 'hard'}).get_json()
+                 for _ in range(20)]
+    stateless += [client.post('/api/play', json={
+        'choice': 'rock', 'difficulty': 'hard', 'history': pack_history([0, 1], [2, 2])
+    }).get_json() for _ in range(5)]
+    stored = app.SESSIONS.created - before
+    data = client.post('/api/play', json={'choice': 'rock', 'session_id': None}).get_json()
+    return check('stateless by default',
+                 stored == 0 and not any('session_id' in r for r in stateless)
+                 and 'session_id' in data and app.SESSIONS.created - before == 1,
+                 f'25 requests without session_id stored {stored} sessions; null opted in')
+
+
+def check_reseed(app, client):
+    data = client.post('/api/play', json={'choice': 'rock', 'session_id': None}).get_json()
+    app.SESSIONS.discard(data['session_id'])  # Same as expiring it
+    history = pack_history([0, 0, 1, 2, 0, 0, 0], [1, 2, 2, 0, 1, 1, 2])
+    again = client.post('/api/play', json={'choice': 'rock', 'session_id': data['session_id'],
+                                           'history': history}).get_json()
+    return check('expired session re-seeded',
+                 again['session_id'] != data['session_id'] and again['rounds'] == 8,
+                 f"new id, {again['rounds']} rounds (7 from the history + this one)")
+
+
+def check_concurrent_rounds(app):
+    session_id = app.app.test_client().post(
+        '/api/play', json={'choice': 'rock', 'difficulty': 'veryhard', 'session_id': None}
+    ).get_json()['session_id']
+    threads, per_thread = 8, 50
+    rounds_seen = []
+
+    def play():
+        client = app.app.test_client()
+        for _ in range(per_thread):
+            data = client.post('/api/play', json={'choice': 'paper', 'difficulty': 'veryhard',
+                                                  'session_id': session_id}).get_json()
+            rounds_seen.append(data['rounds'])
+
+    workers = [threading.Thread(target=play) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    model = app.SESSIONS.get(session_id).model
+    expected = 1 + threads * per_thread
+    return check('concurrent rounds', model.rounds == expected and sum(model.move_counts) == expected
+                 and sorted(rounds_seen) == list(range(2, expected + 1)),
+                 f'{threads} threads x {per_thread} rounds on one session -> {model.rounds} rounds, '
+                 f'each round number answered once')
+
+
+def main():
+    os.environ.setdefault('RPS_LIMIT_PLAY', '0,0,0')
+    os.environ.setdefault('RPS_WARMUP_ROUNDS', '0')
+    import app
+    client = app.app.test_client()
+
+    print("=" * 60)
+    print("SESSION STORE TEST")
+    print("=" * 60)
+
+    results = [
+        check_lru(),
+        check_ttl(),
+        check_opt_in(app, client),
+        check_reseed(app, client),
+        check_concurrent_rounds(app)
+    ]
+
+    print("=" * 60)
+    print("ALL PASSED" if all(results) else "SOME CHECKS FAILED")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Packed History Wire Format Test
+
+Checks the 2-bit history encoding (engine/moves.py pack_history /
+unpack_history), the client's encoder (packHistory in static/script.js)
+and /api/play's handling of it:
+
+1. Round-trips: empty, odd and even round counts, every move pair, the
+   client's 50-game maximum and long server-side histories
+2. Every 1- and 2-byte payload either decodes to rounds that pack back to
+   the same text or raises ValueError (no other exception)
+3. packHistory in static/script.js matches pack_history (run with node;
+   skipped if node is not installed)
+4. /api/play answers 400, never 500, for malformed base64, out-of-range
+   codes and malformed request bodies, and a packed history builds the
+   same model as the equivalent list of game dicts
+
+Usage:
+    python test_wire_format.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import base64
+import json
+import random
+import re
+import shutil
+import subprocess
+
+from engine import MOVES, RESULTS, PlayerModel, dump_model, outcome, pack_history, unpack_history
+
+from test_commentary_offload import check
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The client keeps its last 50 games (static/script.js)
+CLIENT_MAX_GAMES = 50
+
+MALFORMED = [
+    'mPI',             # Missing padding
+    'mPI==',           # Wrong padding
+    'mP I=',           # Whitespace
+    'mPI=\n',
+    '!!!!',            # Not in the alphabet
+    'é',
+    'w',
+    'AA',
+    '////',            # Four 3s: a whole round of non-moves
+    'Aw==',            # 3 in the computer slot of round 1
+    'DA==',            # 3 in the first slot, moves after it
+    'MA==',            # Non-moves followed by a move
+    'AAAAAAAAAAAA/w==' # Whole byte of 3s after full bytes
+]
+
+
+def games(count, rng):
+    player = [rng.randrange(3) for _ in range(count)]
+    computer = [rng.randrange(3) for _ in range(count)]
+    return player, computer
+
+
+def check_round_trips():
+    rng = random.Random(6)
+    ok = pack_history([], []) == '' and unpack_history('') == (bytearray(), bytearray())
+    ok &= pack_history([0, 1, 2], [2, 2, 0]) == 'mPI='  # Example in README.md
+    pairs = [(p, c) for p in range(3) for c in range(3)]
+    ok &= unpack_history(pack_history(*zip(*pairs))) == tuple(map(bytearray, zip(*pairs)))
+    lengths = list(range(0, 18)) + [CLIENT_MAX_GAMES, CLIENT_MAX_GAMES + 1, 20000, 20001]
+    for count in lengths:
+        player, computer = games(count, rng)
+        text = pack_history(player, computer)
+        ok &= (unpack_history(text) == (bytearray(player), bytearray(computer))
+               and len(base64.b64decode(text)) == (count + 1) // 2)
+    return check('round-trips', ok, f'round counts {lengths[0]}-{lengths[17]}, {lengths[18:]}')
+
+
+def raises_value_error(text):
+    try:
+        unpack_history(text)
+    except ValueError:
+        return True
+    return False
+
+
+def check_exhaustive():
+    """Every payload of 1 or 2 bytes: a valid decode or ValueError."""
+    valid = invalid = 0
+    ok = True
+    for size in (1, 2):
+        for value in range(256 ** size):
+            text = base64.b64encode(value.to_bytes(size, 'little')).decode('ascii')
+            try:
+                player, computer = unpack_history(text)
+            except ValueError:
+                invalid += 1
+                continue
+            except Exception:
+                ok = False
+                continue
+            valid += 1
+            ok &= pack_history(player, computer) == text
+    # One byte holds 1 or 2 rounds (9 + 81), two bytes 3 or 4 (9**3 + 9**4)
+    ok &= valid == 9 + 81 + 9 ** 3 + 9 ** 4
+    return check('1-2 byte payloads', ok, f'{valid} decode and re-pack exactly, {invalid} raise ValueError')
+
+
+def check_client_encoder():
+    node = shutil.which('node')
+    if node is None:
+        print("- SKIP  client encoder: node not installed")
+        return True
+    with open(os.path.join(ROOT, 'static', 'script.js')) as f:
+        script = f.read()
+    source = '\n'.join(re.search(pattern, script, re.S | re.M).group(0) for pattern in (
+        r'^const MOVE_CODES = .*?;$', r'^function packHistory\(games\) \{.*?^\}'))
+
+    rng = random.Random(7)
+    cases = [games(count, rng) for count in list(range(0, 8)) + [CLIENT_MAX_GAMES - 1, CLIENT_MAX_GAMES]]
+    histories = [[{'player': MOVES[p], 'computer': MOVES[c], 'result': RESULTS[outcome(p, c)]}
+                  for p, c in zip(player, computer)] for player, computer in cases]
+    program = source + f"\nconsole.log(JSON.stringify({json.dumps(histories)}.map(packHistory)));"
+    packed = json.loads(subprocess.run([node, '-e', program], capture_output=True, text=True,
+                                       check=True, timeout=30).stdout)
+    expected = [pack_history(player, computer) for player, computer in cases]
+    return check('client encoder', packed == expected,
+                 f'packHistory = pack_history for 0-7, {CLIENT_MAX_GAMES - 1} and {CLIENT_MAX_GAMES} games')
+
+
+def check_endpoint(app, client):
+    statuses = []
+    for history in MALFORMED + [5, True, {'player': 'rock'}, [1], [None], [{'player': 'rock'}],
+                                [{'player': 'lizard', 'computer': 'rock', 'result': 'tie'}]]:
+        for body in ({'choice': 'rock', 'history': history},
+                     {'choice': 'rock', 'history': history, 'session_id': None}):
+            response = client.post('/api/play', json=body)
+            statuses.append(response.status_code)
+    for body in ([1], 'rock', 7, {'choice': 5}, {'choice': ['rock']},
+                 {'choice': 'rock', 'session_id': ['x']}, {'choice': 'rock', 'session_id': 5}):
+        statuses.append(client.post('/api/play', json=body).status_code)
+    statuses.append(client.post('/api/play', data='{', content_type='application/json').status_code)
+    results = [check('malformed requests', set(statuses) == {400}, f'{len(statuses)} requests, statuses '
+                     f'{sorted(set(statuses))}')]
+
+    rng = random.Random(8)
+    player, computer = games(CLIENT_MAX_GAMES, rng)
+    listed = [{'player': MOVES[p], 'computer': MOVES[c], 'result': RESULTS[outcome(p, c)]}
+              for p, c in zip(player, computer)]
+    packed = pack_history(player, computer)
+    same = dump_model(app.history_model(packed)) == dump_model(app.history_model(listed))
+    long_player, long_computer = games(20001, rng)
+    response = client.post('/api/play', json={'choice': 'rock', 'difficulty': 'hard',
+                                              'history': pack_history(long_player, long_computer)})
+    results.append(check('packed = game dicts', same and response.status_code == 200
+                         and PlayerModel.from_packed(packed).rounds == CLIENT_MAX_GAMES,
+                         f'{CLIENT_MAX_GAMES}-game model identical; 20001 packed rounds accepted'))
+    return all(results)
+
+
+def main():
+    os.environ.setdefault('RPS_LIMIT_PLAY', '0,0,0')
+    os.environ.setdefault('RPS_LIMIT_HEAVY', '0,0,0')
+    os.environ.setdefault('RPS_WARMUP_ROUNDS', '0')
+    import app
+    client = app.app.test_client()
+
+    print("=" * 60)
+    print("WIRE FORMAT TEST")
+    print("=" * 60)
+
+    results = [
+        check_round_trips(),
+        check_exhaustive(),
+        check_client_encoder(),
+        check('malformed payloads', all(raises_value_error(text) for text in MALFORMED),
+              f'{len(MALFORMED)} hand-picked strings raise ValueError'),
+        check_endpoint(app, client)
+    ]
+
+    print("=" * 60)
+    print("ALL PASSED" if all(results) else "SOME CHECKS FAILED")
+    return 0 if all(results) else 1
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())